@@ -13,13 +13,14 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
 from src.api.deps import client_key, rate_limiter
-from src.api.routes import chat, connections, datasets, export, meta, sandbox, sessions, skills, workspace
+from src.api.routes import chat, connections, datasets, diagnostics, export, meta, sandbox, sessions, skills, workspace
 from src.config import settings
 from src.core.embeddings import embedding_service
 from src.core.infra.queue import get_queue
 from src.core.llm import llm_provider
 from src.core.session import session_manager
 from src.core.tools import runtime as runtime_backend
+from src.core.tools.governor import governor
 from src.core.tools.host_runtime import host_runtime_pool
 from src.core.tools.sandbox import sandbox_pool
 from src.utils.hostinfo import host_info
@@ -53,6 +54,18 @@ async def _maintenance_loop():
             logger.warning("Maintenance sweep failed", error=str(exc))
 
 
+async def _governor_loop():
+    """Rebalances resource limits to what the host has free; see `core.tools.governor`."""
+    while True:
+        try:
+            await asyncio.sleep(settings.GOVERNOR_INTERVAL_SECONDS)
+            await asyncio.to_thread(governor.step)
+        except asyncio.CancelledError:
+            return
+        except Exception as exc:
+            logger.warning("Resource governor step failed", error=str(exc))
+
+
 @contextlib.asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     logger.info(
@@ -84,13 +97,21 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     if settings.LLM_WARM_ON_STARTUP:
         llm_provider.warm()
 
-    task = asyncio.ensure_future(_maintenance_loop())
+    # And for the host runtime: the zygote imports the analysis stack once, in
+    # the background, so the first session forks from it instead of paying
+    # for a fresh interpreter.
+    host_runtime_pool.warm()
+
+    tasks = [asyncio.ensure_future(_maintenance_loop())]
+    if settings.GOVERNOR_ENABLED:
+        tasks.append(asyncio.ensure_future(_governor_loop()))
     try:
         yield
     finally:
-        task.cancel()
-        with contextlib.suppress(asyncio.CancelledError):
-            _ = await task
+        for task in tasks:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                _ = await task
         await get_queue().shutdown()
         await asyncio.to_thread(session_manager.shutdown)
         await asyncio.to_thread(sandbox_pool.shutdown)
@@ -168,6 +189,7 @@ app.include_router(sandbox.router)
 app.include_router(sandbox.jobs_router)
 app.include_router(chat.router)
 app.include_router(export.router)
+app.include_router(diagnostics.router)
 
 
 __all__ = ["app"]
@@ -0,0 +1,566 @@
+"""Several API workers behind one port, each session kept on the worker that owns it.
+
+One uvicorn process is one event loop on one core, serving every websocket and
+every request. ``uvicorn --workers`` does not help on its own: its workers share
+the listening socket, so consecutive requests of one session land on whichever
+worker accepts them, and the session -- its tables, its runtime process, a
+paused consent question -- exists in only one of them.
+
+``python -m src.api.cluster --workers N`` starts N workers on loopback ports
+and serves the public port with :class:`SessionRouter`, a thin ASGI proxy:
+
+* A request or websocket naming a session (``X-Session-Id``, or ``?session=``)
+  goes to the worker that owns it. Ownership is learned from what the workers
+  answer -- the ``X-Session-Id`` response header, a ``session`` frame on a
+  socket -- and, for a session the router has not seen, looked up in the shared
+  store (:mod:`src.core.infra.cluster`). A lookup slower than
+  ``OWNER_LOOKUP_SECONDS`` places the session by a hash of its id instead.
+* A request that starts a session goes to the next worker in turn.
+* ``/api/jobs/{id}`` goes to the worker the id names (``w<index>-``): without
+  Redis a job's state is only in the process running it.
+* ``GET /metrics`` is answered by the router itself: every worker's series,
+  each labelled ``worker``, plus ``wizard_cluster_worker_up``. The process
+  views -- ``/health``, ``/api/diagnostics/*``, and ``/metrics`` too -- take
+  ``?worker=N`` to read one worker instead.
+* Everything else goes to the first worker, the primary, so process-wide state
+  that is not per session (model downloads, say) has one home.
+* A change to credentials, connections, skills or models, made through any
+  worker, is announced to the others so they re-read it from disk.
+
+With one worker (the default) this is plain ``uvicorn src.api.api:app``.
+``SESSION_MAX_ACTIVE`` is for the deployment and is split between the workers.
+Without ``REDIS_URL`` the router's own record is the only session directory, so
+a router restart sends existing sessions to the primary until they are started
+again; set it for anything long-running.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import os
+import re
+import secrets
+import subprocess
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Awaitable, Callable, MutableMapping
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs
+
+import httpx
+
+from src.config import settings
+from src.core.infra.cluster import session_directory
+from src.core.infra.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from src.utils.logging import logger
+
+
+Scope = MutableMapping[str, Any]
+Receive = Callable[[], Awaitable[MutableMapping[str, Any]]]
+Send = Callable[[MutableMapping[str, Any]], Awaitable[None]]
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+#: Requests that start a session, and so are spread across the workers.
+SESSION_STARTS = frozenset({("POST", "/api/session"), ("POST", "/api/datasets"), ("POST", "/api/documents")})
+#: Process-wide state read once per worker; a change through one is announced to the rest.
+SHARED_PREFIXES = ("/api/providers", "/api/connections", "/api/skills", "/api/models")
+#: Never forwarded from outside: the workers' own coordination routes.
+INTERNAL_PREFIX = "/api/cluster"
+#: Views of one process rather than of a session; ``?worker=N`` picks which.
+PROCESS_PREFIXES = ("/health", "/metrics", "/api/diagnostics")
+#: A job lookup whose id names the worker running it (:func:`src.core.infra.queue.job_id`).
+JOB_PATH = re.compile(r"^/api/jobs/w(\d+)-")
+#: Sessions whose owner the router remembers; the oldest are looked up again.
+MAX_OWNERS = 100_000
+#: How long routing waits on the shared directory before placing a session by its id's hash.
+OWNER_LOOKUP_SECONDS = 0.25
+#: Headers that describe one connection, not the message, and are not forwarded.
+HOP_BY_HOP = frozenset(
+    {
+        "connection",
+        "host",
+        "keep-alive",
+        "proxy-authenticate",
+        "proxy-authorization",
+        "te",
+        "trailer",
+        "transfer-encoding",
+        "upgrade",
+    }
+)
+#: Headers a websocket handshake carries through to the worker.
+WEBSOCKET_HEADERS = frozenset({"cookie", "origin", "x-api-key", "x-session-id", "user-agent"})
+
+
+def _session_of(scope: Scope) -> str | None:
+    for name, value in scope.get("headers", ()):
+        if name == b"x-session-id" and value:
+            return value.decode("latin-1")
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    return (query.get("session") or [None])[0] or None
+
+
+def _worker_of(scope: Scope) -> int | None:
+    """The ``?worker=N`` of a process view, if it names one."""
+    if not scope["path"].startswith(PROCESS_PREFIXES):
+        return None
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    value = (query.get("worker") or [""])[0]
+    return int(value) if value.isdigit() else None
+
+
+def _forwarded(scope: Scope) -> list[tuple[str, str]]:
+    """The request's headers, less hop-by-hop ones, plus who really sent it.
+
+    The workers run with uvicorn's proxy headers on for loopback, so
+    ``X-Forwarded-For`` becomes the client address that rate limiting and the
+    per-address websocket cap count -- otherwise every user is the router.
+    ``X-Forwarded-Proto`` is the router's own view of the connection; one the
+    client sent is dropped, or any client could claim to be on TLS.
+    """
+    headers = []
+    forwarded_for = ""
+    for raw_name, raw_value in scope.get("headers", ()):
+        name = raw_name.decode("latin-1").lower()
+        value = raw_value.decode("latin-1")
+        if name == "x-forwarded-for":
+            forwarded_for = value
+        elif name not in HOP_BY_HOP and name != "x-forwarded-proto":
+            headers.append((name, value))
+    client = scope.get("client")
+    if client:
+        forwarded_for = f"{forwarded_for}, {client[0]}" if forwarded_for else client[0]
+    if forwarded_for:
+        headers.append(("x-forwarded-for", forwarded_for))
+    # uvicorn maps https to wss for a websocket scope itself.
+    headers.append(("x-forwarded-proto", "https" if scope.get("scheme") in ("https", "wss") else "http"))
+    return headers
+
+
+def _with_worker(sample: str, index: int) -> str:
+    """``name{labels} value`` with ``worker="index"`` as its first label."""
+    cuts = [position for position in (sample.find("{"), sample.find(" ")) if position >= 0]
+    if not cuts:
+        return sample
+    cut = min(cuts)
+    label = f'worker="{index}"'
+    if sample[cut] == "{":
+        rest = sample[cut + 1 :]
+        return f"{sample[:cut]}{{{label}{'' if rest.startswith('}') else ','}{rest}"
+    return f"{sample[:cut]}{{{label}}}{sample[cut:]}"
+
+
+def merge_metrics(texts: list[str | None]) -> str:
+    """One exposition from every worker's (``None`` for one that did not answer).
+
+    Each family keeps the first worker's ``HELP`` and ``TYPE`` lines and gathers
+    every worker's samples under them, labelled ``worker``; a scraper sees one
+    target whose series add up to the deployment.
+    """
+    headers: dict[str, dict[str, str]] = {}
+    samples: dict[str, list[str]] = {}
+    for index, text in enumerate(texts):
+        family = ""
+        for line in (text or "").splitlines():
+            if line.startswith("#"):
+                parts = line.split(maxsplit=3)
+                if len(parts) >= 3 and parts[1] in ("HELP", "TYPE"):
+                    family = parts[2]
+                    headers.setdefault(family, {}).setdefault(parts[1], line)
+                    samples.setdefault(family, [])
+            elif line.strip():
+                samples.setdefault(family, []).append(_with_worker(line, index))
+    lines: list[str] = []
+    for family, found in samples.items():
+        lines.extend(headers.get(family, {}).values())
+        lines.extend(found)
+    lines.append("# HELP wizard_cluster_worker_up Whether the router could read the worker's metrics.")
+    lines.append("# TYPE wizard_cluster_worker_up gauge")
+    lines.extend(
+        f'wizard_cluster_worker_up{{worker="{index}"}} {int(text is not None)}' for index, text in enumerate(texts)
+    )
+    return "\n".join(lines) + "\n"
+
+
+class SessionRouter:
+    """The ASGI app on the public port. ``workers`` are base URLs, the primary first."""
+
+    def __init__(self, workers: list[str], token: str = "", clients: list[httpx.AsyncClient] | None = None):
+        if not workers:
+            raise ValueError("A router needs at least one worker.")
+        self.workers = workers
+        self.token = token
+        self._clients = clients
+        self._owners: OrderedDict[str, int] = OrderedDict()
+        self._next = itertools.cycle(range(len(workers)))
+        self._background: set[asyncio.Task] = set()
+
+    # ------------------------------------------------------------------ #
+    # Routing
+    # ------------------------------------------------------------------ #
+    async def owner(self, session_id: str) -> int | None:
+        index = self._owners.get(session_id)
+        if index is None:
+            # Off the loop: one slow Redis round-trip would otherwise stall routing for every worker.
+            try:
+                index = await asyncio.wait_for(
+                    asyncio.to_thread(session_directory.owner, session_id), OWNER_LOOKUP_SECONDS
+                )
+            except TimeoutError:
+                logger.warning("Session directory slow, placing by hash", session=session_id)
+                return zlib.crc32(session_id.encode()) % len(self.workers)
+            if index is not None and 0 <= index < len(self.workers):
+                self.learn(session_id, index)
+            else:
+                index = None
+        return index
+
+    def learn(self, session_id: str, index: int) -> None:
+        self._owners[session_id] = index
+        self._owners.move_to_end(session_id)
+        while len(self._owners) > MAX_OWNERS:
+            self._owners.popitem(last=False)
+
+    async def pick(self, method: str, path: str, session_id: str | None, worker: int | None = None) -> int:
+        """Which worker serves this request. ``worker`` is a process view's ``?worker=N``."""
+        job = JOB_PATH.match(path)
+        if job and int(job.group(1)) < len(self.workers):
+            return int(job.group(1))
+        if session_id:
+            index = await self.owner(session_id)
+            if index is not None:
+                return index
+            # An id no worker has claimed is expired or from before a restart;
+            # whichever worker gets it starts afresh, as one process would.
+        if worker is not None and 0 <= worker < len(self.workers):
+            return worker
+        if (method, path) in SESSION_STARTS or (method == "WEBSOCKET" and not session_id):
+            return next(self._next)
+        return 0
+
+    def _learn_from_frame(self, frame: str, index: int) -> None:
+        # Only the socket's own `session` frames; everything else is passed on unread.
+        if not frame.startswith('{"type":"session"'):
+            return
+        try:
+            session_id = json.loads(frame).get("session_id")
+        except ValueError:
+            return
+        if isinstance(session_id, str) and session_id:
+            self.learn(session_id, index)
+
+    def _client(self, index: int) -> httpx.AsyncClient:
+        if self._clients is None:
+            self._clients = [
+                httpx.AsyncClient(base_url=url, timeout=httpx.Timeout(None, connect=10.0)) for url in self.workers
+            ]
+        return self._clients[index]
+
+    # ------------------------------------------------------------------ #
+    # ASGI
+    # ------------------------------------------------------------------ #
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+        elif scope["type"] == "websocket":
+            await self._websocket(scope, receive, send)
+
+    async def _lifespan(self, receive: Receive, send: Send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                for client in self._clients or ():
+                    await client.aclose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _reply(self, send: Send, status: int, detail: str) -> None:
+        body = json.dumps({"detail": detail}).encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    async def _http(self, scope: Scope, receive: Receive, send: Send) -> None:
+        method, path = scope["method"], scope["path"]
+        if path.startswith(INTERNAL_PREFIX):
+            await self._reply(send, 404, "Not Found")
+            return
+        worker = _worker_of(scope)
+        if method == "GET" and path == "/metrics" and worker is None and len(self.workers) > 1:
+            await self._metrics(scope, send)
+            return
+        index = await self.pick(method, path, _session_of(scope), worker)
+
+        async def body() -> AsyncIterator[bytes]:
+            more = True
+            while more:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    return
+                yield message.get("body", b"")
+                more = message.get("more_body", False)
+
+        client = self._client(index)
+        query = scope.get("query_string", b"").decode("latin-1")
+        request = client.build_request(
+            method,
+            scope.get("raw_path", path.encode()).decode("latin-1") + (f"?{query}" if query else ""),
+            headers=_forwarded(scope),
+            content=body() if method not in ("GET", "HEAD", "OPTIONS") else None,
+        )
+        try:
+            response = await client.send(request, stream=True)
+        except httpx.HTTPError as exc:
+            logger.warning("Worker unreachable", worker=index, path=path, error=str(exc))
+            await self._reply(send, 502, "The worker serving this session is unavailable. Try again shortly.")
+            return
+        try:
+            headers = [
+                (name.encode("latin-1"), value.encode("latin-1"))
+                for name, value in response.headers.multi_items()
+                if name.lower() not in HOP_BY_HOP
+            ]
+            session_id = response.headers.get("x-session-id")
+            if session_id:
+                self.learn(session_id, index)
+            await send({"type": "http.response.start", "status": response.status_code, "headers": headers})
+            async for chunk in response.aiter_raw():
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            await response.aclose()
+
+        if method not in ("GET", "HEAD", "OPTIONS") and response.is_success and path.startswith(SHARED_PREFIXES):
+            task = asyncio.ensure_future(self.refresh(exclude=index))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+
+    async def _metrics(self, scope: Scope, send: Send) -> None:
+        if not settings.METRICS_ENABLED:
+            await self._reply(send, 404, "Not Found")
+            return
+
+        async def scrape(index: int) -> str | None:
+            try:
+                response = await self._client(index).get("/metrics", headers=_forwarded(scope))
+            except httpx.HTTPError as exc:
+                logger.warning("Worker metrics unavailable", worker=index, error=str(exc))
+                return None
+            return response.text if response.status_code == 200 else None
+
+        texts = await asyncio.gather(*(scrape(index) for index in range(len(self.workers))))
+        body = merge_metrics(list(texts)).encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", METRICS_CONTENT_TYPE.encode()),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    async def refresh(self, exclude: int | None = None) -> None:
+        """Tells every worker but ``exclude`` to re-read process-wide state from disk."""
+        for index in range(len(self.workers)):
+            if index == exclude:
+                continue
+            try:
+                await self._client(index).post(f"{INTERNAL_PREFIX}/refresh", headers={"X-Cluster-Token": self.token})
+            except httpx.HTTPError as exc:
+                logger.warning("Worker not refreshed", worker=index, error=str(exc))
+
+    async def _websocket(self, scope: Scope, receive: Receive, send: Send) -> None:
+        from websockets.asyncio.client import connect
+
+        await receive()  # websocket.connect
+        index = await self.pick("WEBSOCKET", scope["path"], _session_of(scope))
+        query = scope.get("query_string", b"").decode("latin-1")
+        url = self.workers[index].replace("http://", "ws://", 1) + scope["path"] + (f"?{query}" if query else "")
+        headers = [(name, value) for name, value in _forwarded(scope) if name in WEBSOCKET_HEADERS]
+        headers += [(name, value) for name, value in _forwarded(scope) if name.startswith("x-forwarded-")]
+        try:
+            upstream = await connect(url, additional_headers=headers, max_size=None, open_timeout=10)
+        except Exception as exc:  # noqa: BLE001 - refused, full, or down: the client retries either way
+            logger.info("Worker refused a websocket", worker=index, error=str(exc))
+            await send({"type": "websocket.close", "code": 1013})
+            return
+        await send({"type": "websocket.accept"})
+
+        async def from_client() -> None:
+            while True:
+                message = await receive()
+                if message["type"] == "websocket.disconnect":
+                    return
+                if message.get("text") is not None:
+                    await upstream.send(message["text"])
+                elif message.get("bytes") is not None:
+                    await upstream.send(message["bytes"])
+
+        async def from_worker() -> None:
+            with contextlib.suppress(Exception):
+                async for frame in upstream:
+                    if isinstance(frame, str):
+                        self._learn_from_frame(frame, index)
+                        await send({"type": "websocket.send", "text": frame})
+                    else:
+                        await send({"type": "websocket.send", "bytes": frame})
+
+        relays = [asyncio.ensure_future(from_client()), asyncio.ensure_future(from_worker())]
+        try:
+            done, pending = await asyncio.wait(relays, return_when=asyncio.FIRST_COMPLETED)
+            for task in pending:
+                task.cancel()
+            if relays[1] in done:
+                with contextlib.suppress(Exception):
+                    await send({"type": "websocket.close", "code": upstream.close_code or 1000})
+        finally:
+            for task in relays:
+                task.cancel()
+            await upstream.close()
+
+
+class WorkerProcesses:
+    """Starts, watches and stops the API workers, one uvicorn process each on a loopback port."""
+
+    def __init__(self, count: int, base_port: int, token: str):
+        self.count = count
+        self.ports = [base_port + index for index in range(count)]
+        self.token = token
+        self._processes: list[subprocess.Popen | None] = [None] * count
+        self._stopping = threading.Event()
+
+    def _environment(self, index: int) -> dict[str, str]:
+        # The session cap was sized for the whole host, and each worker enforces
+        # its own; split it so the deployment as a whole keeps to it.
+        share = max(1, -(-settings.SESSION_MAX_ACTIVE // self.count))
+        return {
+            **os.environ,
+            "API_WORKERS": str(self.count),
+            "WORKER_INDEX": str(index),
+            "CLUSTER_TOKEN": self.token,
+            "SESSION_MAX_ACTIVE": str(share),
+        }
+
+    def _spawn(self, index: int) -> subprocess.Popen:
+        command = [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "src.api.api:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(self.ports[index]),
+            "--proxy-headers",
+            "--forwarded-allow-ips",
+            "127.0.0.1",
+        ]
+        process = subprocess.Popen(command, cwd=BACKEND_DIR, env=self._environment(index))
+        self._processes[index] = process
+        logger.info("API worker started", worker=index, port=self.ports[index], pid=process.pid)
+        return process
+
+    def _wait_healthy(self, index: int, timeout: float = 120.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            process = self._processes[index]
+            if process is None or process.poll() is not None:
+                return False
+            try:
+                if httpx.get(f"http://127.0.0.1:{self.ports[index]}/health", timeout=2.0).status_code == 200:
+                    return True
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.25)
+        return False
+
+    def start(self) -> None:
+        for index in range(self.count):
+            self._spawn(index)
+        for index in range(self.count):
+            if not self._wait_healthy(index):
+                self.stop()
+                raise RuntimeError(f"API worker {index} did not become healthy.")
+        threading.Thread(target=self._watch, name="cluster-watch", daemon=True).start()
+
+    def _watch(self) -> None:
+        """Restarts a worker that exits. Its sessions are gone, as after any restart."""
+        while not self._stopping.wait(2.0):
+            for index, process in enumerate(self._processes):
+                if process is not None and process.poll() is not None and not self._stopping.is_set():
+                    logger.warning("API worker exited; restarting", worker=index, code=process.returncode)
+                    self._spawn(index)
+
+    def stop(self) -> None:
+        self._stopping.set()
+        for process in self._processes:
+            if process is not None and process.poll() is None:
+                process.terminate()
+        for process in self._processes:
+            if process is None:
+                continue
+            try:
+                process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+def main(argv: list[str] | None = None) -> int:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the API from one or more worker processes.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=settings.API_WORKERS)
+    parser.add_argument(
+        "--worker-port",
+        type=int,
+        default=settings.API_WORKER_BASE_PORT,
+        help="First worker's port (default: --port + 1).",
+    )
+    args = parser.parse_args(argv)
+
+    if args.workers <= 1:
+        uvicorn.run("src.api.api:app", host=args.host, port=args.port)
+        return 0
+
+    if not settings.redis_enabled:
+        logger.warning(
+            "No REDIS_URL: the router's own record is the only session directory, "
+            "so sessions it has not seen since starting go to the primary"
+        )
+    token = settings.CLUSTER_TOKEN or secrets.token_urlsafe(32)
+    workers = WorkerProcesses(args.workers, args.worker_port or args.port + 1, token)
+    workers.start()
+    router = SessionRouter([f"http://127.0.0.1:{port}" for port in workers.ports], token)
+    logger.info("Routing sessions across API workers", workers=args.workers, port=args.port)
+    try:
+        uvicorn.run(router, host=args.host, port=args.port, proxy_headers=False)
+    finally:
+        workers.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -30,6 +30,17 @@ def require_api_key(x_api_key: str | None = Header(default=None, alias="X-API-Ke
         raise HTTPException(status_code=401, detail="Invalid or missing API key.")
 
 
+def require_diagnostics(x_api_key: str | None = Header(default=None, alias="X-API-Key")) -> None:
+    """Hides the diagnostics routes unless ``DIAGNOSTICS_ENABLED``, and keys them like a mutation.
+
+    A profile shows code paths, file layout and other sessions' work, so even
+    the read-only ones require the key.
+    """
+    if not settings.DIAGNOSTICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    require_api_key(x_api_key)
+
+
 def get_session(
     x_session_id: str | None = Header(default=None, alias=SESSION_HEADER),
     session_query: str | None = Query(default=None, alias="session"),
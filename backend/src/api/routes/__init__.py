@@ -1,4 +1,4 @@
-from . import chat, datasets, export, meta, sandbox, sessions, skills, workspace
+from . import chat, datasets, diagnostics, export, meta, sandbox, sessions, skills, workspace
 
 
-__all__ = ["chat", "datasets", "export", "meta", "sandbox", "sessions", "skills", "workspace"]
+__all__ = ["chat", "datasets", "diagnostics", "export", "meta", "sandbox", "sessions", "skills", "workspace"]
@@ -9,6 +9,8 @@ nothing but translate events into frames.
 from __future__ import annotations
 
 import asyncio
+import weakref
+from collections import deque
 from typing import Any
 
 from fastapi import APIRouter, Depends, Response, WebSocket, WebSocketDisconnect
@@ -19,6 +21,8 @@ from src.config import settings
 from src.core.agent.consent import consent_broker
 from src.core.agent.events import Event, EventCollector, EventType
 from src.core.agent.orchestrator import orchestrator
+from src.core.agent.replay import TurnStream, turn_streams
+from src.core.infra.metrics import WS_BATCH_FRAMES, WS_FRAMES, registry
 from src.core.session import Session, session_manager
 from src.utils.logging import logger
 
@@ -72,27 +76,136 @@ async def chat(
     )
 
 
+#: Streamed text: consecutive frames of one of these types are sent as one.
+_COALESCED = frozenset({EventType.CONTENT_DELTA, EventType.REASONING_DELTA, EventType.PLAN_DELTA, EventType.STDOUT})
+#: A merged stdout frame stops growing here; further output under pressure is dropped.
+MAX_MERGED_STDOUT = 64_000
+
+
 class WebSocketEmitter:
-    """Serialises orchestrator events onto a socket.
+    """Queues orchestrator events for a socket and sends them from its own task.
+
+    One ``send_json`` per event meant one frame per streamed token and per
+    stdout chunk, each written while the orchestrator waited: a slow client
+    stalled the run on its socket. Events now go into a per-socket queue, which
+    a sender task drains:
+
+    * consecutive deltas of one type (and one branch) are merged into a single
+      frame while they wait, for up to ``WS_COALESCE_MS`` after the first;
+    * whatever is waiting when the sender wakes goes out together, as one
+      ``{"type": "batch", "frames": [...]}`` frame when there is more than one;
+    * past ``WS_SEND_QUEUE_MAX`` queued frames, streamed text is merged into
+      the last queued frame of its kind wherever that sits, and stdout that has
+      nowhere to go is dropped. Terminal frames (``final``, ``error``,
+      ``approval_required``) and everything else are always queued.
+
+    How many events were merged and dropped during the turn is reported on its
+    ``final`` frame, as ``delivery``.
 
     Send failures are swallowed: a client that navigated away must not surface as
     an orchestrator exception mid-run.
     """
 
-    def __init__(self, websocket: WebSocket):
+    def __init__(self, websocket: WebSocket, *, max_queued: int | None = None, window: float | None = None):
         self.websocket = websocket
         self.closed = False
+        self.max_queued = max(1, max_queued or settings.WS_SEND_QUEUE_MAX)
+        self.window = settings.WS_COALESCE_MS / 1000 if window is None else window
+        self.merged = 0
+        self.dropped = 0
+        self._queue: deque[dict[str, Any]] = deque()
+        # The last queued frame of each stream, for merging into.
+        self._latest: dict[tuple[EventType, Any], dict[str, Any]] = {}
+        self._ready = asyncio.Event()
+        self._sender: asyncio.Task | None = None
+        _open_emitters.add(self)
 
     async def __call__(self, event: Event) -> None:
         if self.closed:
             return
-        try:
-            await self.websocket.send_json(event.to_dict())
-        except (WebSocketDisconnect, RuntimeError):
-            self.closed = True
-        except Exception as exc:
-            self.closed = True
-            logger.debug("Dropping event, socket unusable", error=str(exc))
+        self._put(event)
+        if self._sender is None:
+            self._sender = asyncio.ensure_future(self._send_loop())
+        self._ready.set()
+
+    def _put(self, event: Event) -> None:
+        # Deltas carry nothing but their text and, from a subagent, its branch.
+        stream = (event.type, event.data.get("branch"))
+        if event.type in _COALESCED:
+            content = str(event.data.get("content", ""))
+            last = self._latest.get(stream)
+            if last is not None and (last is self._queue[-1] or len(self._queue) >= self.max_queued):
+                if event.type is not EventType.STDOUT or len(last["content"]) < MAX_MERGED_STDOUT:
+                    # Takes the newest `seq` too, which is what a client resumes after.
+                    last.update(event.data, content=last["content"] + content)
+                    self.merged += 1
+                    WS_FRAMES.inc(outcome="merged")
+                    return
+            if event.type is EventType.STDOUT and len(self._queue) >= self.max_queued:
+                self.dropped += 1
+                WS_FRAMES.inc(outcome="dropped")
+                return
+        frame = event.to_dict()
+        if event.type is EventType.FINAL:
+            # Per socket: the event is shared with the turn's other subscribers and its replay ring.
+            frame["delivery"] = {"merged": self.merged, "dropped": self.dropped}
+            if self.dropped:
+                logger.info("Slow client, stdout dropped", merged=self.merged, dropped=self.dropped)
+            self.merged = self.dropped = 0
+        if event.type in _COALESCED:
+            frame["content"] = str(frame.get("content", ""))
+            self._latest[stream] = frame
+        self._queue.append(frame)
+
+    def replay(self, frames: list[dict[str, Any]]) -> None:
+        """Queues already-serialised frames, as they are, ahead of anything emitted later."""
+        if self.closed or not frames:
+            return
+        self._queue.extend(dict(frame) for frame in frames)
+        self._latest.clear()
+        if self._sender is None:
+            self._sender = asyncio.ensure_future(self._send_loop())
+        self._ready.set()
+
+    async def _send_loop(self) -> None:
+        while not self.closed:
+            if not self._queue:
+                self._ready.clear()
+                await self._ready.wait()
+                if self.window > 0:
+                    # Let the rest of a burst arrive and merge before sending.
+                    await asyncio.sleep(self.window)
+            frames = list(self._queue)
+            self._queue.clear()
+            self._latest.clear()
+            if not frames:
+                continue
+            try:
+                await self.websocket.send_json(frames[0] if len(frames) == 1 else {"type": "batch", "frames": frames})
+                WS_FRAMES.inc(len(frames), outcome="sent")
+                WS_BATCH_FRAMES.observe(len(frames))
+            except (WebSocketDisconnect, RuntimeError):
+                self.closed = True
+            except Exception as exc:
+                self.closed = True
+                logger.debug("Dropping events, socket unusable", error=str(exc))
+
+    def close(self) -> None:
+        self.closed = True
+        _open_emitters.discard(self)
+        self._queue.clear()
+        self._latest.clear()
+        if self._sender is not None and not self._sender.done():
+            self._sender.cancel()
+
+
+_open_emitters: weakref.WeakSet[WebSocketEmitter] = weakref.WeakSet()
+registry.gauge("wizard_ws_connections", "Open chat websockets.", collect=lambda: len(_open_emitters))
+registry.gauge(
+    "wizard_ws_send_queue_frames",
+    "Frames queued to send, across every open socket.",
+    collect=lambda: sum(len(emitter._queue) for emitter in list(_open_emitters)),
+)
 
 
 @router.websocket("/ws/chat")
@@ -103,9 +216,13 @@ async def websocket_chat(websocket: WebSocket) -> None:
     -------------
     ``{"type": "message", "content": str, "mode": "auto"|"fast"|"deep"|"planning"}``
     ``{"type": "approval", "approved": bool, "id"?: str, "tool": str, "content": str, "plan"?: str, "query"?: str}``
+    ``{"type": "resume", "turn": str, "after": int}``
     ``{"type": "cancel"}``  ``{"type": "ping"}``
 
     Server frames are the orchestrator's event types plus ``session`` and ``pong``.
+    A turn's events carry ``turn`` and ``seq``: a turn outlives the socket that
+    started it, and ``resume`` on a later socket replays the turn from after
+    ``seq`` and then follows it live (see :mod:`src.core.agent.replay`).
 
     An ``approval`` frame carrying ``id`` answers a *running* turn that paused on
     a permission gate; it is routed to the consent broker and starts nothing. One
@@ -135,7 +252,6 @@ async def websocket_chat(websocket: WebSocket) -> None:
     session = session_manager.get_or_create(session_id)
 
     emitter = WebSocketEmitter(websocket)
-    current_run: asyncio.Task | None = None
     last_code: str | None = None
 
     await websocket.send_json({"type": EventType.SESSION.value, "session_id": session.id})
@@ -178,12 +294,43 @@ async def websocket_chat(websocket: WebSocket) -> None:
                 await websocket.send_json({"type": "pong"})
                 continue
 
+            if kind == "resume":
+                stream = turn_streams.get(session.id, str(payload.get("turn") or ""))
+                if stream is None:
+                    await websocket.send_json(
+                        {
+                            "type": EventType.ERROR.value,
+                            "content": "That turn's events are no longer held. Ask again to rerun it.",
+                            "turn": payload.get("turn"),
+                        }
+                    )
+                    continue
+                try:
+                    after = max(0, int(payload.get("after") or 0))
+                except (TypeError, ValueError):
+                    after = 0
+                backlog, missed = stream.attach(emitter, after)
+                if missed:
+                    emitter.replay(
+                        [
+                            {
+                                "type": EventType.WARNING.value,
+                                "content": f"{missed} events of this turn were no longer held while reconnecting.",
+                                "turn": stream.id,
+                            }
+                        ]
+                    )
+                emitter.replay(backlog)
+                continue
+
+            running = turn_streams.running(session.id)
+
             if kind == "cancel":
                 # Any turn paused on a consent question is released first, so
                 # cancelling does not leave a future nobody will ever resolve.
                 consent_broker.abandon(session.id)
-                if current_run and not current_run.done():
-                    current_run.cancel()
+                if running and running.task and not running.task.done():
+                    running.task.cancel()
                 await asyncio.to_thread(session.executor.interrupt)
                 await websocket.send_json({"type": EventType.STATUS.value, "content": "Cancelled", "phase": "idle"})
                 continue
@@ -195,7 +342,7 @@ async def websocket_chat(websocket: WebSocket) -> None:
                     logger.debug("Consent answer had nothing waiting", session=session.id)
                 continue
 
-            if current_run and not current_run.done():
+            if running is not None:
                 await websocket.send_json(
                     {"type": EventType.ERROR.value, "content": "A run is already in progress on this session."}
                 )
@@ -240,6 +387,7 @@ async def websocket_chat(websocket: WebSocket) -> None:
                 session.append_message("user", instruction)
 
             async def run_turn(
+                stream: TurnStream,
                 run_session: Session = session,
                 instruction: str = instruction,
                 mode: str = mode,
@@ -258,7 +406,7 @@ async def websocket_chat(websocket: WebSocket) -> None:
                         session=run_session,
                         instruction=instruction,
                         mode=mode,
-                        emitter=emitter,
+                        emitter=stream,
                         approved_plan=approved_plan,
                         approved_search=approved_search,
                         previous_code=last_code,
@@ -270,7 +418,7 @@ async def websocket_chat(websocket: WebSocket) -> None:
                     if result.code:
                         last_code = result.code
                 except asyncio.CancelledError:
-                    await emitter(
+                    await stream(
                         Event(
                             type=EventType.STATUS,
                             data={"content": "Run cancelled", "phase": "idle"},
@@ -279,11 +427,17 @@ async def websocket_chat(websocket: WebSocket) -> None:
                     raise
                 except Exception as exc:
                     logger.error("Chat run failed", error=str(exc), session=run_session.id)
-                    await emitter(Event(type=EventType.ERROR, data={"content": str(exc)}))
+                    await stream(Event(type=EventType.ERROR, data={"content": str(exc)}))
                 finally:
                     consent_broker.abandon(run_session.id)
 
-            current_run = asyncio.ensure_future(run_turn())
+            stream = turn_streams.start(session.id)
+            stream.attach(emitter)
+            stream.task = asyncio.ensure_future(run_turn(stream))
+            # A callback rather than a `finally`: a task cancelled before its
+            # first step never runs its body, and would leave the session
+            # "already running" for good.
+            stream.task.add_done_callback(lambda _task, finished=stream: finished.finish())
 
     except WebSocketDisconnect:
         logger.info("WebSocket disconnected", session=session.id)
@@ -294,10 +448,13 @@ async def websocket_chat(websocket: WebSocket) -> None:
         except Exception as send_exc:
             logger.debug("Could not deliver the error frame; the socket is already gone", error=str(send_exc))
     finally:
-        # Release before cancelling: a turn parked on a consent question would
-        # otherwise sit until the timeout expired before noticing it was dead.
+        # The turn is not cancelled: it keeps running into its stream, for this
+        # client to resume once it reconnects. A consent question is the one
+        # thing it cannot carry on past, since nobody is left to answer it, so
+        # that is released as declined rather than left to time out.
         consent_broker.abandon(session.id)
-        if current_run and not current_run.done():
-            current_run.cancel()
-        emitter.closed = True
+        running = turn_streams.running(session.id)
+        if running is not None:
+            running.detach(emitter)
+        emitter.close()
         ws_gate.release(client_host)
@@ -5,12 +5,15 @@ from __future__ import annotations
 import asyncio
 import math
 import os
+import time
 from pathlib import Path
 
 from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile
 
 from src.api.deps import SESSION_HEADER, get_session, require_api_key, require_dataset
 from src.api.schemas import (
+    DataQueryRequest,
+    DataQueryResponse,
     DatasetSummary,
     DocumentSummary,
     DocumentUploadResponse,
@@ -32,9 +35,10 @@ from src.core.ingest.loader import (
     EmptyDatasetError,
     UnsupportedFormatError,
     cleanup_path,
-    json_safe_records,
     make_temp_path,
 )
+from src.core.ingest.preview import ARROW_STREAM, page_ipc, page_records, preview_page
+from src.core.ingest.query import QueryError
 from src.core.session import Session
 from src.core.tools.schema_registry import SchemaRegistry
 from src.utils.logging import logger
@@ -63,6 +67,7 @@ async def upload_dataset(
         )
 
     temp_path = make_temp_path(suffix=Path(filename).suffix)
+    load_result = None
     try:
         try:
             await asyncio.to_thread(DatasetLoader.spool_to_disk, file.file, temp_path, settings.MAX_UPLOAD_BYTES)
@@ -104,9 +109,11 @@ async def upload_dataset(
             profile=load_result.profile.to_dict(),
             source_format=load_result.source_format,
             make_active=True,
+            full_data=load_result.full_path,
+            workbook=temp_path if load_result.profile.other_sheets else None,
         )
 
-        SchemaRegistry.register_dataframe(filename, df, session_id=session.id)
+        SchemaRegistry.register_dataframe(filename, df, session_id=session.id, catalog=catalog)
         session.executor.reload_dataset()
 
         logger.info("Dataset ingested", filename=filename, rows=len(df), session=session.id)
@@ -121,7 +128,11 @@ async def upload_dataset(
             session_id=session.id,
         )
     finally:
+        # A multi-sheet workbook is moved into `sheets/` and a full copy into
+        # `full/`; whatever is still here was not adopted.
         cleanup_path(temp_path)
+        if load_result is not None:
+            cleanup_path(load_result.full_path)
 
 
 @router.get("/datasets", response_model=SessionResponse)
@@ -217,30 +228,75 @@ async def preview_data(
     sort_by: str | None = None,
     sort_order: str = Query(default="asc", pattern="^(asc|desc)$"),
     dataset: str | None = None,
+    format: str = Query(default="json", pattern="^(json|arrow)$"),
     session: Session = Depends(require_dataset),
-) -> PreviewResponse:
-    """Paginated view of a loaded table."""
+) -> PreviewResponse | Response:
+    """Paginated view of a loaded table.
+
+    ``format=arrow`` returns the page as an Arrow IPC stream instead, with the
+    paging totals in ``X-Total-Rows`` and ``X-Total-Pages``.
+    """
     handle = session.datasets.get(dataset) if dataset else session.active_handle
     if handle is None:
         raise HTTPException(status_code=404, detail="Requested dataset is not loaded in this session.")
 
     df = handle.df
-    if sort_by:
-        if sort_by not in df.columns:
-            raise HTTPException(status_code=400, detail=f"Unknown column '{sort_by}'.")
-        df = df.sort_values(by=sort_by, ascending=sort_order == "asc", kind="stable")
+    if sort_by and sort_by not in df.columns:
+        raise HTTPException(status_code=400, detail=f"Unknown column '{sort_by}'.")
 
     total_rows = len(df)
+    total_pages = max(1, math.ceil(total_rows / per_page))
     start = (page - 1) * per_page
-    subset = df.iloc[start : start + per_page]
+    # The first sort of a large column takes a while; it must not hold the loop.
+    subset = await asyncio.to_thread(
+        preview_page, df, handle.sort_orders, start, start + per_page, sort_by, sort_order == "asc"
+    )
 
+    if format == "arrow":
+        return Response(
+            content=await asyncio.to_thread(page_ipc, subset),
+            media_type=ARROW_STREAM,
+            headers={"X-Total-Rows": str(total_rows), "X-Total-Pages": str(total_pages)},
+        )
     return PreviewResponse(
         page=page,
         per_page=per_page,
         total_rows=total_rows,
-        total_pages=max(1, math.ceil(total_rows / per_page)),
+        total_pages=total_pages,
         columns=[str(column) for column in df.columns],
         # NaN and +/-Inf are not representable in JSON; the previous implementation
         # relied on df.replace and could still emit them, returning a 500.
-        data=json_safe_records(subset),
+        data=page_records(subset),
+    )
+
+
+@router.post("/data/query", response_model=DataQueryResponse)
+async def query_data(request: DataQueryRequest, session: Session = Depends(require_dataset)) -> DataQueryResponse:
+    """Filters, searches and groups a loaded table without involving the model.
+
+    Results are cached per table and spec, so paging through one is a lookup.
+    """
+    handle = session.datasets.get(request.dataset) if request.dataset else session.active_handle
+    if handle is None:
+        raise HTTPException(status_code=404, detail="Requested dataset is not loaded in this session.")
+
+    started = time.perf_counter()
+    spec = request.model_dump(by_alias=True, exclude={"dataset"})
+    df = handle.df
+    start = (request.page - 1) * request.per_page
+    try:
+        result, cached = await asyncio.to_thread(handle.query_results.run, df, spec)
+    except QueryError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    records = await asyncio.to_thread(lambda: page_records(result.page(df, start, start + request.per_page)))
+
+    return DataQueryResponse(
+        page=request.page,
+        per_page=request.per_page,
+        total_rows=len(result),
+        total_pages=max(1, math.ceil(len(result) / request.per_page)),
+        columns=result.columns,
+        data=records,
+        cached=cached,
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 2),
     )
@@ -0,0 +1,67 @@
+"""Live diagnosis: where the API process and a session's runtime spend their time.
+
+Every route here is absent (404) unless ``DIAGNOSTICS_ENABLED`` is set, and
+requires the API key when one is configured; see :func:`require_diagnostics`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+
+from src.api.deps import require_diagnostics, require_session
+from src.api.schemas import ProfileResponse, RuntimeProfileRequest, RuntimeProfileResponse
+from src.core.infra.profiling import MAX_SECONDS, ProfilerBusyError, profiler
+from src.core.session import Session
+
+
+router = APIRouter(prefix="/api/diagnostics", tags=["diagnostics"], dependencies=[Depends(require_diagnostics)])
+
+
+@router.post("/profile", response_model=ProfileResponse)
+async def profile_process(
+    seconds: float = Query(default=5.0, gt=0, le=MAX_SECONDS),
+    format: Literal["json", "collapsed", "speedscope"] = "json",
+) -> ProfileResponse | Response:
+    """Samples every thread of this process for ``seconds`` and returns what they were doing.
+
+    ``collapsed`` is plain text for flame-graph tools, ``speedscope`` a file
+    https://www.speedscope.app opens as is. One recording at a time: a second
+    request while one runs gets 409.
+    """
+    try:
+        recorded = await asyncio.to_thread(profiler.record, seconds)
+    except ProfilerBusyError as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+    if format == "collapsed":
+        return PlainTextResponse(recorded.collapsed())
+    if format == "speedscope":
+        return JSONResponse(
+            recorded.speedscope(),
+            headers={"Content-Disposition": 'attachment; filename="api-profile.speedscope.json"'},
+        )
+    return ProfileResponse(**recorded.to_dict())
+
+
+async def _runtime_profile(session: Session, enabled: bool | None) -> RuntimeProfileResponse:
+    state = await asyncio.to_thread(session.executor.profile, enabled)
+    if state is None:
+        raise HTTPException(status_code=409, detail="This session has no runtime running to profile.")
+    return RuntimeProfileResponse(session_id=session.id, **state)
+
+
+@router.get("/runtime/profile", response_model=RuntimeProfileResponse)
+async def runtime_profile(session: Session = Depends(require_session)) -> RuntimeProfileResponse:
+    """The session's last profiled cell: its heaviest functions by cumulative time."""
+    return await _runtime_profile(session, None)
+
+
+@router.put("/runtime/profile", response_model=RuntimeProfileResponse)
+async def arm_runtime_profile(
+    body: RuntimeProfileRequest, session: Session = Depends(require_session)
+) -> RuntimeProfileResponse:
+    """Turns cProfile on or off for the session's cells. Off, a cell runs with no hook at all."""
+    return await _runtime_profile(session, body.enabled)
@@ -4,8 +4,10 @@ from __future__ import annotations
 
 import asyncio
 import os
+import secrets
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import Response
 
 from src.api.deps import get_session, require_api_key
 from src.api.schemas import (
@@ -35,6 +37,8 @@ from src.core.data_mode import allowed_providers, check_provider, describe_mode,
 from src.core.embeddings import embedding_service
 from src.core.execution import isolation_for
 from src.core.infra.cache import get_cache
+from src.core.infra.cluster import clustered, refresh_process_caches
+from src.core.infra.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, registry as metrics_registry
 from src.core.infra.queue import get_queue
 from src.core.ingest.documents import supported_document_extensions
 from src.core.ingest.loader import DatasetLoader
@@ -67,6 +71,29 @@ async def health() -> HealthResponse:
     )
 
 
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """Every series in the Prometheus text format, for a scraper rather than the UI."""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return Response(content=metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+@router.post("/api/cluster/refresh", include_in_schema=False)
+async def cluster_refresh(x_cluster_token: str = Header(default="")) -> dict:
+    """Re-reads credentials, connections, skills and models after another worker changed them.
+
+    Called by the router, never by the UI: it does not forward this path, and
+    outside a cluster, or without the token the router handed this worker, the
+    route does not exist.
+    """
+    token = settings.CLUSTER_TOKEN
+    if not clustered() or not token or not secrets.compare_digest(x_cluster_token.encode(), token.encode()):
+        raise HTTPException(status_code=404, detail="Not Found")
+    await asyncio.to_thread(refresh_process_caches)
+    return {"status": "refreshed", "worker": settings.WORKER_INDEX}
+
+
 def performance_notes() -> list[str]:
     """Configuration that will make this install slow, named in plain language.
 
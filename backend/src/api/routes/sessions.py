@@ -2,10 +2,11 @@
 
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, Response
+from fastapi import APIRouter, Depends, HTTPException, Response
 
 from src.api.deps import SESSION_HEADER, get_session, require_api_key
-from src.api.schemas import ReportResponse, SessionResponse
+from src.api.schemas import ReportResponse, SessionResponse, TurnEventsResponse
+from src.core.agent.replay import turn_streams
 from src.core.reporting import reporting_engine
 from src.core.session import Session, session_manager
 
@@ -42,6 +43,16 @@ async def reset_namespace(response: Response, session: Session = Depends(get_ses
     return SessionResponse(**session.describe())
 
 
+@router.get("/session/turns/{turn_id}/events", response_model=TurnEventsResponse)
+async def turn_events(turn_id: str, after: int = 0, session: Session = Depends(get_session)) -> TurnEventsResponse:
+    """A turn's events numbered past ``after``: the running turn, or a finished one still held."""
+    stream = turn_streams.get(session.id, turn_id)
+    if stream is None:
+        raise HTTPException(status_code=404, detail=f"No events held for turn {turn_id!r}.")
+    events, missed = stream.frames(max(0, after))
+    return TurnEventsResponse(turn=stream.id, done=stream.done, seq=stream.seq, missed=missed, events=events)
+
+
 @router.get("/report", response_model=ReportResponse)
 async def generate_report(hours: int = 24, session: Session = Depends(get_session)) -> ReportResponse:
     """Executive summary of this session's analyses."""
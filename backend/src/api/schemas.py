@@ -4,7 +4,7 @@ from __future__ import annotations
 
 from typing import Annotated, Any, Literal
 
-from pydantic import AfterValidator, BaseModel, Field
+from pydantic import AfterValidator, BaseModel, ConfigDict, Field
 from pydantic_core import PydanticCustomError
 
 from src.providers import PROVIDERS, exists as provider_exists
@@ -136,6 +136,43 @@ class SessionResponse(BaseModel):
     execution_backend: str = "inprocess"
 
 
+class TurnEventsResponse(BaseModel):
+    """A turn's recorded events, for a client picking up a stream it lost."""
+
+    turn: str
+    done: bool
+    #: The newest event's number; pass it back as ``after`` to continue.
+    seq: int
+    #: Events past ``after`` that the ring no longer holds.
+    missed: int = 0
+    events: list[dict[str, Any]] = Field(default_factory=list)
+
+
+class ProfileResponse(BaseModel):
+    """A sampling profile of the API process, and the hot paths it crossed meanwhile."""
+
+    seconds: float
+    interval_ms: float
+    samples: int
+    threads: int
+    #: Per call site: ``{"calls", "total_ms", "max_ms"}``.
+    hot_paths: dict[str, dict[str, float]] = Field(default_factory=dict)
+    #: ``thread;outer;...;inner count`` lines, the input flame-graph tools take.
+    collapsed: str = ""
+
+
+class RuntimeProfileRequest(BaseModel):
+    enabled: bool
+
+
+class RuntimeProfileResponse(BaseModel):
+    """Whether the session's runtime profiles its cells, and the last profiled cell's top functions."""
+
+    session_id: str
+    enabled: bool
+    last: dict[str, Any] | None = None
+
+
 class ModelInfoResponse(BaseModel):
     name: str
     size_bytes: int = 0
@@ -352,6 +389,50 @@ class PreviewResponse(BaseModel):
     data: list[dict[str, Any]]
 
 
+class QueryFilter(BaseModel):
+    column: str
+    #: One of `src.core.ingest.query.FILTER_OPS`.
+    op: str = "eq"
+    value: Any = None
+
+
+class QueryAggregate(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    #: ``*`` counts rows.
+    column: str = "*"
+    #: One of `src.core.ingest.query.AGGREGATES`.
+    fn: str = "count"
+    label: str | None = Field(default=None, alias="as")
+
+
+class DataQueryRequest(BaseModel):
+    """A declarative query over one loaded table; see :mod:`src.core.ingest.query`."""
+
+    dataset: str | None = None
+    filters: list[QueryFilter] = Field(default_factory=list, max_length=32)
+    search: str | None = Field(default=None, max_length=200)
+    columns: list[str] | None = None
+    group_by: list[str] = Field(default_factory=list, max_length=8)
+    aggregates: list[QueryAggregate] = Field(default_factory=list, max_length=16)
+    sort_by: str | None = None
+    sort_order: Literal["asc", "desc"] = "asc"
+    page: int = Field(default=1, ge=1)
+    per_page: int = Field(default=50, ge=1, le=500)
+
+
+class DataQueryResponse(BaseModel):
+    page: int
+    per_page: int
+    total_rows: int
+    total_pages: int
+    columns: list[str]
+    data: list[dict[str, Any]]
+    #: Whether the result came from the table's result cache.
+    cached: bool = False
+    elapsed_ms: float = 0.0
+
+
 # ---------------------------------------------------------------- connections --
 # A connection is an ingest source parallel to file upload. The secret half never
 # appears in any of these models: a request may carry one inbound, and no response
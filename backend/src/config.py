@@ -322,6 +322,37 @@ class Settings(BaseSettings):
     HOST_RUNTIME_MEM_LIMIT: str = Field(
         default="", validation_alias=AliasChoices("HOST_RUNTIME_MEM_LIMIT", "LOCAL_RUNTIME_MEM_LIMIT")
     )
+    #: Fork host runtimes from a warm zygote that has already imported the
+    #: analysis stack, instead of starting a fresh interpreter per session.
+    #: Linux only; elsewhere, and whenever the zygote cannot serve, runtimes
+    #: are spawned cold.
+    HOST_RUNTIME_ZYGOTE: bool = True
+    #: Runtimes the zygote keeps forked and parked, ready to bind to a session.
+    HOST_RUNTIME_SPARES: int = 1
+    #: Move each host runtime's memory ceiling with what its cells actually
+    #: use, and size subagent fan-out to the memory the host has free. The
+    #: configured HOST_RUNTIME_MEM_LIMIT stays the floor; see
+    #: `src.core.tools.resources`.
+    ADAPTIVE_LIMITS: bool = True
+    #: Highest ceiling adaptation may raise a runtime to. Unset: half the host's RAM.
+    ADAPTIVE_MEM_MAX: str = ""
+    #: Rebalance the boot-time split while running: every
+    #: GOVERNOR_INTERVAL_SECONDS, sample free memory, load and each runtime's
+    #: RSS, lower runtime admission and subagent fan-out to what fits, and
+    #: under memory pressure stop idle runtimes and unload idle models. See
+    #: `src.core.tools.governor`.
+    GOVERNOR_ENABLED: bool = True
+    GOVERNOR_INTERVAL_SECONDS: float = 15.0
+    #: Free memory, as a fraction of the host's, below which idle runtimes are
+    #: stopped and fan-out runs one branch at a time...
+    GOVERNOR_MEMORY_LOW: float = 0.15
+    #: ...and below which idle models are unloaded too.
+    GOVERNOR_MEMORY_CRITICAL: float = 0.05
+    #: A runtime untouched this long (and with no turn running) may be stopped.
+    GOVERNOR_IDLE_SECONDS: int = 600
+    #: Trace Python allocations in every cell (tracemalloc) and report the peak.
+    #: Precise, but slows allocation-heavy code noticeably; off by default.
+    EXEC_TRACE_MEMORY: bool = False
     #: Whether a host runtime may pip-install a missing package on demand.
     #: Off by default: unlike a container, it would be installing into the
     #: environment the backend itself runs in.
@@ -545,6 +576,14 @@ class Settings(BaseSettings):
     # session is ordinary -- and four means a week of work before the offer
     # appears. Nothing is written until the user confirms.
     SKILL_PROMOTION_THRESHOLD: int = 3
+    # Candidates held in memory per kind for matching a new turn against, most
+    # recently seen first. Matching costs the same however long the history is;
+    # an older candidate is still found by an exact repeat of its question.
+    SKILL_CANDIDATE_INDEX_SIZE: int = 2048
+    # Days a dismissed or promoted candidate stays in that set after it last
+    # recurred, so a reworded repeat still counts toward it rather than starting
+    # a new offer.
+    SKILL_CANDIDATE_SETTLED_DAYS: float = 90.0
 
     # ------------------------------------------------------------------ #
     # Installing a skill from GitHub (Milestone 6)
@@ -571,7 +610,17 @@ class Settings(BaseSettings):
     MAX_UPLOAD_BYTES: int = 512 * 1024 * 1024  # 512MB on disk
     MAX_INMEMORY_ROWS: int = 2_000_000
     PROFILE_SAMPLE_ROWS: int = 200_000  # rows used for profiling/catalog on big data
+    #: Threads `CatalogEngine` spreads a wide frame's cardinality counts over.
+    #: 0 derives it from the host's cores.
+    PROFILE_WORKERS: int = 0
+    #: Past MAX_INMEMORY_ROWS, also convert the whole file to Parquet and expose it
+    #: to the runtime as DuckDB views, so a sampled `df` does not make every total
+    #: an estimate. Off keeps large uploads sample-only.
+    INGEST_OUT_OF_CORE: bool = True
     PROMPT_MAX_COLUMNS: int = 60  # wide-frame guard for prompt context
+    #: Columns per table given a value sketch at registration, for join
+    #: discovery: the primary key and id-named columns first.
+    SKETCH_MAX_COLUMNS: int = 32
 
     # Connections (Milestone 4). An upload is bounded by MAX_UPLOAD_BYTES before
     # anything reads it; a table is not, and `Session._materialize` writes each
@@ -612,12 +661,39 @@ class Settings(BaseSettings):
     QUEUE_MAX_WORKERS: int = 2
     JOB_RESULT_TTL_SECONDS: int = 3600
 
+    # API workers. Above 1, `python -m src.api.cluster` runs this many processes
+    # behind a router that keeps each session on the worker that owns it; set
+    # REDIS_URL too, so ownership survives a router restart. WORKER_INDEX and
+    # CLUSTER_TOKEN are set by the router on each worker it starts.
+    API_WORKERS: int = 1
+    API_WORKER_BASE_PORT: int = 0  # 0 = the public port + 1
+    WORKER_INDEX: int = 0
+    CLUSTER_TOKEN: str = ""
+
     # HTTP / transport security
     CORS_ALLOW_ORIGINS: str = "http://localhost:3000,http://127.0.0.1:3000"
     API_KEY: str = ""  # when set, every mutating route requires X-API-Key
     RATE_LIMIT_MAX_REQUESTS: int = 60
     RATE_LIMIT_WINDOW_SECONDS: int = 60
     WS_MAX_CONCURRENT_PER_IP: int = 4
+    # Outbound frames queued per socket before streamed text is merged and
+    # stdout dropped, and how long a burst of deltas is held to coalesce.
+    WS_SEND_QUEUE_MAX: int = 256
+    WS_COALESCE_MS: int = 20
+    # Events kept per turn for a reconnecting client to resume from, the most
+    # bytes of serialized frames those may add up to (the oldest go first), and
+    # how long a finished turn's events stay readable.
+    TURN_REPLAY_EVENTS: int = 4096
+    TURN_REPLAY_BYTES: int = 4 * 1024 * 1024
+    TURN_REPLAY_TTL_SECONDS: int = 600
+    # The /api/diagnostics routes (a sampling profile of this process, cProfile
+    # of a session's cells) exist only when enabled, and then behind API_KEY.
+    DIAGNOSTICS_ENABLED: bool = False
+    PROFILE_INTERVAL_MS: float = 5.0
+    # GET /metrics: latency histograms and counters for model calls, embeddings,
+    # the semantic cache, SQLite writes, cell execution and websocket frames, in
+    # the Prometheus text format. Unauthenticated, like /health.
+    METRICS_ENABLED: bool = True
 
     # Paths
     DATA_DIR: Path = Field(default_factory=lambda: Path(__file__).parent.parent / "data")
@@ -711,6 +787,9 @@ class Settings(BaseSettings):
         if "QUEUE_MAX_WORKERS" not in explicit:
             self.QUEUE_MAX_WORKERS = max(1, min(4, host.cores // 2))
 
+        if "PROFILE_WORKERS" not in explicit or self.PROFILE_WORKERS <= 0:
+            self.PROFILE_WORKERS = max(1, min(4, host.cores // 2))
+
         ram = host.ram_bytes
 
         if "LLM_NUM_CTX" not in explicit or self.LLM_NUM_CTX <= 0:
@@ -948,6 +1027,15 @@ class Settings(BaseSettings):
         """Memory ceiling for a host runtime, 0 when uncapped."""
         return parse_memory(self.HOST_RUNTIME_MEM_LIMIT) or 0
 
+    @property
+    def adaptive_mem_max_bytes(self) -> int:
+        """Highest ceiling adaptation may set; 0 when RAM is unknown and nothing was configured."""
+        explicit = parse_memory(self.ADAPTIVE_MEM_MAX)
+        if explicit:
+            return explicit
+        ram = host_info().ram_bytes
+        return ram // 2 if ram else 0
+
 
 settings = Settings()
 
@@ -29,6 +29,8 @@ import re
 from dataclasses import dataclass, field
 from enum import StrEnum
 
+from src.core.agent.grounding import ObservedNumbers
+
 
 class ActionKind(StrEnum):
     """What the agent can do with one iteration."""
@@ -267,9 +269,13 @@ class Investigation:
     steps: list[Step] = field(default_factory=list)
     findings: list[str] = field(default_factory=list)
     assumptions: list[str] = field(default_factory=list)
+    #: The numbers in :attr:`executed_output`, indexed as steps arrive.
+    observed: ObservedNumbers = field(default_factory=ObservedNumbers, repr=False, compare=False)
 
     def record(self, step: Step) -> None:
         self.steps.append(step)
+        if step.ok:
+            self.observed.add(step.observation)
 
     def note_finding(self, text: str) -> None:
         cleaned = text.strip()
@@ -40,12 +40,16 @@ CONNECTOR_IMPORTS = [
 ]
 
 
-def dataset_loader_lines(session: Session, *, file_template: str, reader: str) -> tuple[list[str], bool]:
+def dataset_loader_lines(
+    session: Session, *, file_template: str, reader: str, full_template: str | None = None
+) -> tuple[list[str], bool]:
     """Lines that rebuild ``tables`` (and ``df``) the way generated code expects.
 
     ``file_template`` takes one ``{key}`` placeholder -- e.g. ``"tables/{key}.feather"``
     for the in-workspace artifact, ``"data/{key}.csv"`` for a downloaded bundle.
     ``reader`` is the matching pandas call, e.g. ``"pd.read_feather"``.
+    ``full_template`` locates the out-of-core Parquet copies, when the target can
+    reach them; a bundle cannot, since the full population is never shipped.
 
     Returns the lines plus whether a connector-sourced table was involved, so
     the caller only adds the connector imports when something needs them.
@@ -72,6 +76,19 @@ def dataset_loader_lines(session: Session, *, file_template: str, reader: str) -
             lines.append(f'tables[{key!r}] = {reader}("{path}")')
         lines.append("")
 
+    full_keys = [handle.table_key for handle in session.datasets.values() if handle.profile.get("out_of_core")]
+    if full_template and full_keys:
+        lines.append("import duckdb")
+        lines.append("")
+        lines.append("db = duckdb.connect()")
+        lines.append("full_tables = {}")
+        for key in full_keys:
+            path = full_template.format(key=key)
+            statement = f"CREATE VIEW \"{key}\" AS SELECT * FROM read_parquet('{path}')"
+            lines.append(f"db.execute({statement!r})")
+            lines.append(f"full_tables[{key!r}] = db.view({key!r})")
+        lines.append("")
+
     active = session.active_handle
     if active is None and session.datasets:
         active = next(iter(session.datasets.values()))
@@ -113,6 +130,7 @@ def build_script(instruction: str, steps: list[dict[str, str]], session: Session
         session,
         file_template="data/{key}.csv" if bundle else "tables/{key}.feather",
         reader="pd.read_csv" if bundle else "pd.read_feather",
+        full_template=None if bundle else "full/{key}.parquet",
     )
 
     header = [
@@ -159,6 +177,7 @@ def build_notebook(
         session,
         file_template="data/{key}.csv" if bundle else "tables/{key}.feather",
         reader="pd.read_csv" if bundle else "pd.read_feather",
+        full_template=None if bundle else "full/{key}.parquet",
     )
 
     intro = [
@@ -21,7 +21,9 @@ results along with them.
 
 from __future__ import annotations
 
+import math
 import re
+from bisect import bisect_left, bisect_right
 from dataclasses import dataclass, field
 
 
@@ -136,6 +138,68 @@ def _scale_at(text: str, position: int) -> float:
     return SCALES.get(match.group(1).lower(), 1.0)
 
 
+class ObservedNumbers:
+    """Every number execution printed, sorted so a stated figure is a range lookup.
+
+    The check used to hold the output's numbers in a list and try every one of
+    them against every figure in the answer; an investigation that printed a
+    10,000-row table paid for that as an answer-by-output Python loop at the end
+    of the turn. Whatever can report as a stated figure lies within a window
+    around it -- half a unit of its last written place, or the relative margin
+    -- so the values are kept sorted and each figure looks at its window only,
+    by binary search, and runs :func:`_matches` on what falls inside.
+
+    Text is added as it is produced (:meth:`Investigation.record
+    <src.core.agent.actions.Investigation.record>` feeds each successful step
+    in), and the sort happens lazily, once, the next time a figure is looked up.
+    """
+
+    def __init__(self, text: str = ""):
+        self._sorted: list[float] = []
+        self._pending: list[float] = []
+        self._special: set[float] = set()
+        if text:
+            self.add(text)
+
+    def __len__(self) -> int:
+        return len(self._sorted) + len(self._pending) + len(self._special)
+
+    def add(self, text: str) -> None:
+        for token in extract_numbers(text):
+            value = _as_float(token)
+            if value is None:
+                continue
+            if math.isfinite(value):
+                self._pending.append(value)
+            else:
+                self._special.add(value)
+
+    def _values(self) -> list[float]:
+        if self._pending:
+            # The already-sorted prefix is one run to timsort; only the new values cost a sort.
+            self._sorted = sorted(self._sorted + self._pending)
+            self._pending = []
+        return self._sorted
+
+    def grounds(self, stated: str, scale: float = 1.0) -> bool:
+        """Whether any observed value could have been reported as ``stated``."""
+        value = _as_float(stated)
+        if value is None:
+            return False
+        value *= scale
+        if not math.isfinite(value):
+            return value in self._special
+        # The widest any of `_matches`' three rules reaches, plus a hair for
+        # floating-point error; everything inside is checked exactly.
+        half_step = 0.5 * scale / (10 ** _decimals(stated))
+        relative = RELATIVE_TOLERANCE * abs(value) / (1 - RELATIVE_TOLERANCE)
+        window = max(half_step, relative) + 1e-9 * max(1.0, abs(value))
+        values = self._values()
+        start = bisect_left(values, value - window)
+        end = bisect_right(values, value + window, lo=start)
+        return any(_matches(stated, observed, scale) for observed in values[start:end])
+
+
 @dataclass
 class GroundingReport:
     """Which of the answer's numbers were traceable to real output."""
@@ -173,18 +237,23 @@ class GroundingReport:
         }
 
 
-def check_grounding(answer: str, executed_output: str, instruction: str = "") -> GroundingReport:
+def check_grounding(
+    answer: str,
+    executed_output: str | ObservedNumbers,
+    instruction: str = "",
+) -> GroundingReport:
     """Verifies each number in ``answer`` traces to output or to the question.
 
     A number counts as grounded when it appears in the executed output exactly,
     when some output value rounds to it, or when the user put it in the question
-    themselves ("show me the top 20" legitimises a 20 in the reply).
+    themselves ("show me the top 20" legitimises a 20 in the reply). The output
+    may be passed already indexed, as an investigation keeps it.
     """
     report = GroundingReport()
     if not answer.strip():
         return report
 
-    observed = [v for v in (_as_float(t) for t in extract_numbers(executed_output)) if v is not None]
+    observed = executed_output if isinstance(executed_output, ObservedNumbers) else ObservedNumbers(executed_output)
     asked = {n for n in (_normalise(t) for t in extract_numbers(instruction)) if n}
 
     seen: set[str] = set()
@@ -197,7 +266,7 @@ def check_grounding(answer: str, executed_output: str, instruction: str = "") ->
         report.checked += 1
 
         scale = _scale_at(answer, match.start())
-        if normalised in asked or any(_matches(token, value, scale) for value in observed):
+        if normalised in asked or observed.grounds(token, scale):
             report.grounded += 1
             continue
         report.ungrounded.append(token)
@@ -251,10 +320,16 @@ def assumptions_from_profile(profile: dict) -> list[str]:
     if profile.get("truncated"):
         original = profile.get("original_rows")
         total = f" of {original:,}" if isinstance(original, int) else ""
-        notes.append(
-            f"The table was down-sampled to {profile.get('rows', 0):,} rows{total} at load time, "
-            "so counts and totals are not the full population."
-        )
+        if profile.get("out_of_core"):
+            notes.append(
+                f"`df` was a {profile.get('rows', 0):,}-row sample{total}; only figures computed through the "
+                "full table in SQL cover the whole population."
+            )
+        else:
+            notes.append(
+                f"The table was down-sampled to {profile.get('rows', 0):,} rows{total} at load time, "
+                "so counts and totals are not the full population."
+            )
     dropped = profile.get("dropped_columns") or []
     if dropped:
         notes.append(
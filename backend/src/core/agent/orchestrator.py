@@ -88,6 +88,7 @@ from src.core.skills import promotion
 from src.core.skills.registry import skill_registry
 from src.core.tools import packages, runtime as runtime_backend
 from src.core.tools.evaluator import Evaluator
+from src.core.tools.resources import adaptive_limits
 from src.utils.logging import logger
 
 
@@ -1322,8 +1323,17 @@ class AnalysisOrchestrator:
         for branch, subgoal, _ in branches:
             await emit(emitter, EventType.SUBAGENT_START, branch=branch, goal=subgoal, group=group)
 
+        # At most as many branches run at once as the host has memory (and,
+        # for CPU-bound work, cores) for at this session's observed usage; the
+        # rest wait their turn inside the same deadline.
+        concurrency = adaptive_limits.branch_concurrency(session.id, len(branches))
+        if concurrency < len(branches):
+            logger.info("Subagent fan-out narrowed", session=session.id, branches=len(branches), at_once=concurrency)
+        slots = asyncio.Semaphore(concurrency)
+
         async def run_one(branch: str, child_id: str, subgoal: str) -> SubagentResult:
-            return await self._run_subagent(state, session, emitter, branch, child_id, subgoal, child_budget)
+            async with slots:
+                return await self._run_subagent(state, session, emitter, branch, child_id, subgoal, child_budget)
 
         results: list[SubagentResult | BaseException | None]
         if inprocess:
@@ -1763,7 +1773,14 @@ class AnalysisOrchestrator:
         for warning in result.warnings:
             await emit(emitter, EventType.WARNING, content=warning)
 
-        await emit(emitter, EventType.STEP_END, id=step_id, ok=result.ok, duration_ms=state.elapsed_ms)
+        await emit(
+            emitter,
+            EventType.STEP_END,
+            id=step_id,
+            ok=result.ok,
+            duration_ms=state.elapsed_ms,
+            resources=result.resources,
+        )
         return result
 
     # ------------------------------------------------------------------ #
@@ -1819,8 +1836,16 @@ class AnalysisOrchestrator:
             await emit(emitter, EventType.STEP_END, id="verify", ok=False, duration_ms=state.elapsed_ms)
             return
 
+        # Isolated: a recomputation only reads what the analysis left behind,
+        # so it runs in a forked copy of the namespace and cannot disturb it.
         result = await asyncio.to_thread(
-            session.executor.execute, code, session.df, None, session.tables, session.permissions.extra_roots
+            session.executor.execute,
+            code,
+            session.df,
+            None,
+            session.tables,
+            session.permissions.extra_roots,
+            True,
         )
         output = (result.output or "").strip()
 
@@ -1979,9 +2004,10 @@ class AnalysisOrchestrator:
         if not settings.AGENT_GROUNDING_CHECK or state.blocked:
             return
 
+        investigation = state.investigation
         state.grounding = check_grounding(
             state.answer,
-            state.investigation.executed_output or state.output,
+            investigation.observed if investigation.executed_output else state.output,
             state.instruction,
         )
         warning = state.grounding.warning()
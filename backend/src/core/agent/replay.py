@@ -0,0 +1,203 @@
+"""Each turn's events, kept so a client that dropped can pick the stream back up.
+
+The socket used to be the only place a turn's events went. When it closed
+mid-turn -- a laptop's Wi-Fi blinking is enough -- the handler cancelled the
+run, and a client that reconnected a second later had nothing to reconnect
+*to*: the only way back to the answer was to ask again and pay for the whole
+investigation a second time.
+
+A turn now emits into a :class:`TurnStream`, which numbers every event (``turn``
+and ``seq`` are added to each frame), keeps the most recent
+``TURN_REPLAY_EVENTS`` of them -- fewer when their serialized size passes
+``TURN_REPLAY_BYTES``, since a few thousand table frames would otherwise sit in
+memory for the whole TTL -- and forwards each one to whichever sockets are
+attached. The run no longer belongs to a socket: it carries on when its socket
+closes, and a new socket on the same session sends ``{"type": "resume", "turn",
+"after"}`` to be handed everything past ``after`` and then the rest live. A
+finished turn's stream stays readable for ``TURN_REPLAY_TTL_SECONDS``, over the
+socket or from ``GET /api/session/turns/{turn}/events``.
+
+Keyed by session id at module level, as ``consent_broker`` is, so the session
+object carries no transport state.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Any
+
+from src.config import settings
+from src.core.agent.events import Emitter, Event
+from src.utils.logging import logger
+
+
+#: Streams remembered at all, finished or not. The oldest finished go first.
+MAX_STREAMS = 256
+#: Seconds :meth:`TurnStreams.forget` waits, off the event loop, for a cancelled turn to unwind.
+CANCEL_TIMEOUT_SECONDS = 5.0
+
+
+def _cancel(task: asyncio.Future, timeout: float) -> None:
+    """Cancels ``task`` from whichever thread this is, waiting for it when that is not its loop's."""
+    loop = task.get_loop()
+    try:
+        current = asyncio.get_running_loop()
+    except RuntimeError:
+        current = None
+    if current is loop:
+        # The turn cannot run again before this caller yields, and when it does
+        # it resumes into the cancellation.
+        task.cancel()
+        return
+    if not loop.is_running():
+        return
+
+    async def unwind() -> None:
+        task.cancel()
+        await asyncio.wait([task], timeout=timeout)
+
+    try:
+        asyncio.run_coroutine_threadsafe(unwind(), loop).result(timeout + 1)
+    except Exception as exc:
+        logger.warning("A cancelled turn did not unwind in time", error=str(exc))
+
+
+class TurnStream:
+    """One turn's events, sequence-numbered, in a ring of the most recent ones."""
+
+    def __init__(self, session_id: str, capacity: int | None = None, budget: int | None = None):
+        self.session_id = session_id
+        self.id = uuid.uuid4().hex[:16]
+        self.seq = 0
+        self.done = False
+        self.finished_at: float | None = None
+        #: The run producing the events, so any socket on the session can cancel it.
+        self.task: asyncio.Future | None = None
+        self._frames: deque[dict[str, Any]] = deque(maxlen=max(1, capacity or settings.TURN_REPLAY_EVENTS))
+        #: Serialized size of each held frame, oldest first, and their total.
+        self._sizes: deque[int] = deque()
+        self._bytes = 0
+        self._budget = budget or settings.TURN_REPLAY_BYTES
+        self._subscribers: list[Emitter] = []
+
+    async def __call__(self, event: Event) -> None:
+        self.seq += 1
+        event.data["turn"] = self.id
+        event.data["seq"] = self.seq
+        self._hold(event.to_dict())
+        for subscriber in list(self._subscribers):
+            result = subscriber(event)
+            if asyncio.iscoroutine(result):
+                _ = await result
+
+    def _hold(self, frame: dict[str, Any]) -> None:
+        """Appends ``frame``, dropping the oldest past the count or the byte budget.
+
+        The newest frame is always kept, however large: a client resuming
+        right behind it still gets it, and ``frames`` reports the rest missed.
+        """
+        if len(self._frames) == self._frames.maxlen:
+            self._bytes -= self._sizes.popleft()
+        size = len(json.dumps(frame, default=str))
+        self._frames.append(frame)
+        self._sizes.append(size)
+        self._bytes += size
+        while self._bytes > self._budget and len(self._frames) > 1:
+            self._frames.popleft()
+            self._bytes -= self._sizes.popleft()
+
+    def frames(self, after: int = 0) -> tuple[list[dict[str, Any]], int]:
+        """Frames numbered past ``after``, and how many of those the ring no longer holds."""
+        first = self._frames[0]["seq"] if self._frames else self.seq + 1
+        return [frame for frame in self._frames if frame["seq"] > after], max(0, first - after - 1)
+
+    def attach(self, subscriber: Emitter, after: int = 0) -> tuple[list[dict[str, Any]], int]:
+        """:meth:`frames`, and ``subscriber`` receives every event from here on.
+
+        Reading the backlog and subscribing happen with no ``await`` between
+        them, so nothing emitted in between can be missed or sent twice.
+        """
+        backlog = self.frames(after)
+        if not self.done and subscriber not in self._subscribers:
+            self._subscribers.append(subscriber)
+        return backlog
+
+    def detach(self, subscriber: Emitter) -> None:
+        if subscriber in self._subscribers:
+            self._subscribers.remove(subscriber)
+
+    def finish(self) -> None:
+        self.done = True
+        self.finished_at = time.monotonic()
+        self._subscribers.clear()
+
+    def expired(self, now: float) -> bool:
+        return self.finished_at is not None and now - self.finished_at > settings.TURN_REPLAY_TTL_SECONDS
+
+
+class TurnStreams:
+    """Every session's recent turn streams, by turn id."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._streams: OrderedDict[str, TurnStream] = OrderedDict()
+
+    def start(self, session_id: str) -> TurnStream:
+        stream = TurnStream(session_id)
+        with self._lock:
+            self._prune()
+            self._streams[stream.id] = stream
+        return stream
+
+    def get(self, session_id: str, turn_id: str) -> TurnStream | None:
+        """The turn's stream, if it belongs to ``session_id`` and is still held."""
+        with self._lock:
+            self._prune()
+            stream = self._streams.get(turn_id)
+        return stream if stream is not None and stream.session_id == session_id else None
+
+    def running(self, session_id: str) -> TurnStream | None:
+        """The session's unfinished turn, if it has one."""
+        with self._lock:
+            for stream in reversed(self._streams.values()):
+                if stream.session_id == session_id and not stream.done:
+                    return stream
+        return None
+
+    def running_sessions(self) -> set[str]:
+        """Every session with an unfinished turn."""
+        with self._lock:
+            return {stream.session_id for stream in self._streams.values() if not stream.done}
+
+    def forget(self, session_id: str, timeout: float = CANCEL_TIMEOUT_SECONDS) -> None:
+        """Drops the session's streams, cancelling a turn still running in one.
+
+        A turn outlives its socket, so without the cancel a session disposed
+        mid-turn would keep running tools against a released runtime.
+        """
+        with self._lock:
+            streams = [stream for stream in self._streams.values() if stream.session_id == session_id]
+            for stream in streams:
+                del self._streams[stream.id]
+        for stream in streams:
+            if stream.task is not None and not stream.task.done():
+                _cancel(stream.task, timeout)
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        for turn_id in [key for key, stream in self._streams.items() if stream.expired(now)]:
+            del self._streams[turn_id]
+        if len(self._streams) >= MAX_STREAMS:
+            finished = [key for key, stream in self._streams.items() if stream.done]
+            for turn_id in finished[: len(self._streams) - MAX_STREAMS + 1]:
+                del self._streams[turn_id]
+
+
+turn_streams = TurnStreams()
+
+__all__ = ["CANCEL_TIMEOUT_SECONDS", "MAX_STREAMS", "TurnStream", "TurnStreams", "turn_streams"]
@@ -94,7 +94,7 @@ def import_target(
     )
     handle.origin = spec.name
 
-    SchemaRegistry.register_dataframe(name, frame, session_id=session.id)
+    SchemaRegistry.register_dataframe(name, frame, session_id=session.id, catalog=catalog)
     session.executor.reload_dataset()
 
     logger.info(
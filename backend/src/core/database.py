@@ -9,6 +9,8 @@ from typing import Any
 import numpy as np
 
 from src.config import settings
+from src.core.infra.metrics import SQLITE_WRITE_SECONDS, SQLITE_WRITE_WAIT
+from src.core.infra.profiling import hot_paths
 from src.utils.logging import logger
 
 
@@ -83,7 +85,8 @@ SCHEMA_STATEMENTS = (
         code TEXT,
         promoted_to TEXT,
         dismissed INTEGER DEFAULT 0,
-        embedding BLOB
+        embedding BLOB,
+        instruction_hash TEXT
     )
     """,
     # Which analyses used which skill -- the half of the milestone's skills
@@ -122,6 +125,8 @@ INDEX_STATEMENTS = (
     "CREATE INDEX IF NOT EXISTS idx_schema_registry_session ON schema_registry(session_id)",
     "CREATE INDEX IF NOT EXISTS idx_chat_messages_session ON chat_messages(session_id, timestamp)",
     "CREATE INDEX IF NOT EXISTS idx_skill_candidates_kind ON skill_candidates(kind, dismissed)",
+    "CREATE INDEX IF NOT EXISTS idx_skill_candidates_hash ON skill_candidates(kind, instruction_hash)",
+    "CREATE INDEX IF NOT EXISTS idx_skill_candidates_seen ON skill_candidates(kind, last_seen)",
     "CREATE INDEX IF NOT EXISTS idx_skill_usage_skill ON skill_usage(skill, timestamp)",
 )
 
@@ -132,6 +137,7 @@ MIGRATIONS = (
     ("working_memory", "session_id", "TEXT"),
     ("working_memory", "embedding", "BLOB"),
     ("schema_registry", "session_id", "TEXT"),
+    ("skill_candidates", "instruction_hash", "TEXT"),
 )
 
 
@@ -153,6 +159,10 @@ class DatabaseManager:
         Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
         self._local = threading.local()
         self._write_lock = threading.Lock()
+        # Schema writes seen by this process, per session (`None` counts them
+        # all); `_schema_wipes` moves every session's version at once.
+        self._schema_writes: dict[str | None, int] = {}
+        self._schema_wipes = 0
         self._init_db()
 
     # ------------------------------------------------------------------ #
@@ -176,19 +186,26 @@ class DatabaseManager:
 
     @contextmanager
     def _read(self) -> Iterator[sqlite3.Connection]:
-        yield self._connection()
+        with hot_paths.timed("sqlite.read"):
+            yield self._connection()
 
     @contextmanager
     def _write(self) -> Iterator[sqlite3.Connection]:
         """Serialised write transaction. SQLite allows a single writer at a time."""
         conn = self._connection()
-        with self._write_lock:
+        queued = time.perf_counter()
+        # Timed from before the lock, so a profile shows writers queueing.
+        with hot_paths.timed("sqlite.write"), self._write_lock:
+            held = time.perf_counter()
+            SQLITE_WRITE_WAIT.observe(held - queued)
             try:
                 yield conn
                 conn.commit()
             except Exception:
                 conn.rollback()
                 raise
+            finally:
+                SQLITE_WRITE_SECONDS.observe(time.perf_counter() - held)
 
     def close(self):
         """Closes the calling thread's connection (used by tests and shutdown)."""
@@ -348,13 +365,44 @@ class DatabaseManager:
     # ------------------------------------------------------------------ #
     # Skill candidates (recurring analyses, offered for promotion)
     # ------------------------------------------------------------------ #
-    def get_skill_candidates(self, kind: str | None = None, include_settled: bool = False) -> list[dict[str, Any]]:
+    _CANDIDATE_COLUMNS = (
+        "id, kind, instruction, columns, occurrences, first_seen, last_seen,"
+        " plan, code, promoted_to, dismissed, embedding"
+    )
+
+    def _candidate(self, row: sqlite3.Row) -> dict[str, Any]:
+        return {
+            "id": row["id"],
+            "kind": row["kind"],
+            "instruction": row["instruction"],
+            "columns": json.loads(row["columns"] or "[]"),
+            "occurrences": row["occurrences"],
+            "first_seen": row["first_seen"],
+            "last_seen": row["last_seen"],
+            "plan": row["plan"] or "",
+            "code": row["code"] or "",
+            "promoted_to": row["promoted_to"],
+            "dismissed": bool(row["dismissed"]),
+            "embedding": self._deserialize_vector(row["embedding"]),
+        }
+
+    def get_skill_candidates(
+        self,
+        kind: str | None = None,
+        include_settled: bool = False,
+        *,
+        settled_since: float | None = None,
+        seen_after: float | None = None,
+        limit: int | None = None,
+    ) -> list[dict[str, Any]]:
         """Candidates, newest activity first.
 
         ``include_settled`` brings back the ones already promoted or dismissed,
         which only the clustering path wants: a dismissed candidate must still be
         *matched* against, or the next occurrence inserts a fresh row and the
-        offer the user just declined comes straight back.
+        offer the user just declined comes straight back. ``settled_since``
+        narrows that to the settled ones seen since then; ``seen_after`` and
+        ``limit`` bound the read for callers that keep their own copy.
         """
         try:
             with self._read() as conn:
@@ -365,35 +413,74 @@ class DatabaseManager:
                     params.append(kind)
                 if not include_settled:
                     clauses.append("dismissed = 0 AND promoted_to IS NULL")
+                elif settled_since is not None:
+                    clauses.append("((dismissed = 0 AND promoted_to IS NULL) OR last_seen >= ?)")
+                    params.append(settled_since)
+                if seen_after is not None:
+                    clauses.append("last_seen > ?")
+                    params.append(seen_after)
                 where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+                bound = ""
+                if limit is not None:
+                    bound = " LIMIT ?"
+                    params.append(limit)
                 rows = conn.execute(
-                    "SELECT id, kind, instruction, columns, occurrences, first_seen, last_seen,"
-                    f" plan, code, promoted_to, dismissed, embedding FROM skill_candidates{where}"
-                    " ORDER BY last_seen DESC",
+                    f"SELECT {self._CANDIDATE_COLUMNS} FROM skill_candidates{where} ORDER BY last_seen DESC{bound}",
                     tuple(params),
                 ).fetchall()
-
-                return [
-                    {
-                        "id": row["id"],
-                        "kind": row["kind"],
-                        "instruction": row["instruction"],
-                        "columns": json.loads(row["columns"] or "[]"),
-                        "occurrences": row["occurrences"],
-                        "first_seen": row["first_seen"],
-                        "last_seen": row["last_seen"],
-                        "plan": row["plan"] or "",
-                        "code": row["code"] or "",
-                        "promoted_to": row["promoted_to"],
-                        "dismissed": bool(row["dismissed"]),
-                        "embedding": self._deserialize_vector(row["embedding"]),
-                    }
-                    for row in rows
-                ]
+                return [self._candidate(row) for row in rows]
         except Exception as e:
             logger.error("Failed to fetch skill candidates", error=str(e))
             return []
 
+    def get_skill_candidate(self, candidate_id: int) -> dict[str, Any] | None:
+        """One candidate by id, settled or not."""
+        try:
+            with self._read() as conn:
+                row = conn.execute(
+                    f"SELECT {self._CANDIDATE_COLUMNS} FROM skill_candidates WHERE id = ?", (candidate_id,)
+                ).fetchone()
+                return self._candidate(row) if row else None
+        except Exception as e:
+            logger.error("Failed to fetch a skill candidate", error=str(e))
+            return None
+
+    def find_skill_candidate(self, kind: str, instruction_hash: str) -> dict[str, Any] | None:
+        """The most recently seen candidate of ``kind`` recorded under ``instruction_hash``."""
+        try:
+            with self._read() as conn:
+                row = conn.execute(
+                    f"SELECT {self._CANDIDATE_COLUMNS} FROM skill_candidates"
+                    " WHERE kind = ? AND instruction_hash = ? ORDER BY last_seen DESC LIMIT 1",
+                    (kind, instruction_hash),
+                ).fetchone()
+                return self._candidate(row) if row else None
+        except Exception as e:
+            logger.error("Failed to look up a skill candidate", error=str(e))
+            return None
+
+    def unhashed_skill_candidates(self) -> list[tuple[int, str]]:
+        """``(id, instruction)`` for candidates recorded before ``instruction_hash`` existed."""
+        try:
+            with self._read() as conn:
+                rows = conn.execute(
+                    "SELECT id, instruction FROM skill_candidates WHERE instruction_hash IS NULL"
+                ).fetchall()
+                return [(int(row[0]), row[1] or "") for row in rows]
+        except Exception as e:
+            logger.error("Failed to list unhashed skill candidates", error=str(e))
+            return []
+
+    def set_skill_candidate_hashes(self, hashes: list[tuple[str, int]]) -> None:
+        """Stores ``(instruction_hash, id)`` pairs in one transaction."""
+        if not hashes:
+            return
+        try:
+            with self._write() as conn:
+                conn.executemany("UPDATE skill_candidates SET instruction_hash = ? WHERE id = ?", hashes)
+        except Exception as e:
+            logger.error("Failed to store skill candidate hashes", error=str(e))
+
     def add_skill_candidate(
         self,
         kind: str,
@@ -402,6 +489,7 @@ class DatabaseManager:
         plan: str,
         code: str,
         embedding: np.ndarray | None,
+        instruction_hash: str | None = None,
     ) -> int:
         """Records a first occurrence. Returns the new row id, or 0 on failure."""
         now = time.time()
@@ -409,8 +497,8 @@ class DatabaseManager:
             with self._write() as conn:
                 cursor = conn.execute(
                     "INSERT INTO skill_candidates"
-                    " (kind, instruction, columns, occurrences, first_seen, last_seen, plan, code, embedding)"
-                    " VALUES (?, ?, ?, 1, ?, ?, ?, ?, ?)",
+                    " (kind, instruction, columns, occurrences, first_seen, last_seen, plan, code, embedding,"
+                    " instruction_hash) VALUES (?, ?, ?, 1, ?, ?, ?, ?, ?, ?)",
                     (
                         kind,
                         instruction.strip(),
@@ -420,6 +508,7 @@ class DatabaseManager:
                         plan,
                         code,
                         self._serialize_vector(embedding) if embedding is not None else None,
+                        instruction_hash,
                     ),
                 )
                 return int(cursor.lastrowid or 0)
@@ -781,12 +870,31 @@ class DatabaseManager:
                 conn.execute("DELETE FROM chat_messages WHERE session_id = ?", (session_id,))
                 conn.execute("DELETE FROM working_memory WHERE session_id = ?", (session_id,))
                 conn.execute("DELETE FROM schema_registry WHERE session_id = ?", (session_id,))
+                self._schema_written(session_id)
         except Exception as e:
             logger.error("Failed to delete session data", error=str(e))
 
     # ------------------------------------------------------------------ #
     # Schema Registry
     # ------------------------------------------------------------------ #
+    def _schema_written(self, session_id: str | None) -> int:
+        """Counts a schema write; called under the write lock. Returns the session's new version."""
+        if session_id:
+            self._schema_writes[session_id] = self._schema_writes.get(session_id, 0) + 1
+        else:
+            self._schema_wipes += 1
+        self._schema_writes[None] = self._schema_writes.get(None, 0) + 1
+        return self._schema_wipes + self._schema_writes.get(session_id, 0)
+
+    def schema_version(self, session_id: str | None = None) -> int:
+        """Moves on every schema write this process makes that ``get_schemas(session_id)`` would see.
+
+        What an in-memory copy of the registry (:mod:`src.core.tools.schema_graph`)
+        checks itself against, so it is rebuilt after a write it did not apply
+        rather than answering from a table that has since gone.
+        """
+        return self._schema_wipes + self._schema_writes.get(session_id, 0)
+
     def save_schema(
         self,
         filename: str,
@@ -795,7 +903,8 @@ class DatabaseManager:
         primary_key: str,
         meta: dict[str, Any] | None = None,
         session_id: str | None = None,
-    ):
+    ) -> int:
+        """Registers a table. Returns the session's new :meth:`schema_version`, or 0 on failure."""
         try:
             with self._write() as conn:
                 conn.execute(
@@ -803,9 +912,12 @@ class DatabaseManager:
                     " (filename, session_id, columns, row_count, primary_key, meta) VALUES (?, ?, ?, ?, ?, ?)",
                     (filename, session_id, json.dumps(columns), row_count, primary_key, json.dumps(meta or {})),
                 )
+                version = self._schema_written(session_id)
             logger.info("Saved schema to database registry", filename=filename)
+            return version
         except Exception as e:
             logger.error("Failed to save schema registry entry", error=str(e))
+            return 0
 
     def get_schemas(self, session_id: str | None = None) -> list[dict[str, Any]]:
         try:
@@ -842,7 +954,8 @@ class DatabaseManager:
             logger.error("Failed to fetch schemas from registry", error=str(e))
             return []
 
-    def delete_schema(self, filename: str, session_id: str | None = None):
+    def delete_schema(self, filename: str, session_id: str | None = None) -> int:
+        """Unregisters a table. Returns the session's new :meth:`schema_version`, or 0 on failure."""
         try:
             with self._write() as conn:
                 if session_id:
@@ -851,9 +964,12 @@ class DatabaseManager:
                     )
                 else:
                     conn.execute("DELETE FROM schema_registry WHERE filename = ?", (filename,))
+                version = self._schema_written(session_id)
             logger.info("Deleted schema from registry", filename=filename)
+            return version
         except Exception as e:
             logger.error("Failed to delete schema registry entry", error=str(e))
+            return 0
 
 
 # Singleton instance
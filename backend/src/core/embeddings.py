@@ -37,6 +37,8 @@ import numpy as np
 
 from src.config import settings
 from src.core.data_mode import allows_provider
+from src.core.infra.metrics import EMBEDDING_SECONDS, EMBEDDING_TEXTS
+from src.core.infra.profiling import hot_paths
 from src.utils.logging import logger
 
 
@@ -447,7 +449,15 @@ class EmbeddingService:
         """Encodes a batch. Never raises, and always returns one vector per input."""
         if not texts:
             return []
-
+        started = time.perf_counter()
+        with hot_paths.timed("embedding.encode"):
+            vectors = self._encode_many(texts)
+        backend = self.backend
+        EMBEDDING_SECONDS.observe(time.perf_counter() - started, backend=backend)
+        EMBEDDING_TEXTS.inc(len(texts), backend=backend)
+        return vectors
+
+    def _encode_many(self, texts: list[str]) -> list[np.ndarray]:
         # While warm-up is still resolving an encoder, answer from the hashing
         # one rather than queueing behind a model load. A question must never
         # wait on retrieval infrastructure: worst case it retrieves less well,
@@ -17,6 +17,7 @@ import base64
 import builtins
 import io
 import sys
+import time
 from collections.abc import Callable
 from dataclasses import dataclass, field
 from typing import Any
@@ -24,8 +25,10 @@ from typing import Any
 import pandas as pd
 
 from src.config import settings
+from src.core.infra.metrics import EXEC_SECONDS
 from src.core.security.code_guard import CodeGuard, GuardVerdict
 from src.core.tools import runtime as runtime_backend
+from src.core.tools.resources import adaptive_limits
 from src.utils.logging import logger
 
 
@@ -60,6 +63,11 @@ class ExecutionResult:
     #: ``process`` (a separate process, no OS policy applied) or ``none``.
     isolation: str = "container"
     warnings: list[str] = field(default_factory=list)
+    #: What the cell used, as the runtime measured it: ``wall_seconds``,
+    #: ``cpu_seconds``, ``output_bytes`` and, from a daemon, ``peak_rss_bytes``,
+    #: ``mem_limit_bytes`` and the rest of its ``resources`` frame. Empty for a
+    #: cell that never ran.
+    resources: dict[str, Any] = field(default_factory=dict)
 
     @property
     def is_error(self) -> bool:
@@ -76,6 +84,7 @@ class ExecutionResult:
             "isolation": self.isolation,
             "has_image": self.image is not None,
             "warnings": self.warnings,
+            "resources": self.resources,
         }
 
 
@@ -125,12 +134,17 @@ class CodeExecutor:
         on_stdout: Callable[[str], None] | None = None,
         tables: dict[str, pd.DataFrame] | None = None,
         allowed_roots: tuple[str, ...] = (),
+        isolated: bool = False,
     ) -> ExecutionResult:
         """Runs ``code`` on whichever runtime serves this session.
 
         ``tables`` matters only on the in-process path: both daemons read every
         session table off the workspace at startup, so passing them again would
         pay a full serialisation per call for something already there.
+
+        ``isolated`` marks a cell that only reads the namespace; a daemon runs
+        it in a forked copy alongside any cell already running (see
+        :meth:`DaemonClient.run_code`). The in-process path is isolated anyway.
         """
         verdict, prepared = self.guard(code, allowed_roots)
         backend = runtime_backend.active_backend()
@@ -161,10 +175,13 @@ class CodeExecutor:
                 isolation=isolation_for(backend),
             )
 
+        started = time.perf_counter()
         runtime = runtime_backend.get_runtime(self.session_id)
         if runtime is not None:
-            output, image = runtime.run_code(prepared, on_stdout)
+            output, image, resources = runtime.run_code_measured(prepared, on_stdout, isolated=isolated)
             failed = output.startswith("Error executing code:")
+            EXEC_SECONDS.observe(time.perf_counter() - started, backend=backend, status="error" if failed else "ok")
+            self._adapt_limits(runtime, backend, resources)
             return ExecutionResult(
                 output=output,
                 code=prepared,
@@ -174,13 +191,41 @@ class CodeExecutor:
                 sandboxed=isolation_for(backend) in ("container", "os-sandbox"),
                 backend=backend,
                 isolation=isolation_for(backend),
+                resources=resources,
                 # No warning for `host`: it is a supported way to run, and the
                 # isolation actually in force is reported once on /settings
                 # rather than restated on every message. Only the in-process
                 # path below warns, because only it has no isolation at all.
             )
 
-        return self._execute_locally(prepared, df, on_stdout, tables)
+        result = self._execute_locally(prepared, df, on_stdout, tables)
+        EXEC_SECONDS.observe(time.perf_counter() - started, backend="inprocess", status="ok" if result.ok else "error")
+        return result
+
+    def _adapt_limits(self, runtime, backend: str, resources: dict[str, Any]) -> None:
+        """Records what the cell used and moves a host runtime's ceiling to match.
+
+        Only the host backend has a ceiling the daemon can move (its own
+        ``RLIMIT_AS``); a container's is its cgroup, fixed at ``docker run``. A
+        runtime that reports no ceiling in force -- uncapped, or Windows, where
+        the cap is a Job Object -- is left alone.
+        """
+        adaptive_limits.record(self.session_id, resources)
+        current = int(resources.get("mem_limit_bytes") or 0)
+        if backend != "host" or current <= 0:
+            return
+        ceiling = adaptive_limits.memory_ceiling(self.session_id, settings.host_runtime_mem_bytes)
+        if ceiling == current:
+            return
+        applied = runtime.set_memory_limit(ceiling)
+        logger.info(
+            "Runtime memory ceiling adapted",
+            session=self.session_id,
+            previous=current,
+            requested=ceiling,
+            applied=applied,
+            peak_rss=resources.get("peak_rss_bytes"),
+        )
 
     # ------------------------------------------------------------------ #
     def _execute_locally(
@@ -207,6 +252,7 @@ class CodeExecutor:
         except ImportError:
             sns = None
 
+        from src.core.ingest.workbook import LazyTables
         from src.core.tools.stats import StatisticalToolkit
 
         safe_builtins = {name: value for name, value in vars(builtins).items() if name not in BLOCKED_BUILTINS}
@@ -217,15 +263,38 @@ class CodeExecutor:
             "sns": sns,
             "stats": StatisticalToolkit,
             # Always present, even when empty, so generated code can reference
-            # `tables` unconditionally rather than guarding every use.
-            "tables": {name: frame.copy() for name, frame in (tables or {}).items()},
+            # `tables` unconditionally rather than guarding every use. Workbook
+            # sheets not parsed at upload load on first access, as in a daemon.
+            "tables": LazyTables(
+                {name: frame.copy() for name, frame in (tables or {}).items()},
+                runtime_backend.workspace_for(self.session_id),
+            ),
             "__builtins__": safe_builtins,
         }
         if df is not None:
             namespace["df"] = df.copy()
+        # The same out-of-core views a daemon binds, read straight off the
+        # workspace: nothing about them lives in the frames passed in.
+        from src.core.ingest.outofcore import open_connection
+
+        connection, relations = open_connection(
+            runtime_backend.workspace_for(self.session_id), settings.host_runtime_mem_bytes
+        )
+        namespace["db"] = connection
+        namespace["full_tables"] = relations
 
         buffer = io.StringIO()
         original_stdout = sys.stdout
+        started_wall, started_cpu = time.monotonic(), time.thread_time()
+
+        def measured(output: str, image: str | None = None) -> dict[str, Any]:
+            # No peak or ceiling: this process's RSS is the API's, not the cell's.
+            return {
+                "wall_seconds": round(time.monotonic() - started_wall, 4),
+                "cpu_seconds": round(time.thread_time() - started_cpu, 4),
+                "output_bytes": len(output) + len(image or ""),
+            }
+
         warning = (
             "No isolated runtime was available, so this ran in a restricted interpreter "
             "inside the API process. Set EXECUTION_BACKEND=host in backend/.env to run it in a "
@@ -258,6 +327,7 @@ class CodeExecutor:
                 backend="inprocess",
                 isolation="none",
                 warnings=[warning],
+                resources=measured(output, image),
             )
         except Exception as exc:
             import traceback
@@ -274,10 +344,13 @@ class CodeExecutor:
                 backend="inprocess",
                 isolation="none",
                 warnings=[warning],
+                resources=measured(detail),
             )
         finally:
             sys.stdout = original_stdout
             plt.close("all")
+            if connection is not None:
+                connection.close()
 
     # ------------------------------------------------------------------ #
     # Runtime control. All of these address an *existing* runtime only --
@@ -311,6 +384,11 @@ class CodeExecutor:
         """Modules generated code may import in this session's runtime."""
         return runtime_backend.capabilities(self.session_id)
 
+    def profile(self, enabled: bool | None = None) -> dict | None:
+        """See :meth:`DaemonClient.profile`. ``None`` when the session has no runtime."""
+        runtime = self._existing()
+        return runtime.profile(enabled) if runtime else None
+
 
 def plot_output_path(session_id: str) -> str:
     """Path the worker is told to write interactive charts to.
@@ -0,0 +1,84 @@
+"""What an API worker shares with the others when there is more than one.
+
+Sessions, their runtimes, the consent broker, the usage ledger and the
+capability cache are process-global, and stay that way: a session's runtime is
+a child process (or a container) that only the worker which started it can
+talk to, and its tables are in that worker's memory. Several workers therefore
+do not share sessions -- each session belongs to one worker, and the router in
+:mod:`src.api.cluster` sends every request naming it there.
+
+What does cross workers lives in the shared store (:func:`get_cache`, which is
+Redis when ``REDIS_URL`` is set):
+
+* **Session ownership.** Each worker records the sessions it creates, so a
+  router that restarts, or a second one beside it, can still route a session
+  to its worker. Without Redis the store is per-process and the router's own
+  record is the only one -- still correct, for a single router.
+* **Job state**, already mirrored there by :class:`~src.core.infra.queue.JobQueue`.
+
+Process-wide caches of on-disk state (stored credentials, connections, skills)
+are read once per process. A change made through one worker is announced to
+the others by the router, which calls :func:`refresh_process_caches` on each.
+"""
+
+from __future__ import annotations
+
+from src.config import settings
+from src.core.infra.cache import get_cache
+from src.utils.logging import logger
+
+
+def clustered() -> bool:
+    """Whether this process is one of several API workers."""
+    return settings.API_WORKERS > 1
+
+
+class SessionDirectory:
+    """Which worker owns which session, in the shared store. A no-op for a single worker."""
+
+    prefix = "session-owner:"
+
+    def claim(self, session_id: str) -> None:
+        if not clustered():
+            return
+        try:
+            get_cache().set(self.prefix + session_id, settings.WORKER_INDEX, ttl=settings.SESSION_TTL_SECONDS)
+        except Exception as exc:  # the router's own record still routes it
+            logger.debug("Session ownership not recorded", session=session_id, error=str(exc))
+
+    def owner(self, session_id: str) -> int | None:
+        try:
+            value = get_cache().get(self.prefix + session_id)
+        except Exception:
+            return None
+        return value if isinstance(value, int) and not isinstance(value, bool) else None
+
+    def forget(self, session_id: str) -> None:
+        if not clustered():
+            return
+        try:
+            get_cache().delete(self.prefix + session_id)
+        except Exception as exc:
+            logger.debug("Session ownership not cleared", session=session_id, error=str(exc))
+
+
+session_directory = SessionDirectory()
+
+
+def refresh_process_caches() -> None:
+    """Drops this process's copies of shared on-disk state, so the next read goes to disk."""
+    from src.core.connectors.store import connection_store
+    from src.core.credentials import credential_store
+    from src.core.llm import llm_provider
+    from src.core.llm.registry import model_registry
+    from src.core.skills.registry import skill_registry
+
+    credential_store.reload()
+    connection_store.reload()
+    skill_registry.reload()
+    model_registry.invalidate()
+    llm_provider.clear_cache()
+    logger.info("Process caches refreshed", worker=settings.WORKER_INDEX)
+
+
+__all__ = ["SessionDirectory", "clustered", "refresh_process_caches", "session_directory"]
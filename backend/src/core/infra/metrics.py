@@ -0,0 +1,303 @@
+"""Counters, gauges and histograms for the backend's hot paths, in the Prometheus text format.
+
+What the process could say about itself was a handful of point-in-time numbers
+behind separate routes -- ``SessionManager.stats``, ``UsageLedger.totals``,
+``active_runtime_count`` -- and nothing at all about latency: not how long a
+model call takes, how often the semantic cache answers, or how long a writer
+waits for SQLite. A dashboard or an autoscaler needs those as series.
+
+The registry here is deliberately small rather than a client library: three
+metric kinds, labels, fixed histogram buckets, and one text renderer for
+``GET /metrics``. Recording is a dict lookup and an add under a per-metric
+lock; a histogram observation adds a ``bisect`` over its bucket bounds. Values
+that already live elsewhere -- active sessions, runtimes, queued frames -- are
+registered as *callback* gauges and read only when scraped, so the paths that
+change them pay nothing.
+
+Names follow the Prometheus conventions: ``wizard_`` prefix, base units
+(seconds, bytes), ``_total`` on counters.
+"""
+
+from __future__ import annotations
+
+import bisect
+import math
+import threading
+from collections.abc import Callable, Iterable
+
+
+#: Latency buckets, in seconds, from a cached SQLite read to a slow model call.
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+LabelValues = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _labels(names: tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=True)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, object]) -> LabelValues:
+        if len(labels) != len(self.label_names) or not all(name in labels for name in self.label_names):
+            raise ValueError(f"{self.name} takes labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {_escape(self.help)}", f"# TYPE {self.name} {self.kind}"]
+
+    def samples(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """A value that only goes up."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        if amount < 0:
+            raise ValueError("A counter cannot decrease.")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: object) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.label_names, key)} {_format(value)}" for key, value in values]
+
+
+class Gauge(_Metric):
+    """A value that goes both ways; or, given ``collect``, one read when scraped.
+
+    ``collect`` returns either a number or a mapping of label-value tuples to
+    numbers, and must not raise: a scrape that fails tells a dashboard nothing.
+    """
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Iterable[str] = (),
+        collect: Callable[[], float | dict[LabelValues, float]] | None = None,
+    ):
+        super().__init__(name, help, labels)
+        self._values: dict[LabelValues, float] = {}
+        self._collect = collect
+
+    def set(self, value: float, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: object) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: object) -> float:
+        return self._current().get(self._key(labels), 0.0)
+
+    def _current(self) -> dict[LabelValues, float]:
+        if self._collect is None:
+            with self._lock:
+                return dict(self._values)
+        collected = self._collect()
+        return collected if isinstance(collected, dict) else {(): float(collected)}
+
+    def samples(self) -> list[str]:
+        return [
+            f"{self.name}{_labels(self.label_names, key)} {_format(value)}"
+            for key, value in sorted(self._current().items())
+        ]
+
+
+class Histogram(_Metric):
+    """Observations counted into fixed cumulative buckets, with their sum and count."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = (), buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.bounds = tuple(sorted(float(bound) for bound in buckets))
+        # Per label set: one count per bound plus +Inf, then the sum.
+        self._values: dict[LabelValues, list[float]] = {}
+
+    def observe(self, value: float, **labels: object) -> None:
+        key = self._key(labels)
+        slot = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0.0] * (len(self.bounds) + 2)
+            counts[slot] += 1
+            counts[-1] += value
+
+    def count(self, **labels: object) -> int:
+        counts = self._values.get(self._key(labels))
+        return int(sum(counts[:-1])) if counts else 0
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            values = sorted((key, list(counts)) for key, counts in self._values.items())
+        lines = []
+        for key, counts in values:
+            running = 0.0
+            for bound, count in zip((*self.bounds, math.inf), counts[:-1], strict=True):
+                running += count
+                bucket = _labels(self.label_names, key, f'le="{_format(bound)}"')
+                lines.append(f"{self.name}_bucket{bucket} {_format(running)}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_format(counts[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {_format(running)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Metrics by name. Registering a name twice returns the first, so modules may re-import."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric):
+                    raise ValueError(f"{metric.name} is already registered as a {existing.kind}")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help: str, labels: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labels))  # type: ignore[return-value]
+
+    def gauge(
+        self,
+        name: str,
+        help: str,
+        labels: Iterable[str] = (),
+        collect: Callable[[], float | dict[LabelValues, float]] | None = None,
+    ) -> Gauge:
+        return self._register(Gauge(name, help, labels, collect))  # type: ignore[return-value]
+
+    def histogram(
+        self, name: str, help: str, labels: Iterable[str] = (), buckets: Iterable[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))  # type: ignore[return-value]
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines: list[str] = []
+        for metric in metrics:
+            try:
+                samples = metric.samples()
+            except Exception:
+                # A callback gauge whose source is gone. Leaving it out is the
+                # honest answer; failing the scrape would hide every other series.
+                continue
+            lines.extend(metric.header())
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+#: Media type of the text exposition format.
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+registry = MetricsRegistry()
+
+# --------------------------------------------------------------------------- #
+# The hot paths. Declared here, in one place, so the set of series is readable
+# without hunting through call sites; each call site imports its own.
+# --------------------------------------------------------------------------- #
+LLM_SECONDS = registry.histogram(
+    "wizard_llm_request_seconds", "Model call latency, to the last token.", ("provider", "role", "outcome")
+)
+LLM_TOKENS = registry.counter("wizard_llm_tokens_total", "Tokens per model call.", ("provider", "role", "direction"))
+LLM_TOKENS_PER_SECOND = registry.histogram(
+    "wizard_llm_output_tokens_per_second",
+    "Output tokens per second of call time.",
+    ("provider",),
+    buckets=(1, 2, 5, 10, 20, 30, 50, 75, 100, 150, 250, 500, 1000),
+)
+EMBEDDING_SECONDS = registry.histogram("wizard_embedding_seconds", "Time to encode one batch.", ("backend",))
+EMBEDDING_TEXTS = registry.counter("wizard_embedding_texts_total", "Texts encoded.", ("backend",))
+SEMANTIC_CACHE_LOOKUPS = registry.counter(
+    "wizard_semantic_cache_lookups_total", "Semantic cache lookups, by result.", ("result",)
+)
+SQLITE_WRITE_WAIT = registry.histogram(
+    "wizard_sqlite_write_wait_seconds", "Time a writer waited for the SQLite write lock."
+)
+SQLITE_WRITE_SECONDS = registry.histogram(
+    "wizard_sqlite_write_seconds", "Time a write transaction held the lock, to commit."
+)
+EXEC_SECONDS = registry.histogram(
+    "wizard_exec_seconds", "Wall time of one executed cell, as the caller saw it.", ("backend", "status")
+)
+WS_FRAMES = registry.counter(
+    "wizard_ws_frames_total", "Outbound websocket frames, by what became of them.", ("outcome",)
+)
+WS_BATCH_FRAMES = registry.histogram(
+    "wizard_ws_batch_frames",
+    "Frames per websocket send; above one, a backlog went out as a batch.",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512),
+)
+
+
+__all__ = [
+    "CONTENT_TYPE",
+    "EMBEDDING_SECONDS",
+    "EMBEDDING_TEXTS",
+    "EXEC_SECONDS",
+    "LATENCY_BUCKETS",
+    "LLM_SECONDS",
+    "LLM_TOKENS",
+    "LLM_TOKENS_PER_SECOND",
+    "SEMANTIC_CACHE_LOOKUPS",
+    "SQLITE_WRITE_SECONDS",
+    "SQLITE_WRITE_WAIT",
+    "WS_BATCH_FRAMES",
+    "WS_FRAMES",
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "MetricsRegistry",
+    "registry",
+]
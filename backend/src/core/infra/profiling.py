@@ -0,0 +1,243 @@
+"""On-demand profiling of the API process, for diagnosing a slow turn while it happens.
+
+The request log line and each event's ``duration_ms`` say *that* something was
+slow, not where the process spent the time. This answers "where" without a
+restart or a debugger attached:
+
+* :class:`SamplingProfiler` records, for a fixed window, every thread's Python
+  stack every ``PROFILE_INTERVAL_MS``. The result is the number of samples per
+  distinct stack, as collapsed stacks (one ``thread;outer;...;inner count``
+  line each, the flame-graph tools' input) or as a speedscope document.
+* :data:`hot_paths` counts and times the calls that usually explain a slow
+  turn -- model calls, embedding batches, SQLite reads and writes -- over the
+  same window. The call sites ask it for a timer on every call; outside a
+  recording window they get a shared no-op one back, so an idle server pays an
+  attribute read and nothing else.
+
+Nothing here runs unless a caller starts a window: there is no background
+thread, and no profiler hook is installed at any time.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any
+
+from src.config import settings
+
+
+#: Longest recording allowed, whatever a caller asks for.
+MAX_SECONDS = 60.0
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+
+class ProfilerBusyError(RuntimeError):
+    """A recording is already running; the process is profiled once at a time."""
+
+
+class _Idle:
+    """What :meth:`HotPaths.timed` hands out while nothing is recording."""
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info: object) -> None:
+        return None
+
+
+_IDLE = _Idle()
+
+
+class _Timer:
+    __slots__ = ("name", "owner", "started")
+
+    def __init__(self, owner: HotPaths, name: str):
+        self.owner = owner
+        self.name = name
+        self.started = 0.0
+
+    def __enter__(self) -> None:
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.owner.record(self.name, time.perf_counter() - self.started)
+
+
+class HotPaths:
+    """Call counts and time per named call site, kept only while recording."""
+
+    def __init__(self):
+        self.active = False
+        self._lock = threading.Lock()
+        self._stats: dict[str, list[float]] = {}
+
+    def timed(self, name: str) -> _Timer | _Idle:
+        """A context manager timing one call to ``name``; free when not recording."""
+        return _Timer(self, name) if self.active else _IDLE
+
+    def record(self, name: str, seconds: float) -> None:
+        if not self.active:
+            return
+        with self._lock:
+            stats = self._stats.setdefault(name, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+
+    def start(self) -> None:
+        with self._lock:
+            self._stats.clear()
+        self.active = True
+
+    def stop(self) -> dict[str, dict[str, float | int]]:
+        self.active = False
+        with self._lock:
+            return {
+                name: {"calls": int(calls), "total_ms": round(total * 1000, 3), "max_ms": round(peak * 1000, 3)}
+                for name, (calls, total, peak) in sorted(self._stats.items())
+            }
+
+
+hot_paths = HotPaths()
+
+
+@dataclass
+class Profile:
+    """One recording: samples per (thread, stack), outermost frame first."""
+
+    seconds: float
+    interval: float
+    samples: int
+    stacks: Counter[tuple[str, tuple[str, ...]]] = field(default_factory=Counter)
+    hot_paths: dict[str, dict[str, float | int]] = field(default_factory=dict)
+
+    def collapsed(self) -> str:
+        lines = [
+            ";".join((thread, *frames)) + f" {count}"
+            for (thread, frames), count in sorted(self.stacks.items(), key=lambda item: -item[1])
+        ]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def speedscope(self) -> dict[str, Any]:
+        """A speedscope file: one sampled profile per thread, weighted in seconds."""
+        frames: list[dict[str, Any]] = []
+        index: dict[str, int] = {}
+        threads: dict[str, tuple[list[list[int]], list[float]]] = {}
+        for (thread, stack), count in self.stacks.items():
+            ids = []
+            for label in stack:
+                if label not in index:
+                    index[label] = len(frames)
+                    name, _, where = label.partition(" (")
+                    file, _, line = where.rstrip(")").rpartition(":")
+                    frames.append({"name": name, "file": file, "line": int(line) if line.isdigit() else None})
+                ids.append(index[label])
+            samples, weights = threads.setdefault(thread, ([], []))
+            samples.append(ids)
+            weights.append(round(count * self.interval, 6))
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"API process, {self.seconds:g}s",
+            "exporter": "wizard-backend",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": thread,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": round(sum(weights), 6),
+                    "samples": samples,
+                    "weights": weights,
+                }
+                for thread, (samples, weights) in sorted(threads.items())
+            ],
+        }
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "seconds": self.seconds,
+            "interval_ms": round(self.interval * 1000, 3),
+            "samples": self.samples,
+            "threads": len({thread for thread, _ in self.stacks}),
+            "hot_paths": self.hot_paths,
+            "collapsed": self.collapsed(),
+        }
+
+
+def _where(filename: str) -> str:
+    """A frame's file, short: relative to the backend, or from its package down."""
+    if filename.startswith(_BACKEND_DIR):
+        return os.path.relpath(filename, _BACKEND_DIR)
+    for marker in ("site-packages" + os.sep, "dist-packages" + os.sep):
+        if marker in filename:
+            return filename.split(marker, 1)[1]
+    return os.path.basename(filename)
+
+
+class SamplingProfiler:
+    """Samples every thread's stack from a thread of its own, for one window at a time."""
+
+    def __init__(self):
+        self._running = threading.Lock()
+        self._labels: dict[Any, str] = {}
+
+    @property
+    def busy(self) -> bool:
+        return self._running.locked()
+
+    def _label(self, code: Any) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            name = getattr(code, "co_qualname", code.co_name)
+            # `;` separates frames in collapsed stacks, so it cannot be in one.
+            label = f"{name} ({_where(code.co_filename)}:{code.co_firstlineno})".replace(";", ",")
+            self._labels[code] = label
+        return label
+
+    def record(self, seconds: float, interval: float | None = None) -> Profile:
+        """Samples for ``seconds`` (capped at :data:`MAX_SECONDS`). Blocks; run it off the event loop.
+
+        Raises :class:`ProfilerBusyError` when a recording is already running.
+        """
+        if not self._running.acquire(blocking=False):
+            raise ProfilerBusyError("A profile is already being recorded.")
+        seconds = min(max(0.05, seconds), MAX_SECONDS)
+        interval = max(0.001, interval or settings.PROFILE_INTERVAL_MS / 1000)
+        own = threading.get_ident()
+        stacks: Counter[tuple[str, tuple[str, ...]]] = Counter()
+        samples = 0
+        hot_paths.start()
+        try:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                for ident, frame in sys._current_frames().items():
+                    if ident == own:
+                        continue
+                    stack = []
+                    while frame is not None:
+                        stack.append(self._label(frame.f_code))
+                        frame = frame.f_back
+                    if ident not in names:
+                        names.update((thread.ident, thread.name) for thread in threading.enumerate())
+                    stacks[(names.get(ident, f"thread-{ident}"), tuple(reversed(stack)))] += 1
+                samples += 1
+                time.sleep(interval)
+        finally:
+            counted = hot_paths.stop()
+            self._labels.clear()
+            self._running.release()
+        return Profile(seconds=seconds, interval=interval, samples=samples, stacks=stacks, hot_paths=counted)
+
+
+profiler = SamplingProfiler()
+
+__all__ = ["MAX_SECONDS", "HotPaths", "Profile", "ProfilerBusyError", "SamplingProfiler", "hot_paths", "profiler"]
@@ -14,7 +14,9 @@ service ten simultaneous inference jobs.
 The default backend is an in-process asyncio worker pool -- no extra services.
 When ``REDIS_URL`` is set the job *state* is mirrored into Redis so status
 survives a reload and can be read by another worker; execution still happens in
-this process, which keeps the local-first promise intact.
+this process, which keeps the local-first promise intact. Without Redis the state
+is only here, so with several API workers a job id names its worker
+(:func:`job_id`) and the router sends ``/api/jobs/{id}`` there.
 """
 
 from __future__ import annotations
@@ -30,6 +32,7 @@ from typing import Any
 
 from src.config import settings
 from src.core.infra.cache import get_cache
+from src.core.infra.metrics import registry
 from src.utils.logging import logger
 
 
@@ -68,6 +71,12 @@ class Job:
 JobHandler = Callable[["Job"], Awaitable[Any]]
 
 
+def job_id() -> str:
+    """A new job id. Clustered, it starts ``w<index>-`` so the router can send a lookup to its worker."""
+    token = uuid.uuid4().hex[:16]
+    return f"w{settings.WORKER_INDEX}-{token}" if settings.API_WORKERS > 1 else token
+
+
 class JobQueue:
     """Async worker pool with a bounded number of concurrent jobs."""
 
@@ -97,7 +106,7 @@ class JobQueue:
     # ------------------------------------------------------------------ #
     def submit(self, kind: str, handler: JobHandler, session_id: str | None = None) -> Job:
         """Schedules ``handler`` and returns immediately with a PENDING job."""
-        job = Job(id=uuid.uuid4().hex[:16], kind=kind, session_id=session_id)
+        job = Job(id=job_id(), kind=kind, session_id=session_id)
         self._persist(job)
 
         async def runner():
@@ -213,6 +222,17 @@ def get_queue() -> JobQueue:
         return _queue
 
 
+def _jobs_by_status() -> dict[tuple[str, ...], float]:
+    # Read, never create: a scrape should not be what starts the worker pool.
+    counts = {(status.value,): 0.0 for status in JobStatus}
+    for job in _queue.list_jobs() if _queue is not None else ():
+        counts[(job.status.value,)] += 1
+    return counts
+
+
+registry.gauge("wizard_jobs", "Background jobs held by the queue, by status.", ("status",), collect=_jobs_by_status)
+
+
 def reset_queue():
     """Test hook."""
     global _queue
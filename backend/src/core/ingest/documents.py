@@ -31,6 +31,7 @@ from typing import Any
 
 from src.config import settings
 from src.core.embeddings import embedding_service
+from src.core.rag.lexical import LexicalIndex
 from src.utils.logging import logger
 
 
@@ -242,15 +243,22 @@ def load_document(path: Path, name: str) -> ContextDocument:
     return document
 
 
+def document_index(documents: dict[str, ContextDocument]) -> LexicalIndex:
+    """An inverted index over every chunk, in :func:`search_documents` order."""
+    return LexicalIndex(chunk.text for document in documents.values() for chunk in document.chunks)
+
+
 def search_documents(
     documents: dict[str, ContextDocument],
     query: str,
     limit: int | None = None,
+    index: LexicalIndex | None = None,
 ) -> list[tuple[str, str]]:
     """Ranks every chunk across every document. Returns ``(document, passage)``.
 
-    Ranking goes through :mod:`~src.core.embeddings`, which uses a transformer
-    when one is loaded and falls back to lexical overlap when none is -- so
+    Ranking goes through :mod:`~src.core.embeddings` when a transformer is
+    loaded. Without one it is BM25 over ``index`` (built here when the caller
+    keeps none), gated on question coverage the way skill search is -- so
     retrieval works in an air-gapped install, just less well.
     """
     top_k = limit or settings.CONTEXT_TOP_K
@@ -258,7 +266,12 @@ def search_documents(
     if not chunks or not query.strip():
         return []
 
-    ranked = embedding_service.rank(query, [(chunk.text, chunk.embedding) for chunk in chunks])
+    if embedding_service.is_semantic:
+        ranked = embedding_service.rank(query, [(chunk.text, chunk.embedding) for chunk in chunks])
+    else:
+        if index is None or len(index) != len(chunks):
+            index = document_index(documents)
+        ranked = index.rank(query, settings.RAG_MIN_SIMILARITY)
 
     results: list[tuple[str, str]] = []
     for score, index in ranked[:top_k]:
@@ -0,0 +1,173 @@
+"""Incremental JSON record readers.
+
+``pd.read_json`` and ``json.load`` both hold the whole document -- and then the
+whole parsed object tree, several times the size of the text -- before the row
+limit is applied. A log export of a few GB took the API process down with it.
+
+These readers yield one record at a time instead: NDJSON line by line, and for a
+JSON document the elements of the top-level array, or of the first array-valued
+field of a top-level object. The document is decoded through a sliding buffer,
+so memory tracks the largest single record rather than the file.
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any, TextIO
+
+
+#: Characters read per refill of the decode buffer.
+CHUNK_CHARS = 1 << 20
+
+
+class NoRecordArray(ValueError):
+    """The document has no array to stream; it must be read whole."""
+
+
+def iter_ndjson(path: Path, skipped: list[int]) -> Iterator[Any]:
+    """One value per non-blank line. Malformed lines are skipped and counted.
+
+    ``skipped`` is a one-element counter the caller reads after iterating.
+    """
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                skipped[0] += 1
+
+
+def iter_array(path: Path, notes: list[str]) -> Iterator[Any]:
+    """The elements of the document's record array, one at a time.
+
+    A top-level array is streamed directly. A top-level object is scanned key
+    by key until the first array-valued field, whose elements are streamed; the
+    scalar fields before it are small and simply skipped.
+
+    Raises :class:`NoRecordArray` when the document is not a list of records:
+    there is no array, the array holds plain values rather than objects, or the
+    object has a second array field -- ``{"a": [...], "b": [...]}`` is a table
+    stored by column. The last is only found after the first array, so a caller
+    must be ready to discard what it was given.
+    """
+    with open(path, encoding="utf-8") as handle:
+        scanner = _Scanner(handle)
+        first = scanner.peek()
+        if first == "[":
+            yield from _records(scanner)
+            return
+        if first != "{":
+            raise NoRecordArray("top-level value is neither an array nor an object")
+
+        scanner.advance()
+        streamed = False
+        while True:
+            char = scanner.peek()
+            if char in ("}", ""):
+                if not streamed:
+                    raise NoRecordArray("no array field in the top-level object")
+                return
+            if char == ",":
+                scanner.advance()
+                continue
+            scanner.value()  # the key
+            scanner.expect(":")
+            if scanner.peek() != "[":
+                scanner.value()
+            elif streamed:
+                raise NoRecordArray("more than one array field: a column-oriented table")
+            else:
+                notes.append("Extracted the first array field from the JSON object.")
+                yield from _records(scanner)
+                streamed = True
+
+
+def _records(scanner: _Scanner) -> Iterator[Any]:
+    """The array at the scanner, provided its elements are records."""
+    elements = scanner.array()
+    for first in elements:
+        if not isinstance(first, dict):
+            raise NoRecordArray("the array holds values, not records")
+        yield first
+        break
+    yield from elements
+
+
+class _Scanner:
+    """Pulls JSON values off a text stream through a bounded buffer."""
+
+    def __init__(self, handle: TextIO):
+        self._handle = handle
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        chunk = self._handle.read(CHUNK_CHARS)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos :] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """The next non-whitespace character, without consuming it; ``""`` at EOF."""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in " \t\r\n":
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ""
+
+    def advance(self) -> None:
+        self._pos += 1
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise json.JSONDecodeError(f"expected {char!r}", self._buffer, self._pos)
+        self.advance()
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A number that ends exactly at the buffer edge may continue in the
+            # next chunk; only a delimiter after it proves it is complete.
+            if end == len(self._buffer) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def array(self) -> Iterator[Any]:
+        self.expect("[")
+        if self.peek() == "]":
+            self.advance()
+            return
+        while True:
+            yield self.value()
+            char = self.peek()
+            if char == ",":
+                self.advance()
+            elif char == "]":
+                self.advance()
+                return
+            else:
+                raise json.JSONDecodeError("expected ',' or ']'", self._buffer, self._pos)
+
+
+__all__ = ["CHUNK_CHARS", "NoRecordArray", "iter_array", "iter_ndjson"]
@@ -6,12 +6,18 @@ file could cost well over 500MB of RAM.
 
 What changed
 ------------
-* Formats: csv/tsv/txt, xlsx/xls, json/ndjson, parquet, feather.
+* Formats: csv/tsv/txt, xlsx/xls, json/ndjson, parquet, feather. A workbook
+  parses only its largest sheet; see :mod:`src.core.ingest.workbook`.
 * Uploads stream to a temp file, so peak memory tracks the parsed frame rather
-  than 3x the file.
-* Frames larger than ``MAX_INMEMORY_ROWS`` are loaded in chunks and down-sampled
-  deterministically, with the full copy still written to the workspace so the
-  sandbox can stream it.
+  than 3x the file. JSON and NDJSON are read record by record as well -- see
+  :mod:`src.core.ingest.jsonstream`.
+* Delimited text is parsed by Arrow's multithreaded reader in a single pass that
+  counts rows, keeps a deterministic evenly spaced sample and narrows dtypes;
+  pandas remains the fallback for files Arrow refuses.
+* Frames larger than ``MAX_INMEMORY_ROWS`` are down-sampled deterministically.
+  The full file is converted once to Parquet alongside the sample so the
+  runtime can query the whole population out of core -- see
+  :mod:`src.core.ingest.outofcore`.
 * Column names are sanitised **and de-duplicated**. The old regex stripped all
   punctuation, silently turning ``a-b`` and ``a.b`` into two columns both named
   ``ab``; that later broke Feather serialisation and made column selection
@@ -34,6 +40,8 @@ import numpy as np
 import pandas as pd
 
 from src.config import settings
+from src.core.ingest import jsonstream, outofcore, workbook
+from src.utils.filelinks import write_atomically
 from src.utils.logging import logger
 
 
@@ -53,6 +61,14 @@ FEATHER_LIKE = {".feather", ".ft"}
 
 SUPPORTED_EXTENSIONS = CSV_LIKE | EXCEL_LIKE | JSON_LIKE | PARQUET_LIKE | FEATHER_LIKE
 
+#: Arrow parses a CSV one block per thread; smaller blocks spread a mid-sized
+#: file over more cores, larger ones cut per-batch overhead on huge files.
+ARROW_BLOCK_BYTES = 4 * 1024 * 1024
+
+#: JSON records normalised per ``json_normalize`` call. Bounds the transient
+#: cost of flattening, which is several times the records' own size.
+JSON_BATCH_ROWS = 20_000
+
 ENCODINGS = ("utf-8", "utf-8-sig", "utf-16", "cp1252", "latin-1")
 DELIMITERS = (",", ";", "\t", "|")
 
@@ -68,6 +84,10 @@ class DatasetProfile:
     original_rows: int | None = None
     renamed_columns: dict[str, str] = field(default_factory=dict)
     dropped_columns: list[str] = field(default_factory=list)
+    #: The whole file, not just the sample, is queryable through DuckDB.
+    out_of_core: bool = False
+    #: A workbook's unloaded sheets and their data rows, read from its metadata.
+    other_sheets: dict[str, int] = field(default_factory=dict)
 
     def to_dict(self) -> dict[str, Any]:
         return {
@@ -78,6 +98,8 @@ class DatasetProfile:
             "original_rows": self.original_rows,
             "renamed_columns": self.renamed_columns,
             "dropped_columns": self.dropped_columns,
+            "out_of_core": self.out_of_core,
+            "other_sheets": self.other_sheets,
         }
 
 
@@ -87,6 +109,27 @@ class LoadResult:
     profile: DatasetProfile
     source_format: str
     warnings: list[str] = field(default_factory=list)
+    #: A temporary Parquet copy of the full population when the frame was
+    #: sampled, for ``Session.add_dataset`` to move into the workspace. The
+    #: caller owns it and must clean it up if it is not adopted.
+    full_path: Path | None = None
+
+
+@dataclass
+class _Parsed:
+    """What a format reader hands back to :meth:`DatasetLoader.load`."""
+
+    df: pd.DataFrame
+    truncated: bool = False
+    original_rows: int | None = None
+    notes: list[str] = field(default_factory=list)
+    #: Dtypes were already narrowed during the parse; ``load`` skips its own pass.
+    typed: bool = False
+    #: A full-population Parquet copy written during the same read, with the
+    #: sanitised column names.
+    full_path: Path | None = None
+    #: The workbook's other sheets and their data rows, left unparsed.
+    sheets: dict[str, int] = field(default_factory=dict)
 
 
 def sanitize_columns(columns: list[Any]) -> tuple[list[str], dict[str, str]]:
@@ -159,6 +202,218 @@ def categorize_low_cardinality(df: pd.DataFrame, ratio: float = 0.5) -> pd.DataF
     return df
 
 
+def narrow_arrow_types(table, ratio: float = 0.5):
+    """:func:`downcast_numeric` and :func:`categorize_low_cardinality` on Arrow.
+
+    Applied before ``to_pandas``, so repetitive text arrives as a categorical
+    without ever becoming one Python string per row, and numbers arrive narrow.
+    The rules match the pandas versions, so either parser yields the same dtypes.
+    """
+    import pyarrow as pa
+
+    rows = table.num_rows
+    columns = [_narrow_column(column, rows, ratio) for column in table.columns]
+    return pa.Table.from_arrays(columns, names=table.column_names)
+
+
+def _narrow_column(column, rows: int, ratio: float):
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    kind = column.type
+    if pa.types.is_integer(kind) and column.null_count == 0 and rows:
+        bounds = pc.min_max(column)
+        low, high = bounds["min"].as_py(), bounds["max"].as_py()
+        for candidate in (pa.int8(), pa.int16(), pa.int32()):
+            info = np.iinfo(candidate.to_pandas_dtype())
+            if info.min <= low and high <= info.max:
+                return column.cast(candidate)
+        return column
+    if pa.types.is_integer(kind) or pa.types.is_float64(kind):
+        # Integers with gaps become float64 in pandas; both then narrow to
+        # float32 under the same tolerance ``pd.to_numeric`` applies.
+        wide = column.cast(pa.float64())
+        narrow = wide.cast(pa.float32(), safe=False)
+        back = narrow.cast(pa.float64())
+        close = pc.or_(pc.less_equal(pc.abs(pc.subtract(back, wide)), 5e-4), pc.equal(back, wide))
+        return narrow if pc.all(close).as_py() is not False else wide
+    if (pa.types.is_string(kind) or pa.types.is_large_string(kind)) and rows >= 1000:
+        unique = pc.count_distinct(column, mode="all").as_py()
+        if 0 < unique / rows < ratio:
+            return _sorted_dictionary(column)
+    return column
+
+
+def _sorted_dictionary(column):
+    """Dictionary-encodes with sorted categories, as ``astype("category")`` does."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    encoded = pc.dictionary_encode(column.combine_chunks())
+    order = pc.array_sort_indices(encoded.dictionary)
+    position = np.empty(len(order), dtype=np.int32)
+    position[order.to_numpy()] = np.arange(len(order), dtype=np.int32)
+    indices = pc.take(pa.array(position), encoded.indices)
+    return pa.chunked_array([pa.DictionaryArray.from_arrays(indices, encoded.dictionary.take(order))])
+
+
+def _pandas_header(names: list[str]) -> list[str]:
+    """Names blank and repeated header cells the way ``pd.read_csv`` does.
+
+    Arrow keeps them verbatim; matching pandas keeps column names stable
+    whichever of the two parsers read the file.
+    """
+    counts: dict[str, int] = {}
+    result: list[str] = []
+    for position, name in enumerate(names):
+        name = name or f"Unnamed: {position}"
+        if name in counts:
+            suffix = counts[name]
+            while f"{name}.{suffix}" in counts:
+                suffix += 1
+            counts[name] = suffix + 1
+            name = f"{name}.{suffix}"
+        counts[name] = 1
+        result.append(name)
+    return result
+
+
+class _StrideSampler:
+    """An evenly spaced sample of a stream of record batches, in one pass.
+
+    Every ``stride``-th row is kept. Whenever the kept rows pass twice the limit
+    the stride doubles and every other kept row is dropped, so memory is bounded
+    by the limit, not the file, and the total never has to be known up front.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self.stride = 1
+        self.seen = 0
+        self.batches: list = []
+        self._kept = 0
+
+    def add(self, batch) -> None:
+        import pyarrow as pa
+
+        rows = batch.num_rows
+        if self.stride > 1:
+            first = -self.seen % self.stride
+            batch = batch.take(pa.array(np.arange(first, rows, self.stride)))
+        self.seen += rows
+        if batch.num_rows:
+            self.batches.append(batch)
+            self._kept += batch.num_rows
+        while self._kept > 2 * self.limit:
+            self._thin()
+
+    def _thin(self) -> None:
+        import pyarrow as pa
+
+        # Kept rows sit at multiples of the stride, so the even positions are
+        # exactly the multiples of twice the stride.
+        table = pa.Table.from_batches(self.batches)
+        table = table.take(pa.array(np.arange(0, table.num_rows, 2)))
+        self.batches = table.to_batches()
+        self._kept = table.num_rows
+        self.stride *= 2
+
+    def finish(self, schema):
+        """The sample as a table of at most ``limit`` rows, in file order."""
+        import pyarrow as pa
+
+        table = pa.Table.from_batches(self.batches, schema=schema)
+        if table.num_rows > self.limit:
+            picks = np.linspace(0, table.num_rows - 1, self.limit).round().astype(np.int64)
+            table = table.take(pa.array(picks))
+        return table
+
+
+class _RecordSampler:
+    """:class:`_StrideSampler` for parsed JSON records.
+
+    The stride is applied to records *before* they are normalised, so a record
+    the sample will not keep is never flattened into a frame at all. Kept
+    records are normalised in batches of ``JSON_BATCH_ROWS``.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self.stride = 1
+        self.seen = 0
+        self._pending: list[Any] = []
+        self._frames: list[pd.DataFrame] = []
+        self._kept = 0
+
+    def add(self, record: Any) -> None:
+        if self.seen % self.stride == 0:
+            self._pending.append(record)
+            if len(self._pending) >= JSON_BATCH_ROWS:
+                self._flush()
+        self.seen += 1
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        records = [record if isinstance(record, dict) else {"value": record} for record in self._pending]
+        self._pending = []
+        frame = pd.json_normalize(records)
+        self._frames.append(frame)
+        self._kept += len(frame)
+        while self._kept > 2 * self.limit:
+            combined = pd.concat(self._frames, ignore_index=True).iloc[::2]
+            self._frames = [combined]
+            self._kept = len(combined)
+            self.stride *= 2
+
+    def finish(self) -> pd.DataFrame:
+        """The sample as one frame of at most ``limit`` rows, in file order."""
+        self._flush()
+        if not self._frames:
+            return pd.DataFrame()
+        df = pd.concat(self._frames, ignore_index=True) if len(self._frames) > 1 else self._frames[0]
+        if len(df) > self.limit:
+            picks = np.linspace(0, len(df) - 1, self.limit).round().astype(np.int64)
+            df = df.iloc[picks]
+        return df.reset_index(drop=True)
+
+
+class _FullCopy:
+    """The out-of-core Parquet copy, fed the batches the CSV reader already parsed."""
+
+    def __init__(self, columns: list[str]):
+        self.columns = columns
+        self.path: Path | None = None
+        self._writer = None
+
+    def write(self, batch, earlier: list) -> None:
+        """Appends ``batch``; the first call also writes the ``earlier`` batches."""
+        import pyarrow.parquet as pq
+
+        if self._writer is None:
+            self.path = make_temp_path(suffix=".parquet")
+            renamed = batch.rename_columns(self.columns)
+            self._writer = pq.ParquetWriter(self.path, renamed.schema, compression="zstd")
+            for previous in earlier:
+                self._writer.write_batch(previous.rename_columns(self.columns))
+        self._writer.write_batch(batch.rename_columns(self.columns))
+
+    def close(self) -> Path | None:
+        if self._writer is None:
+            return None
+        self._writer.close()
+        return self.path
+
+    def discard(self) -> None:
+        if self._writer is not None:
+            try:
+                self._writer.close()
+            except Exception:
+                pass
+        cleanup_path(self.path)
+        self.path = None
+
+
 class DatasetLoader:
     """Parses an uploaded file into a normalised DataFrame."""
 
@@ -211,21 +466,24 @@ class DatasetLoader:
         warnings: list[str] = []
 
         if suffix in CSV_LIKE:
-            df, truncated, original_rows, notes = cls._read_delimited(path, limit)
+            parsed = cls._read_delimited(path, limit)
         elif suffix in EXCEL_LIKE:
-            df, truncated, original_rows, notes = cls._read_excel(path, limit)
+            parsed = cls._read_excel(path, limit)
         elif suffix in JSON_LIKE:
-            df, truncated, original_rows, notes = cls._read_json(path, suffix, limit)
+            parsed = cls._read_json(path, suffix, limit)
         elif suffix in PARQUET_LIKE:
-            df, truncated, original_rows, notes = cls._read_parquet(path, limit)
+            parsed = cls._read_parquet(path, limit)
         else:
-            df, truncated, original_rows, notes = cls._read_feather(path, limit)
+            parsed = cls._read_feather(path, limit)
 
-        warnings.extend(notes)
+        df, truncated, original_rows = parsed.df, parsed.truncated, parsed.original_rows
+        warnings.extend(parsed.notes)
 
         if df is None or df.empty:
             raise EmptyDatasetError("The uploaded file contains no rows.")
 
+        raw_columns = [str(column) for column in df.columns]
+
         # Flatten a MultiIndex header (common in exported spreadsheets).
         if isinstance(df.columns, pd.MultiIndex):
             df.columns = ["_".join(str(part) for part in tup if str(part) != "nan") for tup in df.columns]
@@ -243,8 +501,21 @@ class DatasetLoader:
             warnings.append(f"Dropped {len(empty_columns)} fully-empty column(s).")
 
         df = df.reset_index(drop=True)
-        df = downcast_numeric(df)
-        df = categorize_low_cardinality(df)
+        if not parsed.typed:
+            df = downcast_numeric(df)
+            df = categorize_low_cardinality(df)
+
+        full_path = parsed.full_path
+        if full_path is not None and empty_columns and not outofcore.select_columns(full_path, list(df.columns)):
+            # The copy must offer the columns `df` does, or `df` and `db` disagree.
+            cleanup_path(full_path)
+            full_path = None
+        if truncated and settings.INGEST_OUT_OF_CORE and full_path is None:
+            full_path, full_rows, skipped = cls._write_full_copy(path, suffix, raw_columns, columns, df)
+            if full_rows:
+                original_rows = full_rows
+            if skipped:
+                warnings.append(f"Skipped {skipped:,} malformed row(s) in the full table.")
 
         profile = DatasetProfile(
             rows=len(df),
@@ -254,21 +525,150 @@ class DatasetLoader:
             original_rows=original_rows,
             renamed_columns=renamed,
             dropped_columns=empty_columns,
+            out_of_core=full_path is not None,
+            other_sheets=parsed.sheets,
         )
-        if truncated:
+        if truncated and full_path is not None:
+            warnings.append(
+                f"Dataset exceeds the in-memory limit; `df` is a {len(df):,}-row sample of {original_rows:,} "
+                "total rows. The full table is queryable with SQL through DuckDB, so totals can still be exact."
+            )
+        elif truncated:
             warnings.append(
                 f"Dataset exceeds the in-memory limit; analysis uses a {len(df):,}-row sample "
-                f"of {original_rows:,} total rows. The full file remains available in the workspace."
+                f"of {original_rows:,} total rows."
             )
 
-        return LoadResult(df=df, profile=profile, source_format=suffix.lstrip("."), warnings=warnings)
+        return LoadResult(
+            df=df, profile=profile, source_format=suffix.lstrip("."), warnings=warnings, full_path=full_path
+        )
+
+    @classmethod
+    def _write_full_copy(
+        cls, path: Path, suffix: str, raw_columns: list[str], columns: list[str], df: pd.DataFrame
+    ) -> tuple[Path | None, int | None, int]:
+        """Converts the whole source file to a temporary Parquet copy.
+
+        Returns the path, its rows and how many malformed rows were skipped;
+        ``(None, None, 0)`` for a format that cannot be read in batches, or when
+        a value the sample never saw does not fit the sample's types -- the
+        dataset then stays sample-only, which is what it was before.
+        """
+        if suffix in CSV_LIKE:
+            kind = "csv"
+        elif suffix in PARQUET_LIKE:
+            kind = "parquet"
+        elif suffix in FEATHER_LIKE:
+            kind = "feather"
+        else:
+            return None, None, 0
+        if len(raw_columns) != len(columns):
+            return None, None, 0
+
+        encoding, delimiter = cls._sniff(path) if kind == "csv" else ("utf-8", ",")
+        destination = make_temp_path(suffix=".parquet")
+        skipped = outofcore.SkippedRows()
+        rows = outofcore.write_parquet_copy(
+            path,
+            destination,
+            kind=kind,
+            raw_columns=raw_columns,
+            columns=columns,
+            keep={column: df[column].dtype for column in df.columns},
+            encoding=encoding,
+            delimiter=delimiter,
+            skipped=skipped,
+        )
+        if rows is None:
+            cleanup_path(destination)
+            return None, None, 0
+        return destination, rows, skipped.count
 
     # ------------------------------------------------------------------ #
-    # Format readers. Each returns (df, truncated, original_rows, warnings).
+    # Format readers. Each returns a ``_Parsed``.
     # ------------------------------------------------------------------ #
     @classmethod
-    def _read_delimited(cls, path: Path, limit: int) -> tuple[pd.DataFrame, bool, int | None, list[str]]:
+    def _read_delimited(cls, path: Path, limit: int) -> _Parsed:
         encoding, delimiter = cls._sniff(path)
+        try:
+            return cls._read_delimited_arrow(path, encoding, delimiter, limit)
+        except Exception as exc:
+            # A type that changes deep in the file, an encoding Arrow cannot
+            # transcode, an empty file: pandas is slower but more forgiving.
+            logger.info("Arrow CSV parse failed; falling back to pandas", path=str(path), error=str(exc))
+        return cls._read_delimited_pandas(path, encoding, delimiter, limit)
+
+    @classmethod
+    def _read_delimited_arrow(cls, path: Path, encoding: str, delimiter: str, limit: int) -> _Parsed:
+        """One multithreaded pass: count, sample, type and (if needed) copy in full.
+
+        The previous path read the file once to count lines, again to parse it
+        in single-threaded pandas chunks, and then walked the sample twice more
+        to down-cast and categorise. Here Arrow parses blocks on every core while
+        the batches stream through a :class:`_StrideSampler`, so the exact row
+        count, the sample and -- past the limit -- the out-of-core Parquet copy
+        all come out of the same read.
+        """
+        import pyarrow as pa
+        from pyarrow import csv as pa_csv
+
+        with path.open("rb") as handle:
+            quoted = b'"' in handle.read(64 * 1024)
+
+        def open_reader(column_types: dict[str, Any], skipped: outofcore.SkippedRows):
+            return pa_csv.open_csv(
+                path,
+                read_options=pa_csv.ReadOptions(encoding=encoding, use_threads=True, block_size=ARROW_BLOCK_BYTES),
+                parse_options=pa_csv.ParseOptions(
+                    delimiter=delimiter,
+                    # Quote-aware block splitting is slower, so only pay for it
+                    # when the file quotes anything at all.
+                    newlines_in_values=quoted,
+                    invalid_row_handler=skipped,
+                ),
+                convert_options=pa_csv.ConvertOptions(column_types=column_types, strings_can_be_null=True),
+            )
+
+        skipped = outofcore.SkippedRows()
+        reader = open_reader({}, skipped)
+        # Arrow infers dates and timestamps where pandas leaves text; keep them
+        # text so both parsers hand the cleaning step the same frame.
+        temporal = {f.name: pa.string() for f in reader.schema if pa.types.is_temporal(f.type)}
+        if temporal:
+            # A fresh count: the first reader already parsed its opening block.
+            skipped = outofcore.SkippedRows()
+            reader = open_reader(temporal, skipped)
+        header = _pandas_header(reader.schema.names)
+        sampler = _StrideSampler(limit)
+        copy = _FullCopy(sanitize_columns(header)[0]) if settings.INGEST_OUT_OF_CORE else None
+        try:
+            for batch in reader:
+                if copy is not None and sampler.seen + batch.num_rows > limit:
+                    # Still below the first thinning, so the sampler holds every
+                    # row read so far and the copy can start from them.
+                    copy.write(batch, earlier=sampler.batches)
+                sampler.add(batch)
+            table = narrow_arrow_types(sampler.finish(reader.schema))
+            df = table.rename_columns(header).to_pandas()
+        except BaseException:
+            if copy is not None:
+                copy.discard()
+            raise
+
+        notes = []
+        if skipped.count:
+            notes.append(f"Skipped {skipped.count:,} malformed row(s) with the wrong number of fields.")
+        return _Parsed(
+            df=df,
+            truncated=sampler.seen > limit,
+            original_rows=sampler.seen,
+            notes=notes,
+            typed=True,
+            full_path=copy.close() if copy is not None else None,
+        )
+
+    @classmethod
+    def _read_delimited_pandas(cls, path: Path, encoding: str, delimiter: str, limit: int) -> _Parsed:
         notes: list[str] = []
 
         read_kwargs: dict[str, Any] = {
@@ -293,17 +693,44 @@ class DatasetLoader:
                     break
                 del chunk, index
             df = pd.concat(frames, ignore_index=True).head(limit)
-            return df, True, total_rows, notes
+            return _Parsed(df=df, truncated=True, original_rows=total_rows, notes=notes)
 
         try:
             df = pd.read_csv(path, **read_kwargs)
         except Exception as exc:
             notes.append(f"Strict parse failed ({exc}); retried with delimiter auto-detection.")
             df = pd.read_csv(path, encoding=encoding, sep=None, engine="python", on_bad_lines="skip")
-        return df, False, total_rows, notes
+        return _Parsed(df=df, original_rows=total_rows, notes=notes)
+
+    @classmethod
+    def _read_excel(cls, path: Path, limit: int) -> _Parsed:
+        sizes = workbook.sheet_dimensions(path)
+        if sizes is None:
+            return cls._read_excel_in_full(path, limit)
+        if not sizes:
+            raise EmptyDatasetError("The workbook contains no sheets.")
+
+        # Pick the largest sheet by its dimension record; parse only that one.
+        name = max(sizes, key=sizes.__getitem__)
+        df = workbook.read_sheet(path, name, limit)
+        notes: list[str] = []
+        others = {sheet: max(0, rows - 1) for sheet, rows in sizes.items() if sheet != name}
+        if others:
+            notes.append(
+                f"Workbook has {len(sizes)} sheets; loaded the largest ('{name}'). "
+                "The others load on first use from `tables`."
+            )
+
+        # A dimension record can overstate (formatted but empty rows), so it
+        # only decides truncation once the parse actually hit the limit.
+        declared = max(0, sizes[name] - 1)
+        truncated = len(df) >= limit and declared > limit
+        original = declared if truncated else len(df)
+        return _Parsed(df=df, truncated=truncated, original_rows=original, notes=notes, sheets=others)
 
     @classmethod
-    def _read_excel(cls, path: Path, limit: int) -> tuple[pd.DataFrame, bool, int | None, list[str]]:
+    def _read_excel_in_full(cls, path: Path, limit: int) -> _Parsed:
+        """Every sheet parsed to find the largest: the only way for legacy ``.xls``."""
         notes: list[str] = []
         try:
             sheets = pd.read_excel(path, sheet_name=None)
@@ -322,50 +749,62 @@ class DatasetLoader:
 
         original = len(df)
         if original > limit:
-            return df.head(limit), True, original, notes
-        return df, False, original, notes
+            return _Parsed(df=df.head(limit), truncated=True, original_rows=original, notes=notes)
+        return _Parsed(df=df, original_rows=original, notes=notes)
 
     @classmethod
-    def _read_json(cls, path: Path, suffix: str, limit: int) -> tuple[pd.DataFrame, bool, int | None, list[str]]:
+    def _read_json(cls, path: Path, suffix: str, limit: int) -> _Parsed:
+        """Streams records through a :class:`_RecordSampler`; memory tracks the batch."""
+        notes: list[str] = []
+        sampler = _RecordSampler(limit)
+        if suffix in {".ndjson", ".jsonl"}:
+            skipped = [0]
+            for record in jsonstream.iter_ndjson(path, skipped):
+                sampler.add(record)
+            if skipped[0]:
+                notes.append(f"Skipped {skipped[0]:,} malformed line(s).")
+        else:
+            try:
+                for record in jsonstream.iter_array(path, notes):
+                    sampler.add(record)
+            except jsonstream.NoRecordArray:
+                return cls._read_json_in_full(path, limit)
+
+        df = sampler.finish()
+        return _Parsed(df=df, truncated=sampler.seen > limit, original_rows=sampler.seen, notes=notes)
+
+    @classmethod
+    def _read_json_in_full(cls, path: Path, limit: int) -> _Parsed:
+        """A document that is not a list of records: column-oriented, plain values, or a single record."""
         notes: list[str] = []
-        lines = suffix in {".ndjson", ".jsonl"}
         try:
-            df = pd.read_json(path, lines=lines)
+            df = pd.read_json(path)
         except ValueError:
-            # Nested payload: normalise the first list-valued key we can find.
             with open(path, encoding="utf-8") as handle:
                 payload = json.load(handle)
-            if isinstance(payload, dict):
-                records = next((v for v in payload.values() if isinstance(v, list)), None)
-                if records is None:
-                    records = [payload]
-                    notes.append("JSON object had no array field; treated it as a single record.")
-                else:
-                    notes.append("Extracted the first array field from the JSON object.")
-            else:
-                records = payload
-            df = pd.json_normalize(records)
+            notes.append("JSON object had no array field; treated it as a single record.")
+            df = pd.json_normalize([payload])
 
         original = len(df)
         if original > limit:
-            return df.head(limit), True, original, notes
-        return df, False, original, notes
+            return _Parsed(df=df.head(limit), truncated=True, original_rows=original, notes=notes)
+        return _Parsed(df=df, original_rows=original, notes=notes)
 
     @classmethod
-    def _read_parquet(cls, path: Path, limit: int) -> tuple[pd.DataFrame, bool, int | None, list[str]]:
+    def _read_parquet(cls, path: Path, limit: int) -> _Parsed:
         df = pd.read_parquet(path)
         original = len(df)
         if original > limit:
-            return df.head(limit), True, original, []
-        return df, False, original, []
+            return _Parsed(df=df.head(limit), truncated=True, original_rows=original)
+        return _Parsed(df=df, original_rows=original)
 
     @classmethod
-    def _read_feather(cls, path: Path, limit: int) -> tuple[pd.DataFrame, bool, int | None, list[str]]:
+    def _read_feather(cls, path: Path, limit: int) -> _Parsed:
         df = pd.read_feather(path)
         original = len(df)
         if original > limit:
-            return df.head(limit), True, original, []
-        return df, False, original, []
+            return _Parsed(df=df.head(limit), truncated=True, original_rows=original)
+        return _Parsed(df=df, original_rows=original)
 
     # ------------------------------------------------------------------ #
     @staticmethod
@@ -413,9 +852,22 @@ def safe_write_feather(df: pd.DataFrame, path: Path) -> bool:
 
     Returns True when the original dtypes survived, False when coercion happened,
     so callers can tell the user their column types changed.
+
+    Written uncompressed as a single record batch and renamed into place: a
+    runtime memory-maps the file and wraps its numeric columns without copying
+    them, which compression or batch boundaries would force it to do, and a
+    subagent's snapshot may be a link to this very file (see
+    :mod:`src.utils.filelinks`).
     """
+
+    def write(frame: pd.DataFrame) -> None:
+        write_atomically(
+            path,
+            lambda temporary: frame.to_feather(temporary, compression="uncompressed", chunksize=max(1, len(frame))),
+        )
+
     try:
-        df.to_feather(path)
+        write(df)
         return True
     except Exception:
         coerced = df.copy()
@@ -426,7 +878,7 @@ def safe_write_feather(df: pd.DataFrame, path: Path) -> bool:
                 except Exception:
                     coerced[column] = coerced[column].apply(repr)
         try:
-            coerced.to_feather(path)
+            write(coerced)
         except Exception as exc:
             logger.warning("Feather write failed after coercion", error=str(exc))
             raise
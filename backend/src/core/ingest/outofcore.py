@@ -0,0 +1,283 @@
+"""Out-of-core copies of tables too large to hold in memory.
+
+``DatasetLoader.load`` caps a frame at ``MAX_INMEMORY_ROWS`` and samples the
+rest away, which is the right size for pandas and the wrong answer for a total:
+a count over a 2M-row sample of a 100M-row file is a guess presented as a fact.
+
+When a load is truncated, the *whole* file is converted once to Parquet -- in
+record batches, so the conversion never holds more than one batch -- and written
+to ``full/<table_key>.parquet`` in the session workspace. The runtime then opens
+a DuckDB connection over those files, so generated code gets ``df`` (the sample,
+for shape and plotting) and ``db``/``full_tables`` (the population, for numbers).
+DuckDB streams Parquet and spills to disk under its own memory limit, so exact
+aggregates over the full file fit inside the sandbox's memory ceiling.
+
+Only formats that can be read in batches are converted here: delimited text,
+Parquet and Feather. Anything else is reported as sample-only rather than parsed
+in full a second time.
+"""
+
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+
+from src.utils.logging import logger
+
+
+#: The workspace subdirectory holding full-population Parquet copies.
+FULL_DIRNAME = "full"
+
+#: Rows per record batch while converting. Bounds conversion memory by the batch,
+#: not the file.
+BATCH_ROWS = 256_000
+
+
+class SkippedRows:
+    """An Arrow ``invalid_row_handler`` that skips a malformed row and counts it.
+
+    The parse runs on several threads, so the count is kept under a lock; the
+    loader reports it rather than let rows disappear without a word.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, _row) -> str:
+        with self._lock:
+            self.count += 1
+        return "skip"
+
+
+def arrow_type_for(dtype: Any):
+    """The Arrow type a column of the *sample's* dtype should parse as in full.
+
+    Widened on purpose: the sample was down-cast to the narrowest lossless type
+    for its own values, and the rows it never saw may not fit that.
+    """
+    import pyarrow as pa
+
+    if pd.api.types.is_bool_dtype(dtype):
+        return pa.bool_()
+    if pd.api.types.is_integer_dtype(dtype):
+        return pa.int64()
+    if pd.api.types.is_float_dtype(dtype):
+        return pa.float64()
+    return pa.string()
+
+
+def write_parquet_copy(
+    source: Path,
+    destination: Path,
+    *,
+    kind: str,
+    raw_columns: list[str],
+    columns: list[str],
+    keep: dict[str, Any],
+    encoding: str = "utf-8",
+    delimiter: str = ",",
+    skipped: SkippedRows | None = None,
+) -> int | None:
+    """Streams ``source`` into ``destination`` as Parquet. Returns the row count.
+
+    ``raw_columns`` are the names as the file spells them and ``columns`` the
+    sanitised names they became, position for position; ``keep`` maps each final
+    name to retain onto the sample's dtype. Malformed delimited rows are counted
+    into ``skipped``. Returns ``None`` when the conversion is not possible -- a
+    format that cannot be streamed, or a value deep in the file the sample's
+    types cannot hold -- and leaves nothing half-written behind.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:  # pragma: no cover - pyarrow is a hard requirement
+        return None
+
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    writer = None
+    rows = 0
+    written = False
+    try:
+        for batch in _batches(source, kind, raw_columns, columns, keep, encoding, delimiter, skipped or SkippedRows()):
+            if batch.num_rows == 0:
+                continue
+            table = pa.Table.from_batches([batch])
+            if writer is None:
+                writer = pq.ParquetWriter(destination, table.schema, compression="zstd")
+            writer.write_table(table)
+            rows += batch.num_rows
+        written = rows > 0
+    except _Unstreamable:
+        pass
+    except Exception as exc:
+        logger.warning("Could not write the full-population copy", source=str(source), error=str(exc))
+    finally:
+        if writer is not None:
+            writer.close()
+    if not written:
+        destination.unlink(missing_ok=True)
+        return None
+    return rows
+
+
+class _Unstreamable(Exception):
+    """The format has no batch reader; the copy is skipped, not failed."""
+
+
+def _batches(
+    source: Path,
+    kind: str,
+    raw_columns: list[str],
+    columns: list[str],
+    keep: dict[str, Any],
+    encoding: str,
+    delimiter: str,
+    skipped: SkippedRows,
+):
+    import pyarrow as pa
+
+    if kind == "csv":
+        from pyarrow import csv as pa_csv
+
+        reader = pa_csv.open_csv(
+            source,
+            read_options=pa_csv.ReadOptions(
+                encoding=encoding, column_names=columns, skip_rows=1, block_size=16 * 1024 * 1024
+            ),
+            parse_options=pa_csv.ParseOptions(delimiter=delimiter, invalid_row_handler=skipped),
+            convert_options=pa_csv.ConvertOptions(
+                include_columns=list(keep),
+                column_types={name: arrow_type_for(dtype) for name, dtype in keep.items()},
+                strings_can_be_null=True,
+            ),
+        )
+        yield from reader
+        return
+
+    if kind == "parquet":
+        import pyarrow.parquet as pq
+
+        batches = pq.ParquetFile(source).iter_batches(batch_size=BATCH_ROWS, columns=raw_columns)
+    elif kind == "feather":
+        import pyarrow.ipc as ipc
+
+        opened = ipc.open_file(pa.memory_map(str(source), "r"))
+        batches = (opened.get_batch(index).select(raw_columns) for index in range(opened.num_record_batches))
+    else:
+        raise _Unstreamable(kind)
+
+    # Selected by the file's own names first, so a stored index column cannot
+    # shift the positional rename onto the wrong data.
+    for batch in batches:
+        yield batch.rename_columns(columns).select(list(keep))
+
+
+def select_columns(path: Path, columns: list[str]) -> bool:
+    """Rewrites the Parquet file at ``path`` with only ``columns``, in batches.
+
+    For a copy written while parsing, before ``load`` decided which columns the
+    in-memory frame keeps: the two must name the same columns. Returns whether
+    the file now matches; on failure the original is left as it was.
+    """
+    import pyarrow.parquet as pq
+
+    staged = path.with_name(path.name + ".part")
+    writer = None
+    try:
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=BATCH_ROWS, columns=columns):
+            if writer is None:
+                writer = pq.ParquetWriter(staged, batch.schema, compression="zstd")
+            writer.write_batch(batch)
+        if writer is None:
+            return False
+        writer.close()
+        writer = None
+        staged.replace(path)
+        return True
+    except Exception as exc:
+        logger.warning("Could not narrow the full-population copy", path=str(path), error=str(exc))
+        return False
+    finally:
+        if writer is not None:
+            writer.close()
+        staged.unlink(missing_ok=True)
+
+
+def full_dir(workspace: Path) -> Path:
+    return workspace / FULL_DIRNAME
+
+
+def full_path(workspace: Path, table_key: str) -> Path:
+    return full_dir(workspace) / f"{table_key}.parquet"
+
+
+def full_tables(workspace: Path) -> dict[str, Path]:
+    """Every full-population copy in a workspace, keyed like ``tables``."""
+    directory = full_dir(workspace)
+    if not directory.is_dir():
+        return {}
+    return {path.stem: path for path in sorted(directory.glob("*.parquet"))}
+
+
+def row_count(path: Path) -> int:
+    """Rows in a Parquet file, from its footer alone."""
+    try:
+        import pyarrow.parquet as pq
+
+        return int(pq.read_metadata(path).num_rows)
+    except Exception:
+        return 0
+
+
+def duckdb_memory_limit(mem_bytes: int) -> str:
+    """Half the runtime's ceiling, leaving the rest for pandas and the interpreter."""
+    return f"{max(256, mem_bytes // (2 * 1024 * 1024))}MB"
+
+
+def open_connection(workspace: Path, mem_bytes: int = 0):
+    """A DuckDB connection with one view per full table, or ``(None, {})``.
+
+    The in-process mirror of what the daemon's ``load_dataset`` builds, so the
+    last-resort interpreter presents the same namespace as a real runtime.
+    """
+    paths = full_tables(workspace)
+    if not paths:
+        return None, {}
+    try:
+        import duckdb
+    except ImportError:
+        return None, {}
+
+    connection = duckdb.connect()
+    if mem_bytes > 0:
+        connection.execute(f"SET memory_limit='{duckdb_memory_limit(mem_bytes)}'")
+    spill = workspace / ".duckdb_tmp"
+    spill.mkdir(parents=True, exist_ok=True)
+    connection.execute(f"SET temp_directory='{_sql_literal(spill.as_posix())}'")
+    relations = {}
+    for key, path in paths.items():
+        source = _sql_literal(path.as_posix())
+        connection.execute(f"CREATE OR REPLACE VIEW \"{key}\" AS SELECT * FROM read_parquet('{source}')")
+        relations[key] = connection.view(key)
+    return connection, relations
+
+
+def _sql_literal(text: str) -> str:
+    return text.replace("'", "''")
+
+
+__all__ = [
+    "FULL_DIRNAME",
+    "arrow_type_for",
+    "duckdb_memory_limit",
+    "full_dir",
+    "full_path",
+    "full_tables",
+    "open_connection",
+    "row_count",
+    "write_parquet_copy",
+]
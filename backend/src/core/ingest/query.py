@@ -0,0 +1,324 @@
+"""Filters, search and group-bys over a loaded table, for the data grid.
+
+Paging and sorting were the only things the grid could do on its own; anything
+else -- "only the rows where region is EU", "revenue by month" -- was a full
+agent turn or a download. A query spec, the body of ``POST /api/data/query``,
+is small enough to build from grid controls and narrow enough to run without
+a model:
+
+* ``filters``: ``{"column", "op", "value"}`` conditions, all of which must hold;
+* ``search``: a case-insensitive substring matched against every text column;
+* ``columns``: the projection;
+* ``group_by`` and ``aggregates`` (``{"column", "fn", "as"}``): one row per group;
+* ``sort_by`` / ``sort_order``.
+
+It runs as vectorised pandas on the session's in-memory frame -- one boolean
+mask per condition, one ``groupby().agg`` -- and never executes anything the
+caller wrote. A filter-only result is kept as row positions into the table,
+not a copy of its rows, and pages are gathered from it as preview pages are.
+Results are cached per table under a hash of the spec without its paging
+(:class:`QueryResults`), so turning pages or flipping back to an earlier
+filter is a lookup.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+
+#: Results kept per table, and the memory they may hold between them.
+MAX_RESULTS = 8
+MAX_RESULT_BYTES = 64 * 1024 * 1024
+
+FILTER_OPS = frozenset(
+    {
+        "eq",
+        "ne",
+        "lt",
+        "le",
+        "gt",
+        "ge",
+        "in",
+        "not_in",
+        "between",
+        "contains",
+        "startswith",
+        "endswith",
+        "is_null",
+        "not_null",
+    }
+)
+AGGREGATES = frozenset({"count", "sum", "mean", "median", "min", "max", "nunique", "std"})
+#: Counts rows rather than a column's values; only valid with ``count``.
+ALL_ROWS = "*"
+
+_PAGING = ("page", "per_page")
+
+
+class QueryError(ValueError):
+    """A spec that names a missing column or an operation the column cannot take."""
+
+
+def _mixed(column: Any, action: str) -> QueryError:
+    return QueryError(f"Column '{column}' cannot be {action}: its values are of mixed types.")
+
+
+def spec_key(spec: dict[str, Any]) -> str:
+    """The hash a spec's result is cached under. Paging is not part of it."""
+    canonical = {key: value for key, value in spec.items() if key not in _PAGING and value not in (None, [], "")}
+    encoded = json.dumps(canonical, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:32]
+
+
+@dataclass(frozen=True)
+class QueryResult:
+    """Either row positions into the source table, or a computed (grouped) frame."""
+
+    columns: list[str]
+    positions: np.ndarray | None = None
+    frame: pd.DataFrame | None = None
+
+    def __len__(self) -> int:
+        return len(self.frame) if self.frame is not None else len(self.positions)
+
+    @property
+    def nbytes(self) -> int:
+        if self.frame is not None:
+            return int(self.frame.memory_usage(index=False, deep=False).sum())
+        return int(self.positions.nbytes)
+
+    def page(self, df: pd.DataFrame, start: int, stop: int) -> pd.DataFrame:
+        if self.frame is not None:
+            return self.frame.iloc[start:stop]
+        return df.take(self.positions[start:stop])[self.columns]
+
+
+def _column(df: pd.DataFrame, name: Any) -> pd.Series:
+    if name not in df.columns:
+        raise QueryError(f"Unknown column '{name}'.")
+    return df[name]
+
+
+def _coerce(series: pd.Series, value: Any) -> Any:
+    """``value`` as the column's kind, so ``"5"`` compares with an integer column."""
+    if value is None:
+        return None
+    try:
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return pd.Timestamp(value)
+        if pd.api.types.is_bool_dtype(series) and isinstance(value, str):
+            return value.strip().lower() in ("true", "1", "yes")
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            return pd.to_numeric(value)
+    except (TypeError, ValueError) as exc:
+        raise QueryError(f"'{value}' is not a value column '{series.name}' can hold.") from exc
+    return value
+
+
+def _text(series: pd.Series) -> pd.Series:
+    return series if pd.api.types.is_string_dtype(series) else series.astype(str).where(series.notna())
+
+
+def _condition(df: pd.DataFrame, condition: dict[str, Any]) -> np.ndarray:
+    series = _column(df, condition.get("column"))
+    op = condition.get("op", "eq")
+    value = condition.get("value")
+    if op not in FILTER_OPS:
+        raise QueryError(f"Unknown filter operator '{op}'.")
+    if op == "is_null":
+        return series.isna().to_numpy()
+    if op == "not_null":
+        return series.notna().to_numpy()
+    if op in ("contains", "startswith", "endswith"):
+        text = _text(series).str.lower()
+        needle = str(value or "").lower()
+        if op == "contains":
+            hits = text.str.contains(needle, regex=False, na=False)
+        else:
+            hits = getattr(text.str, op)(needle, na=False)
+        return hits.to_numpy(dtype=bool)
+    if op in ("in", "not_in", "between"):
+        if not isinstance(value, list):
+            raise QueryError(f"'{op}' takes a list of values.")
+        values = [_coerce(series, item) for item in value]
+        if op == "between":
+            if len(values) != 2:
+                raise QueryError("'between' takes exactly two values.")
+            try:
+                return series.between(values[0], values[1]).to_numpy(dtype=bool)
+            except TypeError as exc:
+                raise QueryError(f"Column '{series.name}' cannot be compared with {value}.") from exc
+        hits = series.isin(values).to_numpy(dtype=bool)
+        return ~hits if op == "not_in" else hits
+
+    target = _coerce(series, value)
+    try:
+        if op == "eq":
+            hits = series.isna() if target is None else series == target
+        elif op == "ne":
+            hits = series.notna() if target is None else series != target
+        else:
+            hits = {"lt": series.lt, "le": series.le, "gt": series.gt, "ge": series.ge}[op](target)
+    except TypeError as exc:
+        raise QueryError(f"Column '{series.name}' cannot be compared with '{value}'.") from exc
+    return hits.fillna(False).to_numpy(dtype=bool)
+
+
+def _search(df: pd.DataFrame, term: str) -> np.ndarray:
+    hits = np.zeros(len(df), dtype=bool)
+    needle = term.lower()
+    for name in df.columns:
+        series = df[name]
+        if pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+            hits |= series.astype(str).str.lower().str.contains(needle, regex=False, na=False).to_numpy(dtype=bool)
+        elif isinstance(series.dtype, pd.CategoricalDtype):
+            # Matched on the categories, then mapped through the codes.
+            matched = series.cat.categories.astype(str).str.lower().str.contains(needle, regex=False)
+            hits |= np.append(matched, False)[series.cat.codes.to_numpy()]
+    return hits
+
+
+def _aggregate(subset: pd.DataFrame, group_by: list[str], aggregates: list[dict[str, Any]]) -> pd.DataFrame:
+    named: dict[str, tuple[str, str]] = {}
+    counts: list[str] = []
+    for aggregate in aggregates or [{"column": ALL_ROWS, "fn": "count"}]:
+        fn = aggregate.get("fn", "count")
+        column = aggregate.get("column", ALL_ROWS)
+        if fn not in AGGREGATES:
+            raise QueryError(f"Unknown aggregate '{fn}'.")
+        label = str(aggregate.get("as") or (fn if column == ALL_ROWS else f"{fn}_{column}"))
+        if label in group_by or label in named or label in counts:
+            raise QueryError(f"'{label}' names two result columns; give the aggregate another 'as'.")
+        if column == ALL_ROWS:
+            if fn != "count":
+                raise QueryError(f"'{fn}' needs a column.")
+            counts.append(label)
+            continue
+        series = _column(subset, column)
+        if fn in ("sum", "mean", "median", "std") and not pd.api.types.is_numeric_dtype(series):
+            raise QueryError(f"'{fn}' needs a numeric column; '{column}' is not.")
+        named[label] = (column, fn)
+
+    if not group_by:
+        row = {label: _apply(subset[column], fn, column) for label, (column, fn) in named.items()}
+        row.update({label: len(subset) for label in counts})
+        return pd.DataFrame([row])
+
+    groups = subset.groupby(group_by, dropna=False, observed=True, sort=False)
+    try:
+        result = groups.agg(**named) if named else pd.DataFrame(index=groups.size().index)
+    except (TypeError, ValueError) as exc:
+        # Named aggregation does not say which column failed; find it one at a time.
+        for column, fn in named.values():
+            _apply(groups[column], fn, column)
+        raise QueryError("The aggregates could not be computed over these groups.") from exc
+    for label in counts:
+        result[label] = groups.size()
+    return result.reset_index()
+
+
+def _apply(values: Any, fn: str, column: Any) -> Any:
+    """``values.agg(fn)`` -- a column or a column's groups -- with a failure named after the column."""
+    try:
+        return values.agg(fn)
+    except (TypeError, ValueError) as exc:
+        raise _mixed(column, f"aggregated with '{fn}'") from exc
+
+
+def _sorted(values: pd.DataFrame | pd.Series, ascending: bool, column: Any, **by: Any) -> Any:
+    try:
+        return values.sort_values(ascending=ascending, kind="stable", na_position="last", **by)
+    except TypeError as exc:
+        raise _mixed(column, "sorted") from exc
+
+
+def execute(df: pd.DataFrame, spec: dict[str, Any]) -> QueryResult:
+    """Runs ``spec`` over ``df``. Raises :class:`QueryError` for a spec it cannot run."""
+    mask = np.ones(len(df), dtype=bool)
+    for condition in spec.get("filters") or []:
+        mask &= _condition(df, condition)
+    if spec.get("search"):
+        mask &= _search(df, str(spec["search"]))
+
+    group_by = [str(name) for name in spec.get("group_by") or []]
+    aggregates = spec.get("aggregates") or []
+    sort_by = spec.get("sort_by")
+    ascending = spec.get("sort_order", "asc") != "desc"
+
+    if group_by or aggregates:
+        for name in group_by:
+            _column(df, name)
+        frame = _aggregate(df[mask] if not mask.all() else df, group_by, aggregates)
+        if sort_by:
+            _column(frame, sort_by)
+            frame = _sorted(frame, ascending, sort_by, by=sort_by)
+        frame = frame.reset_index(drop=True)
+        return QueryResult(columns=[str(column) for column in frame.columns], frame=frame)
+
+    columns = list(spec.get("columns") or df.columns)
+    for name in columns:
+        _column(df, name)
+    positions = np.flatnonzero(mask)
+    if sort_by:
+        keys = _column(df, sort_by).take(positions).reset_index(drop=True)
+        positions = positions[_sorted(keys, ascending, sort_by).index]
+    positions = positions.astype(np.int32) if len(df) < 2**31 else positions
+    return QueryResult(columns=columns, positions=positions)
+
+
+class QueryResults:
+    """One table's recent results, by :func:`spec_key`, tied to the frame they came from."""
+
+    def __init__(self, limit: int = MAX_RESULTS, max_bytes: int = MAX_RESULT_BYTES):
+        self.limit = max(1, limit)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._frame: pd.DataFrame | None = None
+        self._results: OrderedDict[str, QueryResult] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def run(self, df: pd.DataFrame, spec: dict[str, Any]) -> tuple[QueryResult, bool]:
+        """The spec's result, and whether it came from the cache."""
+        key = spec_key(spec)
+        with self._lock:
+            if self._frame is not df:
+                self._frame = df
+                self._results.clear()
+            cached = self._results.get(key)
+            if cached is not None:
+                self._results.move_to_end(key)
+                return cached, True
+        result = execute(df, spec)
+        with self._lock:
+            if self._frame is df and result.nbytes <= self.max_bytes:
+                self._results[key] = result
+                while len(self._results) > self.limit or self._held() > self.max_bytes:
+                    self._results.popitem(last=False)
+        return result, False
+
+    def _held(self) -> int:
+        return sum(result.nbytes for result in self._results.values())
+
+
+__all__ = [
+    "AGGREGATES",
+    "ALL_ROWS",
+    "FILTER_OPS",
+    "MAX_RESULTS",
+    "MAX_RESULT_BYTES",
+    "QueryError",
+    "QueryResult",
+    "QueryResults",
+    "execute",
+    "spec_key",
+]
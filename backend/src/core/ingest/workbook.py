@@ -0,0 +1,191 @@
+"""Multi-sheet workbooks: one sheet loaded, the rest on demand.
+
+``pd.read_excel(path, sheet_name=None)`` parses every sheet of a workbook into
+memory just to pick the largest one. A finance workbook with dozens of sheets
+paid minutes and gigabytes for a frame it then mostly threw away.
+
+Now the sheet sizes come from each worksheet's ``<dimension>`` record, read in
+openpyxl's read-only mode without touching a cell, and only the chosen sheet is
+parsed. The workbook itself is kept in the session workspace under ``sheets/``
+with an index of the other sheets, and both runtimes expose those sheets
+through ``tables``: the first ``tables['<key>']`` reads that one sheet and
+keeps the frame, so an analysis pays for exactly the sheets it looks at.
+
+Legacy ``.xls`` files have no cheap dimension record; they are parsed in full as
+before and have no lazy sheets.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import shutil
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+
+from src.utils.logging import logger
+
+
+#: The workspace subdirectory holding kept workbooks and their sheet index.
+SHEETS_DIRNAME = "sheets"
+INDEX_NAME = "index.json"
+
+
+def sheet_dimensions(path: Path) -> dict[str, int] | None:
+    """Rows per worksheet (header included), in workbook order.
+
+    Read from the dimension records alone. A sheet whose writer left no record
+    is counted by streaming its rows, still without building a frame. Returns
+    ``None`` when the file is not something openpyxl reads -- the caller falls
+    back to a full parse.
+    """
+    try:
+        import openpyxl
+    except ImportError:
+        return None
+    try:
+        book = openpyxl.load_workbook(path, read_only=True, data_only=True, keep_links=False)
+    except Exception as exc:
+        logger.debug("Workbook metadata unreadable; parsing in full", path=str(path), error=str(exc))
+        return None
+    try:
+        sizes: dict[str, int] = {}
+        for sheet in book.worksheets:
+            if not hasattr(sheet, "iter_rows"):
+                continue  # a chartsheet
+            rows = sheet.max_row
+            if rows is None:
+                sheet.reset_dimensions()
+                rows = sum(1 for _ in sheet.iter_rows(values_only=True))
+            sizes[sheet.title] = int(rows)
+        return sizes
+    finally:
+        book.close()
+
+
+def sheet_key(table_key: str, sheet: str) -> str:
+    """How a lazy sheet is addressed in ``tables``: ``<workbook key>_<sheet>``."""
+    slug = re.sub(r"[^a-z0-9]+", "_", sheet.strip().lower()).strip("_") or "sheet"
+    return f"{table_key}_{slug}"
+
+
+def read_sheet(path: Path, sheet: str, limit: int | None = None) -> pd.DataFrame:
+    """Parses one sheet, stopping after ``limit`` data rows."""
+    return pd.read_excel(path, sheet_name=sheet, nrows=limit)
+
+
+def sheets_dir(workspace: Path) -> Path:
+    return workspace / SHEETS_DIRNAME
+
+
+def lazy_index(workspace: Path) -> dict[str, dict[str, Any]]:
+    """Every lazily loadable sheet in a workspace, keyed like ``tables``."""
+    path = sheets_dir(workspace) / INDEX_NAME
+    if not path.is_file():
+        return {}
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as exc:
+        logger.warning("Unreadable sheet index", path=str(path), error=str(exc))
+        return {}
+
+
+def register(workspace: Path, table_key: str, workbook: Path, sheets: dict[str, int], limit: int) -> dict[str, str]:
+    """Moves ``workbook`` into the workspace and indexes its other ``sheets``.
+
+    ``sheets`` maps sheet name to data rows. Returns ``{key: sheet}`` for what
+    was registered. Any entries from an earlier workbook under the same
+    ``table_key`` are replaced, so a re-upload cannot leave stale sheets behind.
+    """
+    forget(workspace, table_key)
+    if not sheets:
+        return {}
+    directory = sheets_dir(workspace)
+    directory.mkdir(parents=True, exist_ok=True)
+    stored = directory / f"{table_key}{workbook.suffix.lower()}"
+    shutil.move(str(workbook), stored)
+
+    index = lazy_index(workspace)
+    registered: dict[str, str] = {}
+    for sheet, rows in sheets.items():
+        key = sheet_key(table_key, sheet)
+        if key == table_key or key in registered:
+            continue
+        index[key] = {"workbook": table_key, "file": stored.name, "sheet": sheet, "rows": int(rows), "limit": limit}
+        registered[key] = sheet
+    _write_index(workspace, index)
+    return registered
+
+
+def forget(workspace: Path, table_key: str) -> None:
+    """Drops a workbook and every sheet registered from it."""
+    index = lazy_index(workspace)
+    owned = {key: entry for key, entry in index.items() if entry.get("workbook") == table_key}
+    if not owned:
+        return
+    for entry in owned.values():
+        (sheets_dir(workspace) / entry["file"]).unlink(missing_ok=True)
+    _write_index(workspace, {key: entry for key, entry in index.items() if key not in owned})
+
+
+def _write_index(workspace: Path, index: dict[str, dict[str, Any]]) -> None:
+    path = sheets_dir(workspace) / INDEX_NAME
+    if not index:
+        path.unlink(missing_ok=True)
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(index, indent=1), encoding="utf-8")
+
+
+class LazyTables(dict):
+    """``tables`` with the workspace's lazy sheets behind it.
+
+    Holds the loaded frames like a plain dict. A missing key that names a lazy
+    sheet is read from its workbook on that first access and kept, so the next
+    access is a lookup. ``in`` answers for lazy sheets too, so a generated
+    ``if 'q2' in tables`` does not load anything to find out.
+
+    The daemon carries its own copy of this class in ``DAEMON_SCRIPT``; the two
+    must agree on the index format above.
+    """
+
+    def __init__(self, frames: dict[str, pd.DataFrame], workspace: Path):
+        super().__init__(frames)
+        self._workspace = workspace
+        self._lazy = lazy_index(workspace)
+
+    def __missing__(self, key: str) -> pd.DataFrame:
+        entry = self._lazy.get(key)
+        if entry is None:
+            raise KeyError(key)
+        frame = read_sheet(sheets_dir(self._workspace) / entry["file"], entry["sheet"], entry.get("limit"))
+        self[key] = frame
+        return frame
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key: object) -> bool:
+        return super().__contains__(key) or key in self._lazy
+
+    def pending(self) -> list[str]:
+        """Lazy sheets not read yet."""
+        return sorted(key for key in self._lazy if not super().__contains__(key))
+
+
+__all__ = [
+    "SHEETS_DIRNAME",
+    "LazyTables",
+    "forget",
+    "lazy_index",
+    "read_sheet",
+    "register",
+    "sheet_dimensions",
+    "sheet_key",
+    "sheets_dir",
+]
@@ -31,6 +31,8 @@ from typing import Any
 
 from src.config import settings
 from src.core.data_mode import check_provider
+from src.core.infra.metrics import LLM_SECONDS, LLM_TOKENS, LLM_TOKENS_PER_SECOND
+from src.core.infra.profiling import hot_paths
 from src.core.llm.resources import LOCAL_PROVIDERS, ResidentPlan, plan_for_models
 from src.core.llm.usage import extract_usage, usage_ledger
 from src.providers import describe
@@ -488,15 +490,32 @@ class LLMProvider:
     # ------------------------------------------------------------------ #
     # Invocation
     # ------------------------------------------------------------------ #
-    def _record(self, spec: ModelSpec, role: LLMRole, session_id: str | None, response: Any, prompt: str, text: str):
-        """Books one call against the session. Never raises — a meter must not fail a turn."""
+    def _record(
+        self,
+        spec: ModelSpec,
+        role: LLMRole,
+        session_id: str | None,
+        response: Any,
+        prompt: str,
+        text: str,
+        seconds: float,
+    ):
+        """Books one call against the session and the metrics. Never raises — a meter must not fail a turn."""
         try:
-            usage_ledger.record(
-                session_id, spec.provider, spec.model, role.value, extract_usage(response, prompt, text)
-            )
+            usage = extract_usage(response, prompt, text)
+            usage_ledger.record(session_id, spec.provider, spec.model, role.value, usage)
+            LLM_SECONDS.observe(seconds, provider=spec.provider, role=role.value, outcome="ok")
+            LLM_TOKENS.inc(usage.input_tokens, provider=spec.provider, role=role.value, direction="input")
+            LLM_TOKENS.inc(usage.output_tokens, provider=spec.provider, role=role.value, direction="output")
+            if usage.output_tokens and seconds > 0:
+                LLM_TOKENS_PER_SECOND.observe(usage.output_tokens / seconds, provider=spec.provider)
         except Exception as exc:  # pragma: no cover - accounting is best effort
             logger.warning("Could not record token usage", error=str(exc))
 
+    @staticmethod
+    def _record_failure(spec: ModelSpec, role: LLMRole, seconds: float) -> None:
+        LLM_SECONDS.observe(seconds, provider=spec.provider, role=role.value, outcome="error")
+
     def complete(
         self,
         prompt: str,
@@ -515,12 +534,15 @@ class LLMProvider:
         client = self.get_client(spec)
         if client is None:
             raise LLMUnavailableError(self._unavailable_message(spec))
+        started = time.perf_counter()
         try:
-            response = client.invoke(prompt)
+            with hot_paths.timed("llm.call"):
+                response = client.invoke(prompt)
             text = self._extract_text(response)
-            self._record(spec, role, session_id, response, prompt, text)
+            self._record(spec, role, session_id, response, prompt, text, time.perf_counter() - started)
             return text
         except Exception as exc:
+            self._record_failure(spec, role, time.perf_counter() - started)
             logger.error("LLM completion failed", provider=spec.provider, model=spec.model, error=str(exc))
             raise LLMUnavailableError(str(exc)) from exc
 
@@ -541,12 +563,15 @@ class LLMProvider:
         client = self.get_client(spec)
         if client is None:
             raise LLMUnavailableError(self._unavailable_message(spec))
+        started = time.perf_counter()
         try:
-            response = await client.ainvoke(prompt)
+            with hot_paths.timed("llm.call"):
+                response = await client.ainvoke(prompt)
             text = self._extract_text(response)
-            self._record(spec, role, session_id, response, prompt, text)
+            self._record(spec, role, session_id, response, prompt, text, time.perf_counter() - started)
             return text
         except Exception as exc:
+            self._record_failure(spec, role, time.perf_counter() - started)
             logger.error("LLM completion failed", provider=spec.provider, model=spec.model, error=str(exc))
             raise LLMUnavailableError(str(exc)) from exc
 
@@ -591,18 +616,21 @@ class LLMProvider:
         # is booked exactly once, which is what `test_turn_cost` pins.
         produced: list[str] = []
         counted: Any = None
+        started = time.perf_counter()
         try:
-            async for chunk in client.astream(prompt):
-                text = self._extract_text(chunk)
-                if getattr(chunk, "usage_metadata", None) or getattr(chunk, "response_metadata", None):
-                    counted = chunk
-                if text:
-                    produced.append(text)
-                    yield text
+            with hot_paths.timed("llm.call"):
+                async for chunk in client.astream(prompt):
+                    text = self._extract_text(chunk)
+                    if getattr(chunk, "usage_metadata", None) or getattr(chunk, "response_metadata", None):
+                        counted = chunk
+                    if text:
+                        produced.append(text)
+                        yield text
         except Exception as exc:
+            self._record_failure(spec, role, time.perf_counter() - started)
             logger.error("LLM streaming failed", provider=spec.provider, model=spec.model, error=str(exc))
             raise LLMUnavailableError(str(exc)) from exc
-        self._record(spec, role, session_id, counted, prompt, "".join(produced))
+        self._record(spec, role, session_id, counted, prompt, "".join(produced), time.perf_counter() - started)
 
     async def stream_to(
         self,
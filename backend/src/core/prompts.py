@@ -119,9 +119,12 @@ def _related_tables(query: str, session_id: str | None, active_columns: list[str
     for schema in schemas:
         columns = ", ".join(str(c) for c in schema.get("columns", [])[:25])
         lines.append(f"- `{schema['filename']}` ({schema.get('row_count', 0)} rows): {columns}")
-        shared = sorted({str(c).lower() for c in schema.get("columns", [])} & {str(c).lower() for c in active_columns})
-        if shared:
-            lines.append(f"  Possible join keys: {', '.join(shared[:5])}")
+        keys = [
+            mine if str(mine).lower() == str(theirs).lower() else f"{mine} = {theirs}"
+            for mine, theirs in schema.get("join_keys", [])
+        ]
+        if keys:
+            lines.append(f"  Possible join keys: {', '.join(keys[:5])}")
     # The root differs per backend, so it is asked for rather than assumed —
     # a container path handed to a local runtime names nothing.
     lines.append(
@@ -340,6 +343,59 @@ def _workspace_root(session_id: str | None = None) -> str:
     return f"{workspace_for(session_id).as_posix()}/"
 
 
+def _full_tables_block(session_id: str | None = None) -> str:
+    """Tells the model which tables are sampled and how to reach the rest.
+
+    Read off the workspace rather than the session, because that is what the
+    runtime binds from -- and a subagent's workspace holds its own snapshot. The
+    row counts come from Parquet footers, so this costs a few small reads.
+    """
+    from src.core.ingest.outofcore import full_tables, row_count
+    from src.core.tools.runtime import capabilities, workspace_for
+
+    if not session_id or "duckdb" not in capabilities(session_id):
+        return ""
+    paths = full_tables(workspace_for(session_id))
+    if not paths:
+        return ""
+
+    lines = ["\n<full_tables>", "These tables are too large for memory. `df` and `tables[...]` hold samples of them:"]
+    for key, path in paths.items():
+        lines.append(
+            f"- `{key}`: {row_count(path):,} rows in full -- `full_tables['{key}']`, or "
+            f'`db.sql("SELECT ... FROM {key}")`'
+        )
+    lines.append(
+        "`db` is a DuckDB connection over the complete data. Push every count, sum, mean, distinct count, "
+        "group-by, filter and join that must be exact to SQL, and bring back only the aggregated result "
+        "with `.df()`. Never call `.df()` on a whole full table. Use the sample for shape, examples and plots."
+    )
+    lines.append("</full_tables>\n")
+    return "\n".join(lines)
+
+
+def _sheets_block(session_id: str | None = None) -> str:
+    """Names the workbook sheets that exist in ``tables`` without being loaded.
+
+    They are absent from the schema context -- nothing was parsed to profile
+    them -- so without this the model cannot know to ask for them.
+    """
+    from src.core.ingest.workbook import lazy_index
+    from src.core.tools.runtime import workspace_for
+
+    if not session_id:
+        return ""
+    index = lazy_index(workspace_for(session_id))
+    if not index:
+        return ""
+    lines = ["\n<workbook_sheets>", "Other sheets of uploaded workbooks. Each loads on first `tables[...]` access:"]
+    for key, entry in index.items():
+        lines.append(f"- `tables['{key}']`: sheet '{entry['sheet']}', ~{entry['rows']:,} rows")
+    lines.append("Column names are as the workbook spells them; inspect `.columns` before relying on one.")
+    lines.append("</workbook_sheets>\n")
+    return "\n".join(lines)
+
+
 def _visualization_rules(session_id: str | None = None) -> str:
     """How to draw, given what this runtime can actually draw with.
 
@@ -443,7 +499,7 @@ loop over rows, and use the library that already implements a method rather than
 </available_libraries>
 
 {context}
-{plan_block}{error_block}{revision_block}{negative_block}
+{_full_tables_block(session_id)}{_sheets_block(session_id)}{plan_block}{error_block}{revision_block}{negative_block}
 <user_request>
 {instruction}
 </user_request>
@@ -514,7 +570,7 @@ coding engine implements it. You never write code yourself.
 </role>
 
 {context}
-{skills}{memory_context}{history}{revision_block}
+{_full_tables_block(session_id)}{_sheets_block(session_id)}{skills}{memory_context}{history}{revision_block}
 <user_request>
 {instruction}
 </user_request>
@@ -0,0 +1,199 @@
+"""Lexical retrieval from an inverted index.
+
+Without a semantic encoder every lexical ranking in the app -- skill chunks,
+reference-document passages, column names, workspace schemas -- re-tokenized
+every candidate on every query and compared token sets one by one. That paid
+for the whole corpus per query, for something the corpus does not change
+between queries, and it ranked on raw overlap, so a match on a rare word and a
+match on a word in every passage scored alike.
+
+:class:`LexicalIndex` tokenizes each passage once, when it is added, and keeps
+postings (term -> passages and counts) and passage lengths. A query touches only
+the postings of its own terms, and three scores fall out of the same lookup:
+
+* **BM25**, for ordering: term frequency saturated by ``k1``, normalised by
+  passage length through ``b``, weighted by how rare the term is;
+* **coverage**, the share of the query's terms a passage contains, which lands
+  on the same scale as an encoder's cosine and is what the existing
+  ``*_MIN_SIMILARITY`` floors gate on (see :meth:`SkillRegistry.search
+  <src.core.skills.registry.SkillRegistry.search>`);
+* **Jaccard overlap**, the short-string measure column and schema matching
+  already used, computed from the same counts.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from collections.abc import Iterable
+
+
+STOPWORDS = frozenset(
+    {
+        "the",
+        "a",
+        "an",
+        "and",
+        "or",
+        "of",
+        "to",
+        "in",
+        "on",
+        "for",
+        "by",
+        "with",
+        "is",
+        "are",
+        "was",
+        "were",
+        "be",
+        "show",
+        "me",
+        "please",
+        "can",
+        "you",
+        "what",
+        "which",
+        "how",
+        "many",
+        "much",
+        "give",
+        "get",
+        "make",
+        "plot",
+        "chart",
+        "graph",
+        "data",
+        "dataset",
+        "column",
+        "columns",
+        "row",
+        "rows",
+        "value",
+        "values",
+        "using",
+        "use",
+        "from",
+        "that",
+        "this",
+        "it",
+        "all",
+    }
+)
+
+TOKEN = re.compile(r"[a-zA-Z_][a-zA-Z0-9_]{1,}")
+
+#: BM25's term-frequency saturation and length normalisation, at the usual values.
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def terms(text: str) -> list[str]:
+    """Content words, lowercased, in order and with repeats."""
+    return [token for token in TOKEN.findall(str(text).lower()) if token not in STOPWORDS]
+
+
+def tokenize(text: str) -> set[str]:
+    """Content words only, lowercased."""
+    return set(terms(text))
+
+
+def fold(term: str) -> str:
+    """A plural folded onto its singular, so "means" matches "mean".
+
+    Deliberately cruder than a stemmer: one trailing ``s``, never from ``ss``
+    or a short word. Applied to passages and queries alike, inside the index
+    only -- :func:`tokenize` keeps returning the words as written.
+    """
+    if len(term) > 3 and term.endswith("s") and not term.endswith("ss"):
+        return term[:-1]
+    return term
+
+
+def _query_terms(query: str | set[str]) -> set[str]:
+    return {fold(term) for term in (tokenize(query) if isinstance(query, str) else query)}
+
+
+class LexicalIndex:
+    """Postings over a growing list of passages, addressed by insertion order."""
+
+    def __init__(self, passages: Iterable[str] = ()):
+        self._postings: dict[str, list[tuple[int, int]]] = {}
+        self._lengths: list[int] = []
+        self._distinct: list[int] = []
+        self._total = 0
+        for passage in passages:
+            self.add(passage)
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, passage: str) -> int:
+        """Indexes one passage and returns its position."""
+        position = len(self._lengths)
+        counts = Counter(fold(term) for term in terms(passage))
+        for term, count in counts.items():
+            self._postings.setdefault(term, []).append((position, count))
+        length = sum(counts.values())
+        self._lengths.append(length)
+        self._distinct.append(len(counts))
+        self._total += length
+        return position
+
+    # ------------------------------------------------------------------ #
+    def matches(self, query: str | set[str]) -> dict[int, int]:
+        """How many of the query's distinct terms each matching passage contains."""
+        wanted = _query_terms(query)
+        found: dict[int, int] = {}
+        for term in wanted:
+            for position, _count in self._postings.get(term, ()):
+                found[position] = found.get(position, 0) + 1
+        return found
+
+    def bm25(self, query: str | set[str]) -> dict[int, float]:
+        """BM25 for every passage containing at least one query term."""
+        wanted = _query_terms(query)
+        passages = len(self._lengths)
+        if not passages or not wanted:
+            return {}
+        average = self._total / passages or 1.0
+        scores: dict[int, float] = {}
+        for term in wanted:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1.0 + (passages - len(postings) + 0.5) / (len(postings) + 0.5))
+            for position, count in postings:
+                norm = 1.0 - BM25_B + BM25_B * self._lengths[position] / average
+                scores[position] = scores.get(position, 0.0) + idf * count * (BM25_K1 + 1) / (count + BM25_K1 * norm)
+        return scores
+
+    def jaccard(self, query: str | set[str]) -> dict[int, float]:
+        """``|query ∩ passage| / |query ∪ passage|`` over distinct terms, for matching passages."""
+        wanted = _query_terms(query)
+        return {
+            position: shared / (len(wanted) + self._distinct[position] - shared)
+            for position, shared in self.matches(wanted).items()
+        }
+
+    def rank(self, query: str, min_coverage: float = 0.0) -> list[tuple[float, int]]:
+        """``(coverage, position)`` for passages covering at least ``min_coverage``.
+
+        Ordered by BM25, best first; the score returned is the coverage, so a
+        caller's similarity floor keeps meaning what it meant.
+        """
+        wanted = _query_terms(query)
+        if not wanted:
+            return []
+        scores = self.bm25(wanted)
+        hits = [
+            (shared / len(wanted), scores.get(position, 0.0), position)
+            for position, shared in self.matches(wanted).items()
+            if shared / len(wanted) >= min_coverage
+        ]
+        hits.sort(key=lambda hit: (hit[1], hit[0], -hit[2]), reverse=True)
+        return [(coverage, position) for coverage, _score, position in hits]
+
+
+__all__ = ["BM25_B", "BM25_K1", "STOPWORDS", "LexicalIndex", "fold", "terms", "tokenize"]
@@ -25,6 +25,7 @@ from __future__ import annotations
 
 import re
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Any
 
 import pandas as pd
@@ -32,63 +33,10 @@ import pandas as pd
 from src.config import settings
 from src.core.database import db_mgr
 from src.core.embeddings import embedding_service
+from src.core.rag.lexical import LexicalIndex, fold, tokenize
 from src.utils.logging import logger
 
 
-STOPWORDS = frozenset(
-    {
-        "the",
-        "a",
-        "an",
-        "and",
-        "or",
-        "of",
-        "to",
-        "in",
-        "on",
-        "for",
-        "by",
-        "with",
-        "is",
-        "are",
-        "was",
-        "were",
-        "be",
-        "show",
-        "me",
-        "please",
-        "can",
-        "you",
-        "what",
-        "which",
-        "how",
-        "many",
-        "much",
-        "give",
-        "get",
-        "make",
-        "plot",
-        "chart",
-        "graph",
-        "data",
-        "dataset",
-        "column",
-        "columns",
-        "row",
-        "rows",
-        "value",
-        "values",
-        "using",
-        "use",
-        "from",
-        "that",
-        "this",
-        "it",
-        "all",
-    }
-)
-
-
 @dataclass
 class RetrievedChunk:
     text: str
@@ -99,12 +47,6 @@ class RetrievedChunk:
         return {"text": self.text, "score": round(self.score, 4), "source": self.source}
 
 
-def tokenize(text: str) -> set[str]:
-    """Content words only, lowercased."""
-    tokens = re.findall(r"[a-zA-Z_][a-zA-Z0-9_]{1,}", str(text).lower())
-    return {t for t in tokens if t not in STOPWORDS}
-
-
 def mentions_column(query: str, column: str) -> bool:
     """Whether ``query`` names ``column``, matched on word boundaries.
 
@@ -121,8 +63,14 @@ def mentions_column(query: str, column: str) -> bool:
 
 
 def lexical_overlap(query_tokens: set[str], candidate: str) -> float:
-    """Jaccard-ish overlap used when no embedding model is available."""
-    candidate_tokens = tokenize(candidate)
+    """Jaccard-ish overlap used when no embedding model is available.
+
+    For one candidate. Ranking many goes through :func:`name_index` instead,
+    which scores the same way without re-tokenizing them per query -- plurals
+    folded on both sides included, so a name scores alike by either path.
+    """
+    candidate_tokens = {fold(token) for token in tokenize(candidate)}
+    query_tokens = {fold(token) for token in query_tokens}
     if not query_tokens or not candidate_tokens:
         return 0.0
     intersection = len(query_tokens & candidate_tokens)
@@ -131,6 +79,16 @@ def lexical_overlap(query_tokens: set[str], candidate: str) -> float:
     return intersection / len(query_tokens | candidate_tokens)
 
 
+@lru_cache(maxsize=64)
+def name_index(names: tuple[str, ...]) -> LexicalIndex:
+    """An index over a set of names -- a frame's columns, a schema's -- built once per set.
+
+    Keyed by the names themselves, so the same frame or schema asked about
+    question after question is tokenized the first time only.
+    """
+    return LexicalIndex(names)
+
+
 class ContextRetriever:
     """Selects the slices of available context that are worth spending tokens on."""
 
@@ -158,14 +116,16 @@ class ContextRetriever:
         if len(all_columns) <= limit:
             return all_columns, False
 
-        query_tokens = tokenize(query)
+        overlap = name_index(tuple(str(c) for c in all_columns)).jaccard(tokenize(query))
 
         explicit = [c for c in all_columns if mentions_column(query, c)]
-        remaining = [c for c in all_columns if c not in explicit]
+        explicit_set = set(explicit)
 
         scored: list[tuple[float, str]] = []
-        for column in remaining:
-            score = lexical_overlap(query_tokens, str(column))
+        for position, column in enumerate(all_columns):
+            if column in explicit_set:
+                continue
+            score = overlap.get(position, 0.0)
             # Numeric columns are more often the subject of analysis.
             if pd.api.types.is_numeric_dtype(df[column].dtype):
                 score += 0.05
@@ -274,33 +234,47 @@ class ContextRetriever:
         active_columns: list[str],
         limit: int = 3,
     ) -> list[dict[str, Any]]:
-        """Other workspace tables that share a join key or match the question."""
+        """Other workspace tables that share a join key or match the question.
+
+        Only the tables the session's schema graph says could score at all are
+        scored -- those joining the active table or sharing a word with the
+        question -- so a workspace's size does not set a prompt's cost. Each is
+        returned with ``join_keys``, the ``(active column, its column)`` pairs
+        the graph found from names and values; an active table the registry
+        does not know falls back to shared column names.
+        """
+        # Imported here: the graph indexes on `rag.lexical`, and importing this
+        # package loads the retriever first.
+        from src.core.tools.schema_graph import schema_graphs
+
         try:
-            schemas = db_mgr.get_schemas(session_id=session_id)
+            graph = schema_graphs.get(session_id)
         except Exception as exc:
             logger.warning("Schema retrieval failed", error=str(exc))
             return []
-        if len(schemas) <= 1:
+        if len(graph) <= 1:
             return []
 
         active = {str(c).lower() for c in active_columns}
         query_tokens = tokenize(query)
 
+        joins = graph.joins_with(active)
+
         scored: list[tuple[float, dict[str, Any]]] = []
-        for schema in schemas:
-            columns = {str(c).lower() for c in schema.get("columns", [])}
-            if columns == active:
-                continue  # this is the active table
-            shared = len(columns & active)
+        for schema in graph.candidates(query_tokens, active):
+            if joins is None:
+                columns = {str(c).lower() for c in schema.get("columns", [])}
+                join_keys = [(column, column) for column in sorted(columns & active)]
+            else:
+                join_keys = joins.get(schema["filename"], [])
+            shared = len(join_keys)
             name_score = lexical_overlap(query_tokens, schema.get("filename", ""))
-            column_score = max(
-                (lexical_overlap(query_tokens, c) for c in schema.get("columns", [])),
-                default=0.0,
-            )
+            names = tuple(str(c) for c in schema.get("columns", []))
+            column_score = max(name_index(names).jaccard(query_tokens).values(), default=0.0) if names else 0.0
             # A shared column is a concrete join opportunity and outranks fuzzy text matching.
             score = shared * 1.0 + name_score + column_score
             if score > 0:
-                scored.append((score, schema))
+                scored.append((score, {**schema, "join_keys": join_keys}))
 
         scored.sort(key=lambda item: item[0], reverse=True)
         return [schema for _, schema in scored[:limit]]
@@ -18,6 +18,7 @@ from src.config import settings
 from src.core.database import db_mgr
 from src.core.embeddings import embedding_service
 from src.core.infra.cache import get_cache
+from src.core.infra.metrics import SEMANTIC_CACHE_LOOKUPS
 from src.utils.logging import logger
 
 
@@ -42,10 +43,12 @@ class SemanticCache:
         exact = cache.get(self._exact_key(query, active_columns))
         if isinstance(exact, str) and exact:
             logger.info("Semantic cache hit (exact)")
+            SEMANTIC_CACHE_LOOKUPS.inc(result="exact")
             return exact
 
         entries = db_mgr.get_cache_entries(active_columns)
         if not entries:
+            SEMANTIC_CACHE_LOOKUPS.inc(result="miss")
             return None
 
         active = sorted(active_columns)
@@ -53,19 +56,23 @@ class SemanticCache:
         # is not valid for another even if the questions are worded identically.
         candidates = [entry for entry in entries if sorted(entry.get("columns", [])) == active]
         if not candidates:
+            SEMANTIC_CACHE_LOOKUPS.inc(result="miss")
             return None
 
         ranked = embedding_service.rank(query.strip().lower(), [(c["query"], c.get("embedding")) for c in candidates])
         if not ranked:
+            SEMANTIC_CACHE_LOOKUPS.inc(result="miss")
             return None
 
         score, index = ranked[0]
         if score < self.threshold:
             logger.info("Semantic cache miss", best_similarity=round(score, 4))
+            SEMANTIC_CACHE_LOOKUPS.inc(result="miss")
             return None
 
         best = candidates[index]
         logger.info("Semantic cache hit", similarity=round(score, 4), cached_query=best["query"])
+        SEMANTIC_CACHE_LOOKUPS.inc(result="similar")
         cache.set(self._exact_key(query, active_columns), best["code"], ttl=3600)
         return best["code"]
 
@@ -32,14 +32,26 @@ from typing import Any
 import pandas as pd
 
 from src.config import settings
+from src.core.agent.replay import turn_streams
 from src.core.data_mode import DataPolicy, normalize as normalize_data_mode
 from src.core.database import db_mgr
 from src.core.execution import CodeExecutor, isolation_for
-from src.core.ingest.documents import ContextDocument, search_documents as rank_document_chunks
+from src.core.infra.cluster import session_directory
+from src.core.infra.metrics import registry
+from src.core.ingest import outofcore, workbook as workbook_sheets
+from src.core.ingest.documents import ContextDocument, document_index, search_documents as rank_document_chunks
 from src.core.ingest.loader import safe_write_feather
+from src.core.ingest.preview import SortOrders
+from src.core.ingest.query import QueryResults
 from src.core.llm.usage import usage_ledger
 from src.core.permissions import PermissionState
+from src.core.rag.lexical import LexicalIndex
 from src.core.tools import runtime as runtime_backend
+from src.core.tools.governor import governor
+from src.core.tools.resources import adaptive_limits
+from src.core.tools.schema_graph import schema_graphs
+from src.core.tools.schema_registry import SchemaRegistry
+from src.utils.filelinks import alias_file, freeze, share_file, write_atomically
 from src.utils.logging import logger
 
 
@@ -57,6 +69,10 @@ class DatasetHandle:
     #: so one data-policy decision can cover every table from a source, including
     #: tables imported later — see `DataPolicy.schema_only_for`.
     origin: str = ""
+    #: Cached sort orders for the preview grid; see :mod:`src.core.ingest.preview`.
+    sort_orders: SortOrders = field(default_factory=SortOrders, repr=False, compare=False)
+    #: Cached grid query results; see :mod:`src.core.ingest.query`.
+    query_results: QueryResults = field(default_factory=QueryResults, repr=False, compare=False)
 
     @property
     def table_key(self) -> str:
@@ -127,6 +143,7 @@ class Session:
         self.last_seen = time.time()
         self.datasets: dict[str, DatasetHandle] = {}
         self.documents: dict[str, ContextDocument] = {}
+        self._document_index: LexicalIndex | None = None
         self.active_dataset: str | None = None
         self.models = ModelPreferences()
         # Session-wide, seeded from the configured default. What the user has
@@ -192,8 +209,17 @@ class Session:
         profile: dict[str, Any] | None = None,
         source_format: str = "csv",
         make_active: bool = True,
+        full_data: Path | None = None,
+        workbook: Path | None = None,
     ) -> DatasetHandle:
-        """Registers a dataset and materialises it into the session workspace."""
+        """Registers a dataset and materialises it into the session workspace.
+
+        ``full_data`` is the loader's Parquet copy of the whole file when ``df``
+        is only a sample. It is moved, not copied, into ``full/`` -- it can be
+        the largest file the session holds. ``workbook`` is the uploaded Excel
+        file when the profile lists ``other_sheets``; it is moved into
+        ``sheets/`` so those sheets can load on first access from ``tables``.
+        """
         handle = DatasetHandle(
             name=name,
             df=df,
@@ -207,8 +233,49 @@ class Session:
                 self.active_dataset = name
         self.touch()
         self._materialize(handle, is_active=self.active_dataset == name)
+        self._adopt_full_copy(handle, full_data)
+        self._adopt_workbook(handle, workbook)
         return handle
 
+    def _adopt_full_copy(self, handle: DatasetHandle, full_data: Path | None):
+        """Places (or clears) the out-of-core copy for ``handle``.
+
+        Cleared when there is none, so re-uploading a smaller file under the same
+        name cannot leave the previous file's population queryable as if current.
+        """
+        target = outofcore.full_path(self.workspace, handle.table_key)
+        if full_data is None:
+            target.unlink(missing_ok=True)
+            return
+        try:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.move(str(full_data), target)
+            # Only ever replaced whole, and the largest file a subagent
+            # snapshots: read-only lets the snapshot be a hardlink.
+            freeze(target)
+        except OSError as exc:
+            logger.error("Failed to place the out-of-core copy", dataset=handle.name, error=str(exc))
+            handle.profile["out_of_core"] = False
+
+    def _adopt_workbook(self, handle: DatasetHandle, workbook: Path | None):
+        """Indexes a workbook's unloaded sheets, or clears a previous upload's."""
+        sheets = handle.profile.get("other_sheets") or {}
+        try:
+            if workbook is None or not sheets:
+                workbook_sheets.forget(self.workspace, handle.table_key)
+                return
+            workbook_sheets.register(
+                self.workspace, handle.table_key, workbook, sheets, limit=settings.MAX_INMEMORY_ROWS
+            )
+        except OSError as exc:
+            logger.error("Failed to keep the workbook's other sheets", dataset=handle.name, error=str(exc))
+            handle.profile["other_sheets"] = {}
+
+    @property
+    def lazy_tables(self) -> dict[str, dict[str, Any]]:
+        """Workbook sheets addressable in ``tables`` but not parsed yet."""
+        return workbook_sheets.lazy_index(self.workspace)
+
     def set_active(self, name: str) -> bool:
         handle = self.datasets.get(name)
         if handle is None:
@@ -229,10 +296,12 @@ class Session:
             # Dropped with the dataset, so re-uploading a file of the same name
             # does not silently inherit a policy the user set for a different one.
             self.data_policy.forget(name)
-        db_mgr.delete_schema(name, session_id=self.id)
+        SchemaRegistry.unregister(name, session_id=self.id)
         for suffix in ("", ".feather"):
             (self.workspace / f"{name}{suffix}").unlink(missing_ok=True)
         (self.workspace / "tables" / f"{handle.table_key}.feather").unlink(missing_ok=True)
+        outofcore.full_path(self.workspace, handle.table_key).unlink(missing_ok=True)
+        workbook_sheets.forget(self.workspace, handle.table_key)
         # The daemon holds the removed frame in its `tables` dict until told
         # otherwise; without this it stays queryable after the user deleted it.
         self.executor.reload_dataset()
@@ -254,11 +323,15 @@ class Session:
         tables_dir = workspace / "tables"
         tables_dir.mkdir(parents=True, exist_ok=True)
         try:
-            handle.df.to_csv(workspace / handle.name, index=False)
-            safe_write_feather(handle.df, tables_dir / f"{handle.table_key}.feather")
+            # Replaced, never rewritten in place: a subagent's snapshot may be
+            # a link to any of these files.
+            csv_path = workspace / handle.name
+            write_atomically(csv_path, lambda temporary: handle.df.to_csv(temporary, index=False))
+            table_path = tables_dir / f"{handle.table_key}.feather"
+            dtypes_preserved = safe_write_feather(handle.df, table_path)
             if is_active:
-                dtypes_preserved = safe_write_feather(handle.df, workspace / "dataset.feather")
-                handle.df.to_csv(workspace / "dataset.csv", index=False)
+                alias_file(table_path, workspace / "dataset.feather")
+                alias_file(csv_path, workspace / "dataset.csv")
                 if not dtypes_preserved:
                     logger.info(
                         "Some object columns were stringified for Feather transport",
@@ -291,8 +364,8 @@ class Session:
         """Snapshots this session's tables into a subagent's workspace.
 
         Run via `asyncio.to_thread` so several branches' snapshots -- each a
-        handful of `shutil.copy2` calls -- proceed concurrently instead of
-        blocking the event loop one at a time. A no-op under `inprocess`,
+        handful of links -- proceed concurrently instead of blocking the
+        event loop one at a time. A no-op under `inprocess`,
         which shares the parent's namespace directly and never reads a
         subagent workspace off disk.
         """
@@ -301,28 +374,55 @@ class Session:
         await asyncio.to_thread(self._snapshot_tables_for, child_id)
 
     def _snapshot_tables_for(self, child_id: str) -> None:
-        """Copies this session's materialized tables into a subagent's workspace.
-
-        A copy, not a live share: the daemon that will read these only reads
-        them once at startup, but this session can still `set_active`/upload/
-        remove a dataset while the subagent's daemon is starting or running,
-        and `remove_dataset` unlinks files outside any lock. A snapshot means a
-        concurrent mutation on the parent can never tear a file out from under
-        a subagent mid-read.
+        """Gives a subagent's workspace this session's materialized tables.
+
+        A snapshot, not a live share: this session can still `set_active`/
+        upload/remove a dataset while the subagent's daemon is starting or
+        running, and `remove_dataset` unlinks files outside any lock. But the
+        snapshot is not a copy either. Every one of these files is written
+        once and then only replaced by rename, so a reflink or a hardlink to
+        today's file is exactly as stable as a copy of it -- and costs no I/O,
+        where copying a 3 GB workspace per branch did. The daemon maps the
+        tables copy-on-write, so branches share their pages in memory too.
+
+        The sheet index is the one file rewritten in place, and is copied.
         """
         child_dir = runtime_backend.workspace_for(child_id)
         child_tables = child_dir / "tables"
         child_tables.mkdir(parents=True, exist_ok=True)
         parent_dir = self.workspace
+        shared: list[tuple[Path, Path]] = [
+            (feather, child_tables / feather.name) for feather in (parent_dir / "tables").glob("*.feather")
+        ]
+        shared += [
+            (parquet, outofcore.full_path(child_dir, key)) for key, parquet in outofcore.full_tables(parent_dir).items()
+        ]
+        shared += [
+            (parent_dir / name, child_dir / name)
+            for name in ("dataset.feather", "dataset.csv")
+            if (parent_dir / name).exists()
+        ]
+        parent_sheets = workbook_sheets.sheets_dir(parent_dir)
+        child_sheets = workbook_sheets.sheets_dir(child_dir)
+        if parent_sheets.is_dir():
+            shared += [
+                (path, child_sheets / path.name)
+                for path in parent_sheets.iterdir()
+                if path.is_file() and path.name != workbook_sheets.INDEX_NAME
+            ]
+
+        methods: dict[str, int] = {}
         try:
-            for feather in (parent_dir / "tables").glob("*.feather"):
-                shutil.copy2(feather, child_tables / feather.name)
-            for name in ("dataset.feather", "dataset.csv"):
-                source = parent_dir / name
-                if source.exists():
-                    shutil.copy2(source, child_dir / name)
+            for source, destination in shared:
+                destination.parent.mkdir(parents=True, exist_ok=True)
+                method = share_file(source, destination)
+                methods[method] = methods.get(method, 0) + 1
+            index = parent_sheets / workbook_sheets.INDEX_NAME
+            if index.is_file():
+                shutil.copy2(index, child_sheets / workbook_sheets.INDEX_NAME)
         except OSError as exc:
             logger.warning("Could not snapshot tables for subagent", subagent=child_id, error=str(exc))
+        logger.debug("Snapshotted tables for subagent", subagent=child_id, **methods)
 
     def release_subagent_runtime(self, child_id: str) -> None:
         """Frees a finished branch's process/container as soon as it is done.
@@ -350,7 +450,8 @@ class Session:
         self._subagent_ids.discard(child_id)
         self.release_subagent_runtime(child_id)
         usage_ledger.forget(child_id)
-        # The workspace holds a full snapshot of every table; nothing reads
+        adaptive_limits.forget(child_id)
+        # The workspace holds a snapshot of every table; nothing reads
         # it once the runtime that read it is gone.
         shutil.rmtree(runtime_backend.workspace_for(child_id), ignore_errors=True)
 
@@ -364,18 +465,29 @@ class Session:
     def add_document(self, document: ContextDocument) -> ContextDocument:
         with self._lock:
             self.documents[document.name] = document
+            self._document_index = None
         self.touch()
         return document
 
     def remove_document(self, name: str) -> bool:
         with self._lock:
+            self._document_index = None
             return self.documents.pop(name, None) is not None
 
     def search_documents(self, query: str, limit: int | None = None) -> list[tuple[str, str]]:
-        """Passages from the attached references that bear on ``query``."""
+        """Passages from the attached references that bear on ``query``.
+
+        The lexical index is built on the first search after the documents
+        change and reused until they change again.
+        """
         if not self.documents:
             return []
-        return rank_document_chunks(self.documents, query, limit)
+        with self._lock:
+            documents = dict(self.documents)
+            if self._document_index is None:
+                self._document_index = document_index(documents)
+            index = self._document_index
+        return rank_document_chunks(documents, query, limit, index)
 
     # ------------------------------------------------------------------ #
     # Deterministic inspection
@@ -403,6 +515,10 @@ class Session:
         if len(self.datasets) > 1:
             others = ", ".join(f"`{name}` ({len(h.df):,} rows)" for name, h in self.datasets.items())
             lines.append(f"All loaded tables (available as `tables[...]`): {others}")
+        lazy = self.lazy_tables
+        if lazy:
+            sheets = ", ".join(f"`{key}` (~{entry['rows']:,} rows)" for key, entry in lazy.items())
+            lines.append(f"Other workbook sheets, loaded on first `tables[...]` access: {sheets}")
 
         if truncated:
             lines.append(f"Describing {len(columns)} of {len(frame.columns)} columns, chosen for relevance.")
@@ -511,15 +627,22 @@ class Session:
         # Any subagent still alive at session end (a turn cancelled mid-fan-out,
         # a crash) would otherwise leak its process/container until this
         # process exits, since a subagent never appears in `SessionManager`.
+        # A turn still running is cancelled first, so it is not left calling
+        # tools on the runtime and rows released below.
+        turn_streams.forget(self.id)
         for child_id in list(self._subagent_ids):
             self.dispose_subagent(child_id)
         runtime_backend.release_runtime(self.id)
         runtime_backend.forget_capabilities(self.id)
         usage_ledger.forget(self.id)
+        adaptive_limits.forget(self.id)
         db_mgr.delete_session_data(self.id)
+        schema_graphs.forget(self.id)
+        session_directory.forget(self.id)
         with self._lock:
             self.datasets.clear()
             self.documents.clear()
+            self._document_index = None
             self.active_dataset = None
 
 
@@ -534,6 +657,7 @@ class SessionManager:
         session = Session(uuid.uuid4().hex)
         with self._lock:
             self._sessions[session.id] = session
+        session_directory.claim(session.id)
         logger.info("Session created", session=session.id, active=len(self._sessions))
         self._enforce_capacity()
         return session
@@ -546,6 +670,10 @@ class SessionManager:
             session.touch()
         return session
 
+    def peek(self, session_id: str) -> Session | None:
+        """:meth:`get` without counting as activity, for housekeeping that only looks."""
+        return self._sessions.get(session_id)
+
     def get_or_create(self, session_id: str | None = None) -> Session:
         """Resolves an id to a live session, creating one when it is absent or expired."""
         session = self.get(session_id)
@@ -575,12 +703,21 @@ class SessionManager:
         return len(sessions)
 
     def _enforce_capacity(self):
-        """Evicts the least-recently-seen session past the configured cap."""
+        """Evicts the least-recently-seen session past ``SESSION_MAX_ACTIVE``.
+
+        A session with a turn running is never chosen. Free memory is not
+        this cap's business: the resource governor limits runtimes, and stops
+        an idle one rather than dispose a whole session.
+        """
+        running = turn_streams.running_sessions()
         with self._lock:
             overflow = len(self._sessions) - settings.SESSION_MAX_ACTIVE
             if overflow <= 0:
                 return
-            ordered = sorted(self._sessions.values(), key=lambda s: s.last_seen)
+            ordered = sorted(
+                (session for session in self._sessions.values() if session.id not in running),
+                key=lambda s: s.last_seen,
+            )
             victims = [self._sessions.pop(s.id) for s in ordered[:overflow]]
         for session in victims:
             logger.warning("Evicting session to stay within capacity", session=session.id)
@@ -601,6 +738,7 @@ class SessionManager:
         return {
             "active_sessions": self.active_count,
             "max_sessions": settings.SESSION_MAX_ACTIVE,
+            "runtime_limit": governor.runtime_limit,
             "ttl_seconds": settings.SESSION_TTL_SECONDS,
             "execution_backend": runtime_backend.active_backend(),
             "active_runtimes": runtime_backend.active_runtime_count(),
@@ -608,3 +746,11 @@ class SessionManager:
 
 
 session_manager = SessionManager()
+
+registry.gauge("wizard_sessions_active", "Sessions held in memory.", collect=lambda: session_manager.active_count)
+registry.gauge(
+    "wizard_sessions_max",
+    "Sessions admitted before the oldest is evicted.",
+    collect=lambda: settings.SESSION_MAX_ACTIVE,
+)
+registry.gauge("wizard_runtimes_active", "Live execution runtimes.", collect=runtime_backend.active_runtime_count)
@@ -171,26 +171,61 @@ def load_skill(path: Path, layer: SkillLayer, *, embed: bool = True) -> Skill:
     )
 
     if embed:
-        _attach_chunks(skill)
+        attach_chunks([skill])
     return skill
 
 
-def _attach_chunks(skill: Skill) -> None:
-    """Chunks the body and embeds each passage.
+def attach_chunks(skills: list[Skill]) -> str | None:
+    """Chunks each body and embeds every passage of every skill in one batch.
 
     The description is prepended to the first chunk: a skill is most often
     matched by *what it is for*, and that sentence lives in the frontmatter
     rather than the body, so without this the one line written to be searchable
     is the one line not searched.
+
+    A skill that already has chunks keeps them and only has its vectors
+    refreshed -- in place, because the registry hands out copies of a parsed
+    skill that share its chunk objects. Passages the vector store already holds
+    for the current encoder are not encoded again; the rest go to the encoder
+    in a single ``encode_many`` call rather than one request each.
+
+    Returns the encoder label the vectors came from, or ``None`` when the
+    encoder changed under the batch and the label cannot be vouched for.
     """
-    passages = chunk_text(f"{skill.description}\n\n{skill.body}")
-    for index, text in enumerate(passages):
-        embedding = None
+    from .vectors import skill_vectors
+
+    for skill in skills:
+        if not skill.chunks:
+            passages = chunk_text(f"{skill.description}\n\n{skill.body}")
+            skill.chunks = [SkillChunk(skill=skill.name, index=index, text=text) for index, text in enumerate(passages)]
+    chunks = [chunk for skill in skills for chunk in skill.chunks]
+    if not chunks:
+        return embedding_service.backend
+
+    label = embedding_service.backend
+    persist = embedding_service.is_semantic
+    texts = [chunk.text for chunk in chunks]
+    vectors = skill_vectors.lookup(label, texts) if persist else [None] * len(chunks)
+    missing = [index for index, vector in enumerate(vectors) if vector is None]
+    if missing:
+        wanted = [texts[index] for index in missing]
+        encoded: list = []
         try:
-            embedding = embedding_service.encode(text)
+            encoded = embedding_service.encode_many(wanted)
         except Exception as exc:  # pragma: no cover - the encoder degrades on its own
             logger.debug("Skill chunk embedding failed; lexical fallback will be used", error=str(exc))
-        skill.chunks.append(SkillChunk(skill=skill.name, index=index, text=text, embedding=embedding))
+        if embedding_service.backend != label:
+            # The encoder fell over or finished warming mid-batch: these vectors
+            # are not the label's, so they are used but not stored under it.
+            label, persist = None, False
+        if len(encoded) == len(missing):
+            for index, vector in zip(missing, encoded, strict=True):
+                vectors[index] = vector
+            if persist:
+                skill_vectors.add(label, wanted, encoded)
+    for chunk, vector in zip(chunks, vectors, strict=True):
+        chunk.embedding = vector
+    return label
 
 
 def render_skill_file(name: str, description: str, body: str, extra: dict[str, Any] | None = None) -> str:
@@ -205,6 +240,7 @@ def render_skill_file(name: str, description: str, body: str, extra: dict[str, A
 __all__ = [
     "EXECUTABLE_SUFFIXES",
     "MARKDOWN_SUFFIXES",
+    "attach_chunks",
     "executable_payload",
     "load_skill",
     "offending_names",
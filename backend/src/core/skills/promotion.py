@@ -27,6 +27,18 @@ threshold. A **dismissed or promoted candidate still participates in matching**
 otherwise the next occurrence inserts a fresh row and the offer the user just
 declined comes back on the following turn.
 
+Matching
+--------
+Matching runs on every completed turn, so it may not cost more as history
+grows. An exact repeat -- the same question up to case, spacing and closing
+punctuation -- is found by :func:`instruction_hash` through an indexed column.
+Anything else is matched against a :class:`CandidateIndex` of vectors held in
+memory and kept current as occurrences are recorded, rather than by reading and
+ranking every row of the table. That index is bounded: it holds the
+most recently seen candidates, and a settled one leaves it once it has not
+recurred for ``SKILL_CANDIDATE_SETTLED_DAYS``. Past that point only an exact
+repeat still finds it, which is the case the stickiness above exists for.
+
 Nothing here writes a skill. Crossing the threshold produces a *candidate*; a file
 appears only when the user confirms, which is what the milestone means by "not
 auto-published silently".
@@ -34,9 +46,14 @@ auto-published silently".
 
 from __future__ import annotations
 
+import hashlib
+import threading
+import time
 from dataclasses import dataclass
 from typing import Any
 
+import numpy as np
+
 from src.config import settings
 from src.core.database import db_mgr
 from src.core.embeddings import embedding_service
@@ -111,22 +128,185 @@ def _from_row(entry: dict[str, Any]) -> Candidate:
     )
 
 
-def _match(kind: str, instruction: str) -> dict[str, Any] | None:
-    """The existing candidate this instruction is another occurrence of."""
-    entries = db_mgr.get_skill_candidates(kind=kind, include_settled=True)
-    if not entries:
-        return None
+def instruction_hash(instruction: str) -> str:
+    """The key an exact repeat is found by: case, spacing and closing punctuation folded."""
+    folded = " ".join(instruction.lower().split()).rstrip("?.! ")
+    return hashlib.sha256(folded.encode("utf-8")).hexdigest()[:32]
 
-    ranked = embedding_service.rank(
-        instruction, [(entry["instruction"] or "", entry["embedding"]) for entry in entries]
-    )
-    if not ranked:
-        return None
 
-    score, index = ranked[0]
-    if score < settings.TRAJECTORY_MIN_SIMILARITY:
-        return None
-    return entries[index]
+def _unit(vector: np.ndarray) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32).ravel()
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+@dataclass
+class _Entry:
+    instruction: str
+    vector: np.ndarray
+    last_seen: float
+    settled: bool
+
+
+class CandidateIndex:
+    """One kind's recently seen candidates, as unit vectors, for nearest-match lookup.
+
+    Loaded from the table once, then kept current by :func:`record`,
+    :func:`dismiss` and :func:`mark_promoted`, and topped up with rows another
+    process wrote since the last read (``last_seen`` past the newest one held).
+    What it holds is a hint: a match is re-read from the table by id before it
+    is used, so a row settled or deleted elsewhere is never acted on stale.
+    """
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self._lock = threading.Lock()
+        self._entries: dict[int, _Entry] = {}
+        self._loaded = False
+        self._watermark = 0.0
+        self._matrix: tuple[list[int], np.ndarray] | None = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ------------------------------------------------------------------ #
+    def _sync(self, width: int) -> None:
+        now = time.time()
+        if self._loaded:
+            rows = db_mgr.get_skill_candidates(
+                self.kind, include_settled=True, seen_after=self._watermark, limit=settings.SKILL_CANDIDATE_INDEX_SIZE
+            )
+        else:
+            rows = db_mgr.get_skill_candidates(
+                self.kind,
+                include_settled=True,
+                settled_since=now - settings.SKILL_CANDIDATE_SETTLED_DAYS * 86400,
+                limit=settings.SKILL_CANDIDATE_INDEX_SIZE,
+            )
+            self._loaded = True
+        for row in rows:
+            self._put(
+                int(row["id"]),
+                row["instruction"] or "",
+                row["embedding"],
+                float(row["last_seen"] or 0),
+                bool(row["dismissed"] or row["promoted_to"]),
+            )
+
+        # A changed encoder leaves stored vectors at another width; they are
+        # re-encoded rather than scored at 0.0, as `EmbeddingService.rank` does.
+        stale = [key for key, entry in self._entries.items() if entry.vector.size != width]
+        if stale:
+            encoded = embedding_service.encode_many([self._entries[key].instruction for key in stale])
+            for key, vector in zip(stale, encoded, strict=False):
+                self._entries[key].vector = _unit(vector)
+            self._matrix = None
+        self._prune(now)
+
+    def _put(self, key: int, instruction: str, vector: np.ndarray | None, last_seen: float, settled: bool) -> None:
+        entry = self._entries.get(key)
+        if entry is not None and (vector is None or entry.vector.size == np.asarray(vector).size):
+            entry.last_seen = max(entry.last_seen, last_seen)
+            entry.settled = entry.settled or settled
+        else:
+            unit = _unit(vector) if vector is not None else np.zeros(0, dtype=np.float32)
+            self._entries[key] = _Entry(instruction, unit, last_seen, settled)
+            self._matrix = None
+        self._watermark = max(self._watermark, last_seen)
+
+    def _prune(self, now: float) -> None:
+        horizon = now - settings.SKILL_CANDIDATE_SETTLED_DAYS * 86400
+        aged = {key for key, entry in self._entries.items() if entry.settled and entry.last_seen < horizon}
+        excess = len(self._entries) - len(aged) - settings.SKILL_CANDIDATE_INDEX_SIZE
+        if excess > 0:
+            kept = sorted((entry.last_seen, key) for key, entry in self._entries.items() if key not in aged)
+            aged.update(key for _seen, key in kept[:excess])
+        for key in aged:
+            del self._entries[key]
+        if aged:
+            self._matrix = None
+
+    def _scores(self, query: np.ndarray) -> tuple[list[int], np.ndarray]:
+        if self._matrix is None:
+            keys = list(self._entries)
+            matrix = (
+                np.stack([self._entries[key].vector for key in keys])
+                if keys
+                else np.zeros((0, query.size), dtype=np.float32)
+            )
+            self._matrix = (keys, matrix)
+        keys, matrix = self._matrix
+        return keys, matrix @ query
+
+    # ------------------------------------------------------------------ #
+    def match(self, vector: np.ndarray) -> dict[str, Any] | None:
+        """The candidate ``vector`` is another occurrence of, read fresh from the table."""
+        query = _unit(vector)
+        with self._lock:
+            self._sync(query.size)
+            while self._entries:
+                keys, scores = self._scores(query)
+                best = int(np.argmax(scores))
+                if float(scores[best]) < settings.TRAJECTORY_MIN_SIMILARITY:
+                    return None
+                row = db_mgr.get_skill_candidate(keys[best])
+                if row is not None and row["kind"] == self.kind:
+                    return row
+                # Deleted under us; drop it and take the next best.
+                del self._entries[keys[best]]
+                self._matrix = None
+            return None
+
+    def add(self, key: int, instruction: str, vector: np.ndarray) -> None:
+        with self._lock:
+            self._put(key, instruction, vector, time.time(), False)
+            self._prune(time.time())
+
+    def touch(self, key: int) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.last_seen = time.time()
+
+    def settle(self, key: int) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.settled = True
+
+
+_indexes = {kind: CandidateIndex(kind) for kind in KIND_LABELS}
+
+_backfill_lock = threading.Lock()
+_backfilled = False
+
+
+def _backfill_hashes() -> None:
+    """Hashes candidates recorded before the column existed, once per process.
+
+    The migration can only add the column; the fold lives here, not in SQL, so
+    older rows stay NULL -- and invisible to the exact lookup -- until this runs.
+    """
+    global _backfilled
+    if _backfilled:
+        return
+    with _backfill_lock:
+        if _backfilled:
+            return
+        rows = db_mgr.unhashed_skill_candidates()
+        db_mgr.set_skill_candidate_hashes([(instruction_hash(text), candidate_id) for candidate_id, text in rows])
+        _backfilled = True
+
+
+def _match(kind: str, instruction: str, embedding: np.ndarray | None = None) -> dict[str, Any] | None:
+    """The existing candidate this instruction is another occurrence of."""
+    _backfill_hashes()
+    exact = db_mgr.find_skill_candidate(kind, instruction_hash(instruction))
+    if exact is not None:
+        return exact
+    if embedding is None:
+        embedding = embedding_service.encode(instruction.lower())
+    return _indexes[kind].match(embedding)
 
 
 def record(
@@ -153,12 +333,17 @@ def record(
 
     try:
         embedding = embedding_service.encode(text.lower())
-        existing = _match(kind, text)
+        existing = _match(kind, text, embedding)
 
         if existing is None:
-            candidate_id = db_mgr.add_skill_candidate(kind, text, columns, plan, code, embedding)
+            candidate_id = db_mgr.add_skill_candidate(
+                kind, text, columns, plan, code, embedding, instruction_hash=instruction_hash(text)
+            )
+            if candidate_id:
+                _indexes[kind].add(candidate_id, text, embedding)
             occurrences = 1
         else:
+            _indexes[kind].touch(int(existing["id"]))
             if existing["dismissed"] or existing["promoted_to"]:
                 # Still counted, so the record stays true, but never re-offered.
                 db_mgr.bump_skill_candidate(int(existing["id"]), plan, code)
@@ -207,10 +392,8 @@ def pending() -> list[Candidate]:
 
 
 def get(candidate_id: int) -> Candidate | None:
-    for entry in db_mgr.get_skill_candidates(include_settled=True):
-        if int(entry["id"]) == candidate_id:
-            return _from_row(entry)
-    return None
+    entry = db_mgr.get_skill_candidate(candidate_id)
+    return _from_row(entry) if entry else None
 
 
 def find(instruction: str) -> Candidate | None:
@@ -234,12 +417,21 @@ def find(instruction: str) -> Candidate | None:
     return _from_row(entry) if entry else None
 
 
+def _settle(candidate_id: int) -> None:
+    for index in _indexes.values():
+        index.settle(candidate_id)
+
+
 def dismiss(candidate_id: int) -> bool:
-    return db_mgr.settle_skill_candidate(candidate_id)
+    settled = db_mgr.settle_skill_candidate(candidate_id)
+    _settle(candidate_id)
+    return settled
 
 
 def mark_promoted(candidate_id: int, skill_name: str) -> bool:
-    return db_mgr.settle_skill_candidate(candidate_id, promoted_to=skill_name)
+    settled = db_mgr.settle_skill_candidate(candidate_id, promoted_to=skill_name)
+    _settle(candidate_id)
+    return settled
 
 
 def draft_body(candidate: Candidate) -> str:
@@ -279,10 +471,12 @@ __all__ = [
     "KIND_RECOVERY",
     "KIND_RECURRING",
     "Candidate",
+    "CandidateIndex",
     "dismiss",
     "draft_body",
     "find",
     "get",
+    "instruction_hash",
     "mark_promoted",
     "pending",
     "record",
@@ -25,23 +25,36 @@ copy appears to do nothing and there is no way to find out why.
 **A malformed skill is logged and skipped, never fatal.** The same rule
 ``ConnectionStore._read`` follows: one bad file on disk must not stop the app
 answering questions.
+
+**A reload re-reads only what changed.** Every parsed skill is kept with the
+file's modification time and size and a hash of its content; a rescan stats
+each path and parses only those whose stat changed *and* whose content then
+hashes differently. The chunks of the skills that did change are embedded in one
+batch, against vectors persisted by encoder and passage (see
+:mod:`~src.core.skills.vectors`), so installing one skill into a library of
+hundreds costs one parse and a handful of encodes, not a re-embedding of all of it.
 """
 
 from __future__ import annotations
 
+import hashlib
 import threading
+import time
+from dataclasses import dataclass, replace
 from pathlib import Path
 
 from src.config import settings
 from src.core.embeddings import embedding_service
+from src.core.rag.lexical import LexicalIndex
 from src.utils.appdirs import config_dir
 from src.utils.logging import logger
 
-from .loader import load_skill, render_skill_file, skill_paths
+from .loader import attach_chunks, load_skill, render_skill_file, skill_paths
 from .spec import (
     SKILL_FILENAME,
     InvalidSkill,
     Skill,
+    SkillChunk,
     SkillError,
     SkillLayer,
     SkillMatch,
@@ -88,25 +101,52 @@ ROOTS = {
 TRUNCATION_MARKER = "\n… [truncated]"
 
 
-def _rank_by_coverage(query: str, passages: list[str]) -> list[tuple[float, int]]:
-    """Scores passages by how much of the question they contain, best first.
+#: How recent a modification time must be for a stat match to be double-checked
+#: against the content; see `_racy`.
+RACY_WINDOW_NS = 2_000_000_000
+
+
+@dataclass
+class _Parsed:
+    """One path's last parse: the skill, or why it was refused."""
+
+    signature: tuple
+    digest: str
+    skill: Skill | None = None
+    error: str = ""
 
-    Normalised by the *query's* token count rather than the union, unlike
-    :func:`~src.core.rag.retriever.lexical_overlap`. That function is right where
-    it is used -- comparing a query against a column name, where both sides are
-    short -- but dividing by the union punishes a passage for being long, and a
-    skill body is two orders of magnitude longer than a question. The union form
-    scored a perfect topical match at 0.04, which no floor can tell from noise.
+
+def _signature(path: Path) -> tuple:
+    """What a stat says about a skill path; a change means "look again".
+
+    For the directory form this includes every file name under it, because
+    adding a script to a skill directory is what makes the loader refuse it.
     """
-    from src.core.rag.retriever import tokenize
+    if path.is_dir():
+        source = (path / SKILL_FILENAME).stat()
+        listing = tuple(sorted(str(entry.relative_to(path)) for entry in path.rglob("*")))
+        return (source.st_mtime_ns, source.st_size, listing)
+    stat = path.stat()
+    return (stat.st_mtime_ns, stat.st_size)
 
-    wanted = tokenize(query)
-    if not wanted:
-        return []
 
-    scored = [(len(wanted & tokenize(text)) / len(wanted), index) for index, text in enumerate(passages)]
-    scored.sort(key=lambda item: item[0], reverse=True)
-    return scored
+def _racy(signature: tuple) -> bool:
+    """Whether the file changed too recently for its stat to be trusted.
+
+    Modification times are coarser than writes: a same-size edit landing in
+    the same tick as the previous one leaves the stat unchanged. Within that
+    window the content is hashed regardless, the way git treats a racily clean
+    index entry.
+    """
+    return time.time_ns() - signature[0] < RACY_WINDOW_NS
+
+
+def _digest(path: Path, signature: tuple) -> str:
+    source = path / SKILL_FILENAME if path.is_dir() else path
+    digest = hashlib.sha256(source.read_bytes())
+    if len(signature) > 2:
+        digest.update(repr(signature[2]).encode("utf-8"))
+    return digest.hexdigest()
 
 
 class SkillRegistry:
@@ -116,6 +156,13 @@ class SkillRegistry:
         self._cache: dict[str, Skill] | None = None
         self._shadowed: list[Skill] = []
         self._lock = threading.Lock()
+        #: Every path's last parse, kept across reloads; see the module docstring.
+        self._parsed: dict[tuple[SkillLayer, str], _Parsed] = {}
+        #: The encoder every cached chunk vector came from; ``None`` when mixed.
+        self._vector_label: str | None = None
+        #: The scan it was built from, every resolved chunk, and an inverted
+        #: index over their text. Built on the first lexical search after a scan.
+        self._lexical: tuple[dict[str, Skill], list[tuple[SkillChunk, Skill]], LexicalIndex] | None = None
 
     # ------------------------------------------------------------------ #
     # Discovery
@@ -131,29 +178,66 @@ class SkillRegistry:
                 self._cache, self._shadowed = self._scan()
             return self._cache
 
+    def _parse(self, path: Path, layer: SkillLayer) -> _Parsed | None:
+        """The path's parse, reused when neither its stat nor its content changed."""
+        key = (layer, str(path))
+        cached = self._parsed.get(key)
+        try:
+            signature = _signature(path)
+            if cached is not None and cached.signature == signature and not _racy(signature):
+                return cached
+            digest = _digest(path, signature)
+        except OSError as exc:
+            logger.warning("Could not read a skill", path=str(path), error=str(exc))
+            return None
+        if cached is not None and cached.digest == digest:
+            # Touched, not edited.
+            cached.signature = signature
+            return cached
+
+        try:
+            parsed = _Parsed(signature, digest, skill=load_skill(path, layer, embed=False))
+        except InvalidSkill as exc:
+            parsed = _Parsed(signature, digest, error=str(exc))
+        except OSError as exc:
+            logger.warning("Could not read a skill", path=str(path), error=str(exc))
+            return None
+        self._parsed[key] = parsed
+        return parsed
+
     def _scan(self) -> tuple[dict[str, Skill], list[Skill]]:
         resolved: dict[str, Skill] = {}
         shadowed: list[Skill] = []
+        seen: set[tuple[SkillLayer, str]] = set()
+        found: list[tuple[SkillLayer, Skill]] = []
 
         # Ascending precedence, so a later layer overwrites an earlier one and
         # the displaced skill is recorded rather than dropped.
         for layer in sorted(ROOTS, key=lambda item: item.precedence):
             root = ROOTS[layer]()
             for path in skill_paths(root):
-                try:
-                    skill = load_skill(path, layer)
-                except InvalidSkill as exc:
-                    logger.warning("Skipped an unreadable skill", path=str(path), layer=layer.value, error=str(exc))
+                seen.add((layer, str(path)))
+                parsed = self._parse(path, layer)
+                if parsed is None:
                     continue
-                except OSError as exc:
-                    logger.warning("Could not read a skill", path=str(path), error=str(exc))
+                if parsed.skill is None:
+                    logger.warning("Skipped an unreadable skill", path=str(path), layer=layer.value, error=parsed.error)
                     continue
-
-                previous = resolved.get(skill.name)
-                if previous is not None:
-                    previous.shadowed_by = layer.value
-                    shadowed.append(previous)
-                resolved[skill.name] = skill
+                found.append((layer, parsed.skill))
+
+        for key in set(self._parsed) - seen:
+            del self._parsed[key]
+        self._embed([skill for _layer, skill in found])
+
+        for layer, parsed_skill in found:
+            # A copy, so shadowing and provenance stamped on below never reach
+            # the cached parse. It shares the parse's chunks and their vectors.
+            skill = replace(parsed_skill)
+            previous = resolved.get(skill.name)
+            if previous is not None:
+                previous.shadowed_by = layer.value
+                shadowed.append(previous)
+            resolved[skill.name] = skill
 
         # Provenance is stamped on here rather than read out of each file's own
         # frontmatter, because Milestone 6 fetches those files from strangers and
@@ -167,6 +251,26 @@ class SkillRegistry:
             logger.info("Skills loaded", count=len(resolved), shadowed=len(shadowed))
         return resolved, shadowed
 
+    def _parsed_skills(self) -> list[Skill]:
+        return [parsed.skill for parsed in self._parsed.values() if parsed.skill is not None]
+
+    def _embed(self, skills: list[Skill]) -> None:
+        """Gives every chunk a vector from the current encoder, in one batch.
+
+        Only skills parsed since the last scan need one -- unless the encoder
+        changed since, in which case every vector is from the wrong one and all
+        of them are refreshed (mostly from the vector store).
+        """
+        from .vectors import skill_vectors
+
+        label = embedding_service.backend
+        pending = skills if label != self._vector_label else [skill for skill in skills if not skill.chunks]
+        # `None` back from a partial batch leaves the cache mixed, and the next
+        # scan or search refreshes all of it.
+        self._vector_label = attach_chunks(pending) if pending else label
+        if embedding_service.is_semantic and self._vector_label == label:
+            skill_vectors.save(label, [chunk.text for skill in skills for chunk in skill.chunks])
+
     def reload(self) -> None:
         """Drops the cache so the next read goes back to disk."""
         with self._lock:
@@ -203,7 +307,7 @@ class SkillRegistry:
         With an encoder loaded this is :meth:`embedding_service.rank`, the same
         path reference documents use.
 
-        **Without one it is question-coverage, not the hashing encoder.** That
+        **Without one it is lexical, not the hashing encoder.** That
         substitution is deliberate and was made after measuring: the fallback
         encoder is a signed bag-of-words sketch, and cosine between a six-word
         question and a 1,200-character passage is dominated by sketch collisions.
@@ -213,7 +317,16 @@ class SkillRegistry:
         Coverage -- what fraction of the question's content words the passage
         actually contains -- gives 0.0 and 0.667 for the same pair, discriminates
         correctly, and lands on the same scale as a transformer's cosine, which is
-        why one ``SKILLS_MIN_SIMILARITY`` serves both.
+        why one ``SKILLS_MIN_SIMILARITY`` serves both. Coverage is normalised by
+        the *question's* token count rather than the union, as
+        :func:`~src.core.rag.retriever.lexical_overlap` is: dividing by the union
+        punishes a passage for being long, and scored a perfect topical match
+        at 0.04.
+
+        Passages past the floor are ordered by BM25 from a
+        :class:`~src.core.rag.lexical.LexicalIndex` built once per scan, so a
+        match on the question's rare words outranks one on its common ones and
+        a query costs its own terms' postings rather than a pass over every chunk.
 
         At most one passage per skill: two chunks of the same skill are two views
         of one piece of know-how, and spending the whole budget on them crowds out
@@ -227,14 +340,19 @@ class SkillRegistry:
             return []
 
         skills = self._load()
-        chunks = [(chunk, skill) for skill in skills.values() for chunk in skill.chunks]
-        if not chunks:
-            return []
-
+        if embedding_service.is_semantic and self._vector_label != embedding_service.backend:
+            # Scanned while the encoder was still warming up, or before it
+            # changed: those vectors are not comparable with the query's.
+            with self._lock:
+                self._embed(list(self._parsed_skills()))
         if embedding_service.is_semantic:
+            chunks = [(chunk, skill) for skill in skills.values() for chunk in skill.chunks]
             ranked = embedding_service.rank(query, [(chunk.text, chunk.embedding) for chunk, _ in chunks])
         else:
-            ranked = _rank_by_coverage(query, [chunk.text for chunk, _ in chunks])
+            chunks, index = self._lexical_index(skills)
+            ranked = index.rank(query, settings.SKILLS_MIN_SIMILARITY)
+        if not chunks:
+            return []
 
         matches: list[SkillMatch] = []
         claimed: set[str] = set()
@@ -250,6 +368,13 @@ class SkillRegistry:
             matches.append(SkillMatch(skill=skill, text=chunk.text, score=float(score)))
         return matches
 
+    def _lexical_index(self, skills: dict[str, Skill]) -> tuple[list[tuple[SkillChunk, Skill]], LexicalIndex]:
+        built = self._lexical
+        if built is None or built[0] is not skills:
+            chunks = [(chunk, skill) for skill in skills.values() for chunk in skill.chunks]
+            built = self._lexical = (skills, chunks, LexicalIndex(chunk.text for chunk, _ in chunks))
+        return built[1], built[2]
+
     def render_block(self, matches: list[SkillMatch], limit: int | None = None) -> str:
         """The ``<skills>`` block injected into the planning prompt.
 
@@ -0,0 +1,140 @@
+"""Skill chunk vectors, kept on disk between scans.
+
+A registry reload used to re-embed every chunk of every skill, one encoder
+request per chunk: installing, editing or promoting a single skill paid a
+remote round trip for each passage of the whole library, and a few hundred
+skills took minutes to come back.
+
+A chunk's vector depends on two things only -- its text and the encoder that
+produced it -- so that is what it is keyed by: the encoder's label
+(``embedding_service.backend``, e.g. ``provider:ollama/nomic-embed-text``) and
+a hash of the passage. An unchanged chunk is looked up rather than encoded,
+whichever skill it belongs to and however the file around it changed, and a
+different encoder simply misses.
+
+``vectors.npz`` sits beside ``installed.json`` in the user skills directory.
+Only vectors from a semantic encoder are kept; the hashing fallback is cheaper
+to recompute than to read. A save prunes the current encoder's vectors down to
+the chunks the registry still holds, and leaves other encoders' alone, so an
+afternoon offline does not throw away the provider's vectors.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from src.utils.appdirs import config_dir
+from src.utils.filelinks import write_atomically
+from src.utils.logging import logger
+
+
+VECTORS_FILENAME = "vectors.npz"
+
+
+def text_key(text: str) -> str:
+    """The hash a passage is stored under."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+class ChunkVectorStore:
+    """``{encoder label: {passage hash: vector}}``, read once and written on change."""
+
+    def __init__(self, path: Path | None = None):
+        self._path = path
+        self._vectors: dict[str, dict[str, np.ndarray]] | None = None
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> Path:
+        # Resolved per access, as `install_index` is: the test suite pins the
+        # config directory after `src` is imported.
+        return self._path or (config_dir() / "skills" / VECTORS_FILENAME)
+
+    # ------------------------------------------------------------------ #
+    def _load(self) -> dict[str, dict[str, np.ndarray]]:
+        if self._vectors is None:
+            self._vectors = self._read()
+        return self._vectors
+
+    def _read(self) -> dict[str, dict[str, np.ndarray]]:
+        path = self.path
+        if not path.is_file():
+            return {}
+        try:
+            with np.load(path, allow_pickle=False) as archive:
+                stored: dict[str, dict[str, np.ndarray]] = {}
+                for index, label in enumerate(archive["labels"].tolist()):
+                    keys = archive[f"keys_{index}"].tolist()
+                    matrix = archive[f"vectors_{index}"]
+                    stored[str(label)] = {str(key): matrix[row] for row, key in enumerate(keys)}
+                return stored
+        except (OSError, ValueError, KeyError) as exc:
+            # Stale vectors are a cache miss, never a failed reload.
+            logger.warning("Could not read stored skill vectors", path=str(path), error=str(exc))
+            return {}
+
+    # ------------------------------------------------------------------ #
+    def lookup(self, label: str, texts: list[str]) -> list[np.ndarray | None]:
+        """The stored vector for each passage, ``None`` where there is none."""
+        with self._lock:
+            stored = self._load().get(label, {})
+            return [stored.get(text_key(text)) for text in texts]
+
+    def add(self, label: str, texts: list[str], vectors: list[np.ndarray]) -> None:
+        with self._lock:
+            stored = self._load().setdefault(label, {})
+            for text, vector in zip(texts, vectors, strict=True):
+                stored[text_key(text)] = np.asarray(vector, dtype=np.float32)
+            self._dirty = True
+
+    def save(self, label: str, live: list[str]) -> bool:
+        """Prunes ``label`` to the passages in ``live`` and writes the file if anything changed."""
+        with self._lock:
+            vectors = self._load()
+            if label in vectors:
+                keep = {text_key(text) for text in live}
+                current = vectors[label]
+                if keep.issuperset(current):
+                    pruned = current
+                else:
+                    pruned = {key: vector for key, vector in current.items() if key in keep}
+                    self._dirty = True
+                vectors[label] = pruned
+            if not self._dirty:
+                return False
+            arrays: dict[str, np.ndarray] = {"labels": np.array(list(vectors), dtype=str)}
+            for index, stored in enumerate(vectors.values()):
+                arrays[f"keys_{index}"] = np.array(list(stored), dtype=str)
+                arrays[f"vectors_{index}"] = (
+                    np.stack(list(stored.values())) if stored else np.empty((0, 0), dtype=np.float32)
+                )
+            path = self.path
+
+            def write(temporary: Path) -> None:
+                with open(temporary, "wb") as handle:
+                    np.savez(handle, **arrays)
+
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                write_atomically(path, write)
+            except (OSError, ValueError) as exc:
+                logger.warning("Could not save skill vectors", path=str(path), error=str(exc))
+                return False
+            self._dirty = False
+            return True
+
+    def reload(self) -> None:
+        with self._lock:
+            self._vectors = None
+            self._dirty = False
+
+
+skill_vectors = ChunkVectorStore()
+
+
+__all__ = ["VECTORS_FILENAME", "ChunkVectorStore", "skill_vectors", "text_key"]
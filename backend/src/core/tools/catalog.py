@@ -4,18 +4,22 @@ Profiling now runs against a bounded sample. The previous implementation called
 ``nunique()`` and a full outlier scan on every column of the full frame, which is
 several passes over the data on every upload -- fine at 5,000 rows, minutes at
 5,000,000.
+
+Within the sample the work is columnar: each statistic runs once across every
+column instead of once per column, which is what dominated upload-to-ready time
+on wide tables.
 """
 
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
+import numpy as np
 import pandas as pd
 
 from src.config import settings
 
-from .stats import StatisticalToolkit
-
 
 class CatalogEngine:
     """Detects semantic types and per-column quality metrics."""
@@ -37,15 +41,27 @@ class CatalogEngine:
         ("personal", ("name", "email", "phone", "ssn", "address", "birth")),
     )
 
+    #: Below this many columns a thread pool costs more than it saves.
+    PARALLEL_MIN_COLUMNS = 32
+
     @classmethod
-    def analyze(cls, df: pd.DataFrame, sample_rows: int | None = None) -> dict[str, Any]:
-        """Profiles the frame, sampling when it exceeds the configured budget."""
+    def analyze(cls, df: pd.DataFrame, sample_rows: int | None = None, workers: int | None = None) -> dict[str, Any]:
+        """Profiles the frame, sampling when it exceeds the configured budget.
+
+        Each statistic is computed for every column at once rather than column by
+        column: one null count over the whole frame (exact, and shared with
+        :meth:`SchemaRegistry.register_dataframe` through ``null_count``), one
+        quantile call for every numeric column's outlier fences, and one scan per
+        semantic pattern over the heads of every undecided column. Cardinality is
+        exact on the sample and, on wide frames, spread over ``workers`` threads.
+        """
         limit = sample_rows or settings.PROFILE_SAMPLE_ROWS
         sample = df.sample(n=limit, random_state=0) if len(df) > limit else df
         sampled = len(sample) < len(df)
 
         total_cells = int(df.size)
-        total_missing = int(df.isnull().sum().sum()) if total_cells else 0
+        null_counts = df.isna().sum() if total_cells else pd.Series(0, index=df.columns)
+        total_missing = int(null_counts.sum())
 
         catalog: dict[str, Any] = {
             "columns": {},
@@ -57,65 +73,133 @@ class CatalogEngine:
                 "sample_rows": int(len(sample)),
             },
         }
+        if not len(df.columns):
+            return catalog
 
-        for column in df.columns:
-            catalog["columns"][str(column)] = cls._analyze_column(sample, str(column))
+        unique = cls._cardinality(sample, workers if workers is not None else settings.PROFILE_WORKERS)
+        outliers = cls._outliers(sample)
+        semantic = cls._semantic_types(sample, unique)
+        row_count = len(df) or 1
+        for position, column in enumerate(df.columns):
+            nulls = int(null_counts.iloc[position])
+            catalog["columns"][str(column)] = {
+                "native_dtype": str(df.dtypes.iloc[position]),
+                "semantic_type": semantic[str(column)],
+                "quality": {
+                    "missing_percentage": round(nulls / row_count * 100, 2),
+                    "null_count": nulls,
+                    "unique_values": unique[str(column)],
+                    "outliers": outliers.get(str(column), {}),
+                },
+            }
         return catalog
 
     # ------------------------------------------------------------------ #
     @classmethod
-    def _analyze_column(cls, df: pd.DataFrame, column: str) -> dict[str, Any]:
-        series = df[column]
-        row_count = len(df) or 1
-
-        missing_pct = round(float(series.isnull().sum()) / row_count * 100, 2)
+    def _cardinality(cls, sample: pd.DataFrame, workers: int) -> dict[str, int]:
+        """Distinct non-null values per column; ``-1`` for unhashable contents."""
+
+        def count(columns: list[Any]) -> dict[str, int]:
+            result: dict[str, int] = {}
+            for column in columns:
+                try:
+                    result[str(column)] = int(sample[column].nunique(dropna=True))
+                except TypeError:
+                    result[str(column)] = -1
+            return result
+
+        columns = list(sample.columns)
+        if workers <= 1 or len(columns) < cls.PARALLEL_MIN_COLUMNS:
+            return count(columns)
+        # Hashing releases the GIL for numeric columns, which is most of a wide
+        # frame; strided chunks keep the per-thread mix of dtypes even.
+        chunks = [columns[offset::workers] for offset in range(workers)]
+        merged: dict[str, int] = {}
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="catalog") as pool:
+            for part in pool.map(count, chunks):
+                merged.update(part)
+        return merged
+
+    @staticmethod
+    def _outliers(sample: pd.DataFrame) -> dict[str, dict[str, Any]]:
+        """IQR outliers for every numeric column from one quantile call.
+
+        The same fences as :meth:`StatisticalToolkit.detect_outliers`, without
+        materialising the outlying values only to count them.
+        """
+        numeric = [
+            column
+            for column, dtype in sample.dtypes.items()
+            if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+        ]
+        if not numeric or sample.empty:
+            return {}
+        block = sample[numeric]
+        present = block.notna().sum()
         try:
-            unique_count = int(series.nunique(dropna=True))
-        except TypeError:
-            unique_count = -1  # unhashable contents
-
-        outliers: dict[str, Any] = {}
-        if pd.api.types.is_numeric_dtype(series.dtype) and series.notna().any():
-            try:
-                info = StatisticalToolkit.detect_outliers(df, column)
-                outliers = {"count": info["outlier_count"], "percentage": info["outlier_percentage"]}
-            except Exception:
-                outliers = {}
-
-        return {
-            "native_dtype": str(series.dtype),
-            "semantic_type": cls._detect_semantic_type(series),
-            "quality": {
-                "missing_percentage": missing_pct,
-                "unique_values": unique_count,
-                "outliers": outliers,
-            },
-        }
+            fences = block.quantile([0.25, 0.75])
+        except (TypeError, ValueError):
+            return {}
+        q1, q3 = fences.iloc[0], fences.iloc[1]
+        spread = q3 - q1
+        outside = block.lt(q1 - 1.5 * spread) | block.gt(q3 + 1.5 * spread)
+        counts = outside.sum()
+
+        result: dict[str, dict[str, Any]] = {}
+        for column in numeric:
+            if present[column] == 0:
+                continue
+            count = int(counts[column])
+            result[str(column)] = {"count": count, "percentage": round(count / int(present[column]) * 100, 2)}
+        return result
 
     @classmethod
-    def _detect_semantic_type(cls, series: pd.Series) -> str:
-        name = str(series.name).lower()
+    def _semantic_types(cls, sample: pd.DataFrame, unique: dict[str, int]) -> dict[str, str]:
+        """Semantic type per column, with each pattern scanned once for all columns."""
+        result: dict[str, str] = {}
+        heads: dict[str, pd.Series] = {}
+        numeric: set[str] = set()
+        for column, dtype in sample.dtypes.items():
+            name = str(column)
+            if pd.api.types.is_numeric_dtype(dtype):
+                numeric.add(name)
+            decided = cls._type_from_name_or_dtype(name, dtype)
+            if decided:
+                result[name] = decided
+                continue
+            head = sample[column].dropna().head(100).astype(str)
+            if head.empty:
+                result[name] = "empty"
+            else:
+                heads[name] = head
+
+        if heads:
+            values = pd.concat(list(heads.values()), ignore_index=True)
+            labels = np.repeat(np.array(list(heads), dtype=object), [len(head) for head in heads.values()])
+            rates = {
+                semantic_type: values.str.match(pattern).groupby(labels).mean()
+                for semantic_type, pattern in cls.SEMANTIC_PATTERNS.items()
+            }
+            for name, head in heads.items():
+                matched = next((kind for kind, rate in rates.items() if rate.get(name, 0.0) > 0.6), None)
+                if matched:
+                    result[name] = matched
+                elif name in numeric:
+                    result[name] = "numeric"
+                else:
+                    distinct = unique.get(name, -1)
+                    categorical = 0 <= distinct <= max(2, len(head) // 4)
+                    result[name] = "categorical" if categorical else "text"
+        return result
+
+    @classmethod
+    def _type_from_name_or_dtype(cls, name: str, dtype: Any) -> str | None:
+        lowered = name.lower()
         for semantic_type, hints in cls.NAME_HINTS:
-            if any(hint in name for hint in hints):
+            if any(hint in lowered for hint in hints):
                 return semantic_type
-
-        if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        if pd.api.types.is_datetime64_any_dtype(dtype):
             return "temporal"
-        if pd.api.types.is_bool_dtype(series.dtype):
+        if pd.api.types.is_bool_dtype(dtype):
             return "boolean"
-
-        sample = series.dropna().astype(str).head(100)
-        if sample.empty:
-            return "empty"
-
-        for semantic_type, pattern in cls.SEMANTIC_PATTERNS.items():
-            try:
-                if sample.str.match(pattern).mean() > 0.6:
-                    return semantic_type
-            except Exception:
-                # Defensive: odd dtypes can make the vectorised match raise.
-                continue
-
-        if pd.api.types.is_numeric_dtype(series.dtype):
-            return "numeric"
-        return "categorical" if series.nunique(dropna=True) <= max(2, len(sample) // 4) else "text"
+        return None
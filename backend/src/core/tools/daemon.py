@@ -22,13 +22,19 @@ from __future__ import annotations
 import json
 import socket
 import struct
+import threading
+import time
 from collections.abc import Callable
 
+from src.core.ingest.outofcore import FULL_DIRNAME
+from src.core.ingest.workbook import SHEETS_DIRNAME
 from src.core.tools.packages import DISTRIBUTION_NAMES, LIBS_DIRNAME
 
 
 DAEMON_PATH = "/tmp/wizard_sandbox_daemon.py"
 PID_FILE = "/tmp/wizard_sandbox_daemon.pid"
+#: Actions the daemon answers on its control thread, concurrently with a cell.
+CONTROL_ACTIONS = frozenset({"ping", "capabilities", "inspect_variables", "set_limits", "profile"})
 DAEMON_PORT = 5005
 
 #: Top-level modules the daemon reports on when asked for its capabilities.
@@ -67,13 +73,20 @@ PROBE_MODULES: tuple[str, ...] = (
 DAEMON_SCRIPT = '''
 import base64
 import builtins
+import errno
 import io
 import json
 import os
+import pickle
+import queue
+import select
+import signal
 import socket
 import struct
 import subprocess
 import sys
+import threading
+import time
 import traceback
 
 PID_FILE = %(pid_file)r
@@ -84,16 +97,25 @@ MEM_BYTES = %(mem_bytes)d
 PROBE_MODULES = %(probe_modules)s
 DISTRIBUTIONS = %(distributions)s
 LIBS_DIR = os.path.join(WORKSPACE, %(libs_dirname)r)
+FULL_DIR = os.path.join(WORKSPACE, %(full_dirname)r)
+SHEETS_DIR = os.path.join(WORKSPACE, %(sheets_dirname)r)
+# Bytes of new variables an isolated cell may hand back to the namespace.
+MERGE_LIMIT_BYTES = 64 * 1024 * 1024
+# Armed by the parent's `profile` action. While off, a cell runs with no
+# profiler hook installed at all.
+PROFILING = {"enabled": False, "last": None}
 
 
-def apply_memory_limit():
+def apply_memory_limit(mem_bytes=None):
     """Caps address space so runaway code dies instead of swapping the host.
 
     POSIX only. Windows bounds a process through Job Objects, which needs
     pywin32; rather than pretend, the local runtime reports the cap as
-    unenforced there.
+    unenforced there. Called again by `set_limits` when the parent moves a
+    session's ceiling; the hard limit is left alone, so it can move both ways.
     """
-    if MEM_BYTES <= 0:
+    mem_bytes = MEM_BYTES if mem_bytes is None else int(mem_bytes)
+    if mem_bytes <= 0:
         return
     try:
         import resource
@@ -101,12 +123,90 @@ def apply_memory_limit():
         return
     try:
         soft, hard = resource.getrlimit(resource.RLIMIT_AS)
-        ceiling = MEM_BYTES if hard in (resource.RLIM_INFINITY, -1) else min(MEM_BYTES, hard)
+        ceiling = mem_bytes if hard in (resource.RLIM_INFINITY, -1) else min(mem_bytes, hard)
         resource.setrlimit(resource.RLIMIT_AS, (ceiling, hard))
     except (ValueError, OSError):
         pass
 
 
+def memory_limit():
+    """The address-space ceiling in force now; 0 when there is none."""
+    try:
+        import resource
+
+        soft, _hard = resource.getrlimit(resource.RLIMIT_AS)
+    except Exception:
+        return 0
+    return 0 if soft in (resource.RLIM_INFINITY, -1) else int(soft)
+
+
+def usage_mark(trace_memory):
+    """Starts measuring one cell. Paired with `usage_since`.
+
+    On Linux the peak-RSS high-water mark is reset first (`clear_refs` 5), so
+    the peak reported is the cell's own; elsewhere, or where that write is
+    refused, it is the process's lifetime peak and says so.
+    """
+    scope = "process"
+    try:
+        with open("/proc/self/clear_refs", "w") as handle:
+            handle.write("5")
+        scope = "cell"
+    except Exception:
+        pass
+    if trace_memory:
+        import tracemalloc
+
+        tracemalloc.start()
+    return {"wall": time.monotonic(), "cpu": cpu_seconds(), "scope": scope, "trace": bool(trace_memory)}
+
+
+def usage_since(mark, output_bytes, out_of_memory=False):
+    report = {
+        "wall_seconds": round(time.monotonic() - mark["wall"], 4),
+        "cpu_seconds": round(cpu_seconds() - mark["cpu"], 4),
+        "peak_rss_bytes": peak_rss_bytes(),
+        "peak_scope": mark["scope"],
+        "output_bytes": int(output_bytes),
+        "mem_limit_bytes": memory_limit(),
+        "out_of_memory": bool(out_of_memory),
+    }
+    if mark["trace"]:
+        import tracemalloc
+
+        report["traced_peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return report
+
+
+def cpu_seconds():
+    try:
+        import resource
+
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        return usage.ru_utime + usage.ru_stime
+    except Exception:
+        return time.process_time()
+
+
+def peak_rss_bytes():
+    try:
+        with open("/proc/self/status") as handle:
+            for line in handle:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except Exception:
+        pass
+    try:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    except Exception:
+        return None
+    # Kilobytes on Linux, bytes on macOS.
+    return int(peak) if sys.platform == "darwin" else int(peak) * 1024
+
+
 def recvall(sock, n):
     data = bytearray()
     while len(data) < n:
@@ -175,6 +275,103 @@ def probe_capabilities():
     return available
 
 
+class LazyTables(dict):
+    """`tables` with a workbook's unparsed sheets behind it.
+
+    Mirrors `src.core.ingest.workbook.LazyTables`: a missing key naming a sheet
+    in `sheets/index.json` is read from its workbook on first access and kept.
+    """
+
+    def __init__(self, frames, pd):
+        dict.__init__(self, frames)
+        self._pd = pd
+        self._lazy = {}
+        index = os.path.join(SHEETS_DIR, "index.json")
+        if os.path.isfile(index):
+            try:
+                with open(index, encoding="utf-8") as handle:
+                    self._lazy = json.load(handle)
+            except (OSError, ValueError) as exc:
+                print("Could not read the sheet index: " + str(exc))
+
+    def __missing__(self, key):
+        entry = self._lazy.get(key)
+        if entry is None:
+            raise KeyError(key)
+        frame = self._pd.read_excel(
+            os.path.join(SHEETS_DIR, entry["file"]), sheet_name=entry["sheet"], nrows=entry.get("limit")
+        )
+        self[key] = frame
+        return frame
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or key in self._lazy
+
+    def pending(self):
+        return sorted(key for key in self._lazy if not dict.__contains__(self, key))
+
+
+def read_feather_shared(path, pd):
+    """Reads a Feather file without copying its plain numeric columns.
+
+    The file is mapped copy-on-write and each numeric column with no nulls
+    becomes a writeable numpy view of the mapping. Every runtime reading the
+    same file -- a session and its subagents, whose snapshots are links to it
+    -- shares those pages through the page cache; a write copies only the page
+    it touches, and never reaches the file. Everything else converts as
+    `pd.read_feather` would, and so does any file this cannot map.
+    """
+    try:
+        import mmap
+
+        import numpy as np
+        import pyarrow as pa
+        import pyarrow.ipc as ipc
+
+        with open(path, "rb") as handle:
+            mapping = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_COPY)
+        buffer = pa.py_buffer(mapping)
+        table = ipc.open_file(pa.BufferReader(buffer)).read_all()
+        names = table.column_names
+        if len(set(names)) != len(names):
+            raise ValueError("duplicate column names")
+        stored = {entry.get("name"): entry.get("numpy_type") for entry in (table.schema.pandas_metadata or {}).get("columns", [])}
+
+        shared = {}
+        for name, column in zip(names, table.columns):
+            kind = column.type
+            if column.num_chunks != 1 or column.null_count:
+                continue
+            if not (pa.types.is_integer(kind) or pa.types.is_floating(kind)):
+                continue
+            dtype = np.dtype(kind.to_pandas_dtype())
+            if stored.get(name, str(dtype)) != str(dtype):
+                continue  # a pandas extension dtype such as Int64 -- let Arrow restore it
+            chunk = column.chunk(0)
+            data = chunk.buffers()[1]
+            if data is None:
+                continue
+            offset = data.address - buffer.address + chunk.offset * dtype.itemsize
+            if offset < 0 or offset + len(chunk) * dtype.itemsize > buffer.size:
+                continue  # decompressed elsewhere, not a view of the file
+            shared[name] = np.frombuffer(mapping, dtype=dtype, count=len(chunk), offset=offset)
+
+        if not shared:
+            return table.to_pandas()
+        rest = table.drop_columns(list(shared)).to_pandas() if len(shared) < len(names) else None
+        index = rest.index if rest is not None else pd.RangeIndex(table.num_rows)
+        columns = {name: shared[name] if name in shared else rest[name] for name in names}
+        return pd.DataFrame(columns, index=index, copy=False)
+    except Exception:
+        return pd.read_feather(path)
+
+
 def load_dataset(exec_globals, pd):
     """Binds `df` to the active table and `tables` to every loaded table.
 
@@ -191,15 +388,18 @@ def load_dataset(exec_globals, pd):
                 continue
             key = entry[: -len(".feather")]
             try:
-                tables[key] = pd.read_feather(os.path.join(tables_dir, entry))
+                tables[key] = read_feather_shared(os.path.join(tables_dir, entry), pd)
             except Exception as exc:
                 print("Could not load table " + key + ": " + str(exc))
+    tables = LazyTables(tables, pd)
     exec_globals["tables"] = tables
     if tables:
         print("Tables available: " + ", ".join(sorted(tables)))
+    if tables.pending():
+        print("Sheets loaded on first access: " + ", ".join(tables.pending()))
 
     for filename, reader in (
-        ("dataset.feather", pd.read_feather),
+        ("dataset.feather", lambda path: read_feather_shared(path, pd)),
         ("dataset.parquet", pd.read_parquet),
         ("dataset.csv", pd.read_csv),
     ):
@@ -214,6 +414,54 @@ def load_dataset(exec_globals, pd):
     print("No dataset present yet.")
 
 
+def open_full_tables(exec_globals):
+    """Binds `db` and `full_tables` over the out-of-core Parquet copies.
+
+    A sampled `df` answers shape questions; totals need the population. DuckDB
+    reads the Parquet lazily and spills to the workspace under half this
+    runtime's memory ceiling, so an exact aggregate over a file far larger than
+    RAM still fits inside the limit that `apply_memory_limit` set.
+    """
+    previous = exec_globals.get("db")
+    if previous is not None:
+        try:
+            previous.close()
+        except Exception:
+            pass
+    exec_globals["db"] = None
+    exec_globals["full_tables"] = {}
+    if not os.path.isdir(FULL_DIR):
+        return
+    entries = sorted(entry for entry in os.listdir(FULL_DIR) if entry.endswith(".parquet"))
+    if not entries:
+        return
+    try:
+        import duckdb
+    except ImportError:
+        print("Full tables present but duckdb is not installed; only the samples are loaded.")
+        return
+
+    db = duckdb.connect()
+    if MEM_BYTES > 0:
+        db.execute("SET memory_limit='" + str(max(256, MEM_BYTES // (2 * 1024 * 1024))) + "MB'")
+    spill = os.path.join(WORKSPACE, ".duckdb_tmp")
+    os.makedirs(spill, exist_ok=True)
+    db.execute("SET temp_directory='" + spill.replace("'", "''") + "'")
+    relations = {}
+    for entry in entries:
+        key = entry[: -len(".parquet")]
+        source = "'" + os.path.join(FULL_DIR, entry).replace("'", "''") + "'"
+        try:
+            db.execute('CREATE OR REPLACE VIEW "' + key + '" AS SELECT * FROM read_parquet(' + source + ")")
+            relations[key] = db.view(key)
+        except Exception as exc:
+            print("Could not open full table " + key + ": " + str(exc))
+    exec_globals["db"] = db
+    exec_globals["full_tables"] = relations
+    if relations:
+        print("Full tables (DuckDB): " + ", ".join(sorted(relations)))
+
+
 def install_missing(module_name):
     # The map is injected rather than duplicated, so the container path and the
     # parent-side installer cannot disagree about what `sklearn` is called.
@@ -249,6 +497,295 @@ def describe(value, pd):
     return {"type": type_name, "shape": shape, "preview": preview}
 
 
+def describe_namespace(exec_globals, pd):
+    info = {}
+    for name, value in list(exec_globals.items()):
+        if name.startswith("__"):
+            continue
+        if type(value).__name__ in ("module", "function", "builtin_function_or_method", "type"):
+            continue
+        info[name] = describe(value, pd)
+    return info
+
+
+def summarize_profile(profile, limit=40):
+    """A cell's heaviest functions by cumulative time, from its cProfile run."""
+    import pstats
+
+    stats = pstats.Stats(profile)
+    rows = [
+        {
+            "function": name,
+            "file": os.path.basename(filename),
+            "line": line,
+            "calls": calls,
+            "self_s": round(self_s, 6),
+            "total_s": round(total_s, 6),
+        }
+        for (filename, line, name), (_primitive, calls, self_s, total_s, _callers) in stats.stats.items()
+    ]
+    rows.sort(key=lambda row: row["total_s"], reverse=True)
+    return {"total_s": round(stats.total_tt, 6), "functions": rows[:limit], "function_count": len(rows)}
+
+
+def run_cell(conn, code, exec_globals, plt, trace_memory=False):
+    """Executes one cell with output streamed to `conn`. Returns the reply.
+
+    The reply carries what the cell used under `resources`: wall and CPU
+    seconds, peak RSS, bytes of output, the ceiling it ran under, whether it
+    hit that ceiling and, when asked for, the tracemalloc peak.
+    """
+    mark = usage_mark(trace_memory)
+    stdout_stream = StreamingStdout(conn)
+    stderr_buffer = io.StringIO()
+    real_stdout, real_stderr = sys.stdout, sys.stderr
+    sys.stdout, sys.stderr = stdout_stream, stderr_buffer
+
+    plot_data = None
+    status = "success"
+    out_of_memory = False
+    profile = None
+    if PROFILING["enabled"]:
+        import cProfile
+
+        profile = cProfile.Profile()
+    try:
+        plt.close("all")
+        # The parent may have installed into LIBS_DIR since the last
+        # execution; without this the finder's negative cache still says
+        # the module is missing.
+        import importlib
+
+        importlib.invalidate_caches()
+        if profile is not None:
+            profile.enable()
+        try:
+            exec(code, exec_globals)
+        except ModuleNotFoundError as exc:
+            if not ALLOW_PIP:
+                raise
+            install_missing(exc.name)
+            exec(code, exec_globals)
+        finally:
+            if profile is not None:
+                profile.disable()
+
+        if plt.get_fignums():
+            buffer = io.BytesIO()
+            plt.savefig(buffer, format="png", bbox_inches="tight", dpi=110)
+            buffer.seek(0)
+            plot_data = base64.b64encode(buffer.read()).decode("utf-8")
+            plt.close("all")
+    except KeyboardInterrupt:
+        status = "interrupted"
+        print("Execution interrupted.", file=stderr_buffer)
+    except MemoryError:
+        status = "error"
+        out_of_memory = True
+        stderr_buffer.write(
+            "MemoryError: this step exceeded the memory limit for the runtime.\\n"
+            "Work on a sample or in chunks, or raise SANDBOX_MEM_LIMIT."
+        )
+    except BaseException:
+        status = "error"
+        stderr_buffer.write(traceback.format_exc())
+    finally:
+        sys.stdout, sys.stderr = real_stdout, real_stderr
+    stderr = stderr_buffer.getvalue()
+    output_bytes = len(stdout_stream.getvalue()) + len(stderr) + len(plot_data or "")
+    if profile is not None:
+        try:
+            PROFILING["last"] = dict(summarize_profile(profile), status=status, code=code[:2000])
+        except Exception as exc:
+            PROFILING["last"] = {"error": str(exc), "status": status, "code": code[:2000]}
+    return {
+        "status": status,
+        "stdout": "",
+        "stderr": stderr,
+        "plot": plot_data,
+        "resources": usage_since(mark, output_bytes, out_of_memory),
+    }
+
+
+def run_isolated(conn, payload, exec_globals, plt, server, cell_lock):
+    """Runs a read-only cell in a forked child, beside whatever runs next.
+
+    Called with ``cell_lock`` held, so no cell is running: a fork while another
+    thread is inside a cell could copy a lock that thread holds -- the
+    allocator's, logging's, a BLAS pool's -- and deadlock the child on it.
+
+    The child inherits the namespace copy-on-write, so it reads every frame
+    without a copy and nothing it changes reaches the session. Its output
+    streams to the client directly; its reply and any variables it *added*
+    come back over a pipe and are bound here, where they do not already exist
+    -- a name a main cell has meanwhile bound is the main cell's.
+    """
+    known = set(exec_globals)
+    read_fd, write_fd = os.pipe()
+    try:
+        pid = os.fork()
+    except OSError as exc:
+        os.close(read_fd)
+        os.close(write_fd)
+        try:
+            send_message(conn, {"status": "error", "stdout": "", "stderr": "Could not fork: " + str(exc)})
+        finally:
+            conn.close()
+        return
+    if pid == 0:
+        try:
+            os.close(read_fd)
+            server.close()
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            reply = run_cell(conn, payload.get("code", ""), exec_globals, plt, payload.get("trace_memory"))
+            variables, size = {}, 0
+            for name, value in list(exec_globals.items()):
+                if name in known or name.startswith("__"):
+                    continue
+                try:
+                    blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+                except Exception:
+                    continue
+                size += len(blob)
+                if size > MERGE_LIMIT_BYTES:
+                    break
+                variables[name] = blob
+            reply["variables"] = variables
+            data = pickle.dumps(reply, protocol=pickle.HIGHEST_PROTOCOL)
+            view = memoryview(data)
+            while view:
+                view = view[os.write(write_fd, view) :]
+        finally:
+            os._exit(0)
+    os.close(write_fd)
+    threading.Thread(
+        target=collect_isolated,
+        args=(conn, pid, read_fd, exec_globals, payload.get("timeout"), cell_lock),
+        daemon=True,
+    ).start()
+
+
+def collect_isolated(conn, pid, read_fd, exec_globals, timeout, cell_lock):
+    """Waits for an isolated cell, binds its new names and answers the client.
+
+    The child is killed and reaped, and every descriptor closed, however this
+    ends. The names are bound under ``cell_lock``, between cells, never in the
+    middle of one.
+    """
+    try:
+        chunks = []
+        deadline = None if not timeout else time.monotonic() + float(timeout)
+        while True:
+            wait = None if deadline is None else max(0.0, deadline - time.monotonic())
+            ready, _, _ = select.select([read_fd], [], [], wait)
+            if not ready:
+                reply = {"status": "error", "stderr": "Execution exceeded the time limit."}
+                break
+            chunk = os.read(read_fd, 1 << 20)
+            if not chunk:
+                data = b"".join(chunks)
+                reply = pickle.loads(data) if data else {"status": "error", "stderr": "The isolated cell died."}
+                break
+            chunks.append(chunk)
+        merged = []
+        variables = reply.pop("variables", None) or {}
+        with cell_lock:
+            for name, blob in variables.items():
+                if name in exec_globals:
+                    continue
+                try:
+                    exec_globals[name] = pickle.loads(blob)
+                    merged.append(name)
+                except Exception:
+                    pass
+        reply["merged"] = sorted(merged)
+        reply.setdefault("stdout", "")
+        send_message(conn, reply)
+    except Exception:
+        try:
+            send_message(conn, {"status": "error", "stdout": "", "stderr": traceback.format_exc()})
+        except Exception:
+            pass
+    finally:
+        os.close(read_fd)
+        # Still our unreaped child, so the pid cannot have been reused: a
+        # finished one is a zombie the signal does not reach.
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        try:
+            os.waitpid(pid, 0)
+        except ChildProcessError:
+            pass
+        conn.close()
+
+
+def serve_control(server, work, exec_globals, sandbox_report, pd, plt, cell_lock):
+    """Accepts every connection, answering what does not touch the namespace.
+
+    Runs on its own thread so `ping` and `inspect_variables` answer while a
+    long cell runs. A cell, a reload and a reset are handed to the main thread
+    -- the one a SIGINT interrupts -- in arrival order. An isolated cell is
+    forked from here when no cell is running; otherwise it queues like any
+    other, and the main thread forks it between cells.
+    """
+    delay = 0.0
+    while True:
+        try:
+            conn, _ = server.accept()
+        except OSError as exc:
+            # A closed or invalid listener fails the same way forever: stop
+            # rather than spin on it.
+            if server.fileno() == -1 or exc.errno in (errno.EBADF, errno.EINVAL, errno.ENOTSOCK):
+                return
+            # Out of descriptors, say: wait for some to be released.
+            delay = min(max(delay * 2, 0.05), 1.0)
+            print("Control accept failed, retrying: " + str(exc), file=sys.__stderr__)
+            time.sleep(delay)
+            continue
+        delay = 0.0
+        try:
+            conn.settimeout(30)
+            payload = read_message(conn)
+            conn.settimeout(None)
+            if not payload:
+                conn.close()
+                continue
+            action = payload.get("action", "execute")
+            if action == "ping":
+                send_message(conn, {"status": "success", "pong": True})
+            elif action == "capabilities":
+                send_message(conn, {"status": "success", "modules": probe_capabilities(), "sandbox": sandbox_report})
+            elif action == "inspect_variables":
+                send_message(conn, {"status": "success", "variables": describe_namespace(exec_globals, pd)})
+            elif action == "set_limits":
+                apply_memory_limit(payload.get("mem_bytes") or 0)
+                send_message(conn, {"status": "success", "mem_limit_bytes": memory_limit()})
+            elif action == "profile":
+                if payload.get("enabled") is not None:
+                    PROFILING["enabled"] = bool(payload["enabled"])
+                send_message(conn, {"status": "success", "enabled": PROFILING["enabled"], "last": PROFILING["last"]})
+            elif action == "execute" and payload.get("isolated") and hasattr(os, "fork"):
+                if cell_lock.acquire(blocking=False):
+                    try:
+                        run_isolated(conn, payload, exec_globals, plt, server, cell_lock)
+                    finally:
+                        cell_lock.release()
+                else:
+                    work.put((conn, payload))
+                continue
+            else:
+                work.put((conn, payload))
+                continue
+            conn.close()
+        except Exception:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
 def run_server(port=%(port)d):
     with open(PID_FILE, "w") as handle:
         handle.write(str(os.getpid()))
@@ -275,6 +812,7 @@ def run_server(port=%(port)d):
 
     exec_globals = {"pd": pd, "np": np, "plt": plt, "sns": sns, "__builtins__": __builtins__}
     load_dataset(exec_globals, pd)
+    open_full_tables(exec_globals)
 
     server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
@@ -299,113 +837,51 @@ def run_server(port=%(port)d):
     print("Sandbox daemon listening on port " + str(port))
     sys.stdout.flush()
 
+    work = queue.Queue()
+    # Held for the whole of each queued item: whatever else must not overlap a
+    # cell -- a fork, binding an isolated cell's names -- takes it too.
+    cell_lock = threading.Lock()
+    threading.Thread(
+        target=serve_control,
+        args=(server, work, exec_globals, sandbox_report, pd, plt, cell_lock),
+        name="daemon-control",
+        daemon=True,
+    ).start()
+
     while True:
         conn = None
         try:
-            conn, _ = server.accept()
-            payload = read_message(conn)
-            if not payload:
-                conn.close()
-                continue
-
+            conn, payload = work.get()
             action = payload.get("action", "execute")
 
-            if action == "ping":
-                send_message(conn, {"status": "success", "pong": True})
-                conn.close()
-                continue
-
-            if action == "capabilities":
-                send_message(
-                    conn,
-                    {"status": "success", "modules": probe_capabilities(), "sandbox": sandbox_report},
-                )
-                conn.close()
-                continue
-
-            if action == "reload_dataset":
-                load_dataset(exec_globals, pd)
-                send_message(conn, {"status": "success"})
-                conn.close()
-                continue
-
-            if action == "reset":
-                exec_globals.clear()
-                exec_globals.update(
-                    {"pd": pd, "np": np, "plt": plt, "sns": sns, "__builtins__": __builtins__}
-                )
-                load_dataset(exec_globals, pd)
-                send_message(conn, {"status": "success"})
-                conn.close()
-                continue
-
-            if action == "inspect_variables":
-                info = {}
-                for name, value in list(exec_globals.items()):
-                    if name.startswith("__"):
-                        continue
-                    if type(value).__name__ in ("module", "function", "builtin_function_or_method", "type"):
-                        continue
-                    info[name] = describe(value, pd)
-                send_message(conn, {"status": "success", "variables": info})
-                conn.close()
-                continue
-
-            code = payload.get("code", "")
-            stdout_stream = StreamingStdout(conn)
-            stderr_buffer = io.StringIO()
-            real_stdout, real_stderr = sys.stdout, sys.stderr
-            sys.stdout, sys.stderr = stdout_stream, stderr_buffer
-
-            plot_data = None
-            status = "success"
-            try:
-                plt.close("all")
-                # The parent may have installed into LIBS_DIR since the last
-                # execution; without this the finder's negative cache still says
-                # the module is missing.
-                import importlib
-
-                importlib.invalidate_caches()
-                try:
-                    exec(code, exec_globals)
-                except ModuleNotFoundError as exc:
-                    if not ALLOW_PIP:
-                        raise
-                    install_missing(exc.name)
-                    exec(code, exec_globals)
-
-                if plt.get_fignums():
-                    buffer = io.BytesIO()
-                    plt.savefig(buffer, format="png", bbox_inches="tight", dpi=110)
-                    buffer.seek(0)
-                    plot_data = base64.b64encode(buffer.read()).decode("utf-8")
-                    plt.close("all")
-            except KeyboardInterrupt:
-                status = "interrupted"
-                print("Execution interrupted.", file=stderr_buffer)
-            except MemoryError:
-                status = "error"
-                stderr_buffer.write(
-                    "MemoryError: this step exceeded the memory limit for the runtime.\\n"
-                    "Work on a sample or in chunks, or raise SANDBOX_MEM_LIMIT."
-                )
-            except BaseException:
-                status = "error"
-                stderr_buffer.write(traceback.format_exc())
-            finally:
-                sys.stdout, sys.stderr = real_stdout, real_stderr
-
-            send_message(
-                conn,
-                {
-                    "status": status,
-                    "stdout": "",
-                    "stderr": stderr_buffer.getvalue(),
-                    "plot": plot_data,
-                },
-            )
+            with cell_lock:
+                if action == "reload_dataset":
+                    load_dataset(exec_globals, pd)
+                    open_full_tables(exec_globals)
+                    send_message(conn, {"status": "success"})
+                elif action == "reset":
+                    exec_globals.clear()
+                    exec_globals.update({"pd": pd, "np": np, "plt": plt, "sns": sns, "__builtins__": __builtins__})
+                    load_dataset(exec_globals, pd)
+                    open_full_tables(exec_globals)
+                    send_message(conn, {"status": "success"})
+                elif payload.get("isolated") and hasattr(os, "fork"):
+                    # Queued behind a cell that has now finished.
+                    run_isolated(conn, payload, exec_globals, plt, server, cell_lock)
+                    continue
+                else:
+                    reply = run_cell(conn, payload.get("code", ""), exec_globals, plt, payload.get("trace_memory"))
+                    send_message(conn, reply)
             conn.close()
+        except KeyboardInterrupt:
+            # An interrupt that arrives between cells has nothing to stop; it
+            # must not take the runtime down with it.
+            if conn is not None:
+                try:
+                    send_message(conn, {"status": "interrupted", "stdout": "", "stderr": "Execution interrupted."})
+                    conn.close()
+                except Exception:
+                    pass
         except Exception:
             try:
                 if conn is not None:
@@ -452,6 +928,8 @@ def render_daemon(
         "probe_modules": json.dumps(list(PROBE_MODULES)),
         "distributions": json.dumps(DISTRIBUTION_NAMES),
         "libs_dirname": LIBS_DIRNAME,
+        "full_dirname": FULL_DIRNAME,
+        "sheets_dirname": SHEETS_DIRNAME,
     }
 
 
@@ -479,6 +957,14 @@ class DaemonClient:
     #: Set by the subclass once the process is listening.
     port: int | None = None
     session_id: str = ""
+    #: When a request last started or finished (``time.time``), and how many
+    #: are in flight: what the resource governor reads to call a runtime idle.
+    last_used: float = 0.0
+    in_flight: int = 0
+
+    def __init__(self) -> None:
+        # Per runtime: a class-level lock would serialise every runtime's bookkeeping.
+        self._activity = threading.Lock()
 
     # ------------------------------------------------------------------ #
     def endpoint(self) -> tuple[str, int]:
@@ -505,9 +991,13 @@ class DaemonClient:
 
         timeout = settings.SANDBOX_EXEC_TIMEOUT
         host, port = self.endpoint()
-        sock = socket.create_connection((host, port), timeout=timeout)
-        sock.settimeout(timeout)
+        with self._activity:
+            self.in_flight += 1
+            self.last_used = time.time()
+        sock: socket.socket | None = None
         try:
+            sock = socket.create_connection((host, port), timeout=timeout)
+            sock.settimeout(timeout)
             raw = json.dumps(payload).encode("utf-8")
             sock.sendall(struct.pack(">I", len(raw)) + raw)
 
@@ -532,7 +1022,14 @@ class DaemonClient:
                 message["stdout"] = "".join(stdout_parts) + (message.get("stdout") or "")
                 return message
         finally:
-            sock.close()
+            if sock is not None:
+                sock.close()
+            self._settle()
+
+    def _settle(self) -> None:
+        with self._activity:
+            self.in_flight -= 1
+            self.last_used = time.time()
 
     @staticmethod
     def _recv_exactly(sock: socket.socket, count: int) -> bytearray | None:
@@ -545,51 +1042,80 @@ class DaemonClient:
         return data
 
     # ------------------------------------------------------------------ #
-    def run_code(self, code: str, on_stdout: Callable[[str], None] | None = None) -> tuple[str, str | None]:
+    def run_code(
+        self, code: str, on_stdout: Callable[[str], None] | None = None, isolated: bool = False
+    ) -> tuple[str, str | None]:
         """Executes ``code``. Returns ``(output_text, base64_png_or_None)``."""
+        output, plot, _resources = self.run_code_measured(code, on_stdout, isolated)
+        return output, plot
+
+    def run_code_measured(
+        self, code: str, on_stdout: Callable[[str], None] | None = None, isolated: bool = False
+    ) -> tuple[str, str | None, dict]:
+        """:meth:`run_code`, plus what the cell used as the daemon measured it.
+
+        The third element is the reply's ``resources`` frame -- empty when the
+        cell never reached the daemon.
+
+        ``isolated`` is for a cell that only reads the namespace -- a
+        verification, say. The daemon forks it beside whatever is running
+        instead of queueing it behind that, so it takes no lock here; variables
+        it creates are merged back, changes it makes to existing ones are not.
+        A runtime that cannot fork runs it in turn, as an ordinary cell.
+        """
         from src.config import settings
         from src.utils.logging import logger
 
+        payload: dict = {"action": "execute", "code": code, "trace_memory": settings.EXEC_TRACE_MEMORY}
         lock = getattr(self, "_lock", None)
+        if isolated:
+            payload.update(isolated=True, timeout=settings.SANDBOX_EXEC_TIMEOUT)
+            lock = None
         try:
             if lock is not None:
                 with lock:
-                    response = self._request({"action": "execute", "code": code}, on_stdout)
-            else:  # pragma: no cover - every concrete runtime carries a lock
-                response = self._request({"action": "execute", "code": code}, on_stdout)
+                    response = self._request(payload, on_stdout)
+            else:
+                response = self._request(payload, on_stdout)
         except TimeoutError:
             return (
                 f"Error executing code:\nExecution exceeded the {settings.SANDBOX_EXEC_TIMEOUT}s time limit.",
                 None,
+                {},
             )
         except DaemonUnavailableError as exc:
-            return f"Error executing code:\n{exc}", None
+            return f"Error executing code:\n{exc}", None, {}
         except Exception as exc:
             logger.error("Runtime communication failed", error=str(exc))
-            return f"Error executing code:\nRuntime communication failure: {exc}", None
+            return f"Error executing code:\nRuntime communication failure: {exc}", None, {}
 
         status = response.get("status")
         stdout = (response.get("stdout") or "").strip()
         stderr = (response.get("stderr") or "").strip()
+        resources = response.get("resources") or {}
 
         if status == "interrupted":
-            return "Execution interrupted by user.", None
+            return "Execution interrupted by user.", None, resources
         if status == "error":
             detail = stderr or "Unknown execution error."
-            return f"Error executing code:\n{detail}", None
-        return (stdout or "Executed successfully."), response.get("plot")
+            return f"Error executing code:\n{detail}", None, resources
+        return (stdout or "Executed successfully."), response.get("plot"), resources
+
+    def _simple(self, action: str, key: str | None = None, default=None, **fields):
+        """One request/response with no streaming, swallowing transport errors.
 
-    def _simple(self, action: str, key: str | None = None, default=None):
-        """One request/response with no streaming, swallowing transport errors."""
+        Control actions skip the lock: the daemon answers them on its own
+        thread, so a ping or a variable listing no longer waits out a cell.
+        """
         from src.utils.logging import logger
 
-        lock = getattr(self, "_lock", None)
+        lock = None if action in CONTROL_ACTIONS else getattr(self, "_lock", None)
         try:
             if lock is not None:
                 with lock:
-                    response = self._request({"action": action})
-            else:  # pragma: no cover
-                response = self._request({"action": action})
+                    response = self._request({"action": action, **fields})
+            else:
+                response = self._request({"action": action, **fields})
         except Exception as exc:
             logger.warning("Runtime action failed", action=action, error=str(exc))
             return default
@@ -622,6 +1148,27 @@ class DaemonClient:
     def ping(self) -> bool:
         return self._simple("ping", "pong", False) is True
 
+    def profile(self, enabled: bool | None = None) -> dict | None:
+        """Arms (or disarms) cProfile for the runtime's cells, and returns the last cell's.
+
+        ``enabled=None`` only reads. Answered on the control thread, so it can
+        be asked while the cell it is about to report on is still running.
+        Returns ``None`` when the runtime could not be asked.
+        """
+        fields = {} if enabled is None else {"enabled": bool(enabled)}
+        response = self._simple("profile", None, None, **fields)
+        if response is None:
+            return None
+        return {"enabled": bool(response.get("enabled")), "last": response.get("last")}
+
+    def set_memory_limit(self, mem_bytes: int) -> int | None:
+        """Moves the runtime's address-space ceiling; answered between cells or during one.
+
+        Returns the ceiling now in force (``0``: none), or ``None`` when the
+        runtime could not be asked.
+        """
+        return self._simple("set_limits", "mem_limit_bytes", None, mem_bytes=int(mem_bytes))
+
 
 __all__ = [
     "DAEMON_PATH",
@@ -0,0 +1,410 @@
+"""The whole host, looked at while it runs, and the limits that follow from it.
+
+``Settings`` splits the machine once, at boot: inference threads, a memory
+ceiling per runtime, and ``SESSION_MAX_ACTIVE`` from half the RAM over that
+ceiling. Under real load the runtimes, the resident models and this process
+compete for the same memory and cores, and nothing rebalanced that split --
+the first thing to notice a host running short was the OOM killer, and it
+picks whichever process is largest, which is usually the one mid-cell.
+
+:class:`AdaptiveLimits` adapts per session, from that session's own cells.
+:class:`ResourceGovernor` looks at the host as a whole every
+``GOVERNOR_INTERVAL_SECONDS``: free memory, the one-minute load, and each host
+runtime's resident size. From that sample it decides:
+
+* **Runtime admission.** As many live runtimes as free memory holds at the
+  observed per-runtime footprint, never more than ``SESSION_MAX_ACTIVE``.
+  Sessions themselves are not counted: one without a runtime holds no memory
+  worth freeing, and its rows are the user's work. Before a runtime starts,
+  :meth:`ResourceGovernor.make_room` stops the longest-idle ones past the
+  limit; a session with a turn running keeps its runtime.
+* **Runtime count.** Runtimes past the same figure, and under memory pressure
+  as many as it takes to get back above ``GOVERNOR_MEMORY_LOW``, are stopped
+  on each sample -- idle ones only, largest first under pressure. A stopped
+  runtime starts again on the session's next cell, as after a crash: the
+  datasets are on disk and reload, variables do not.
+* **Model fan-out.** Subagent branches are where a turn runs model calls (and
+  cells) side by side; under memory pressure they run one at a time, and on a
+  saturated CPU two at a time.
+* **Model residency.** Below ``GOVERNOR_MEMORY_CRITICAL``, with no turn
+  running, idle models are unloaded through ``llm_provider.release``. They
+  reload on the next call, which costs seconds; the OOM killer costs a turn.
+
+Sampling reads ``/proc`` and the pools' own bookkeeping; nothing here starts a
+process. Where a figure cannot be read (macOS, a Docker runtime's RSS) the
+decision that needs it is left as configured.
+"""
+
+from __future__ import annotations
+
+import os
+import statistics
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from src.config import settings
+from src.core.infra.metrics import registry
+from src.utils.hostinfo import available_ram_bytes, host_info
+from src.utils.logging import logger
+
+
+#: Share of the host's RAM never handed out, as in ``resources``.
+RESERVE_FRACTION = 0.1
+#: The smallest footprint assumed per runtime, before any has been measured.
+MIN_RUNTIME_BYTES = 256 * 1024 * 1024
+#: One-minute load per logical core at which the CPU counts as saturated.
+SATURATED_LOAD = 1.0
+#: Branches run at once on a saturated CPU.
+SATURATED_FAN_OUT = 2
+#: Models are unloaded at most this often, however long memory stays critical.
+RELEASE_COOLDOWN_SECONDS = 120.0
+
+EVICTIONS = registry.counter(
+    "wizard_governor_runtime_evictions_total", "Idle runtimes stopped by the resource governor.", ("reason",)
+)
+
+
+def _rss_bytes(pid: int | str) -> int | None:
+    """Resident set size of ``pid`` from ``/proc``; ``None`` off Linux or once it has gone."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        with open(f"/proc/{pid}/status", encoding="utf-8") as handle:
+            for line in handle:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        return None
+    return None
+
+
+def _load_1m() -> float | None:
+    try:
+        return os.getloadavg()[0]
+    except (OSError, AttributeError):
+        return None
+
+
+@dataclass(frozen=True)
+class RuntimeUsage:
+    """One live runtime, as sampled."""
+
+    session_id: str
+    rss_bytes: int | None
+    idle_seconds: float
+    busy: bool
+
+
+@dataclass(frozen=True)
+class HostSample:
+    total_bytes: int | None
+    available_bytes: int | None
+    load_1m: float | None
+    logical_cores: int
+    api_rss_bytes: int | None = None
+    runtimes: tuple[RuntimeUsage, ...] = ()
+    turns_running: bool = False
+
+    @property
+    def free_fraction(self) -> float | None:
+        if not self.total_bytes or self.available_bytes is None:
+            return None
+        return self.available_bytes / self.total_bytes
+
+    @property
+    def runtime_rss_bytes(self) -> int:
+        return sum(runtime.rss_bytes or 0 for runtime in self.runtimes)
+
+
+@dataclass(frozen=True)
+class Decision:
+    """What one sample implies. ``fan_out_limit`` of ``None`` leaves fan-out to ``AdaptiveLimits``."""
+
+    pressure: str
+    runtime_limit: int
+    fan_out_limit: int | None
+    evict: tuple[str, ...] = ()
+    release_models: bool = False
+    reasons: dict[str, str] = field(default_factory=dict)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "pressure": self.pressure,
+            "runtime_limit": self.runtime_limit,
+            "fan_out_limit": self.fan_out_limit,
+            "evict": list(self.evict),
+            "release_models": self.release_models,
+        }
+
+
+def decide(sample: HostSample) -> Decision:
+    """The limits and actions ``sample`` calls for. Pure: nothing is applied here."""
+    configured = max(1, settings.SESSION_MAX_ACTIVE)
+    free = sample.free_fraction
+    if free is None:
+        pressure = "unknown"
+    elif free < settings.GOVERNOR_MEMORY_CRITICAL:
+        pressure = "critical"
+    elif free < settings.GOVERNOR_MEMORY_LOW:
+        pressure = "low"
+    else:
+        pressure = "ok"
+
+    measured = [runtime.rss_bytes for runtime in sample.runtimes if runtime.rss_bytes]
+    per_runtime = max(MIN_RUNTIME_BYTES, int(statistics.median(measured)) if measured else 0)
+    live = len(sample.runtimes)
+    if sample.available_bytes is None or not sample.total_bytes:
+        limit = configured
+    else:
+        # Floor division on a negative headroom rounds away from zero, so a
+        # deficit of a fraction of a runtime still counts as one too many. The
+        # host's free memory is every API worker's to spend, so each takes a share.
+        headroom = sample.available_bytes - int(sample.total_bytes * RESERVE_FRACTION)
+        limit = max(1, min(configured, live + headroom // (per_runtime * max(1, settings.API_WORKERS))))
+
+    if pressure in ("low", "critical"):
+        fan_out: int | None = 1
+    elif sample.load_1m is not None and sample.load_1m >= SATURATED_LOAD * sample.logical_cores:
+        fan_out = SATURATED_FAN_OUT
+    else:
+        fan_out = None
+
+    idle = [
+        runtime
+        for runtime in sample.runtimes
+        if not runtime.busy and runtime.idle_seconds >= settings.GOVERNOR_IDLE_SECONDS
+    ]
+    evict: list[str] = []
+    reasons: dict[str, str] = {}
+    # Past the limit: the longest idle go first, whatever their size.
+    for runtime in sorted(idle, key=lambda runtime: -runtime.idle_seconds)[: max(0, live - limit)]:
+        evict.append(runtime.session_id)
+        reasons[runtime.session_id] = "over_limit"
+    if pressure in ("low", "critical") and sample.total_bytes and sample.available_bytes is not None:
+        # Under pressure: the largest go first, until free memory is estimated
+        # back above the low-water mark.
+        needed = int(sample.total_bytes * settings.GOVERNOR_MEMORY_LOW) - sample.available_bytes
+        needed -= sum(runtime.rss_bytes or 0 for runtime in idle if runtime.session_id in reasons)
+        for runtime in sorted(idle, key=lambda runtime: -(runtime.rss_bytes or 0)):
+            if needed <= 0:
+                break
+            if runtime.session_id in reasons:
+                continue
+            evict.append(runtime.session_id)
+            reasons[runtime.session_id] = "memory_pressure"
+            needed -= runtime.rss_bytes or per_runtime
+
+    return Decision(
+        pressure=pressure,
+        runtime_limit=limit,
+        fan_out_limit=fan_out,
+        evict=tuple(evict),
+        release_models=pressure == "critical" and not sample.turns_running,
+        reasons=reasons,
+    )
+
+
+class ResourceGovernor:
+    """Holds the latest :class:`Decision` and applies it; :meth:`step` is the periodic entry point."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._decision: Decision | None = None
+        self._sample: HostSample | None = None
+        self._released_at = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.GOVERNOR_ENABLED
+
+    @property
+    def runtime_limit(self) -> int:
+        """Runtimes to admit before stopping idle ones: ``SESSION_MAX_ACTIVE`` until a sample says otherwise."""
+        decision = self._decision
+        if not self.enabled or decision is None:
+            return settings.SESSION_MAX_ACTIVE
+        return min(settings.SESSION_MAX_ACTIVE, decision.runtime_limit)
+
+    @property
+    def fan_out_limit(self) -> int | None:
+        decision = self._decision
+        return decision.fan_out_limit if self.enabled and decision is not None else None
+
+    def sample(self) -> HostSample:
+        # Imported here: the session module reads this governor's limits, and
+        # the runtime pools and turn streams are only consulted, never owned.
+        from src.core.agent.replay import turn_streams
+        from src.core.infra.queue import JobStatus, get_queue
+        from src.core.session import session_manager
+        from src.core.tools.runtime import live_runtimes, parent_session_id
+
+        busy = turn_streams.running_sessions()
+        busy.update(job.session_id for job in get_queue().list_jobs() if job.status is JobStatus.RUNNING)
+        now = time.time()
+        usage = []
+        for session_id, runtime in live_runtimes().items():
+            owner = parent_session_id(session_id)
+            session = session_manager.peek(owner)
+            seen = max(runtime.last_used, session.last_seen if session is not None else 0.0)
+            process = getattr(runtime, "process", None)
+            usage.append(
+                RuntimeUsage(
+                    session_id=session_id,
+                    rss_bytes=_rss_bytes(process.pid) if getattr(process, "pid", None) else None,
+                    idle_seconds=now - seen if seen else float("inf"),
+                    busy=runtime.in_flight > 0 or owner in busy,
+                )
+            )
+        host = host_info()
+        return HostSample(
+            total_bytes=host.ram_bytes,
+            available_bytes=available_ram_bytes(),
+            load_1m=_load_1m(),
+            logical_cores=host.logical_cores,
+            api_rss_bytes=_rss_bytes("self"),
+            runtimes=tuple(usage),
+            turns_running=bool(busy),
+        )
+
+    def step(self) -> Decision | None:
+        """Samples, decides and applies. Blocking; the lifespan runs it on a thread."""
+        if not self.enabled:
+            return None
+        sample = self.sample()
+        decision = decide(sample)
+        with self._lock:
+            previous = self._decision
+            self._decision = decision
+            self._sample = sample
+        if previous is None or (previous.pressure, previous.runtime_limit, previous.fan_out_limit) != (
+            decision.pressure,
+            decision.runtime_limit,
+            decision.fan_out_limit,
+        ):
+            logger.info(
+                "Resource limits rebalanced",
+                pressure=decision.pressure,
+                free_mb=None if sample.available_bytes is None else sample.available_bytes // (1024 * 1024),
+                load_1m=None if sample.load_1m is None else round(sample.load_1m, 2),
+                runtimes=len(sample.runtimes),
+                runtime_rss_mb=sample.runtime_rss_bytes // (1024 * 1024),
+                runtime_limit=decision.runtime_limit,
+                fan_out_limit=decision.fan_out_limit,
+            )
+        self._apply(sample, decision)
+        return decision
+
+    def _apply(self, sample: HostSample, decision: Decision) -> None:
+        from src.core.tools import runtime as runtime_backend
+
+        sizes = {runtime.session_id: runtime.rss_bytes for runtime in sample.runtimes}
+        live = runtime_backend.live_runtimes() if decision.evict else {}
+        for session_id in decision.evict:
+            current = live.get(session_id)
+            if current is not None and current.in_flight:
+                # A cell started since the sample; it is not idle any more.
+                continue
+            reason = decision.reasons.get(session_id, "over_limit")
+            logger.warning(
+                "Stopping an idle runtime to free memory",
+                session=session_id,
+                reason=reason,
+                rss_mb=None if sizes.get(session_id) is None else sizes[session_id] // (1024 * 1024),
+            )
+            runtime_backend.release_runtime(session_id)
+            EVICTIONS.inc(reason=reason)
+
+        if decision.release_models and time.monotonic() - self._released_at >= RELEASE_COOLDOWN_SECONDS:
+            from src.core.llm.provider import LLMRole, llm_provider
+
+            self._released_at = time.monotonic()
+            logger.warning("Unloading idle models under memory pressure", free_fraction=sample.free_fraction)
+            roles = [LLMRole.MANAGER, LLMRole.WORKER] + ([LLMRole.VISION] if settings.VISION_ENABLED else [])
+            for role in roles:
+                llm_provider.release(role)
+
+    def make_room(self, session_id: str) -> None:
+        """Stops idle runtimes until one for ``session_id`` fits under :attr:`runtime_limit`.
+
+        Called before a runtime starts. Only runtimes with nothing in flight and
+        no turn running on their session are stopped, longest idle first; when
+        none qualifies the new one starts anyway, and the next :meth:`step`
+        deals with the pressure.
+        """
+        if not self.enabled or self._decision is None:
+            return
+        from src.core.agent.replay import turn_streams
+        from src.core.tools import runtime as runtime_backend
+
+        live = runtime_backend.live_runtimes()
+        excess = len(live) + 1 - self.runtime_limit
+        if session_id in live or excess <= 0:
+            return
+        owner = runtime_backend.parent_session_id(session_id)
+        busy = turn_streams.running_sessions() | {owner}
+        idle = sorted(
+            (
+                (other, runtime)
+                for other, runtime in live.items()
+                if not runtime.in_flight and runtime_backend.parent_session_id(other) not in busy
+            ),
+            key=lambda item: item[1].last_used,
+        )
+        for other, _runtime in idle[:excess]:
+            logger.warning("Stopping an idle runtime to admit another", session=other, admitting=session_id)
+            runtime_backend.release_runtime(other)
+            EVICTIONS.inc(reason="admission")
+
+    def snapshot(self) -> dict[str, Any] | None:
+        """The latest decision and the sample behind it, or ``None`` before the first step."""
+        with self._lock:
+            decision, sample = self._decision, self._sample
+        if decision is None or sample is None:
+            return None
+        return {
+            **decision.to_dict(),
+            "available_bytes": sample.available_bytes,
+            "load_1m": sample.load_1m,
+            "api_rss_bytes": sample.api_rss_bytes,
+            "runtime_rss_bytes": sample.runtime_rss_bytes,
+            "runtimes": len(sample.runtimes),
+        }
+
+
+governor = ResourceGovernor()
+
+
+def _sampled(name: str) -> float:
+    snapshot = governor.snapshot() or {}
+    value = snapshot.get(name)
+    return float("nan") if value is None else float(value)
+
+
+registry.gauge(
+    "wizard_host_memory_available_bytes",
+    "Free memory at the governor's last sample.",
+    collect=lambda: _sampled("available_bytes"),
+)
+registry.gauge(
+    "wizard_host_load1", "One-minute load at the governor's last sample.", collect=lambda: _sampled("load_1m")
+)
+registry.gauge(
+    "wizard_api_rss_bytes",
+    "Resident size of the API process at the last sample.",
+    collect=lambda: _sampled("api_rss_bytes"),
+)
+registry.gauge(
+    "wizard_runtime_rss_bytes",
+    "Resident size of every host runtime together, at the last sample.",
+    collect=lambda: _sampled("runtime_rss_bytes"),
+)
+registry.gauge(
+    "wizard_governor_runtime_limit",
+    "Runtimes admitted before idle ones are stopped.",
+    collect=lambda: governor.runtime_limit,
+)
+
+__all__ = ["Decision", "HostSample", "ResourceGovernor", "RuntimeUsage", "decide", "governor"]
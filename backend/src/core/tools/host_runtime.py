@@ -21,6 +21,11 @@ it on, :mod:`src.core.security.sandbox` restricts the child through the OS --
 Landlock and seccomp, an ``sandbox-exec`` profile, or a job object and a low
 integrity level -- and the runtime reports back which of those actually took,
 rather than the configuration being taken as evidence that they did.
+
+On Linux the child is normally forked from :mod:`src.core.tools.zygote`, which
+has already imported the analysis stack, rather than started as a fresh
+interpreter; the sandbox and the memory ceiling are applied after the fork
+either way.
 """
 
 from __future__ import annotations
@@ -40,6 +45,7 @@ from src.config import settings
 from src.core.security.sandbox import SpawnPlan, plan_spawn, policy_for
 from src.core.security.sandbox.bootstrap import render_bootstrap
 from src.core.tools.daemon import DaemonClient, find_free_port, render_daemon
+from src.core.tools.zygote import ForkedProcess, zygote
 from src.utils.logging import logger
 
 
@@ -47,17 +53,19 @@ class HostSession(DaemonClient):
     """One subprocess bound to one user session."""
 
     def __init__(self, session_id: str, workspace_dir: Path, extra_roots: tuple[str, ...] = ()):
+        super().__init__()
         self.session_id = session_id
         self.workspace_dir = workspace_dir
         # Directories the user consented to. The sandbox must not deny what the
         # permission profile was asked about and allowed, or the grant reads as
         # broken.
         self.extra_roots = extra_roots
-        self.process: subprocess.Popen | None = None
+        self.process: subprocess.Popen | ForkedProcess | None = None
         self.port: int | None = None
         self.created_at = time.time()
         self._script_path: Path | None = None
         self._bootstrap_path: Path | None = None
+        self._log_path: Path | None = None
         self._plan: SpawnPlan | None = None
         self._lock = threading.Lock()
 
@@ -128,6 +136,47 @@ class HostSession(DaemonClient):
         # matplotlib`, before any generated code exists.
         env.update(plan.env)
 
+        started = time.monotonic()
+        self.process = self._fork_from_zygote(plan)
+        forked = self.process is not None
+        if not forked:
+            self.process = self._spawn_cold(plan, env)
+
+        if plan.adopt is not None:
+            plan.adopt(self.process)
+
+        if not self._wait_ready():
+            detail = self._drain_startup_output(20000)
+            self.stop()
+            raise RuntimeError(f"Host runtime did not start: {detail or 'no output'}")
+
+        logger.info(
+            "Host runtime started",
+            session=self.session_id,
+            port=self.port,
+            pid=self.process.pid,
+            forked=forked,
+            start_ms=round((time.monotonic() - started) * 1000),
+            sandbox=plan.mechanism,
+            enforced=self._enforced_summary() if policy.enabled else "off",
+        )
+
+    def _fork_from_zygote(self, plan: SpawnPlan) -> ForkedProcess | None:
+        """The runtime forked from the warm zygote, or ``None`` to spawn cold.
+
+        Only a plan that is the bare command line qualifies: a wrapper such as
+        ``sandbox-exec`` or a job object to adopt into has to be applied by a
+        real spawn. Anything the fork needs beyond that -- the policy, the
+        memory ceiling -- the entry script applies in the child, as it would
+        after a cold start.
+        """
+        if plan.adopt is not None or plan.argv[:2] != [sys.executable, "-u"]:
+            return None
+        self._log_path = self.workspace_dir / ".runtime.log"
+        env = {"MPLBACKEND": "Agg", **plan.env}
+        return zygote.spawn(plan.argv[2:], self.workspace_dir, env, self._log_path)
+
+    def _spawn_cold(self, plan: SpawnPlan, env: dict[str, str]) -> subprocess.Popen:
         creation_flags = 0
         preexec = None
         if sys.platform == "win32":
@@ -138,7 +187,7 @@ class HostSession(DaemonClient):
             preexec = os.setsid
 
         try:
-            self.process = subprocess.Popen(
+            return subprocess.Popen(
                 plan.argv,
                 cwd=str(self.workspace_dir),
                 env=env,
@@ -153,23 +202,6 @@ class HostSession(DaemonClient):
             self.process = None
             raise
 
-        if plan.adopt is not None:
-            plan.adopt(self.process)
-
-        if not self._wait_ready():
-            detail = self._drain_startup_output()
-            self.stop()
-            raise RuntimeError(f"Host runtime did not start: {detail or 'no output'}")
-
-        logger.info(
-            "Host runtime started",
-            session=self.session_id,
-            port=self.port,
-            pid=self.process.pid,
-            sandbox=plan.mechanism,
-            enforced=self._enforced_summary() if policy.enabled else "off",
-        )
-
     def _enforced_summary(self) -> str:
         """What the child says actually took, asked of the child.
 
@@ -190,12 +222,14 @@ class HostSession(DaemonClient):
     def _wait_ready(self) -> bool:
         """Waits for the daemon to listen, giving up early if the child died.
 
-        The first start imports pandas and matplotlib, which on a cold page
-        cache is seconds -- so the timeout is generous, but a child that has
-        already exited is not waited on at all.
+        A cold start imports pandas and matplotlib, which on a cold page cache
+        is seconds -- so the timeout is generous, but a child that has already
+        exited is not waited on at all. A forked one is listening within tens
+        of milliseconds, so the poll starts fine and backs off.
         """
         deadline = time.time() + settings.HOST_RUNTIME_START_TIMEOUT
         host, port = self.endpoint()
+        delay = 0.005
         while time.time() < deadline:
             if self.process is None or self.process.poll() is not None:
                 return False
@@ -203,7 +237,8 @@ class HostSession(DaemonClient):
                 with socket.create_connection((host, port), timeout=0.5):
                     return True
             except OSError:
-                time.sleep(0.15)
+                time.sleep(delay)
+                delay = min(delay * 2, 0.15)
         return False
 
     def _drain_startup_output(self, limit: int = 2000) -> str:
@@ -236,7 +271,9 @@ class HostSession(DaemonClient):
             if sys.platform == "win32":
                 self.process.send_signal(signal.CTRL_BREAK_EVENT)
             else:
-                os.kill(self.process.pid, signal.SIGINT)
+                # Through the handle, not the bare pid: a forked runtime's pid is
+                # freed by the zygote the moment it exits.
+                self.process.send_signal(signal.SIGINT)
             logger.info("Host runtime interrupt signalled", session=self.session_id)
             return True
         except (OSError, ValueError) as exc:
@@ -265,7 +302,7 @@ class HostSession(DaemonClient):
         if plan is not None and plan.teardown is not None:
             plan.teardown()
 
-        for path in (self._script_path, self._bootstrap_path, self.pid_file):
+        for path in (self._script_path, self._bootstrap_path, self._log_path, self.pid_file):
             try:
                 if path is not None:
                     path.unlink(missing_ok=True)
@@ -295,6 +332,11 @@ class HostRuntimePool:
         """
         return settings.host_backend_allowed
 
+    def warm(self) -> None:
+        """Starts the zygote in the background, so the first session forks too."""
+        if self.available and settings.EXECUTION_BACKEND == "host":
+            zygote.warm()
+
     def workspace_for(self, session_id: str) -> Path:
         from src.core.tools.sandbox import sandbox_pool
 
@@ -365,11 +407,17 @@ class HostRuntimePool:
             self._sessions.clear()
         for session in sessions:
             session.stop()
+        zygote.shutdown()
 
     @property
     def active_count(self) -> int:
         return len(self._sessions)
 
+    def runtimes(self) -> dict[str, HostSession]:
+        """Every live runtime, by session id; a copy, safe to iterate while others start."""
+        with self._lock:
+            return dict(self._sessions)
+
 
 host_runtime_pool = HostRuntimePool()
 
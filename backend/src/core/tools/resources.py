@@ -0,0 +1,164 @@
+"""What cells actually use, and limits that follow it.
+
+Every runtime used to run under one fixed ceiling -- ``HOST_RUNTIME_MEM_LIMIT``,
+sized once at boot from the host's RAM -- and every parallel decision fanned out
+to as many branches as it named. Both were guesses made before any code ran: a
+session joining two large tables died at a ceiling the host could easily have
+raised, and four memory-hungry branches were started together on a host with
+room for two.
+
+Each daemon now reports what a cell used (the ``resources`` frame of its reply:
+wall and CPU seconds, peak RSS, output size, the ceiling in force and whether
+the cell ran out of it). :class:`AdaptiveLimits` keeps a short window of those
+per session and answers two questions from it:
+
+* :meth:`~AdaptiveLimits.memory_ceiling` -- the ceiling a host runtime should
+  run its next cell under. Raised when the session's peak nears it (or a cell
+  hit it) and the host has memory free to give; lowered again when usage falls
+  away or free memory runs short. Never below the configured limit, which stays
+  the floor, and never above ``ADAPTIVE_MEM_MAX``. The ceiling is ``RLIMIT_AS``,
+  address space rather than resident memory, which is why it is only ever moved
+  *up* from the configured floor on evidence: virtual size runs well ahead of
+  RSS for numpy code, so shrinking below the floor on an RSS reading would
+  break cells that were fine.
+* :meth:`~AdaptiveLimits.branch_concurrency` -- how many subagent branches may
+  run at once: as many as fit in free memory at the session's observed peak,
+  and no more than there are cores when its cells are CPU-bound.
+
+The window is keyed by session id and held here rather than on the session, as
+the usage ledger is, so the runtime layer does not import ``core.session``.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict, deque
+from typing import Any
+
+from src.config import settings
+from src.core.tools.governor import governor
+from src.utils.hostinfo import available_ram_bytes, host_info
+
+
+#: Cells remembered per session.
+WINDOW = 20
+#: Sessions remembered at all; the least recently active are dropped first.
+MAX_SESSIONS = 512
+#: Raise the ceiling once a session's peak passes this fraction of it...
+HIGH_WATER = 0.6
+#: ...and lower it once the peak falls below this fraction.
+LOW_WATER = 0.25
+#: A move smaller than this fraction of the current ceiling is not worth making.
+HYSTERESIS = 0.1
+#: Ceilings move in steps of this size.
+STEP_BYTES = 64 * 1024 * 1024
+#: The smallest per-branch footprint assumed when sizing fan-out.
+MIN_BRANCH_BYTES = 256 * 1024 * 1024
+#: Share of the host's RAM never handed out, left for the API process and the OS.
+RESERVE_FRACTION = 0.1
+#: CPU seconds per wall second above which a session's cells count as CPU-bound.
+CPU_BOUND_RATIO = 0.8
+
+
+def _round_up(num_bytes: float) -> int:
+    return int(-(-num_bytes // STEP_BYTES) * STEP_BYTES)
+
+
+def _reserve_bytes() -> int:
+    ram = host_info().ram_bytes
+    return int(ram * RESERVE_FRACTION) if ram else 0
+
+
+class AdaptiveLimits:
+    """Per-session usage history and the limits derived from it."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._history: OrderedDict[str, deque[dict[str, Any]]] = OrderedDict()
+
+    def record(self, session_id: str, resources: dict[str, Any]) -> None:
+        """Adds one cell's ``resources`` frame to the session's window."""
+        if not resources:
+            return
+        with self._lock:
+            window = self._history.get(session_id)
+            if window is None:
+                window = self._history[session_id] = deque(maxlen=WINDOW)
+            window.append(resources)
+            self._history.move_to_end(session_id)
+            while len(self._history) > MAX_SESSIONS:
+                self._history.popitem(last=False)
+
+    def forget(self, session_id: str) -> None:
+        with self._lock:
+            self._history.pop(session_id, None)
+
+    def _window(self, session_id: str) -> list[dict[str, Any]]:
+        with self._lock:
+            return list(self._history.get(session_id, ()))
+
+    def peak_rss(self, session_id: str) -> int | None:
+        """The highest peak RSS in the session's window, or ``None`` before any cell."""
+        peaks = [int(frame["peak_rss_bytes"]) for frame in self._window(session_id) if frame.get("peak_rss_bytes")]
+        return max(peaks) if peaks else None
+
+    def memory_ceiling(self, session_id: str, floor: int) -> int:
+        """The ceiling the session's runtime should run its next cell under.
+
+        ``floor`` is the configured limit; ``0`` (uncapped) is returned as is,
+        since there is nothing to adapt. Before any cell, and with adaptation
+        off, the answer is the ceiling already in force.
+        """
+        window = self._window(session_id)
+        current = int(window[-1].get("mem_limit_bytes") or floor) if window else floor
+        if floor <= 0 or not settings.ADAPTIVE_LIMITS or not window:
+            return current
+
+        peak = self.peak_rss(session_id) or 0
+        wanted = current
+        if window[-1].get("out_of_memory"):
+            wanted = current * 2
+        elif peak > HIGH_WATER * current or peak < LOW_WATER * current:
+            wanted = _round_up(peak / HIGH_WATER)
+
+        maximum = max(floor, settings.adaptive_mem_max_bytes)
+        available = available_ram_bytes()
+        if available is not None:
+            # A raise takes from what is free now, less a reserve for the rest
+            # of the host; when that goes negative the ceiling comes back down.
+            maximum = min(maximum, current + available - _reserve_bytes())
+        wanted = max(floor, min(wanted, maximum))
+
+        if current <= maximum and abs(wanted - current) < HYSTERESIS * current:
+            return current
+        return wanted
+
+    def branch_concurrency(self, session_id: str, requested: int) -> int:
+        """How many of ``requested`` subagent branches to run at once.
+
+        The resource governor's host-wide cap applies first, whether or not
+        per-session adaptation is on.
+        """
+        cap = governor.fan_out_limit
+        if cap is not None:
+            requested = max(1, min(requested, cap))
+        if requested <= 1 or not settings.ADAPTIVE_LIMITS:
+            return requested
+        allowed = requested
+        available = available_ram_bytes()
+        if available is not None:
+            # Each branch starts from the session's tables, so it is assumed to
+            # need what the session itself has needed.
+            per_branch = max(self.peak_rss(session_id) or 0, MIN_BRANCH_BYTES)
+            allowed = min(allowed, (available - _reserve_bytes()) // per_branch)
+        window = self._window(session_id)
+        wall = sum(float(frame.get("wall_seconds") or 0) for frame in window)
+        cpu = sum(float(frame.get("cpu_seconds") or 0) for frame in window)
+        if wall > 0 and cpu / wall >= CPU_BOUND_RATIO:
+            allowed = min(allowed, host_info().logical_cores)
+        return max(1, int(allowed))
+
+
+adaptive_limits = AdaptiveLimits()
+
+__all__ = ["AdaptiveLimits", "adaptive_limits"]
@@ -97,6 +97,10 @@ def get_runtime(session_id: str, create: bool = True) -> DaemonClient | None:
     handles.
     """
     backend = active_backend()
+    if create and backend in ("docker", "host"):
+        from src.core.tools.governor import governor
+
+        governor.make_room(session_id)
 
     if backend == "docker":
         from src.core.tools.sandbox import sandbox_pool
@@ -212,6 +216,14 @@ def active_runtime_count() -> int:
     return sandbox_pool.active_count + host_runtime_pool.active_count
 
 
+def live_runtimes() -> dict[str, DaemonClient]:
+    """Every runtime either pool holds, by session id (subagents' included)."""
+    from src.core.tools.host_runtime import host_runtime_pool
+    from src.core.tools.sandbox import sandbox_pool
+
+    return {**sandbox_pool.runtimes(), **host_runtime_pool.runtimes()}
+
+
 @lru_cache(maxsize=1)
 def _local_modules() -> frozenset[str]:
     """Modules importable in *this* process, probed once.
@@ -349,6 +361,7 @@ __all__ = [
     "forget_capabilities",
     "get_runtime",
     "is_subagent_id",
+    "live_runtimes",
     "parent_session_id",
     "rebind_roots",
     "release_runtime",
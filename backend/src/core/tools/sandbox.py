@@ -72,6 +72,7 @@ class SandboxSession(DaemonClient):
     """One container bound to one user session."""
 
     def __init__(self, client, session_id: str, workspace_dir: Path):
+        super().__init__()
         self.client = client
         self.session_id = session_id
         self.workspace_dir = workspace_dir
@@ -109,7 +110,11 @@ class SandboxSession(DaemonClient):
             "volumes": {host_workspace: {"bind": "/workspace", "mode": "rw"}},
             "working_dir": "/workspace",
             "detach": True,
-            "labels": {"wizard_managed": "true", "wizard_session": self.session_id},
+            "labels": {
+                "wizard_managed": "true",
+                "wizard_session": self.session_id,
+                "wizard_worker": str(settings.WORKER_INDEX),
+            },
             "network_disabled": settings.SANDBOX_NETWORK_DISABLED,
             # Containment: generated code must not be able to starve the host or
             # gain privileges beyond what it starts with.
@@ -324,13 +329,21 @@ class SandboxPool:
             session.stop()
 
     def prune_orphans(self):
-        """Removes containers left behind by a previous process."""
+        """Removes containers left behind by a previous process.
+
+        With several API workers each prunes only its own: another worker's
+        containers are live sessions. Containers from before workers were
+        labelled are the first worker's to remove.
+        """
         if not self.available:
             return
+        worker = str(settings.WORKER_INDEX)
         try:
             for container in self.client.containers.list(all=True, filters={"label": "wizard_managed=true"}):
                 if container.labels.get("wizard_session") in self._sessions:
                     continue
+                if container.labels.get("wizard_worker", "0") != worker:
+                    continue
                 try:
                     container.remove(force=True)
                 except Exception as exc:
@@ -351,6 +364,11 @@ class SandboxPool:
     def active_count(self) -> int:
         return len(self._sessions)
 
+    def runtimes(self) -> dict[str, SandboxSession]:
+        """Every live runtime, by session id; a copy, safe to iterate while others start."""
+        with self._lock:
+            return dict(self._sessions)
+
 
 sandbox_pool = SandboxPool()
 
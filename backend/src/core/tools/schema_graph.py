@@ -0,0 +1,400 @@
+"""The workspace's tables, indexed by what could connect them.
+
+Every prompt used to read every registered schema of the session, intersect
+each one's lowercased columns with the active table's and score its name and
+columns against the question; the join hints beside it compared every pair of
+tables. A workspace of a few hundred tables paid tens of thousands of column
+comparisons per prompt, to re-derive answers that change only when a table is
+registered or removed.
+
+:class:`SchemaGraph` holds one session's tables and keeps, as they come and go:
+
+* lowercased column name -> tables with that column, and the foreign-key
+  names (``user_id``, ``users_id``) a table's primary key answers to;
+* name and column tokens -> tables, for matching the question;
+* each column's value sketch (:mod:`src.core.tools.sketches`), with the
+  unique ones -- the columns a join can point at -- kept apart;
+* the join edges those imply, recomputed only for the table that changed.
+
+An edge is a pair of columns whose values say they join: one column unique and
+the other's values estimated to lie within it (``CONTAINMENT``), so
+``cust_no`` and ``customer_id`` holding the same ids are paired. Containment
+alone pairs any short run of small integers with any unique integer id --
+``age`` lies within ``products.id`` -- so the two must also be comparable in
+size, and the referencing column must look like a key: an id-like name, or
+about as many distinct values as the key has (``KEY_RATIO``). A pair the
+names alone suggest -- a shared name, or ``user_id`` beside ``users.id`` -- is
+kept unless both columns were sketched and their values are comparable in
+number and estimated not to overlap at all (``DISJOINT``); two ``code``
+columns from different systems are not offered as a join. Columns without a
+sketch (too few distinct values, measurements) keep the name rules alone.
+
+Related tables and join suggestions are then lookups. :data:`schema_graphs`
+keeps one graph per session, applies the registry's own writes to it in place,
+and rebuilds it from the database when :meth:`DatabaseManager.schema_version
+<src.core.database.DatabaseManager.schema_version>` shows a write it did not see.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+from collections import OrderedDict
+from typing import Any
+
+from src.core.database import db_mgr
+from src.core.rag.lexical import fold, tokenize
+from src.core.tools import sketches
+from src.core.tools.sketches import ColumnSketch
+
+
+#: Estimated share of a column's values found in a unique column of another
+#: table above which the two are reported as a join, whatever their names.
+CONTAINMENT = 0.8
+#: Distinct values of a referencing column, as a share of the key's, from which
+#: it counts as a key whatever its name.
+KEY_RATIO = 0.5
+#: Estimated overlap below which a name match is dropped as coincidence.
+DISJOINT = 0.05
+#: Sessions whose graph is kept; the least recently used is dropped and rebuilt
+#: on its next prompt.
+MAX_GRAPHS = 256
+
+
+def _stem(filename: str) -> tuple[str, str]:
+    name = filename.split(".")[0].lower()
+    return name, name[:-1] if name.endswith("s") else name
+
+
+def _references(schema: dict[str, Any]) -> set[str]:
+    """Column names that would point at this table's primary key: ``users.id`` <- ``user_id``."""
+    if not schema.get("primary_key"):
+        return set()
+    name, singular = _stem(schema["filename"])
+    return {f"{singular}_id", f"{name}_id"}
+
+
+def find_overlap(left: dict[str, Any], right: dict[str, Any]) -> list[tuple[str, str]]:
+    """Column pairs two tables could join on: a shared name or a name/key convention."""
+    left_name, left_singular = _stem(left["filename"])
+    right_name, right_singular = _stem(right["filename"])
+
+    overlap: list[tuple[str, str]] = []
+    for column_a in left["columns"]:
+        lowered_a = str(column_a).lower()
+        for column_b in right["columns"]:
+            lowered_b = str(column_b).lower()
+            if lowered_a == lowered_b:
+                overlap.append((column_a, column_b))
+                continue
+            # A foreign key convention: orders.user_id -> users.id
+            if right.get("primary_key") and lowered_b == str(right["primary_key"]).lower():
+                if lowered_a in {f"{right_singular}_id", f"{right_name}_id"}:
+                    overlap.append((column_a, column_b))
+            elif left.get("primary_key") and lowered_a == str(left["primary_key"]).lower():
+                if lowered_b in {f"{left_singular}_id", f"{left_name}_id"}:
+                    overlap.append((column_a, column_b))
+    return overlap
+
+
+def _sketches(schema: dict[str, Any]) -> dict[str, ColumnSketch]:
+    stored = (schema.get("meta") or {}).get("sketches") or {}
+    decoded = {column: ColumnSketch.from_dict(entry) for column, entry in stored.items()}
+    return {column: found for column, found in decoded.items() if found is not None}
+
+
+#: Last words of a column name that say it holds identifiers.
+_KEY_WORDS = frozenset({"id", "ids", "uuid", "guid", "key", "no", "num", "number", "code", "ref"})
+
+
+def _id_like(column: str) -> bool:
+    """``cust_no``, ``customerId``, ``order ref``: a name whose last word names an identifier."""
+    words = re.findall(r"[a-z]+|[0-9]+", re.sub(r"([a-z])([A-Z])", r"\1 \2", str(column)).lower())
+    return bool(words) and words[-1] in _KEY_WORDS
+
+
+def _joins(name: str, inner: ColumnSketch, outer: ColumnSketch) -> bool:
+    """Whether column ``name`` (``inner``) references ``outer``: a key its values lie within."""
+    if not outer.unique or not sketches.comparable(inner, outer):
+        return False
+    if not _id_like(name) and inner.distinct < KEY_RATIO * outer.distinct:
+        return False
+    return sketches.containment(inner, outer) >= CONTAINMENT
+
+
+def _disjoint(left: ColumnSketch, right: ColumnSketch) -> bool:
+    return (
+        sketches.comparable(left, right)
+        and sketches.containment(left, right) < DISJOINT
+        and sketches.containment(right, left) < DISJOINT
+    )
+
+
+def _tokens(schema: dict[str, Any]) -> set[str]:
+    """What the question is matched on: the file name's words, and its columns' folded."""
+    found = tokenize(schema.get("filename", ""))
+    for column in schema.get("columns", []):
+        found |= {fold(token) for token in tokenize(str(column))}
+    return found
+
+
+class SchemaGraph:
+    """One session's tables and the indexes over them."""
+
+    def __init__(self, schemas: list[dict[str, Any]] = (), version: int = 0):
+        self.version = version
+        self._lock = threading.Lock()
+        # Registration order, which is the order the database lists them in: a
+        # re-registered table moves to the end, as `INSERT OR REPLACE` moves it.
+        self._tables: dict[str, dict[str, Any]] = {}
+        self._order: dict[str, int] = {}
+        self._registered = 0
+        self._lowered: dict[str, frozenset[str]] = {}
+        self._by_columns: dict[frozenset[str], set[str]] = {}
+        self._by_column: dict[str, set[str]] = {}
+        self._by_reference: dict[str, set[str]] = {}
+        self._by_token: dict[str, set[str]] = {}
+        self._sketches: dict[str, dict[str, ColumnSketch]] = {}
+        self._keys: dict[tuple[str, str], ColumnSketch] = {}
+        self._edges: dict[tuple[str, str], list[tuple[str, str]]] = {}
+        self._adjacent: dict[str, set[tuple[str, str]]] = {}
+        for schema in schemas:
+            self._add(schema)
+
+    def __len__(self) -> int:
+        return len(self._tables)
+
+    # ------------------------------------------------------------------ #
+    def add(self, schema: dict[str, Any]) -> None:
+        with self._lock:
+            self._add(schema)
+
+    def remove(self, filename: str) -> None:
+        with self._lock:
+            self._remove(filename)
+
+    def _add(self, schema: dict[str, Any]) -> None:
+        filename = schema["filename"]
+        self._remove(filename)
+        lowered = frozenset(str(column).lower() for column in schema.get("columns", []))
+        sketched = _sketches(schema)
+        neighbours = self._neighbours(schema, lowered, sketched)
+
+        self._tables[filename] = schema
+        self._order[filename] = self._registered
+        self._registered += 1
+        self._lowered[filename] = lowered
+        self._by_columns.setdefault(lowered, set()).add(filename)
+        for column in lowered:
+            self._by_column.setdefault(column, set()).add(filename)
+        for name in _references(schema):
+            self._by_reference.setdefault(name, set()).add(filename)
+        for token in _tokens(schema):
+            self._by_token.setdefault(token, set()).add(filename)
+        self._sketches[filename] = sketched
+        for column, found in sketched.items():
+            if found.unique:
+                self._keys[(filename, column)] = found
+
+        # Every other table is older now, so it is the left side of the pair.
+        for other in neighbours:
+            overlap = self._overlap(self._tables[other], schema)
+            if overlap:
+                self._edges[(other, filename)] = overlap
+                self._adjacent.setdefault(other, set()).add((other, filename))
+                self._adjacent.setdefault(filename, set()).add((other, filename))
+
+    def _remove(self, filename: str) -> None:
+        schema = self._tables.pop(filename, None)
+        if schema is None:
+            return
+        del self._order[filename]
+        lowered = self._lowered.pop(filename)
+        self._discard(self._by_columns, lowered, filename)
+        for column in lowered:
+            self._discard(self._by_column, column, filename)
+        for name in _references(schema):
+            self._discard(self._by_reference, name, filename)
+        for token in _tokens(schema):
+            self._discard(self._by_token, token, filename)
+        for column in self._sketches.pop(filename, {}):
+            self._keys.pop((filename, column), None)
+        for pair in self._adjacent.pop(filename, set()):
+            del self._edges[pair]
+            other = pair[0] if pair[1] == filename else pair[1]
+            self._discard(self._adjacent, other, pair)
+
+    @staticmethod
+    def _discard(index: dict, key: Any, value: Any) -> None:
+        members = index.get(key)
+        if members is not None:
+            members.discard(value)
+            if not members:
+                del index[key]
+
+    def _neighbours(
+        self, schema: dict[str, Any], lowered: frozenset[str], sketched: dict[str, ColumnSketch]
+    ) -> set[str]:
+        """Tables :func:`find_overlap` or a value match could pair with ``schema``.
+
+        The value half compares this table's columns with the session's keys,
+        and its keys with every sketched column: work done once per
+        registration, in proportion to the workspace, so no prompt does it.
+        """
+        found: set[str] = set()
+        for column in lowered:
+            found |= self._by_column.get(column, set())
+            found |= self._by_reference.get(column, set())
+        for name in _references(schema):
+            found |= self._by_column.get(name, set())
+        for (table, _key), key_sketch in self._keys.items():
+            if table not in found and any(_joins(name, column, key_sketch) for name, column in sketched.items()):
+                found.add(table)
+        for key_sketch in (column for column in sketched.values() if column.unique):
+            for table, columns in self._sketches.items():
+                if table not in found and any(_joins(name, column, key_sketch) for name, column in columns.items()):
+                    found.add(table)
+        found.discard(schema["filename"])
+        return found
+
+    def _overlap(self, left: dict[str, Any], right: dict[str, Any]) -> list[tuple[str, str]]:
+        left_sketches = self._sketches[left["filename"]]
+        right_sketches = self._sketches[right["filename"]]
+        overlap = [
+            (column_a, column_b)
+            for column_a, column_b in find_overlap(left, right)
+            if not (
+                column_a in left_sketches
+                and column_b in right_sketches
+                and _disjoint(left_sketches[column_a], right_sketches[column_b])
+            )
+        ]
+        for column_a, sketch_a in left_sketches.items():
+            for column_b, sketch_b in right_sketches.items():
+                if (column_a, column_b) not in overlap and (
+                    _joins(column_a, sketch_a, sketch_b) or _joins(column_b, sketch_b, sketch_a)
+                ):
+                    overlap.append((column_a, column_b))
+        return overlap
+
+    # ------------------------------------------------------------------ #
+    def joins_with(self, columns: set[str]) -> dict[str, list[tuple[str, str]]] | None:
+        """Join pairs between the table with these (lowercased) columns and each other table.
+
+        Oriented ``(its column, other table's column)``. ``None`` when no
+        registered table has exactly these columns.
+        """
+        with self._lock:
+            own = self._by_columns.get(frozenset(columns))
+            if not own:
+                return None
+            joins: dict[str, list[tuple[str, str]]] = {}
+            for left, right in sorted({pair for table in own for pair in self._adjacent.get(table, ())}):
+                overlap = self._edges[(left, right)]
+                if left in own and right not in own:
+                    joins.setdefault(right, []).extend(overlap)
+                elif right in own and left not in own:
+                    joins.setdefault(left, []).extend((b, a) for a, b in overlap)
+            return joins
+
+    def schemas(self) -> list[dict[str, Any]]:
+        with self._lock:
+            return list(self._tables.values())
+
+    def join_suggestions(self) -> list[dict[str, Any]]:
+        """Pairs of tables that share a column name, a name/key convention or key values."""
+        with self._lock:
+            order = self._order
+            pairs = sorted(self._edges.items(), key=lambda item: (order[item[0][0]], order[item[0][1]]))
+        return [
+            {
+                "file1": left,
+                "file2": right,
+                "matching_columns": [{"col1": a, "col2": b} for a, b in overlap],
+            }
+            for (left, right), overlap in pairs
+        ]
+
+    def candidates(self, query_tokens: set[str], active_columns: set[str]) -> list[dict[str, Any]]:
+        """Tables sharing a column with the active one or a word with the question, in registration order.
+
+        Every table a name or column score could rate above zero is here; the
+        active table itself (same column set) is not.
+        """
+        with self._lock:
+            active = frozenset(active_columns)
+            found: set[str] = set()
+            for column in active:
+                found |= self._by_column.get(column, set())
+            for table in self._by_columns.get(active, ()):
+                found |= {other for pair in self._adjacent.get(table, ()) for other in pair}
+            for token in query_tokens:
+                found |= self._by_token.get(token, set())
+                found |= self._by_token.get(fold(token), set())
+            found -= self._by_columns.get(active, set())
+            return [self._tables[filename] for filename in sorted(found, key=self._order.__getitem__)]
+
+
+class SchemaGraphs:
+    """One :class:`SchemaGraph` per session, kept in step with the registry."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._graphs: OrderedDict[str | None, SchemaGraph] = OrderedDict()
+
+    def get(self, session_id: str | None) -> SchemaGraph:
+        version = db_mgr.schema_version(session_id)
+        with self._lock:
+            graph = self._graphs.get(session_id)
+            if graph is not None and graph.version == version:
+                self._graphs.move_to_end(session_id)
+                return graph
+        # Read with the version taken first: a write landing in between leaves
+        # the graph a version behind, so the next call rebuilds it again.
+        graph = SchemaGraph(db_mgr.get_schemas(session_id=session_id), version)
+        with self._lock:
+            self._graphs[session_id] = graph
+            self._graphs.move_to_end(session_id)
+            while len(self._graphs) > MAX_GRAPHS:
+                self._graphs.popitem(last=False)
+        return graph
+
+    def saved(self, schema: dict[str, Any], version: int) -> None:
+        """Applies a registration the database numbered ``version``."""
+        self._apply(schema.get("session_id"), version, lambda graph: graph.add(schema))
+
+    def deleted(self, filename: str, session_id: str | None, version: int) -> None:
+        self._apply(session_id, version, lambda graph: graph.remove(filename))
+
+    def _apply(self, session_id: str | None, version: int, change) -> None:
+        with self._lock:
+            # The all-sessions view is rare enough to rebuild on any change.
+            self._graphs.pop(None, None)
+            graph = self._graphs.get(session_id)
+            if graph is None or not version:
+                return
+            if graph.version != version - 1:
+                # Another write came between this one and the graph; start over.
+                del self._graphs[session_id]
+                return
+            change(graph)
+            graph.version = version
+
+    def forget(self, session_id: str) -> None:
+        with self._lock:
+            self._graphs.pop(session_id, None)
+
+
+schema_graphs = SchemaGraphs()
+
+
+__all__ = [
+    "CONTAINMENT",
+    "DISJOINT",
+    "KEY_RATIO",
+    "MAX_GRAPHS",
+    "SchemaGraph",
+    "SchemaGraphs",
+    "find_overlap",
+    "schema_graphs",
+]
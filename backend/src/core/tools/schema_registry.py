@@ -1,7 +1,9 @@
 """Schema catalogue enabling multi-table reasoning.
 
 Registrations are scoped to a session so one user's tables never appear in
-another user's prompt context.
+another user's prompt context. What prompts ask of it -- related tables, join
+hints -- is answered from the session's :class:`~src.core.tools.schema_graph.SchemaGraph`,
+which every registration and removal here updates in place.
 """
 
 from __future__ import annotations
@@ -10,7 +12,10 @@ from typing import Any
 
 import pandas as pd
 
+from src.config import settings
 from src.core.database import db_mgr
+from src.core.tools import sketches
+from src.core.tools.schema_graph import schema_graphs
 from src.utils.logging import logger
 
 
@@ -21,27 +26,102 @@ class SchemaRegistry:
     """Stores table shapes and infers plausible join keys between them."""
 
     @classmethod
-    def register_dataframe(cls, filename: str, df: pd.DataFrame, session_id: str | None = None):
+    def register_dataframe(
+        cls,
+        filename: str,
+        df: pd.DataFrame,
+        session_id: str | None = None,
+        catalog: dict[str, Any] | None = None,
+    ):
+        """Saves the table's shape and inferred primary key.
+
+        ``catalog`` is the frame's :meth:`CatalogEngine.analyze` result when the
+        caller already has one. Its exact null counts are reused rather than
+        recounted, and its cardinalities settle most primary-key candidates
+        without another pass over the column.
+        """
         try:
             columns = [str(column) for column in df.columns]
+            profiled = cls._profiled_columns(df, catalog)
+            if profiled is not None:
+                null_counts = {column: int(profiled[column]["quality"]["null_count"]) for column in columns}
+            else:
+                null_counts = {str(column): int(count) for column, count in df.isnull().sum().items()}
+            primary_key = cls._detect_primary_key(df, profiled, catalog)
             meta = {
                 "dtypes": {str(column): str(dtype) for column, dtype in df.dtypes.items()},
-                "null_counts": {str(column): int(count) for column, count in df.isnull().sum().items()},
+                "null_counts": null_counts,
+                "sketches": cls._sketch_columns(df, primary_key),
             }
-            db_mgr.save_schema(
+            schema = {
+                "filename": filename,
+                "session_id": session_id,
+                "columns": columns,
+                "row_count": int(len(df)),
+                "primary_key": primary_key,
+                "meta": meta,
+            }
+            version = db_mgr.save_schema(
                 filename=filename,
                 columns=columns,
-                row_count=int(len(df)),
-                primary_key=cls._detect_primary_key(df),
+                row_count=schema["row_count"],
+                primary_key=primary_key,
                 meta=meta,
                 session_id=session_id,
             )
+            schema_graphs.saved(schema, version)
             logger.info("Registered dataset schema", filename=filename, columns=len(columns))
         except Exception as exc:
             logger.error("Failed to register schema", filename=filename, error=str(exc))
 
     @classmethod
-    def _detect_primary_key(cls, df: pd.DataFrame) -> str:
+    def unregister(cls, filename: str, session_id: str | None = None) -> None:
+        version = db_mgr.delete_schema(filename, session_id=session_id)
+        schema_graphs.deleted(filename, session_id, version)
+
+    @staticmethod
+    def _sketch_columns(df: pd.DataFrame, primary_key: str) -> dict[str, dict[str, Any]]:
+        """A value sketch per join-candidate column, keys first, at most ``SKETCH_MAX_COLUMNS``.
+
+        Computed here, once, so finding a join never needs the table again. A
+        wide frame is bounded because registration sits on the upload path.
+        """
+
+        def priority(column: Any) -> int:
+            lowered = str(column).lower()
+            if str(column) == primary_key:
+                return 0
+            return 1 if lowered in ID_NAMES or lowered.endswith("_id") or lowered.startswith("id_") else 2
+
+        sketched: dict[str, dict[str, Any]] = {}
+        for column in sorted(df.columns, key=priority):
+            if len(sketched) >= settings.SKETCH_MAX_COLUMNS:
+                break
+            try:
+                found = sketches.sketch(df[column])
+            except (TypeError, ValueError):
+                continue
+            if found is not None:
+                sketched[str(column)] = found.to_dict()
+        return sketched
+
+    @staticmethod
+    def _profiled_columns(df: pd.DataFrame, catalog: dict[str, Any] | None) -> dict[str, Any] | None:
+        """The catalog's per-column entries, if it describes exactly this frame."""
+        if not catalog:
+            return None
+        entries = catalog.get("columns") or {}
+        rows = (catalog.get("global_quality") or {}).get("rows")
+        if rows != len(df) or set(entries) != {str(column) for column in df.columns}:
+            return None
+        if not all("null_count" in (entry.get("quality") or {}) for entry in entries.values()):
+            return None
+        return entries
+
+    @classmethod
+    def _detect_primary_key(
+        cls, df: pd.DataFrame, profiled: dict[str, Any] | None = None, catalog: dict[str, Any] | None = None
+    ) -> str:
         """Heuristic primary key: a conventional name first, then any unique column."""
         for column in df.columns:
             if str(column).lower() in ID_NAMES:
@@ -51,73 +131,51 @@ class SchemaRegistry:
             lowered = str(column).lower()
             if lowered.endswith("_id") or lowered.startswith("id_"):
                 try:
-                    if df[column].is_unique:
+                    if cls._is_unique(df, column, profiled, catalog):
                         return str(column)
                 except TypeError:
                     continue
 
         for column in df.columns:
             try:
-                if df[column].isnull().sum() == 0 and df[column].is_unique:
+                if df[column].isnull().sum() == 0 and cls._is_unique(df, column, profiled, catalog):
                     return str(column)
             except TypeError:
                 continue
         return ""
 
-    # ------------------------------------------------------------------ #
-    @classmethod
-    def get_join_suggestions(cls, session_id: str | None = None) -> list[dict[str, Any]]:
-        """Pairs of tables that share a column name or a name/key convention."""
-        schemas = db_mgr.get_schemas(session_id=session_id)
-        if len(schemas) < 2:
-            return []
-
-        suggestions = []
-        for i in range(len(schemas)):
-            for j in range(i + 1, len(schemas)):
-                left, right = schemas[i], schemas[j]
-                overlap = cls._find_overlap(left, right)
-                if overlap:
-                    suggestions.append(
-                        {
-                            "file1": left["filename"],
-                            "file2": right["filename"],
-                            "matching_columns": [{"col1": a, "col2": b} for a, b in overlap],
-                        }
-                    )
-        return suggestions
-
     @staticmethod
-    def _stem(filename: str) -> tuple[str, str]:
-        name = filename.split(".")[0].lower()
-        return name, name[:-1] if name.endswith("s") else name
+    def _is_unique(
+        df: pd.DataFrame, column: Any, profiled: dict[str, Any] | None, catalog: dict[str, Any] | None
+    ) -> bool:
+        """``df[column].is_unique``, answered from the catalog where it can be.
+
+        Exact when the catalog profiled every row. From a sample only a "no" is
+        conclusive -- a duplicate in the sample is a duplicate in the frame.
+        """
+        if profiled is not None:
+            quality = profiled[str(column)]["quality"]
+            distinct = int(quality.get("unique_values", -1))
+            if distinct >= 0:
+                overall = catalog["global_quality"]
+                nulls = int(quality["null_count"])
+                if not overall.get("sampled"):
+                    return distinct + (1 if nulls else 0) == len(df)
+                if nulls == 0 and distinct < int(overall.get("sample_rows") or 0):
+                    return False
+        return bool(df[column].is_unique)
 
+    # ------------------------------------------------------------------ #
     @classmethod
-    def _find_overlap(cls, left: dict[str, Any], right: dict[str, Any]) -> list[tuple[str, str]]:
-        left_name, left_singular = cls._stem(left["filename"])
-        right_name, right_singular = cls._stem(right["filename"])
-
-        overlap: list[tuple[str, str]] = []
-        for column_a in left["columns"]:
-            lowered_a = str(column_a).lower()
-            for column_b in right["columns"]:
-                lowered_b = str(column_b).lower()
-                if lowered_a == lowered_b:
-                    overlap.append((column_a, column_b))
-                    continue
-                # A foreign key convention: orders.user_id -> users.id
-                if right.get("primary_key") and lowered_b == str(right["primary_key"]).lower():
-                    if lowered_a in {f"{right_singular}_id", f"{right_name}_id"}:
-                        overlap.append((column_a, column_b))
-                elif left.get("primary_key") and lowered_a == str(left["primary_key"]).lower():
-                    if lowered_b in {f"{left_singular}_id", f"{left_name}_id"}:
-                        overlap.append((column_a, column_b))
-        return overlap
+    def get_join_suggestions(cls, session_id: str | None = None) -> list[dict[str, Any]]:
+        """Pairs of tables that share a column name, a name/key convention or key values."""
+        return schema_graphs.get(session_id).join_suggestions()
 
     @classmethod
     def get_workspace_schema_context(cls, session_id: str | None = None) -> str:
         """Renders all registered tables for prompt injection."""
-        schemas = db_mgr.get_schemas(session_id=session_id)
+        graph = schema_graphs.get(session_id)
+        schemas = graph.schemas()
         if not schemas:
             return ""
 
@@ -131,7 +189,7 @@ class SchemaRegistry:
             described = ", ".join(f"{c} ({dtypes.get(c, 'unknown')})" for c in schema["columns"][:30])
             lines.append(f"  Columns: {described}")
 
-        suggestions = cls.get_join_suggestions(session_id=session_id)
+        suggestions = graph.join_suggestions()
         if suggestions:
             lines.append("--- Possible joins ---")
             for suggestion in suggestions:
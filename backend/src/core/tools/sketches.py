@@ -0,0 +1,178 @@
+"""Fixed-size summaries of a column's values, for finding joins without the data.
+
+Two tables join on a pair of columns whose *values* line up, and a name only
+hints at that: ``cust_no`` and ``customer_id`` holding the same ids share no
+name, and two ``code`` columns from different systems share nothing else.
+Comparing values directly would mean holding both tables at once, which a
+workspace of hundreds of tables cannot do on every prompt. So each column is
+summarised once, when its table is registered, into a :class:`ColumnSketch`:
+
+* a **MinHash** signature -- ``NUM_PERM`` minima of the distinct values under
+  as many hash functions; the share of positions two signatures agree on
+  estimates the Jaccard similarity of the two value sets;
+* a **HyperLogLog** register array, estimating the number of distinct values
+  to a few percent in ``2**HLL_BITS`` bytes;
+* whether every non-null value is distinct -- whether the column can be the
+  referenced side of a join at all.
+
+From Jaccard and the two cardinalities follows *containment*, the share of one
+column's values found in the other (:func:`containment`), which is the
+question a join key answers: every ``orders.buyer_id`` should be a
+``customers.customer_id``, while the reverse need not hold.
+
+MinHash sees containment only while the two sets are of comparable size: a
+hundred ids inside a million are a Jaccard of 1e-4, below what 64 positions
+resolve. :func:`comparable` says when an estimate means something, and a
+low-containment verdict is only acted on when it does.
+"""
+
+from __future__ import annotations
+
+import base64
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+
+#: Positions in a signature. The Jaccard estimate's standard error is about
+#: ``sqrt(J(1 - J) / NUM_PERM)`` -- a few hundredths at 64.
+NUM_PERM = 64
+#: HyperLogLog index bits: 256 one-byte registers, about 6.5% standard error.
+HLL_BITS = 8
+#: Fewer distinct values than this are not sketched. Two short runs of small
+#: integers agree by construction, not because one references the other.
+MIN_DISTINCT = 20
+#: Smallest size ratio at which a Jaccard estimate can tell contained from disjoint.
+MIN_RATIO = 0.1
+
+_REGISTERS = 1 << HLL_BITS
+_ALPHA = 0.7213 / (1 + 1.079 / _REGISTERS)
+_rng = np.random.default_rng(0x5EED_5CE7)
+_XOR = _rng.integers(0, 2**63, size=NUM_PERM, dtype=np.uint64)
+_MUL = _rng.integers(0, 2**63, size=NUM_PERM, dtype=np.uint64) | np.uint64(1)
+
+
+@dataclass(eq=False)
+class ColumnSketch:
+    """One column's MinHash signature, HyperLogLog registers and uniqueness."""
+
+    minhash: np.ndarray
+    registers: np.ndarray
+    unique: bool
+    _distinct: float | None = field(default=None, repr=False)
+
+    @property
+    def distinct(self) -> float:
+        """Estimated distinct non-null values."""
+        if self._distinct is None:
+            self._distinct = _estimate(self.registers)
+        return self._distinct
+
+    def to_dict(self) -> dict[str, object]:
+        return {
+            "minhash": [int(value) for value in self.minhash],
+            "hll": base64.b64encode(self.registers.tobytes()).decode("ascii"),
+            "unique": self.unique,
+        }
+
+    @classmethod
+    def from_dict(cls, stored: dict[str, object]) -> ColumnSketch | None:
+        try:
+            minhash = np.asarray(stored["minhash"], dtype=np.uint64)
+            registers = np.frombuffer(base64.b64decode(str(stored["hll"])), dtype=np.uint8)
+        except (KeyError, TypeError, ValueError, OverflowError):
+            return None
+        if minhash.size != NUM_PERM or registers.size != _REGISTERS:
+            return None
+        return cls(minhash=minhash, registers=registers, unique=bool(stored.get("unique")))
+
+
+def value_hashes(series: pd.Series) -> np.ndarray | None:
+    """One 64-bit hash per non-null value, or ``None`` for a column no join is made on.
+
+    Integral floats are hashed as integers, so an id column read as ``float64``
+    because of a missing value still matches the ``int64`` one it references.
+    Fractional floats and booleans are measurements and flags, not keys.
+    """
+    values = series.dropna()
+    if pd.api.types.is_bool_dtype(values):
+        return None
+    if pd.api.types.is_numeric_dtype(values):
+        floats = values.astype("float64")
+        if not bool((floats == np.floor(floats)).all()) or not bool((floats.abs() < 2**63).all()):
+            return None
+        values = floats.astype("int64")
+    else:
+        values = values.astype(str).str.strip()
+    return pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64)
+
+
+def sketch(series: pd.Series) -> ColumnSketch | None:
+    """The column's sketch, or ``None`` when it is not a join candidate."""
+    hashes = value_hashes(series)
+    if hashes is None:
+        return None
+    distinct = np.unique(hashes)
+    if distinct.size < MIN_DISTINCT:
+        return None
+
+    signature = np.empty(NUM_PERM, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for position in range(NUM_PERM):
+            mixed = (distinct ^ _XOR[position]) * _MUL[position]
+            mixed ^= mixed >> np.uint64(31)
+            signature[position] = mixed.min()
+
+    registers = np.zeros(_REGISTERS, dtype=np.uint8)
+    index = (distinct >> np.uint64(64 - HLL_BITS)).astype(np.intp)
+    rest = (distinct << np.uint64(HLL_BITS)) | np.uint64(1 << (HLL_BITS - 1))
+    # Leading zeros of the remaining bits, plus one. The guard bit above keeps
+    # the count finite.
+    rank = (64 - np.floor(np.log2(rest.astype(np.float64)))).astype(np.uint8)
+    np.maximum.at(registers, index, rank)
+
+    return ColumnSketch(minhash=signature, registers=registers, unique=bool(distinct.size == hashes.size))
+
+
+def _estimate(registers: np.ndarray) -> float:
+    raw = _ALPHA * _REGISTERS**2 / float(np.sum(np.power(2.0, -registers.astype(np.float64))))
+    empty = int(np.count_nonzero(registers == 0))
+    if raw <= 2.5 * _REGISTERS and empty:
+        # Linear counting, which is the accurate estimator at small cardinalities.
+        return _REGISTERS * float(np.log(_REGISTERS / empty))
+    return raw
+
+
+def jaccard(left: ColumnSketch, right: ColumnSketch) -> float:
+    """Estimated Jaccard similarity of the two value sets."""
+    return float(np.mean(left.minhash == right.minhash))
+
+
+def containment(inner: ColumnSketch, outer: ColumnSketch) -> float:
+    """Estimated share of ``inner``'s distinct values that are also ``outer``'s."""
+    similarity = jaccard(inner, outer)
+    if similarity == 0.0 or inner.distinct <= 0:
+        return 0.0
+    shared = similarity * (inner.distinct + outer.distinct) / (1 + similarity)
+    return min(1.0, shared / inner.distinct)
+
+
+def comparable(left: ColumnSketch, right: ColumnSketch) -> bool:
+    """Whether the two are close enough in size for a low estimate to mean "disjoint"."""
+    small, large = sorted((left.distinct, right.distinct))
+    return large > 0 and small / large >= MIN_RATIO
+
+
+__all__ = [
+    "HLL_BITS",
+    "MIN_DISTINCT",
+    "MIN_RATIO",
+    "NUM_PERM",
+    "ColumnSketch",
+    "comparable",
+    "containment",
+    "jaccard",
+    "sketch",
+    "value_hashes",
+]
@@ -0,0 +1,481 @@
+"""A warm fork-server for host runtimes.
+
+Every host session used to start as ``python -u .runtime_daemon.py``: a fresh
+interpreter that then imported pandas, numpy and matplotlib before it would
+listen. That is a second or more on a warm page cache and several on a cold
+one, paid on the first step of every session and again by every subagent
+branch that fans out from it.
+
+The zygote pays it once. It is a long-lived interpreter that imports the
+analysis stack and then waits on a socket for spawn requests. Each request is
+served by a forked child that already has those modules in memory (shared
+copy-on-write with the zygote and every sibling) and then runs the session's
+entry script exactly as the cold spawn would -- the sandbox bootstrap when the
+OS policy is on, else the daemon itself. Everything session-specific happens
+*after* the fork, in the child: ``setsid``, the workspace as cwd, the plan's
+environment, the Landlock/seccomp policy and the daemon's own ``RLIMIT_AS``.
+Nothing a session restricts is ever applied to the zygote.
+
+``HOST_RUNTIME_SPARES`` children are kept forked ahead of time, parked on a
+pipe until a request binds them, so a spawn is a write and a reply rather than
+a fork.
+
+Linux only. On macOS the sandbox is ``sandbox-exec`` wrapping the command line,
+which a fork cannot apply, and forking after the system frameworks are loaded is
+not safe there; Windows has no fork. Those spawn cold, as before, and so does
+any request the zygote cannot serve.
+"""
+
+from __future__ import annotations
+
+import atexit
+import contextlib
+import itertools
+import json
+import os
+import select
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+from src.config import settings
+from src.utils.logging import logger
+
+
+#: Modules the zygote imports before forking; the daemon's own imports.
+PRELOAD_MODULES = ("matplotlib", "matplotlib.pyplot", "numpy", "pandas", "seaborn")
+
+
+# Runs as `python -u -c ZYGOTE_SCRIPT <socket fd> <spares> <modules json>`.
+# Deliberately standalone -- like the daemon, it never imports `src`.
+ZYGOTE_SCRIPT = """
+import importlib
+import json
+import os
+import runpy
+import select
+import signal
+import socket
+import sys
+import traceback
+
+SOCK = socket.socket(fileno=int(sys.argv[1]))
+SPARES = int(sys.argv[2])
+MODULES = json.loads(sys.argv[3])
+
+
+def preload():
+    # MPLBACKEND=Agg is in the environment, so pyplot never reaches for a GUI.
+    for name in MODULES:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            pass
+
+
+def become(request, inherited):
+    \"\"\"Turns this forked child into the session's runtime. Never returns.\"\"\"
+    code = 0
+    try:
+        for fd in inherited:
+            os.close(fd)
+        os.setsid()
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        os.chdir(request["cwd"])
+        os.environ.update(request.get("env") or {})
+        log = os.open(request["log"], os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        null = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(null, 0)
+        os.dup2(log, 1)
+        os.dup2(log, 2)
+        os.close(null)
+        os.close(log)
+        sys.argv = list(request["argv"])
+        runpy.run_path(sys.argv[0], run_name="__main__")
+    except SystemExit as exc:
+        code = exc.code if isinstance(exc.code, int) else 1
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code)
+
+
+def held(spares):
+    # Every descriptor a child must not keep: the control socket and the
+    # other children's pipes and pidfds.
+    return [SOCK.fileno()] + [fd for _pid, write_fd, pidfd in spares for fd in (write_fd, pidfd)]
+
+
+def fork_spare(spares):
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        # A parked child must hold no write end but its own zygote's, or it
+        # would never see EOF when the zygote exits.
+        os.close(write_fd)
+        for fd in held(spares):
+            os.close(fd)
+        payload = b""
+        while True:
+            chunk = os.read(read_fd, 65536)
+            if not chunk:
+                break
+            payload += chunk
+        os.close(read_fd)
+        if not payload:
+            os._exit(0)
+        become(json.loads(payload), [])
+    os.close(read_fd)
+    # Opened before anything is reaped, so the pidfd names this child and no
+    # later holder of its pid.
+    spares.append((pid, write_fd, os.pidfd_open(pid)))
+
+
+def reply(message, pidfd=None):
+    data = json.dumps(message).encode("utf-8")
+    if pidfd is None:
+        SOCK.send(data)
+    else:
+        socket.send_fds(SOCK, [data], [pidfd])
+
+
+def reap():
+    # Children exit to this process. Their pids are freed only here, after the
+    # pidfd that identifies each one has been handed over.
+    while True:
+        try:
+            pid, _status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            return
+        if pid == 0:
+            return
+
+
+def serve():
+    # A Ctrl-C at the terminal is for the API process, not for this one.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    preload()
+    spares = []
+    for _ in range(SPARES):
+        fork_spare(spares)
+    reply({"ready": True, "pid": os.getpid()})
+
+    while True:
+        ready, _, _ = select.select([SOCK], [], [], 5.0)
+        reap()
+        if not ready:
+            continue
+        data = SOCK.recv(1 << 20)
+        if not data:
+            break
+        try:
+            request = json.loads(data)
+        except ValueError:
+            reply({"error": "malformed request"})
+            continue
+        tag = request.pop("id", None)
+        try:
+            if spares:
+                pid, write_fd, pidfd = spares.pop(0)
+                os.write(write_fd, json.dumps(request).encode("utf-8"))
+                os.close(write_fd)
+            else:
+                pid = os.fork()
+                if pid == 0:
+                    become(request, held(spares))
+                pidfd = os.pidfd_open(pid)
+            try:
+                reply({"id": tag, "pid": pid}, pidfd)
+            finally:
+                os.close(pidfd)
+        except Exception as exc:
+            reply({"id": tag, "error": str(exc)})
+            continue
+        while len(spares) < SPARES:
+            fork_spare(spares)
+
+    # The parent went away: parked children exit on EOF, bound ones are
+    # sessions and are stopped by whoever owns them.
+    for _pid, write_fd, pidfd in spares:
+        os.close(write_fd)
+        os.close(pidfd)
+
+
+serve()
+"""
+
+
+def supported() -> bool:
+    """Whether host runtimes may be forked from a zygote on this platform.
+
+    The zygote hands each child over as a pidfd (Linux 5.3, Python 3.9), the
+    only handle on a process that another process reaps.
+    """
+    return (
+        sys.platform.startswith("linux")
+        and hasattr(os, "fork")
+        and hasattr(os, "pidfd_open")
+        and hasattr(signal, "pidfd_send_signal")
+        and settings.HOST_RUNTIME_ZYGOTE
+    )
+
+
+class ForkedProcess:
+    """A runtime forked by the zygote, behind the slice of ``Popen`` that
+    :class:`~src.core.tools.host_runtime.HostSession` uses.
+
+    The zygote, not this process, is the parent and reaps it, so its pid may be
+    reused once it exits; it is tracked through a pidfd instead, which names
+    this process and no later one. The exit status goes to the zygote; only the
+    fact of the exit is known here. ``stdout`` is the child's log file opened for
+    reading, which is what a failed start drains.
+    """
+
+    def __init__(self, pid: int, log_path: Path, argv: list[str], pidfd: int = -1):
+        self.pid = pid
+        self.args = argv
+        self.returncode: int | None = None
+        self.log_path = log_path
+        self.pidfd = pidfd
+        self.stdout = open(log_path, "rb")  # noqa: SIM115 - closed by HostSession.stop
+
+    def poll(self) -> int | None:
+        if self.returncode is None:
+            if self.pidfd < 0:
+                self.returncode = -1
+            else:
+                # A pidfd becomes readable when its process exits.
+                exited, _, _ = select.select([self.pidfd], [], [], 0)
+                if exited:
+                    self._exited()
+        return self.returncode
+
+    def wait(self, timeout: float | None = None) -> int:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.poll() is None:
+            if deadline is not None and time.monotonic() >= deadline:
+                raise subprocess.TimeoutExpired(self.args, timeout or 0)
+            time.sleep(0.02)
+        return int(self.returncode or 0)
+
+    def send_signal(self, sig: int) -> None:
+        if self.poll() is None:
+            try:
+                signal.pidfd_send_signal(self.pidfd, sig)
+            except ProcessLookupError:
+                self._exited()
+
+    def terminate(self) -> None:
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self) -> None:
+        self.send_signal(signal.SIGKILL)
+
+    def _exited(self) -> None:
+        self.returncode = -1
+        self._close_pidfd()
+
+    def _close_pidfd(self) -> None:
+        pidfd, self.pidfd = self.pidfd, -1
+        if pidfd >= 0:
+            os.close(pidfd)
+
+    def __del__(self):
+        self._close_pidfd()
+
+
+class Zygote:
+    """Owns the fork-server process and hands out forked runtimes.
+
+    Started on first use (or by :meth:`warm` at boot) and restarted if it dies.
+    Requests are serialised, one datagram each way over a ``SOCK_SEQPACKET``
+    socket pair, which is what lets a reply carry the child's pidfd. Each request
+    is numbered and its reply echoes the number, so a reply that arrives after
+    its request timed out is recognised as stale instead of answering the next.
+    """
+
+    def __init__(self):
+        self._process: subprocess.Popen | None = None
+        self._socket: socket.socket | None = None
+        self._lock = threading.Lock()
+        self._requests = itertools.count(1)
+        atexit.register(self.shutdown)
+
+    @property
+    def is_running(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def warm(self) -> None:
+        """Starts the zygote on a background thread so no session waits on it."""
+        if supported():
+            threading.Thread(target=self._ensure_started, name="runtime-zygote", daemon=True).start()
+
+    def spawn(self, argv: list[str], cwd: Path, env: dict[str, str], log_path: Path) -> ForkedProcess | None:
+        """Forks a runtime running ``argv`` (script first). ``None`` if it cannot.
+
+        ``None`` is not an error: the caller spawns cold instead.
+        """
+        if not supported():
+            return None
+        # Created here rather than by the child, so the handle a failed start
+        # drains exists before the child does.
+        try:
+            log_path.write_bytes(b"")
+            process = ForkedProcess(0, log_path, argv)
+        except OSError as exc:
+            logger.warning("Could not create a forked runtime's log", error=str(exc))
+            return None
+        request = {"argv": argv, "cwd": str(cwd), "env": env, "log": str(log_path)}
+        with self._lock:
+            reply, pidfd = self._exchange(request) if self._ensure_started_locked() else (None, -1)
+        if reply is None or "pid" not in reply or pidfd < 0:
+            if reply is not None:
+                logger.warning("Zygote could not fork a runtime", error=reply.get("error", "no pidfd"))
+            process.stdout.close()
+            return None
+        process.pid = int(reply["pid"])
+        process.pidfd = pidfd
+        return process
+
+    def shutdown(self) -> None:
+        with self._lock:
+            process, self._process = self._process, None
+            sock, self._socket = self._socket, None
+        if sock is not None:
+            # The zygote exits on EOF.
+            sock.close()
+        if process is None:
+            return
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        except OSError as exc:
+            logger.debug("Could not stop the runtime zygote", error=str(exc))
+
+    # ------------------------------------------------------------------ #
+    def _ensure_started(self) -> bool:
+        with self._lock:
+            return self._ensure_started_locked()
+
+    def _ensure_started_locked(self) -> bool:
+        if self.is_running:
+            return True
+        if self._process is not None:
+            logger.warning("Runtime zygote had exited; restarting")
+            self._discard_locked()
+
+        env = dict(os.environ)
+        env["MPLBACKEND"] = "Agg"
+        env.pop("PYTHONSTARTUP", None)
+        started = time.monotonic()
+        ours, theirs = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        try:
+            process = subprocess.Popen(
+                [
+                    sys.executable,
+                    "-u",
+                    "-c",
+                    ZYGOTE_SCRIPT,
+                    str(theirs.fileno()),
+                    str(max(0, settings.HOST_RUNTIME_SPARES)),
+                    json.dumps(list(PRELOAD_MODULES)),
+                ],
+                env=env,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                pass_fds=(theirs.fileno(),),
+                start_new_session=True,
+            )
+        except OSError as exc:
+            logger.warning("Could not start the runtime zygote", error=str(exc))
+            ours.close()
+            return False
+        finally:
+            theirs.close()
+        self._process, self._socket = process, ours
+        reply, _pidfd = self._read_reply(settings.HOST_RUNTIME_START_TIMEOUT, None)
+        if reply is None or not reply.get("ready"):
+            logger.warning("Runtime zygote did not become ready; spawning cold")
+            self._discard_locked()
+            return False
+        logger.info(
+            "Runtime zygote ready",
+            pid=process.pid,
+            spares=settings.HOST_RUNTIME_SPARES,
+            preload_seconds=round(time.monotonic() - started, 2),
+        )
+        return True
+
+    def _discard_locked(self) -> None:
+        process, self._process = self._process, None
+        sock, self._socket = self._socket, None
+        if sock is not None:
+            sock.close()
+        if process is not None and process.poll() is None:
+            process.kill()
+
+    def _exchange(self, request: dict) -> tuple[dict | None, int]:
+        sock = self._socket
+        if sock is None:
+            return None, -1
+        tag = next(self._requests)
+        try:
+            sock.send(json.dumps({**request, "id": tag}).encode("utf-8"))
+        except OSError as exc:
+            logger.warning("Runtime zygote is unreachable", error=str(exc))
+            return None, -1
+        return self._read_reply(10.0, tag)
+
+    def _read_reply(self, timeout: float, tag: int | None) -> tuple[dict | None, int]:
+        """The reply to request ``tag`` and the pidfd it carried (``-1`` if none).
+
+        Replies to earlier, abandoned requests are dropped on the way, and the
+        runtime each of them forked -- which nobody will ever own -- is killed.
+        """
+        process, sock = self._process, self._socket
+        if process is None or sock is None:
+            return None, -1
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or process.poll() is not None:
+                return None, -1
+            ready, _, _ = select.select([sock], [], [], min(remaining, 0.5))
+            if not ready:
+                continue
+            try:
+                data, fds, _flags, _address = socket.recv_fds(sock, 1 << 16, 1)
+            except OSError:
+                return None, -1
+            if not data:
+                return None, -1
+            pidfd = fds[0] if fds else -1
+            try:
+                reply = json.loads(data)
+            except ValueError:
+                reply = None
+            if reply is not None and reply.get("id") == tag:
+                return reply, pidfd
+            if pidfd >= 0:
+                logger.warning("Stopping a runtime forked for an abandoned request", pid=(reply or {}).get("pid"))
+                with contextlib.suppress(ProcessLookupError):
+                    signal.pidfd_send_signal(pidfd, signal.SIGKILL)
+                os.close(pidfd)
+
+
+zygote = Zygote()
+
+__all__ = ["PRELOAD_MODULES", "ForkedProcess", "Zygote", "supported", "zygote"]
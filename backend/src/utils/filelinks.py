@@ -0,0 +1,136 @@
+"""Sharing immutable workspace files instead of copying them.
+
+A subagent starts from a snapshot of its parent's tables, and that snapshot
+used to be a byte-for-byte copy of every file -- four branches over a 3 GB
+workspace wrote 12 GB before any of them ran a cell. The snapshot only has to
+guarantee that a later change on the parent cannot alter what a branch sees,
+and that holds for a shared file as long as nobody ever writes one in place.
+
+So the two halves are:
+
+* :func:`write_atomically` -- every table file is written to a sibling
+  temporary and renamed over its path, which gives the path a *new* inode and
+  leaves any other link to the old one untouched;
+* :func:`share_file` -- a snapshot is a reflink (a copy-on-write clone, where
+  the filesystem supports one), else a hardlink, else a copy. A hardlink
+  shares the inode, mode included, so an in-place write from either workspace
+  would reach both; only a source already made read-only with :func:`freeze`
+  is hardlinked. Anything else is cloned or copied, and the snapshot's own
+  inode is marked read-only.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import stat
+import sys
+import threading
+from collections.abc import Callable
+from pathlib import Path
+from typing import TypeVar
+
+from src.utils.logging import logger
+
+
+T = TypeVar("T")
+
+#: ``FICLONE`` from ``linux/fs.h``: clone a whole file's extents (btrfs, XFS,
+#: bcachefs, overlayfs over those).
+_FICLONE = 0x40049409
+_WRITE_BITS = stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH
+
+
+def write_atomically(path: Path, write: Callable[[Path], T]) -> T:
+    """Calls ``write(temporary)`` and renames the result over ``path``.
+
+    Readers of ``path`` see the old file or the new one, never a truncated
+    one, and a link made from the old file keeps the old contents.
+    """
+    temporary = path.with_name(f".{path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+    try:
+        result = write(temporary)
+        if sys.platform == "win32" and path.exists():
+            # Windows refuses to replace a read-only file.
+            os.chmod(path, stat.S_IWRITE | stat.S_IREAD)
+        os.replace(temporary, path)
+        return result
+    finally:
+        temporary.unlink(missing_ok=True)
+
+
+def share_file(source: Path, destination: Path) -> str:
+    """Makes ``destination`` a snapshot of ``source`` without copying if possible.
+
+    Returns how: ``"reflink"``, ``"hardlink"`` or ``"copy"``. ``source`` must
+    only ever be replaced through :func:`write_atomically`, never rewritten.
+    Its mode is never changed: whoever else holds it may still need to write.
+    """
+    destination.unlink(missing_ok=True)
+    if _reflink(source, destination):
+        freeze(destination)
+        return "reflink"
+    if sys.platform != "win32" and not _writable(source):
+        try:
+            os.link(source, destination)
+        except OSError:
+            pass
+        else:
+            return "hardlink"
+    shutil.copy2(source, destination)
+    freeze(destination)
+    return "copy"
+
+
+def freeze(path: Path) -> None:
+    """Marks ``path`` read-only, which makes it safe to share by hardlink.
+
+    For files nothing writes in place -- replaced with :func:`write_atomically`,
+    or not at all. A no-op on Windows, where a read-only file cannot be deleted.
+    """
+    if sys.platform == "win32":
+        return
+    mode = stat.S_IMODE(path.stat().st_mode)
+    os.chmod(path, mode & ~_WRITE_BITS)
+
+
+def _writable(path: Path) -> bool:
+    return bool(path.stat().st_mode & _WRITE_BITS)
+
+
+def alias_file(source: Path, destination: Path) -> None:
+    """Puts ``source``'s contents at ``destination`` as a second name for it.
+
+    For two names of one file inside a workspace -- ``dataset.feather`` is
+    the active table's file -- so the bytes are written once. Replaced
+    atomically, and copied where hardlinks are not available.
+    """
+
+    def link(temporary: Path) -> None:
+        try:
+            os.link(source, temporary)
+        except OSError:
+            shutil.copy2(source, temporary)
+
+    write_atomically(destination, link)
+
+
+def _reflink(source: Path, destination: Path) -> bool:
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        with open(source, "rb") as src, open(destination, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+        shutil.copystat(source, destination)
+        return True
+    except OSError as exc:
+        logger.debug("Reflink unavailable; falling back", path=str(source), error=str(exc))
+        destination.unlink(missing_ok=True)
+        return False
+
+
+__all__ = ["alias_file", "freeze", "share_file", "write_atomically"]
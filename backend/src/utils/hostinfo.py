@@ -138,32 +138,38 @@ def _physical_cores() -> tuple[int | None, int | None]:
     return physical, logical
 
 
+def _windows_memory_status() -> tuple[int, int] | None:
+    """``(total, available)`` physical memory from ``GlobalMemoryStatusEx``."""
+    try:
+        import ctypes
+
+        class _MemoryStatusEx(ctypes.Structure):
+            _fields_ = [
+                ("dwLength", ctypes.c_ulong),
+                ("dwMemoryLoad", ctypes.c_ulong),
+                ("ullTotalPhys", ctypes.c_ulonglong),
+                ("ullAvailPhys", ctypes.c_ulonglong),
+                ("ullTotalPageFile", ctypes.c_ulonglong),
+                ("ullAvailPageFile", ctypes.c_ulonglong),
+                ("ullTotalVirtual", ctypes.c_ulonglong),
+                ("ullAvailVirtual", ctypes.c_ulonglong),
+                ("ullAvailExtendedVirtual", ctypes.c_ulonglong),
+            ]
+
+        status = _MemoryStatusEx()
+        status.dwLength = ctypes.sizeof(_MemoryStatusEx)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):  # type: ignore[attr-defined]
+            return int(status.ullTotalPhys), int(status.ullAvailPhys)
+    except Exception:
+        return None
+    return None
+
+
 def _total_ram_bytes() -> int | None:
     """Installed RAM, or ``None`` when the platform will not say."""
     if sys.platform == "win32":
-        try:
-            import ctypes
-
-            class _MemoryStatusEx(ctypes.Structure):
-                _fields_ = [
-                    ("dwLength", ctypes.c_ulong),
-                    ("dwMemoryLoad", ctypes.c_ulong),
-                    ("ullTotalPhys", ctypes.c_ulonglong),
-                    ("ullAvailPhys", ctypes.c_ulonglong),
-                    ("ullTotalPageFile", ctypes.c_ulonglong),
-                    ("ullAvailPageFile", ctypes.c_ulonglong),
-                    ("ullTotalVirtual", ctypes.c_ulonglong),
-                    ("ullAvailVirtual", ctypes.c_ulonglong),
-                    ("ullAvailExtendedVirtual", ctypes.c_ulonglong),
-                ]
-
-            status = _MemoryStatusEx()
-            status.dwLength = ctypes.sizeof(_MemoryStatusEx)
-            if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):  # type: ignore[attr-defined]
-                return int(status.ullTotalPhys)
-        except Exception:
-            return None
-        return None
+        status = _windows_memory_status()
+        return None if status is None else status[0]
 
     # Linux and macOS both expose these; a container sees the host's total here,
     # which is why the cgroup limit below takes precedence when present.
@@ -262,4 +268,35 @@ def host_info() -> HostInfo:
     )
 
 
-__all__ = ["HostInfo", "host_info"]
+def available_ram_bytes() -> int | None:
+    """Memory that could be handed out right now, or ``None`` when unknowable.
+
+    Not cached, unlike :func:`host_info`: this is the figure that moves. Inside
+    a memory-limited cgroup it is the limit minus what the cgroup already
+    charges; otherwise ``MemAvailable`` on Linux and the available physical
+    memory on Windows. macOS has no cheap equivalent and reports ``None``.
+    """
+    limit = _cgroup_memory_limit_bytes()
+    if limit is not None:
+        for path in ("/sys/fs/cgroup/memory.current", "/sys/fs/cgroup/memory/memory.usage_in_bytes"):
+            try:
+                with open(path, encoding="utf-8") as handle:
+                    return max(0, limit - int(handle.read().strip()))
+            except (OSError, ValueError):
+                continue
+    if sys.platform.startswith("linux"):
+        try:
+            with open("/proc/meminfo", encoding="utf-8") as handle:
+                for line in handle:
+                    if line.startswith("MemAvailable:"):
+                        return int(line.split()[1]) * 1024
+        except (OSError, ValueError, IndexError):
+            return None
+        return None
+    if sys.platform == "win32":
+        status = _windows_memory_status()
+        return None if status is None else status[1]
+    return None
+
+
+__all__ = ["HostInfo", "available_ram_bytes", "host_info"]
@@ -121,6 +121,10 @@ os.environ.update(
         # actual singleton should still get a pure no-op here, not a dial to
         # the port-1 provider URLs.
         "LLM_RELEASE_IDLE_MODELS": "false",
+        # The governor samples the real host. A suite running on a busy CI box
+        # must not have its sessions capped or its runtimes stopped by whatever
+        # else that box is doing; tests that exercise it call `decide` directly.
+        "GOVERNOR_ENABLED": "false",
     }
 )
 
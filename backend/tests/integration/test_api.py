@@ -16,6 +16,7 @@ import pytest
 from fastapi.testclient import TestClient
 
 from src.api.api import app
+from src.config import settings
 from src.core.session import session_manager
 
 
@@ -230,6 +231,63 @@ def test_preview_sorts(client: TestClient) -> None:
     assert [row["n"] for row in payload["data"]] == [3, 2, 1]
 
 
+def test_preview_can_be_read_as_arrow(client: TestClient) -> None:
+    import pyarrow as pa
+
+    session_id = client.post("/api/session").json()["session_id"]
+    headers = {SESSION_HEADER: session_id}
+    client.post(
+        "/api/datasets?clean=false",
+        files={"file": ("d.csv", csv_bytes(pd.DataFrame({"n": range(120)})), "text/csv")},
+        headers=headers,
+    )
+
+    response = client.get("/api/data/preview?format=arrow&sort_by=n&sort_order=desc&per_page=50", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/vnd.apache.arrow.stream"
+    assert response.headers["x-total-rows"] == "120"
+    assert response.headers["x-total-pages"] == "3"
+    table = pa.ipc.open_stream(response.content).read_all()
+    assert table.column("n").to_pylist() == list(range(119, 69, -1))
+
+
+def test_query_filters_pages_and_caches(client: TestClient) -> None:
+    session_id = client.post("/api/session").json()["session_id"]
+    headers = {SESSION_HEADER: session_id}
+    frame = pd.DataFrame({"n": range(120), "parity": ["even", "odd"] * 60})
+    client.post("/api/datasets?clean=false", files={"file": ("d.csv", csv_bytes(frame), "text/csv")}, headers=headers)
+
+    spec = {"filters": [{"column": "parity", "op": "eq", "value": "odd"}], "sort_by": "n", "sort_order": "desc"}
+    first = client.post("/api/data/query", json={**spec, "per_page": 25}, headers=headers).json()
+    assert first["total_rows"] == 60 and first["total_pages"] == 3
+    assert [row["n"] for row in first["data"][:3]] == [119, 117, 115]
+    assert not first["cached"]
+
+    second = client.post("/api/data/query", json={**spec, "per_page": 25, "page": 2}, headers=headers).json()
+    assert second["cached"]
+    assert second["data"][0]["n"] == 69
+
+    grouped = client.post(
+        "/api/data/query",
+        json={"group_by": ["parity"], "aggregates": [{"column": "n", "fn": "sum", "as": "total"}]},
+        headers=headers,
+    ).json()
+    assert {row["parity"]: row["total"] for row in grouped["data"]} == {"even": 3540, "odd": 3600}
+
+    bad = client.post("/api/data/query", json={"filters": [{"column": "nope"}]}, headers=headers)
+    assert bad.status_code == 400
+    bad = client.post(
+        "/api/data/query",
+        json={"group_by": ["parity"], "aggregates": [{"column": "n", "fn": "sum", "as": "parity"}]},
+        headers=headers,
+    )
+    assert bad.status_code == 400
+    bad = client.post(
+        "/api/data/query", json={"filters": [{"column": "parity", "op": "between", "value": [1, 2]}]}, headers=headers
+    )
+    assert bad.status_code == 400
+
+
 def test_preview_rejects_an_unknown_sort_column(client: TestClient, simple_df: pd.DataFrame) -> None:
     session_id = upload(client, simple_df)["session_id"]
     response = client.get("/api/data/preview?sort_by=nope", headers={SESSION_HEADER: session_id})
@@ -497,3 +555,70 @@ def test_chat_response_carries_the_investigation_fields(client: TestClient, monk
         assert field in body, f"missing {field}"
     assert body["mode"] == "fast"
     assert body["iterations"] >= 1
+
+
+def test_diagnostics_are_absent_unless_enabled(client: TestClient) -> None:
+    assert client.post("/api/diagnostics/profile?seconds=0.1").status_code == 404
+    assert client.get("/api/diagnostics/runtime/profile").status_code == 404
+
+
+def test_diagnostics_require_the_api_key(client: TestClient, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "DIAGNOSTICS_ENABLED", True)
+    monkeypatch.setattr(settings, "API_KEY", "secret")
+    assert client.post("/api/diagnostics/profile?seconds=0.1").status_code == 401
+
+    response = client.post("/api/diagnostics/profile?seconds=0.2", headers={"X-API-Key": "secret"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["samples"] >= 1
+    assert body["threads"] >= 1
+    assert body["collapsed"].strip()
+
+
+def test_a_profile_is_available_as_collapsed_stacks_and_speedscope(client: TestClient, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "DIAGNOSTICS_ENABLED", True)
+    collapsed = client.post("/api/diagnostics/profile?seconds=0.1&format=collapsed")
+    assert collapsed.headers["content-type"].startswith("text/plain")
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in collapsed.text.splitlines())
+
+    speedscope = client.post("/api/diagnostics/profile?seconds=0.1&format=speedscope").json()
+    assert speedscope["$schema"].startswith("https://www.speedscope.app/")
+    assert speedscope["profiles"] and speedscope["shared"]["frames"]
+
+
+def test_runtime_profiling_needs_a_running_runtime(client: TestClient, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "DIAGNOSTICS_ENABLED", True)
+    session_id = client.post("/api/session").headers["X-Session-Id"]
+    response = client.put(
+        "/api/diagnostics/runtime/profile", json={"enabled": True}, headers={"X-Session-Id": session_id}
+    )
+    assert response.status_code == 409
+    assert client.get("/api/diagnostics/runtime/profile", headers={"X-Session-Id": "nope"}).status_code == 404
+
+
+def test_metrics_are_exposed_in_the_prometheus_text_format(client: TestClient, monkeypatch) -> None:
+    from stubs import ScriptedLLM
+
+    monkeypatch.setattr(
+        "src.core.agent.orchestrator.llm_provider",
+        ScriptedLLM(["1. Count", "```python\nprint(len(df))\n```", "There is 1 row."]),
+    )
+    session_id = client.post("/api/datasets?clean=false", files={"file": ("d.csv", b"a\n1\n", "text/csv")}).json()[
+        "session_id"
+    ]
+    client.post("/api/chat", json={"message": "how many rows", "mode": "fast"}, headers={"X-Session-Id": session_id})
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert "# TYPE wizard_exec_seconds histogram" in text
+    assert "wizard_exec_seconds_count{" in text
+    assert "wizard_sessions_active " in text
+    assert 'wizard_jobs{status="running"}' in text
+    assert "wizard_ws_connections 0" in text
+
+
+def test_metrics_can_be_switched_off(client: TestClient, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "METRICS_ENABLED", False)
+    assert client.get("/metrics").status_code == 404
@@ -0,0 +1,240 @@
+"""Several API workers behind the session router: who serves what, and what they share.
+
+The workers here are stand-in ASGI apps that answer with their own index, so a
+test reads which one a request reached; the real app is only needed for the
+internal refresh route.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+import zlib
+from collections.abc import Iterator
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.api import app
+from src.api.cluster import SessionRouter
+from src.config import settings
+from src.core.infra.cluster import session_directory
+from src.core.infra.queue import job_id as job_id_for_this_worker
+from src.core.session import session_manager
+
+
+def fake_worker(index: int, seen: list[tuple[int, str, str, bytes]]):
+    """A worker that starts a session on POST /api/session and otherwise reports who it is."""
+
+    async def worker(scope, receive, send) -> None:
+        body = b""
+        more = True
+        while more:
+            message = await receive()
+            body += message.get("body", b"")
+            more = message.get("more_body", False)
+        seen.append((index, scope["method"], scope["path"], body))
+        headers = [(b"content-type", b"application/json")]
+        if scope["path"] == "/api/session" and scope["method"] == "POST":
+            headers.append((b"x-session-id", f"session-{index}-{len(seen)}".encode()))
+        received = dict(scope["headers"])
+        payload = json.dumps(
+            {
+                "worker": index,
+                "forwarded_for": received.get(b"x-forwarded-for", b"").decode(),
+                "forwarded_proto": received.get(b"x-forwarded-proto", b"").decode(),
+            }
+        ).encode()
+        if scope["path"] == "/metrics":
+            headers = [(b"content-type", b"text/plain")]
+            payload = (
+                "# HELP wizard_turns_total Turns run.\n# TYPE wizard_turns_total counter\n"
+                f'wizard_turns_total{{mode="fast"}} {index + 1}\n'
+                "# HELP wizard_sessions_active Sessions held.\n# TYPE wizard_sessions_active gauge\n"
+                "wizard_sessions_active 2\n"
+            ).encode()
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": payload})
+
+    return worker
+
+
+@pytest.fixture
+def cluster() -> Iterator[tuple[SessionRouter, list]]:
+    seen: list[tuple[int, str, str, bytes]] = []
+    clients = [
+        httpx.AsyncClient(transport=httpx.ASGITransport(app=fake_worker(index, seen)), base_url=f"http://worker{index}")
+        for index in range(3)
+    ]
+    yield SessionRouter([f"http://worker{index}" for index in range(3)], token="t", clients=clients), seen
+
+
+def call(router: SessionRouter, method: str, path: str, **kwargs) -> httpx.Response:
+    async def scenario() -> httpx.Response:
+        transport = httpx.ASGITransport(app=router, client=("203.0.113.7", 5000))
+        async with httpx.AsyncClient(transport=transport, base_url="http://router") as client:
+            response = await client.request(method, path, **kwargs)
+        # Let a fire-and-forget refresh finish inside this loop.
+        await asyncio.sleep(0)
+        while router._background:
+            await asyncio.gather(*router._background)
+        return response
+
+    return asyncio.run(scenario())
+
+
+def test_new_sessions_are_spread_across_the_workers(cluster) -> None:
+    router, _ = cluster
+
+    workers = [call(router, "POST", "/api/session").json()["worker"] for _ in range(4)]
+
+    assert workers == [0, 1, 2, 0]
+
+
+def test_a_session_stays_on_the_worker_that_created_it(cluster) -> None:
+    router, seen = cluster
+    call(router, "POST", "/api/session")
+    created = call(router, "POST", "/api/session")
+    session_id = created.headers["x-session-id"]
+
+    by_header = call(router, "POST", "/api/chat", headers={"X-Session-Id": session_id}, content=b"question")
+    by_query = call(router, "GET", f"/api/session?session={session_id}")
+
+    assert by_header.json()["worker"] == by_query.json()["worker"] == 1
+    assert seen[-2] == (1, "POST", "/api/chat", b"question")
+
+
+def test_requests_without_a_known_owner_go_to_the_primary(cluster) -> None:
+    router, _ = cluster
+    call(router, "POST", "/api/session")
+
+    assert call(router, "GET", "/api/providers").json()["worker"] == 0
+    assert call(router, "GET", "/api/session", headers={"X-Session-Id": "expired"}).json()["worker"] == 0
+
+
+def test_the_owner_recorded_by_a_worker_routes_a_session_the_router_never_saw(cluster, monkeypatch) -> None:
+    router, _ = cluster
+    monkeypatch.setattr(settings, "API_WORKERS", 3)
+    monkeypatch.setattr(settings, "WORKER_INDEX", 2)
+    session_directory.claim("from-before-a-restart")
+
+    response = call(router, "GET", "/api/session", headers={"X-Session-Id": "from-before-a-restart"})
+
+    assert response.json()["worker"] == 2
+    session_directory.forget("from-before-a-restart")
+    assert session_directory.owner("from-before-a-restart") is None
+
+
+def test_a_slow_directory_places_the_session_by_its_hash(cluster, monkeypatch) -> None:
+    router, _ = cluster
+
+    def stalled(session_id: str) -> int:
+        time.sleep(0.3)
+        return 1
+
+    monkeypatch.setattr(session_directory, "owner", stalled)
+    monkeypatch.setattr("src.api.cluster.OWNER_LOOKUP_SECONDS", 0.02)
+    placed = zlib.crc32(b"from-a-slow-redis") % 3
+
+    first = call(router, "GET", "/api/session", headers={"X-Session-Id": "from-a-slow-redis"})
+    again = call(router, "GET", "/api/session", headers={"X-Session-Id": "from-a-slow-redis"})
+
+    assert first.json()["worker"] == again.json()["worker"] == placed
+
+
+def test_workers_see_the_real_client_address(cluster) -> None:
+    router, _ = cluster
+
+    assert call(router, "GET", "/health").json()["forwarded_for"] == "203.0.113.7"
+
+
+def test_a_client_cannot_claim_to_be_on_tls(cluster) -> None:
+    router, _ = cluster
+
+    response = call(router, "GET", "/health", headers={"X-Forwarded-Proto": "https"})
+
+    assert response.json()["forwarded_proto"] == "http"
+
+
+def test_metrics_are_gathered_from_every_worker(cluster) -> None:
+    router, seen = cluster
+
+    text = call(router, "GET", "/metrics").text
+
+    assert sorted(index for index, _, path, _ in seen if path == "/metrics") == [0, 1, 2]
+    assert text.count("# TYPE wizard_turns_total counter") == 1
+    for index in range(3):
+        assert f'wizard_turns_total{{worker="{index}",mode="fast"}} {index + 1}' in text
+        assert f'wizard_sessions_active{{worker="{index}"}} 2' in text
+        assert f'wizard_cluster_worker_up{{worker="{index}"}} 1' in text
+
+
+def test_a_process_view_can_name_its_worker(cluster) -> None:
+    router, _ = cluster
+
+    assert call(router, "POST", "/api/diagnostics/profile?worker=2").json()["worker"] == 2
+    assert call(router, "GET", "/health?worker=1").json()["worker"] == 1
+    assert call(router, "GET", "/metrics?worker=1").text.startswith("# HELP wizard_turns_total")
+    # Only the process views; anywhere else the parameter is the route's own business.
+    assert call(router, "GET", "/api/providers?worker=2").json()["worker"] == 0
+
+
+def test_a_job_is_looked_up_on_the_worker_that_runs_it(cluster, monkeypatch) -> None:
+    router, _ = cluster
+    monkeypatch.setattr(settings, "API_WORKERS", 3)
+    monkeypatch.setattr(settings, "WORKER_INDEX", 2)
+
+    job_id = job_id_for_this_worker()
+
+    assert job_id.startswith("w2-")
+    assert call(router, "GET", f"/api/jobs/{job_id}").json()["worker"] == 2
+    assert call(router, "GET", "/api/jobs/w7-outside-the-cluster").json()["worker"] == 0
+
+
+def test_a_shared_change_through_one_worker_refreshes_the_others(cluster) -> None:
+    router, seen = cluster
+
+    call(router, "PUT", "/api/providers/openai/credentials", json={"api_key": "k"})
+
+    refreshes = sorted(index for index, _, path, _ in seen if path == "/api/cluster/refresh")
+    assert refreshes == [1, 2]
+
+
+def test_the_internal_routes_are_not_reachable_through_the_router(cluster) -> None:
+    router, seen = cluster
+
+    assert call(router, "POST", "/api/cluster/refresh").status_code == 404
+    assert seen == []
+
+
+def test_an_unreachable_worker_is_a_bad_gateway() -> None:
+    async def down(scope, receive, send) -> None:
+        raise httpx.ConnectError("refused")
+
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=down), base_url="http://worker0")
+    router = SessionRouter(["http://worker0"], clients=[client])
+
+    assert call(router, "GET", "/api/session").status_code == 502
+
+
+def test_a_single_worker_records_no_ownership() -> None:
+    session = session_manager.create()
+    try:
+        assert session_directory.owner(session.id) is None
+    finally:
+        session_manager.drop(session.id)
+
+
+def test_the_refresh_route_exists_only_for_a_clustered_worker_holding_the_token(monkeypatch) -> None:
+    with TestClient(app) as client:
+        assert client.post("/api/cluster/refresh", headers={"X-Cluster-Token": ""}).status_code == 404
+
+        monkeypatch.setattr(settings, "API_WORKERS", 2)
+        monkeypatch.setattr(settings, "CLUSTER_TOKEN", "secret")
+        assert client.post("/api/cluster/refresh", headers={"X-Cluster-Token": "wrong"}).status_code == 404
+
+        response = client.post("/api/cluster/refresh", headers={"X-Cluster-Token": "secret"})
+        assert response.status_code == 200
+        assert response.json() == {"status": "refreshed", "worker": 0}
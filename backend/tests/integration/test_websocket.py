@@ -2,7 +2,10 @@
 
 from __future__ import annotations
 
+import asyncio
 import io
+import json
+from collections import deque
 from collections.abc import AsyncIterator, Iterator
 
 import pandas as pd
@@ -10,6 +13,10 @@ import pytest
 from fastapi.testclient import TestClient
 
 from src.api.api import app
+from src.api.routes.chat import WebSocketEmitter
+from src.config import settings
+from src.core.agent.events import Event, EventType
+from src.core.agent.replay import TurnStreams
 from src.core.session import session_manager
 
 
@@ -59,14 +66,19 @@ class StreamingStub:
         return "".join(chunks)
 
 
+def unbatched(frame: dict) -> list[dict]:
+    """The events one socket frame carries."""
+    return frame["frames"] if frame.get("type") == "batch" else [frame]
+
+
 def collect_until(websocket, terminal: set[str], limit: int = 200) -> list[dict]:
-    """Drains frames until a terminal type arrives."""
+    """Drains events until a terminal type arrives."""
     frames: list[dict] = []
     for _ in range(limit):
-        frame = websocket.receive_json()
-        frames.append(frame)
-        if frame.get("type") in terminal:
-            break
+        for frame in unbatched(websocket.receive_json()):
+            frames.append(frame)
+            if frame.get("type") in terminal:
+                return frames
     return frames
 
 
@@ -167,11 +179,15 @@ def test_full_run_streams_tokens_then_finishes(client: TestClient, session_with_
 
     types = [frame["type"] for frame in frames]
     assert "final" in types, f"run never completed: {types}"
-    assert types.count("content_delta") > 1, "the answer did not stream"
+    assert "content_delta" in types, "the answer did not stream"
     assert "code" in types
 
     final = frames[-1]
     assert "five rows" in final["response"]
+    # A burst of deltas goes out as one frame; the text is all still there.
+    streamed = "".join(frame["content"] for frame in frames if frame["type"] == "content_delta")
+    assert streamed == final["response"]
+    assert final["delivery"]["dropped"] == 0
 
 
 def test_planning_mode_emits_an_approval_request(client: TestClient, session_with_data: str, monkeypatch) -> None:
@@ -364,8 +380,10 @@ def test_cancel_reaches_a_run_that_is_waiting_for_consent(
         # own frames and the acknowledgement race, and either order is correct.
         acknowledged = False
         for _ in range(200):
-            frame = websocket.receive_json()
-            if frame["type"] == "status" and frame["content"] == "Cancelled":
+            if any(
+                frame["type"] == "status" and frame["content"] == "Cancelled"
+                for frame in unbatched(websocket.receive_json())
+            ):
                 acknowledged = True
                 break
 
@@ -380,3 +398,218 @@ def test_an_answer_for_a_request_that_is_gone_is_ignored(client: TestClient, ses
         websocket.send_json({"type": "ping"})
 
         assert websocket.receive_json()["type"] == "pong"
+
+
+# --------------------------------------------------------------------------- #
+# Outbound queue
+# --------------------------------------------------------------------------- #
+class SlowSocket:
+    """Records frames, taking ``delay`` seconds over each one."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.sent: list[dict] = []
+
+    async def send_json(self, frame: dict) -> None:
+        await asyncio.sleep(self.delay)
+        self.sent.append(frame)
+
+    def events(self) -> list[dict]:
+        return [event for frame in self.sent for event in unbatched(frame)]
+
+
+async def _settle(emitter: WebSocketEmitter) -> None:
+    for _ in range(200):
+        if not emitter._queue:
+            break
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0.05)
+    emitter.close()
+
+
+def test_consecutive_deltas_go_out_as_one_frame() -> None:
+    async def scenario() -> SlowSocket:
+        socket = SlowSocket()
+        emitter = WebSocketEmitter(socket, window=0.01)
+        for token in ["The ", "answer ", "is ", "42."]:
+            await emitter(Event(type=EventType.CONTENT_DELTA, data={"content": token}))
+        await emitter(Event(type=EventType.FINAL, data={"response": "The answer is 42."}))
+        await _settle(emitter)
+        return socket
+
+    socket = asyncio.run(scenario())
+
+    assert len(socket.sent) == 1, "the burst was not sent together"
+    events = socket.events()
+    assert [event["type"] for event in events] == ["content_delta", "final"]
+    assert events[0]["content"] == "The answer is 42."
+    assert events[1]["delivery"] == {"merged": 3, "dropped": 0}
+
+
+def test_each_socket_reports_its_own_delivery_without_touching_the_event() -> None:
+    async def scenario() -> tuple[SlowSocket, SlowSocket, Event]:
+        first, second = SlowSocket(), SlowSocket()
+        busy, idle = WebSocketEmitter(first, window=0.01), WebSocketEmitter(second, window=0.01)
+        for token in ["a", "b"]:
+            await busy(Event(type=EventType.CONTENT_DELTA, data={"content": token}))
+        final = Event(type=EventType.FINAL, data={"response": "ab"})
+        await busy(final)
+        await idle(final)
+        await _settle(busy)
+        await _settle(idle)
+        return first, second, final
+
+    first, second, final = asyncio.run(scenario())
+
+    assert first.events()[-1]["delivery"] == {"merged": 1, "dropped": 0}
+    assert second.events()[-1]["delivery"] == {"merged": 0, "dropped": 0}
+    assert "delivery" not in final.data
+
+
+def test_deltas_from_different_branches_are_not_merged() -> None:
+    async def scenario() -> SlowSocket:
+        socket = SlowSocket()
+        emitter = WebSocketEmitter(socket, window=0.01)
+        await emitter(Event(type=EventType.STDOUT, data={"content": "a", "branch": "b1"}))
+        await emitter(Event(type=EventType.STDOUT, data={"content": "b", "branch": "b2"}))
+        await _settle(emitter)
+        return socket
+
+    events = asyncio.run(scenario()).events()
+    assert [(event["branch"], event["content"]) for event in events] == [("b1", "a"), ("b2", "b")]
+
+
+def test_a_slow_client_loses_stdout_but_never_the_answer() -> None:
+    """The orchestrator never waits on the socket, however far behind it falls."""
+
+    async def scenario() -> tuple[SlowSocket, float]:
+        socket = SlowSocket(delay=0.05)
+        emitter = WebSocketEmitter(socket, max_queued=4, window=0)
+        started = asyncio.get_running_loop().time()
+        for index in range(500):
+            await emitter(Event(type=EventType.STATUS, data={"content": f"step {index}"}))
+            await emitter(Event(type=EventType.STDOUT, data={"content": "x" * 200}))
+        await emitter(Event(type=EventType.CONTENT_DELTA, data={"content": "Done."}))
+        await emitter(Event(type=EventType.FINAL, data={"response": "Done."}))
+        elapsed = asyncio.get_running_loop().time() - started
+        await _settle(emitter)
+        return socket, elapsed
+
+    socket, elapsed = asyncio.run(scenario())
+
+    assert elapsed < 0.05, "emitting waited on the socket"
+    events = socket.events()
+    assert events[-1]["type"] == "final"
+    assert [event["content"] for event in events if event["type"] == "content_delta"] == ["Done."]
+    assert len([event for event in events if event["type"] == "status"]) == 500
+    delivery = events[-1]["delivery"]
+    assert delivery["merged"] + delivery["dropped"] > 0
+    stdout = sum(len(event["content"]) for event in events if event["type"] == "stdout")
+    assert stdout + 200 * delivery["dropped"] == 500 * 200
+
+
+# --------------------------------------------------------------------------- #
+# Resuming a turn
+# --------------------------------------------------------------------------- #
+def test_a_turn_outlives_its_socket_and_resumes_on_the_next(
+    client: TestClient, session_with_data: str, monkeypatch
+) -> None:
+    """The run is not cancelled with the socket, so reconnecting costs no rerun."""
+    monkeypatch.setattr("src.core.agent.orchestrator.llm_provider", StreamingStub(INSTALL_SCRIPT))
+
+    with client.websocket_connect(f"/ws/chat?session={session_with_data}") as websocket:
+        websocket.receive_json()
+        websocket.send_json({"type": "message", "content": "fit a survival model", "mode": "fast"})
+        seen = collect_until(websocket, {"approval_required", "final", "error"})
+    # Gone mid-turn, with a question open: it is declined and the run carries on.
+    turn, last = seen[-1]["turn"], seen[-1]["seq"]
+    assert [frame["seq"] for frame in seen] == sorted({frame["seq"] for frame in seen})
+
+    with client.websocket_connect(f"/ws/chat?session={session_with_data}") as websocket:
+        websocket.receive_json()
+        websocket.send_json({"type": "resume", "turn": turn, "after": last})
+        rest = collect_until(websocket, {"final", "error"})
+
+    assert rest[-1]["type"] == "final"
+    # Merged deltas skip numbers; nothing is repeated or out of order.
+    assert [frame["seq"] for frame in rest] == sorted({frame["seq"] for frame in rest})
+    assert rest[0]["seq"] > last
+
+    response = client.get(
+        f"/api/session/turns/{turn}/events", params={"after": last}, headers={"X-Session-ID": session_with_data}
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["done"] and body["missed"] == 0
+    assert [event["seq"] for event in body["events"]] == list(range(last + 1, rest[-1]["seq"] + 1))
+
+
+def test_resuming_an_unknown_turn_is_an_error(client: TestClient, session_with_data: str) -> None:
+    with client.websocket_connect(f"/ws/chat?session={session_with_data}") as websocket:
+        websocket.receive_json()
+        websocket.send_json({"type": "resume", "turn": "no-such-turn", "after": 3})
+        frame = websocket.receive_json()
+
+    assert frame["type"] == "error"
+    assert frame["turn"] == "no-such-turn"
+
+
+def test_the_ring_reports_what_it_no_longer_holds(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "TURN_REPLAY_TTL_SECONDS", 0)
+    streams = TurnStreams()
+    stream = streams.start("s1")
+    stream._frames = deque(maxlen=3)
+
+    async def emit_five() -> None:
+        for index in range(5):
+            await stream(Event(type=EventType.STDOUT, data={"content": str(index)}))
+
+    asyncio.run(emit_five())
+
+    frames, missed = stream.frames(after=1)
+    assert [frame["seq"] for frame in frames] == [3, 4, 5]
+    assert missed == 1
+    assert streams.get("other-session", stream.id) is None
+    assert streams.running("s1") is stream
+
+    stream.finish()
+    stream.finished_at -= 1
+    assert streams.get("s1", stream.id) is None, "a finished turn outlived its TTL"
+
+
+def test_the_ring_drops_its_oldest_frames_past_the_byte_budget(monkeypatch) -> None:
+    """A few thousand table frames held for the whole TTL are a leak in all but name."""
+    monkeypatch.setattr(settings, "TURN_REPLAY_BYTES", 2000)
+    stream = TurnStreams().start("s1")
+
+    async def emit_large() -> None:
+        for index in range(10):
+            await stream(Event(type=EventType.STDOUT, data={"content": str(index) * 600}))
+
+    asyncio.run(emit_large())
+
+    frames, missed = stream.frames(after=0)
+    assert 1 < len(frames) < 10
+    assert [frame["seq"] for frame in frames] == list(range(11 - len(frames), 11))
+    assert missed == 10 - len(frames)
+    assert stream._bytes == sum(len(json.dumps(frame)) for frame in frames) <= 2000
+
+
+def test_forgetting_a_session_cancels_its_running_turn() -> None:
+    """Turns outlive their socket; a disposed session must not leave one calling tools."""
+    streams = TurnStreams()
+
+    async def scenario() -> None:
+        on_loop = streams.start("s1")
+        on_loop.task = asyncio.ensure_future(asyncio.sleep(60))
+        off_loop = streams.start("s2")
+        off_loop.task = asyncio.ensure_future(asyncio.sleep(60))
+
+        streams.forget("s1")
+        await asyncio.to_thread(streams.forget, "s2")
+        assert off_loop.task.cancelled(), "a reaper thread returned before the turn unwound"
+        await asyncio.sleep(0)
+        assert on_loop.task.cancelled()
+        assert streams.running("s1") is None and streams.running("s2") is None
+
+    asyncio.run(scenario())
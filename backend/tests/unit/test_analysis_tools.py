@@ -9,7 +9,9 @@ import pytest
 from src.core.database import db_mgr
 from src.core.llm.registry import classify
 from src.core.prompts import create_prompt, generate_system_context
+from src.core.rag.lexical import LexicalIndex
 from src.core.rag.retriever import ContextRetriever, lexical_overlap, tokenize
+from src.core.tools import sketches
 from src.core.tools.catalog import CatalogEngine
 from src.core.tools.evaluator import Evaluator
 from src.core.tools.schema_registry import SchemaRegistry
@@ -57,6 +59,47 @@ def test_catalog_samples_large_frames() -> None:
     assert catalog["global_quality"]["rows"] == 50_000
 
 
+def test_catalog_counts_nulls_over_the_whole_frame_when_sampling() -> None:
+    df = pd.DataFrame({"a": [None] * 100 + list(range(9_900))})
+    catalog = CatalogEngine.analyze(df, sample_rows=500)
+
+    quality = catalog["columns"]["a"]["quality"]
+    assert quality["null_count"] == 100
+    assert quality["missing_percentage"] == 1.0
+
+
+def test_catalog_outliers_match_the_toolkit() -> None:
+    rng = np.random.default_rng(7)
+    df = pd.DataFrame({"x": np.append(rng.normal(size=300), [40.0, -35.0]), "y": rng.integers(0, 9, 302)})
+    catalog = CatalogEngine.analyze(df)
+
+    for column in ("x", "y"):
+        expected = StatisticalToolkit.detect_outliers(df, column)
+        assert catalog["columns"][column]["quality"]["outliers"] == {
+            "count": expected["outlier_count"],
+            "percentage": expected["outlier_percentage"],
+        }
+
+
+def test_catalog_patterns_are_judged_per_column() -> None:
+    df = pd.DataFrame(
+        {
+            "contact": ["a@b.com", "c@d.org", "e@f.net"],
+            "homepage": ["https://a.io", "http://b.io", "https://c.io"],
+            "host": ["10.0.0.1", "10.0.0.2", "192.168.1.1"],
+            "notes": ["free text", "more text", "other"],
+        }
+    )
+    columns = CatalogEngine.analyze(df)["columns"]
+    assert [columns[c]["semantic_type"] for c in df.columns] == ["email", "url", "ip_address", "text"]
+
+
+def test_catalog_is_the_same_profiled_in_parallel() -> None:
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({f"c{i}": rng.integers(0, i + 2, 500) for i in range(40)})
+    assert CatalogEngine.analyze(df, workers=4) == CatalogEngine.analyze(df, workers=1)
+
+
 def test_catalog_on_empty_frame(empty_df: pd.DataFrame) -> None:
     catalog = CatalogEngine.analyze(empty_df)
     assert catalog["columns"] == {}
@@ -155,6 +198,42 @@ def test_lexical_overlap_scores_related_text_higher() -> None:
     assert lexical_overlap(query, "revenue") > lexical_overlap(query, "unrelated_field")
 
 
+def test_bm25_ranks_a_rare_term_above_a_common_one() -> None:
+    index = LexicalIndex(["revenue by region", "revenue by month", "revenue by chargeback"])
+    ranked = index.rank("revenue chargeback")
+    assert ranked[0][1] == 2
+    assert {position for _coverage, position in ranked} == {0, 1, 2}
+
+
+def test_rank_gates_on_coverage_not_score() -> None:
+    index = LexicalIndex(["refund policy", "refund window for disputed chargebacks"])
+    ranked = index.rank("refund chargebacks window", min_coverage=0.5)
+    assert [position for _coverage, position in ranked] == [1]
+    assert ranked[0][0] == pytest.approx(1.0)
+
+
+def test_index_jaccard_matches_lexical_overlap() -> None:
+    names = ["total_revenue", "region", "order_id"]
+    query = tokenize("revenue by region")
+    scores = LexicalIndex(names).jaccard(query)
+    for position, name in enumerate(names):
+        assert scores.get(position, 0.0) == pytest.approx(lexical_overlap(query, name))
+
+
+def test_a_name_scores_alike_with_or_without_the_index() -> None:
+    query = tokenize("orders by customers")
+    for name in ("Orders.csv", "customer", "Customers-2024.xlsx"):
+        indexed = LexicalIndex([name]).jaccard(query).get(0, 0.0)
+        assert indexed > 0
+        assert lexical_overlap(query, name) == pytest.approx(indexed)
+
+
+def test_index_folds_plurals_on_both_sides() -> None:
+    index = LexicalIndex(["Status C means cancelled"])
+    assert index.rank("cancelled status means") == index.rank("cancelled status mean") == [(1.0, 0)]
+    assert "means" in tokenize("Status C means cancelled")
+
+
 def test_column_selection_passes_through_narrow_frames(simple_df: pd.DataFrame) -> None:
     columns, truncated = ContextRetriever().select_columns("anything", simple_df)
     assert columns == ["A", "B", "C"]
@@ -228,6 +307,22 @@ def test_registry_returns_empty_when_nothing_is_unique() -> None:
     assert SchemaRegistry._detect_primary_key(df) == ""
 
 
+def test_registry_reuses_the_catalog_it_is_given(monkeypatch) -> None:
+    df = pd.DataFrame({"order_id": [1, 2, 3], "note": ["a", None, "c"]})
+    catalog = CatalogEngine.analyze(df)
+
+    def recount(*args, **kwargs):
+        raise AssertionError("null counts were recomputed")
+
+    monkeypatch.setattr(pd.DataFrame, "isnull", recount)
+    SchemaRegistry.register_dataframe("orders.csv", df, session_id="catalog-share", catalog=catalog)
+
+    schema = db_mgr.get_schemas(session_id="catalog-share")[0]
+    assert schema["primary_key"] == "order_id"
+    assert schema["meta"]["null_counts"] == {"order_id": 0, "note": 1}
+    db_mgr.delete_session_data("catalog-share")
+
+
 def test_registry_suggests_a_foreign_key_join() -> None:
     session_id = "join-test"
     SchemaRegistry.register_dataframe(
@@ -244,6 +339,151 @@ def test_registry_suggests_a_foreign_key_join() -> None:
     db_mgr.delete_session_data(session_id)
 
 
+def test_registry_suggests_a_join_on_shared_key_values_under_different_names() -> None:
+    session_id = "value-join-test"
+    rng = np.random.default_rng(3)
+    SchemaRegistry.register_dataframe(
+        "customers.csv", pd.DataFrame({"customer_id": range(100), "tier": ["a"] * 100}), session_id=session_id
+    )
+    SchemaRegistry.register_dataframe(
+        "orders.csv",
+        pd.DataFrame({"order_id": range(5000, 5300), "buyer_id": rng.integers(0, 100, 300)}),
+        session_id=session_id,
+    )
+
+    suggestions = SchemaRegistry.get_join_suggestions(session_id=session_id)
+    assert suggestions == [
+        {
+            "file1": "customers.csv",
+            "file2": "orders.csv",
+            "matching_columns": [{"col1": "customer_id", "col2": "buyer_id"}],
+        }
+    ]
+    db_mgr.delete_session_data(session_id)
+
+
+def test_unregistering_a_table_drops_its_joins() -> None:
+    session_id = "unregister-test"
+    SchemaRegistry.register_dataframe("users.csv", pd.DataFrame({"id": [1, 2]}), session_id=session_id)
+    SchemaRegistry.register_dataframe(
+        "orders.csv", pd.DataFrame({"order_id": [7, 8], "user_id": [1, 2]}), session_id=session_id
+    )
+    assert SchemaRegistry.get_join_suggestions(session_id=session_id)
+
+    SchemaRegistry.unregister("users.csv", session_id=session_id)
+    assert SchemaRegistry.get_join_suggestions(session_id=session_id) == []
+    assert [schema["filename"] for schema in db_mgr.get_schemas(session_id=session_id)] == ["orders.csv"]
+    db_mgr.delete_session_data(session_id)
+
+
+def test_a_write_outside_the_registry_is_not_answered_from_a_stale_graph() -> None:
+    session_id = "stale-graph-test"
+    SchemaRegistry.register_dataframe("users.csv", pd.DataFrame({"id": [1, 2]}), session_id=session_id)
+    SchemaRegistry.register_dataframe(
+        "orders.csv", pd.DataFrame({"order_id": [7, 8], "user_id": [1, 2]}), session_id=session_id
+    )
+    assert SchemaRegistry.get_join_suggestions(session_id=session_id)
+
+    db_mgr.delete_session_data(session_id)
+    assert SchemaRegistry.get_join_suggestions(session_id=session_id) == []
+    assert SchemaRegistry.get_workspace_schema_context(session_id=session_id) == ""
+
+
+def test_related_schemas_score_only_tables_that_could_match() -> None:
+    session_id = "related-test"
+    SchemaRegistry.register_dataframe(
+        "sales.csv", pd.DataFrame({"region": ["n"], "revenue": [1.0]}), session_id=session_id
+    )
+    SchemaRegistry.register_dataframe(
+        "regions.csv", pd.DataFrame({"region": ["n"], "manager": ["m"]}), session_id=session_id
+    )
+    SchemaRegistry.register_dataframe(
+        "weather.csv", pd.DataFrame({"city": ["c"], "rainfall": [2.0]}), session_id=session_id
+    )
+    for number in range(30):
+        SchemaRegistry.register_dataframe(
+            f"log_{number}.csv", pd.DataFrame({"event": ["e"], "level": ["l"]}), session_id=session_id
+        )
+
+    related = ContextRetriever().retrieve_related_schemas(
+        "rainfall by region", session_id, active_columns=["region", "revenue"]
+    )
+    assert [schema["filename"] for schema in related] == ["regions.csv", "weather.csv"]
+    db_mgr.delete_session_data(session_id)
+
+
+def test_sketches_estimate_cardinality_containment_and_uniqueness() -> None:
+    keys = sketches.sketch(pd.Series(range(5000)))
+    references = sketches.sketch(pd.Series(np.random.default_rng(5).integers(0, 5000, 4000)))
+    elsewhere = sketches.sketch(pd.Series(range(9000, 14000)))
+
+    assert keys.unique and not references.unique
+    assert keys.distinct == pytest.approx(5000, rel=0.15)
+    assert sketches.containment(references, keys) > 0.9
+    assert sketches.containment(elsewhere, keys) == 0.0
+    assert sketches.ColumnSketch.from_dict(keys.to_dict()).to_dict() == keys.to_dict()
+
+
+def test_measurements_and_short_columns_are_not_sketched() -> None:
+    assert sketches.sketch(pd.Series(np.linspace(0, 1, 100))) is None
+    assert sketches.sketch(pd.Series([True, False] * 50)) is None
+    assert sketches.sketch(pd.Series(range(5))) is None
+    # An id column read as float because of a gap is still an id column.
+    assert sketches.sketch(pd.Series([*range(50), None])) is not None
+
+
+def test_registry_pairs_columns_by_values_when_the_names_differ() -> None:
+    session_id = "sketch-join-test"
+    ids = [f"C{number:04d}" for number in range(200)]
+    rng = np.random.default_rng(9)
+    SchemaRegistry.register_dataframe(
+        "customers.csv", pd.DataFrame({"customer_id": ids, "segment": ["a", "b"] * 100}), session_id=session_id
+    )
+    SchemaRegistry.register_dataframe(
+        "orders.csv",
+        pd.DataFrame({"order_ref": [f"O{n}" for n in range(600)], "cust_no": rng.choice(ids, 600)}),
+        session_id=session_id,
+    )
+
+    pairs = [
+        (match["col1"], match["col2"])
+        for entry in SchemaRegistry.get_join_suggestions(session_id=session_id)
+        for match in entry["matching_columns"]
+    ]
+    assert pairs == [("customer_id", "cust_no")]
+
+    related = ContextRetriever().retrieve_related_schemas(
+        "orders per customer", session_id, active_columns=["customer_id", "segment"]
+    )
+    assert related[0]["filename"] == "orders.csv"
+    assert related[0]["join_keys"] == [("customer_id", "cust_no")]
+    db_mgr.delete_session_data(session_id)
+
+
+def test_same_named_columns_with_disjoint_values_are_not_a_join() -> None:
+    session_id = "disjoint-join-test"
+    SchemaRegistry.register_dataframe("billing.csv", pd.DataFrame({"code": range(100)}), session_id=session_id)
+    SchemaRegistry.register_dataframe("shipping.csv", pd.DataFrame({"code": range(1000, 1100)}), session_id=session_id)
+
+    assert SchemaRegistry.get_join_suggestions(session_id=session_id) == []
+    db_mgr.delete_session_data(session_id)
+
+
+def test_small_integer_columns_are_not_joined_to_an_unrelated_id() -> None:
+    """A run of ages lies within any unique id from 1 to 2000; that is not a reference."""
+    session_id = "key-like-join-test"
+    rng = np.random.default_rng(3)
+    SchemaRegistry.register_dataframe("products.csv", pd.DataFrame({"id": range(1, 2001)}), session_id=session_id)
+    SchemaRegistry.register_dataframe(
+        "people.csv",
+        pd.DataFrame({"age": rng.integers(18, 91, 3000), "visits": rng.integers(0, 201, 3000)}),
+        session_id=session_id,
+    )
+
+    assert SchemaRegistry.get_join_suggestions(session_id=session_id) == []
+    db_mgr.delete_session_data(session_id)
+
+
 def test_registry_scopes_schemas_to_a_session() -> None:
     SchemaRegistry.register_dataframe("a.csv", pd.DataFrame({"x": [1]}), session_id="s-one")
     SchemaRegistry.register_dataframe("b.csv", pd.DataFrame({"y": [1]}), session_id="s-two")
@@ -8,9 +8,15 @@ teaching the user to ignore the warning.
 
 from __future__ import annotations
 
+import random
+
 import pytest
 
+from src.core.agent.actions import ActionKind, Investigation, Step
 from src.core.agent.grounding import (
+    ObservedNumbers,
+    _as_float,
+    _matches,
     assumptions_from_code,
     assumptions_from_profile,
     check_grounding,
@@ -101,6 +107,41 @@ def test_extract_numbers_reads_the_shapes_output_actually_uses() -> None:
     assert "99" in found
 
 
+# --------------------------------------------------------------------------- #
+# The observed-number index
+# --------------------------------------------------------------------------- #
+def test_the_index_agrees_with_checking_every_value() -> None:
+    """The window lookup is an optimisation; it must never change a verdict."""
+    rng = random.Random(7)
+    output = " ".join(f"{rng.uniform(-5e6, 5e6):.{rng.choice([0, 2, 4])}f}" for _ in range(400))
+    observed = [_as_float(token) for token in extract_numbers(output)]
+    index = ObservedNumbers(output)
+    picks = rng.sample(observed, 40)
+    stated = [f"{value:.1f}" for value in picks] + [f"{value / 1e6:.2f}" for value in picks]
+    stated += [f"{rng.uniform(-5e6, 5e6):.3f}" for _ in range(40)]
+    for token in stated:
+        for scale in (1.0, 1e6):
+            expected = any(_matches(token, value, scale) for value in observed)
+            assert index.grounds(token, scale) is expected, (token, scale)
+
+
+def test_scaled_figures_are_found_in_a_large_output() -> None:
+    output = "\n".join(f"row {i} {i * 37.25:.2f}" for i in range(10_000)) + "\ntotal 3214567"
+    report = check_grounding("Total revenue was 3.2 million, against 9.7 million forecast.", output)
+    assert report.checked == 2
+    assert report.ungrounded == ["9.7"]
+
+
+def test_an_investigation_indexes_successful_steps_as_they_are_recorded() -> None:
+    investigation = Investigation()
+    investigation.record(Step(index=1, kind=ActionKind.CODE, goal="", observation="mean 48213.7"))
+    investigation.record(Step(index=2, kind=ActionKind.CODE, goal="", observation="error at 91234", ok=False))
+    assert investigation.observed.grounds("48,214")
+    assert not investigation.observed.grounds("91234")
+    report = check_grounding("The mean was 48,214, not 91,234.", investigation.observed)
+    assert report.ungrounded == ["91,234"]
+
+
 # --------------------------------------------------------------------------- #
 # Assumption ledger
 # --------------------------------------------------------------------------- #
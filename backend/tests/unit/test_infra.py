@@ -12,6 +12,8 @@ import pytest
 from src.core.database import DatabaseManager
 from src.core.embeddings import EmbeddingService, cosine_similarity
 from src.core.infra.cache import InProcessCache
+from src.core.infra.metrics import MetricsRegistry
+from src.core.infra.profiling import HotPaths, ProfilerBusyError, SamplingProfiler
 from src.core.infra.queue import Job, JobQueue, JobStatus
 
 
@@ -292,3 +294,123 @@ def test_memory_pruning_keeps_the_most_recent(tmp_path) -> None:
     manager.prune_memories(keep_last=5)
     assert len(manager.get_memories()) == 5
     manager.close()
+
+
+# --------------------------------------------------------------------------- #
+# Profiling
+# --------------------------------------------------------------------------- #
+def _spin_in_a_thread(seconds: float) -> threading.Thread:
+    def spin_for_the_profiler() -> None:
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            sum(range(1000))
+
+    thread = threading.Thread(target=spin_for_the_profiler, name="spinner")
+    thread.start()
+    return thread
+
+
+def test_hot_paths_cost_nothing_and_count_nothing_while_idle() -> None:
+    paths = HotPaths()
+    assert paths.timed("sqlite.read") is paths.timed("llm.call")
+    with paths.timed("sqlite.read"):
+        pass
+    paths.start()
+    with paths.timed("sqlite.read"):
+        time.sleep(0.01)
+    with paths.timed("sqlite.read"):
+        pass
+    counted = paths.stop()
+    assert counted["sqlite.read"]["calls"] == 2
+    assert counted["sqlite.read"]["max_ms"] >= 10
+    with paths.timed("sqlite.read"):
+        pass
+    paths.start()
+    assert paths.stop() == {}
+
+
+def test_the_sampler_sees_a_busy_thread_in_its_own_function() -> None:
+    thread = _spin_in_a_thread(0.6)
+    try:
+        profile = SamplingProfiler().record(0.3, interval=0.005)
+    finally:
+        thread.join()
+    assert profile.samples > 5
+    spinner = [stack for (name, stack), _count in profile.stacks.items() if name == "spinner"]
+    assert any("spin_for_the_profiler" in frame for stack in spinner for frame in stack)
+
+    line = next(line for line in profile.collapsed().splitlines() if line.startswith("spinner;"))
+    assert int(line.rsplit(" ", 1)[1]) >= 1
+
+    document = profile.speedscope()
+    spinning = next(entry for entry in document["profiles"] if entry["name"] == "spinner")
+    assert len(spinning["samples"]) == len(spinning["weights"])
+    names = {document["shared"]["frames"][index]["name"] for sample in spinning["samples"] for index in sample}
+    assert any(name.endswith("spin_for_the_profiler") for name in names)
+
+
+def test_one_recording_at_a_time() -> None:
+    sampler = SamplingProfiler()
+    thread = threading.Thread(target=sampler.record, args=(0.3,))
+    thread.start()
+    time.sleep(0.05)
+    try:
+        with pytest.raises(ProfilerBusyError):
+            sampler.record(0.1)
+    finally:
+        thread.join()
+    assert sampler.record(0.05).samples >= 1
+
+
+# --------------------------------------------------------------------------- #
+# Metrics
+# --------------------------------------------------------------------------- #
+def test_counters_and_gauges_render_in_the_text_format() -> None:
+    metrics = MetricsRegistry()
+    lookups = metrics.counter("wizard_lookups_total", "Lookups.", ("result",))
+    lookups.inc(result="hit")
+    lookups.inc(2, result="miss")
+    depth = metrics.gauge("wizard_depth", "Depth.")
+    depth.set(5)
+    depth.dec()
+
+    text = metrics.render()
+    assert "# TYPE wizard_lookups_total counter" in text
+    assert 'wizard_lookups_total{result="hit"} 1' in text
+    assert 'wizard_lookups_total{result="miss"} 2' in text
+    assert "wizard_depth 4" in text
+    assert metrics.counter("wizard_lookups_total", "Again.", ("result",)) is lookups
+    with pytest.raises(ValueError):
+        lookups.inc(-1, result="hit")
+    with pytest.raises(ValueError):
+        lookups.inc(outcome="hit")
+
+
+def test_histogram_buckets_are_cumulative() -> None:
+    metrics = MetricsRegistry()
+    latency = metrics.histogram("wizard_latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(seconds)
+
+    lines = metrics.render().splitlines()
+    assert 'wizard_latency_seconds_bucket{le="0.1"} 2' in lines
+    assert 'wizard_latency_seconds_bucket{le="1"} 3' in lines
+    assert 'wizard_latency_seconds_bucket{le="+Inf"} 4' in lines
+    assert "wizard_latency_seconds_count 4" in lines
+    assert "wizard_latency_seconds_sum 3.65" in lines
+    assert latency.count() == 4
+
+
+def test_callback_gauges_are_read_at_scrape_time_and_a_failing_one_is_left_out() -> None:
+    metrics = MetricsRegistry()
+    queued = [1, 2]
+    metrics.gauge("wizard_queued", "Queued.", collect=lambda: len(queued))
+    metrics.gauge("wizard_jobs", "Jobs.", ("status",), collect=lambda: {("running",): 1, ("failed",): 0})
+    metrics.gauge("wizard_broken", "Broken.", collect=lambda: 1 / 0)
+
+    assert "wizard_queued 2" in metrics.render()
+    queued.append(3)
+    text = metrics.render()
+    assert "wizard_queued 3" in text
+    assert 'wizard_jobs{status="running"} 1' in text
+    assert "wizard_broken" not in text
@@ -20,6 +20,8 @@ from src.core.ingest.loader import (
     safe_write_feather,
     sanitize_columns,
 )
+from src.core.ingest.preview import SortOrders, page_ipc, page_records, preview_page
+from src.core.ingest.query import QueryError, QueryResults, execute, spec_key
 
 
 # --------------------------------------------------------------------------- #
@@ -146,6 +148,73 @@ def test_load_ndjson(tmp_path: Path) -> None:
     assert len(result.df) == 2
 
 
+def test_json_is_streamed_across_buffer_boundaries(tmp_path: Path, monkeypatch) -> None:
+    """A tiny buffer splits keys, strings and numbers mid-token; none may be misread."""
+    monkeypatch.setattr("src.core.ingest.jsonstream.CHUNK_CHARS", 7)
+    path = tmp_path / "data.json"
+    records = [{"id": 123456789 + i, "name": f"row {i}", "nested": {"x": i / 4}} for i in range(40)]
+    path.write_text(json.dumps({"meta": {"pages": 1}, "items": records}), encoding="utf-8")
+
+    result = DatasetLoader.load(path)
+    assert result.df["id"].tolist() == [123456789 + i for i in range(40)]
+    assert result.df["nested_x"].iloc[-1] == pytest.approx(9.75)
+
+
+def test_a_json_array_is_never_loaded_whole(tmp_path: Path, monkeypatch) -> None:
+    def whole_document(*args, **kwargs):
+        raise AssertionError("the whole document was parsed")
+
+    monkeypatch.setattr(json, "load", whole_document)
+    monkeypatch.setattr(pd, "read_json", whole_document)
+    path = tmp_path / "data.json"
+    path.write_text(json.dumps([{"a": i} for i in range(3000)]), encoding="utf-8")
+
+    result = DatasetLoader.load(path, max_rows=300)
+    assert result.profile.truncated
+    assert result.profile.original_rows == 3000
+    values = result.df["a"].tolist()
+    assert len(values) == 300
+    # Sampled across the file, not the first 300 records.
+    assert values[0] == 0 and values[-1] > 2_900
+
+
+def test_malformed_ndjson_lines_are_skipped(tmp_path: Path) -> None:
+    path = tmp_path / "data.ndjson"
+    path.write_text('{"a": 1}\nnot json\n\n{"a": 2}\n', encoding="utf-8")
+
+    result = DatasetLoader.load(path)
+    assert result.df["a"].tolist() == [1, 2]
+    assert any("malformed" in warning for warning in result.warnings)
+
+
+def test_column_oriented_json_is_still_read(tmp_path: Path) -> None:
+    """No record array to stream: the document is small enough to read whole."""
+    path = tmp_path / "data.json"
+    path.write_text(json.dumps({"a": {"0": 1, "1": 2}, "b": {"0": "x", "1": "y"}}), encoding="utf-8")
+
+    result = DatasetLoader.load(path)
+    assert list(result.df.columns) == ["a", "b"]
+    assert len(result.df) == 2
+
+
+def test_a_dict_of_lists_keeps_every_column(tmp_path: Path) -> None:
+    path = tmp_path / "data.json"
+    path.write_text(json.dumps({"a": [1, 2, 3], "b": [4, 5, 6]}), encoding="utf-8")
+
+    result = DatasetLoader.load(path)
+    assert list(result.df.columns) == ["a", "b"]
+    assert result.df["b"].tolist() == [4, 5, 6]
+
+
+def test_an_array_of_plain_values_is_not_streamed_as_records(tmp_path: Path) -> None:
+    path = tmp_path / "data.json"
+    path.write_text(json.dumps({"a": [1, 2, 3]}), encoding="utf-8")
+
+    result = DatasetLoader.load(path)
+    assert list(result.df.columns) == ["a"]
+    assert result.df["a"].tolist() == [1, 2, 3]
+
+
 def test_large_file_is_sampled_and_reported(tmp_path: Path) -> None:
     path = tmp_path / "big.csv"
     pd.DataFrame({"a": range(5000)}).to_csv(path, index=False)
@@ -157,6 +226,211 @@ def test_large_file_is_sampled_and_reported(tmp_path: Path) -> None:
     assert any("sample" in warning.lower() for warning in result.warnings)
 
 
+def test_a_sampled_csv_keeps_its_full_population_as_parquet(tmp_path: Path) -> None:
+    """A sample answers shape questions; the Parquet copy is what makes totals exact."""
+    import pyarrow.parquet as pq
+
+    path = tmp_path / "big.csv"
+    pd.DataFrame({"order id": range(5000), "amount": [1.5] * 5000}).to_csv(path, index=False)
+
+    result = DatasetLoader.load(path, max_rows=500)
+    try:
+        assert result.profile.out_of_core
+        assert result.full_path is not None
+        table = pq.read_table(result.full_path)
+        assert table.num_rows == 5000
+        # The same sanitised names as `df`, so SQL and pandas agree on columns.
+        assert table.column_names == list(result.df.columns) == ["order_id", "amount"]
+        assert table.column("amount").to_pandas().sum() == pytest.approx(7500.0)
+    finally:
+        if result.full_path is not None:
+            result.full_path.unlink(missing_ok=True)
+
+
+def test_a_parquet_upload_is_copied_in_batches(tmp_path: Path) -> None:
+    import pyarrow.parquet as pq
+
+    path = tmp_path / "big.parquet"
+    pd.DataFrame({"a b": range(3000)}).to_parquet(path)
+
+    result = DatasetLoader.load(path, max_rows=100)
+    try:
+        assert result.full_path is not None
+        assert pq.read_table(result.full_path).column_names == ["a_b"]
+        assert result.profile.original_rows == 3000
+    finally:
+        if result.full_path is not None:
+            result.full_path.unlink(missing_ok=True)
+
+
+def test_a_file_within_the_limit_gets_no_full_copy(tmp_path: Path, simple_df: pd.DataFrame) -> None:
+    path = tmp_path / "small.csv"
+    simple_df.to_csv(path, index=False)
+
+    result = DatasetLoader.load(path)
+    assert result.full_path is None
+    assert not result.profile.out_of_core
+
+
+def test_the_full_copy_can_be_turned_off(tmp_path: Path, monkeypatch) -> None:
+    from src.config import settings
+
+    monkeypatch.setattr(settings, "INGEST_OUT_OF_CORE", False)
+    path = tmp_path / "big.csv"
+    pd.DataFrame({"a": range(2000)}).to_csv(path, index=False)
+
+    result = DatasetLoader.load(path, max_rows=100)
+    assert result.profile.truncated
+    assert result.full_path is None
+
+
+def test_a_value_the_sample_cannot_type_leaves_nothing_behind(tmp_path: Path) -> None:
+    """Integers in every sampled row and text further down: refused, never half-written."""
+    from src.core.ingest.outofcore import write_parquet_copy
+
+    source = tmp_path / "big.csv"
+    source.write_text("a\n1\n2\nnot-a-number\n", encoding="utf-8")
+    destination = tmp_path / "full.parquet"
+
+    rows = write_parquet_copy(
+        source, destination, kind="csv", raw_columns=["a"], columns=["a"], keep={"a": np.dtype("int8")}
+    )
+    assert rows is None
+    assert not destination.exists()
+
+
+def test_csv_sample_spans_the_whole_file_in_order(tmp_path: Path) -> None:
+    """The single-pass sampler cannot know the total up front, yet must not favour the head."""
+    path = tmp_path / "big.csv"
+    pd.DataFrame({"a": range(10_000)}).to_csv(path, index=False)
+
+    result = DatasetLoader.load(path, max_rows=1000)
+    values = result.df["a"].tolist()
+    assert len(values) == 1000
+    assert values == sorted(values)
+    assert values[0] == 0 and values[-1] > 9_900
+    assert result.profile.original_rows == 10_000
+
+
+def test_csv_dtypes_are_narrowed_during_the_parse(tmp_path: Path) -> None:
+    path = tmp_path / "data.csv"
+    pd.DataFrame(
+        {
+            "small": [i % 100 for i in range(2000)],
+            "day": ["sat", "sun", "mon", "fri"] * 500,
+            "price": [0.5] * 2000,
+            "when": ["2024-01-01"] * 2000,
+        }
+    ).to_csv(path, index=False)
+
+    df = DatasetLoader.load(path).df
+    assert df["small"].dtype == np.int8
+    assert df["price"].dtype == np.float32
+    # Same categories, in the same order, as `astype("category")` would give.
+    assert list(df["day"].cat.categories) == ["fri", "mon", "sat", "sun"]
+    # Dates stay text, as the pandas parser leaves them.
+    assert not pd.api.types.is_datetime64_any_dtype(df["when"])
+
+
+def test_a_sampled_csv_is_copied_in_the_same_pass(tmp_path: Path, monkeypatch) -> None:
+    import pyarrow.parquet as pq
+
+    def second_read(*args, **kwargs):
+        raise AssertionError("the CSV was read a second time for the full copy")
+
+    monkeypatch.setattr(DatasetLoader, "_write_full_copy", classmethod(second_read))
+    path = tmp_path / "big.csv"
+    pd.DataFrame({"x y": range(4000)}).to_csv(path, index=False)
+
+    result = DatasetLoader.load(path, max_rows=300)
+    try:
+        assert result.full_path is not None
+        table = pq.read_table(result.full_path)
+        assert table.column_names == ["x_y"]
+        assert table.column("x_y").to_pylist() == list(range(4000))
+    finally:
+        if result.full_path is not None:
+            result.full_path.unlink(missing_ok=True)
+
+
+def test_the_same_pass_copy_drops_the_columns_the_frame_drops(tmp_path: Path) -> None:
+    import pyarrow.parquet as pq
+
+    path = tmp_path / "big.csv"
+    pd.DataFrame({"a": range(4000), "empty": [None] * 4000}).to_csv(path, index=False)
+
+    result = DatasetLoader.load(path, max_rows=300)
+    try:
+        assert list(result.df.columns) == ["a"]
+        assert result.full_path is not None
+        assert pq.read_table(result.full_path).column_names == ["a"]
+    finally:
+        if result.full_path is not None:
+            result.full_path.unlink(missing_ok=True)
+
+
+def test_malformed_csv_rows_are_counted_not_silently_dropped(tmp_path: Path) -> None:
+    path = tmp_path / "data.csv"
+    path.write_text("a,b\n1,2\n3,4,5\n6,7\n8\n", encoding="utf-8")
+
+    result = DatasetLoader.load(path)
+    assert result.df["a"].tolist() == [1, 6]
+    assert any("Skipped 2 malformed row(s)" in warning for warning in result.warnings)
+
+
+def test_a_type_change_deep_in_a_csv_falls_back_to_pandas(tmp_path: Path, monkeypatch) -> None:
+    """Arrow fixes types from the first block; pandas re-reads rather than failing."""
+    monkeypatch.setattr("src.core.ingest.loader.ARROW_BLOCK_BYTES", 64)
+    path = tmp_path / "data.csv"
+    path.write_text("a,b\n" + "".join(f"{i},x\n" for i in range(50)) + "oops,y\n", encoding="utf-8")
+
+    result = DatasetLoader.load(path)
+    assert len(result.df) == 51
+    assert "oops" in result.df["a"].astype(str).tolist()
+
+
+def test_blank_and_repeated_csv_headers_match_pandas(tmp_path: Path) -> None:
+    path = tmp_path / "data.csv"
+    path.write_text("a,,a\n1,2,3\n", encoding="utf-8")
+
+    result = DatasetLoader.load(path)
+    assert list(result.df.columns) == ["a", "Unnamed_1", "a_1"]
+
+
+def test_a_workbook_parses_only_its_largest_sheet(tmp_path: Path, monkeypatch) -> None:
+    pytest.importorskip("openpyxl")
+    path = tmp_path / "book.xlsx"
+    with pd.ExcelWriter(path) as writer:
+        pd.DataFrame({"a": range(5)}).to_excel(writer, sheet_name="Small", index=False)
+        pd.DataFrame({"b": range(40)}).to_excel(writer, sheet_name="Big", index=False)
+        pd.DataFrame({"c": range(10)}).to_excel(writer, sheet_name="Mid", index=False)
+
+    parsed: list = []
+    real_read_excel = pd.read_excel
+
+    def tracking(*args, **kwargs):
+        parsed.append(kwargs.get("sheet_name"))
+        return real_read_excel(*args, **kwargs)
+
+    monkeypatch.setattr(pd, "read_excel", tracking)
+    result = DatasetLoader.load(path)
+    assert parsed == ["Big"]
+    assert list(result.df.columns) == ["b"]
+    # Sizes come from each sheet's dimension record, header excluded.
+    assert result.profile.other_sheets == {"Small": 5, "Mid": 10}
+
+
+def test_a_workbook_sheet_past_the_limit_is_truncated(tmp_path: Path) -> None:
+    pytest.importorskip("openpyxl")
+    path = tmp_path / "book.xlsx"
+    pd.DataFrame({"a": range(300)}).to_excel(path, index=False)
+
+    result = DatasetLoader.load(path, max_rows=100)
+    assert len(result.df) == 100
+    assert result.profile.truncated
+    assert result.profile.original_rows == 300
+
+
 def test_fully_empty_columns_are_dropped(tmp_path: Path) -> None:
     path = tmp_path / "data.csv"
     pd.DataFrame({"a": [1, 2], "blank": [None, None]}).to_csv(path, index=False)
@@ -261,6 +535,174 @@ def test_json_safe_records_on_empty_frame() -> None:
     assert json_safe_records(pd.DataFrame()) == []
 
 
+# --------------------------------------------------------------------------- #
+# Preview pages
+# --------------------------------------------------------------------------- #
+def test_preview_pages_follow_a_stable_sort_with_missing_values_last() -> None:
+    df = pd.DataFrame({"k": [2.0, np.nan, 1.0, 2.0, np.nan, 1.0], "row": range(6)})
+    orders = SortOrders()
+
+    for ascending in (True, False):
+        expected = df.sort_values("k", ascending=ascending, kind="stable")
+        pages = [preview_page(df, orders, start, start + 4, "k", ascending) for start in (0, 4)]
+        assert pd.concat(pages)["row"].tolist() == expected["row"].tolist()
+
+
+def test_preview_sort_orders_are_computed_once_per_frame() -> None:
+    df = pd.DataFrame({"k": [3, 1, 2]})
+    orders = SortOrders(limit=1)
+
+    first = orders.positions(df, "k", True)
+    assert orders.positions(df, "k", True) is first, "the column was sorted again"
+
+    orders.positions(df, "k", False)
+    assert len(orders) == 1
+
+    replaced = pd.DataFrame({"k": [1, 2, 3]})
+    assert orders.positions(replaced, "k", False).tolist() == [2, 1, 0], "served the old frame's order"
+
+
+def test_preview_records_match_json_safe_records(missing_values_df: pd.DataFrame) -> None:
+    df = missing_values_df.assign(
+        when=pd.to_datetime(["2024-01-01", None, "2024-01-03", "2024-01-04"]),
+        kind=pd.Categorical(["a", "b", None, "a"]),
+        mixed=[1, "two", {"three": 3}, None],
+    )
+
+    assert page_records(df) == json_safe_records(df)
+    assert page_records(df.iloc[0:0]) == []
+
+
+def test_preview_ipc_keeps_types_and_sends_mixed_objects_as_text() -> None:
+    import pyarrow as pa
+
+    df = pd.DataFrame({"n": [1, 2], "x": [0.5, np.nan], "mixed": [1, "two"]})
+    table = pa.ipc.open_stream(page_ipc(df)).read_all()
+
+    assert table.column("n").type == pa.int64()
+    assert table.column("x").to_pylist() == [0.5, None]
+    assert table.column("mixed").to_pylist() == ["1", "two"]
+
+
+# --------------------------------------------------------------------------- #
+# Grid queries
+# --------------------------------------------------------------------------- #
+@pytest.fixture
+def sales_df() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "region": pd.Categorical(["EU", "US", "EU", "APAC", None, "US"]),
+            "product": ["Widget", "gadget", "widget pro", "Gizmo", "Widget", None],
+            "units": [5, 3, 8, 1, 2, 7],
+            "price": [2.5, 10.0, 3.0, np.nan, 2.5, 9.0],
+        }
+    )
+
+
+def test_grid_query_filters_and_sorts_as_row_positions(sales_df: pd.DataFrame) -> None:
+    spec = {
+        "filters": [{"column": "units", "op": "ge", "value": "3"}, {"column": "price", "op": "not_null"}],
+        "columns": ["product", "units"],
+        "sort_by": "units",
+        "sort_order": "desc",
+    }
+    result = execute(sales_df, spec)
+
+    assert result.frame is None, "a filter copied the rows"
+    page = result.page(sales_df, 0, 10)
+    assert page.columns.tolist() == ["product", "units"]
+    assert page["units"].tolist() == [8, 7, 5, 3]
+
+
+def test_grid_query_search_matches_text_and_categories(sales_df: pd.DataFrame) -> None:
+    assert len(execute(sales_df, {"search": "widget"})) == 3
+    assert len(execute(sales_df, {"search": "apac"})) == 1
+    assert len(execute(sales_df, {"filters": [{"column": "product", "op": "startswith", "value": "g"}]})) == 2
+
+
+def test_grid_query_groups_and_aggregates(sales_df: pd.DataFrame) -> None:
+    result = execute(
+        sales_df,
+        {
+            "group_by": ["region"],
+            "aggregates": [
+                {"column": "units", "fn": "sum", "as": "units"},
+                {"column": "*", "fn": "count"},
+                {"column": "price", "fn": "mean"},
+            ],
+            "sort_by": "units",
+            "sort_order": "desc",
+        },
+    )
+    rows = page_records(result.page(sales_df, 0, 10))
+
+    assert [row["region"] for row in rows[:2]] == ["EU", "US"]
+    assert rows[0] == {"region": "EU", "units": 13, "count": 2, "mean_price": 2.75}
+    assert {row["region"] for row in rows} == {"EU", "US", "APAC", "nan"}, "the missing group was dropped"
+
+    total = execute(sales_df, {"aggregates": [{"column": "units", "fn": "max"}]})
+    assert page_records(total.page(sales_df, 0, 1)) == [{"max_units": 8}]
+
+
+@pytest.mark.parametrize(
+    "spec",
+    [
+        {"filters": [{"column": "nope", "op": "eq", "value": 1}]},
+        {"filters": [{"column": "units", "op": "regex", "value": ".*"}]},
+        {"filters": [{"column": "units", "op": "eq", "value": "many"}]},
+        {"filters": [{"column": "units", "op": "between", "value": [1]}]},
+        {"aggregates": [{"column": "product", "fn": "mean"}]},
+        {"aggregates": [{"column": "*", "fn": "sum"}]},
+        {"group_by": ["region"], "sort_by": "units"},
+    ],
+)
+def test_grid_query_rejects_what_it_cannot_run(sales_df: pd.DataFrame, spec: dict) -> None:
+    with pytest.raises(QueryError):
+        execute(sales_df, spec)
+
+
+@pytest.mark.parametrize(
+    ("spec", "column"),
+    [
+        pytest.param({"filters": [{"column": "product", "op": "between", "value": [1, 5]}]}, "product", id="between"),
+        pytest.param(
+            {"group_by": ["region"], "aggregates": [{"column": "units", "fn": "sum", "as": "region"}]},
+            "region",
+            id="alias-is-a-group",
+        ),
+        pytest.param({"group_by": ["region"], "aggregates": [{"column": "code", "fn": "min"}]}, "code", id="min"),
+        pytest.param({"sort_by": "code"}, "code", id="sort"),
+    ],
+)
+def test_grid_query_names_the_column_a_well_formed_spec_fails_on(
+    sales_df: pd.DataFrame, spec: dict, column: str
+) -> None:
+    """Not a 500: each of these used to escape as pandas' own TypeError or ValueError."""
+    mixed = sales_df.assign(code=[1, "a", 2, "b", 3, None])
+    with pytest.raises(QueryError, match=f"'{column}'"):
+        execute(mixed, spec)
+
+
+def test_grid_query_rejects_two_aggregates_under_one_name(sales_df: pd.DataFrame) -> None:
+    aggregates = [{"column": "units", "fn": "sum", "as": "total"}, {"column": "price", "fn": "sum", "as": "total"}]
+    with pytest.raises(QueryError, match="'total'"):
+        execute(sales_df, {"group_by": ["region"], "aggregates": aggregates})
+
+
+def test_grid_query_results_are_cached_without_paging(sales_df: pd.DataFrame) -> None:
+    results = QueryResults(limit=2)
+    spec = {"filters": [{"column": "units", "op": "gt", "value": 2}], "page": 1}
+
+    first, cached = results.run(sales_df, spec)
+    assert not cached
+    again, cached = results.run(sales_df, {**spec, "page": 3, "per_page": 10})
+    assert cached and again is first
+    assert spec_key(spec) != spec_key({**spec, "search": "widget"})
+
+    _, cached = results.run(sales_df.copy(), spec)
+    assert not cached, "served another frame's result"
+
+
 def test_safe_write_feather_coerces_mixed_columns(tmp_path: Path) -> None:
     df = pd.DataFrame({"mixed": [1, "two", {"three": 3}]})
     preserved = safe_write_feather(df, tmp_path / "out.feather")
@@ -0,0 +1,265 @@
+"""Limits that follow what a session's cells, and the host, actually use.
+
+A runtime ran every cell under one ceiling sized at boot, and every parallel
+decision started all of its branches at once, whatever the host had free. The
+session cap was the boot-time split too, however full the host became.
+"""
+
+from __future__ import annotations
+
+import pytest
+
+from src.config import settings
+from src.core.tools import governor as governor_module, resources
+from src.core.tools.governor import HostSample, RuntimeUsage, decide, governor
+from src.core.tools.resources import AdaptiveLimits
+
+
+GB = 1024**3
+MB = 1024**2
+
+
+@pytest.fixture
+def limits(monkeypatch) -> AdaptiveLimits:
+    monkeypatch.setattr(settings, "ADAPTIVE_LIMITS", True)
+    monkeypatch.setattr(settings, "ADAPTIVE_MEM_MAX", "8g")
+    monkeypatch.setattr(resources, "available_ram_bytes", lambda: 16 * GB)
+    monkeypatch.setattr(resources, "_reserve_bytes", lambda: 2 * GB)
+    return AdaptiveLimits()
+
+
+def cell(peak: int, ceiling: int = 2 * GB, **extra) -> dict:
+    return {"wall_seconds": 1.0, "cpu_seconds": 0.1, "peak_rss_bytes": peak, "mem_limit_bytes": ceiling, **extra}
+
+
+def test_the_configured_limit_holds_until_a_cell_has_run(limits) -> None:
+    assert limits.memory_ceiling("s", 2 * GB) == 2 * GB
+
+
+def test_a_peak_near_the_ceiling_raises_it(limits) -> None:
+    limits.record("s", cell(int(1.8 * GB)))
+    raised = limits.memory_ceiling("s", 2 * GB)
+    assert raised > 2 * GB
+    assert 1.8 * GB <= raised * resources.HIGH_WATER + resources.STEP_BYTES
+
+
+def test_running_out_of_memory_doubles_the_ceiling(limits) -> None:
+    limits.record("s", cell(600 * MB, out_of_memory=True))
+    assert limits.memory_ceiling("s", 2 * GB) == 4 * GB
+
+
+def test_a_raise_is_capped_by_the_configured_maximum(limits) -> None:
+    limits.record("s", cell(int(1.9 * GB), ceiling=7 * GB, out_of_memory=True))
+    assert limits.memory_ceiling("s", 2 * GB) == 8 * GB
+
+
+def test_a_raise_is_capped_by_free_memory(limits, monkeypatch) -> None:
+    monkeypatch.setattr(resources, "available_ram_bytes", lambda: 3 * GB)
+    limits.record("s", cell(600 * MB, out_of_memory=True))
+    # 2 GB in force, 3 GB free less a 2 GB reserve: 1 GB more at most.
+    assert limits.memory_ceiling("s", 2 * GB) == 3 * GB
+
+
+def test_a_raised_ceiling_comes_back_down_when_usage_falls(limits) -> None:
+    limits.record("s", cell(100 * MB, ceiling=6 * GB))
+    assert limits.memory_ceiling("s", 2 * GB) == 2 * GB
+
+
+def test_a_ceiling_never_drops_below_the_configured_floor(limits, monkeypatch) -> None:
+    monkeypatch.setattr(resources, "available_ram_bytes", lambda: 0)
+    limits.record("s", cell(int(1.9 * GB), ceiling=4 * GB))
+    assert limits.memory_ceiling("s", 2 * GB) == 2 * GB
+
+
+def test_small_moves_are_not_made(limits) -> None:
+    limits.record("s", cell(int(0.62 * 2 * GB)))
+    assert limits.memory_ceiling("s", 2 * GB) == 2 * GB
+
+
+def test_an_uncapped_runtime_and_disabled_adaptation_are_left_alone(limits, monkeypatch) -> None:
+    limits.record("s", cell(int(1.9 * GB), ceiling=0, out_of_memory=True))
+    assert limits.memory_ceiling("s", 0) == 0
+    monkeypatch.setattr(settings, "ADAPTIVE_LIMITS", False)
+    limits.record("t", cell(int(1.9 * GB), out_of_memory=True))
+    assert limits.memory_ceiling("t", 2 * GB) == 2 * GB
+
+
+def test_fan_out_is_narrowed_to_what_fits_in_free_memory(limits) -> None:
+    limits.record("s", cell(5 * GB, ceiling=8 * GB))
+    # 16 GB free less a 2 GB reserve holds two branches at 5 GB each.
+    assert limits.branch_concurrency("s", 4) == 2
+
+
+def test_fan_out_is_capped_at_the_cores_for_cpu_bound_work(limits, monkeypatch) -> None:
+    monkeypatch.setattr(resources, "host_info", lambda: type("Host", (), {"logical_cores": 2, "ram_bytes": None})())
+    limits.record("s", cell(100 * MB, cpu_seconds=1.0))
+    assert limits.branch_concurrency("s", 4) == 2
+    limits.record("t", cell(100 * MB))
+    assert limits.branch_concurrency("t", 4) == 4
+
+
+def test_fan_out_always_runs_at_least_one_branch(limits, monkeypatch) -> None:
+    monkeypatch.setattr(resources, "available_ram_bytes", lambda: 0)
+    assert limits.branch_concurrency("s", 3) == 1
+
+
+def test_a_forgotten_session_starts_over(limits) -> None:
+    limits.record("s", cell(int(1.9 * GB)))
+    limits.forget("s")
+    assert limits.peak_rss("s") is None
+    assert limits.memory_ceiling("s", 2 * GB) == 2 * GB
+
+
+# --------------------------------------------------------------------------- #
+# The host-wide governor
+# --------------------------------------------------------------------------- #
+@pytest.fixture
+def host(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "GOVERNOR_ENABLED", True)
+    monkeypatch.setattr(settings, "SESSION_MAX_ACTIVE", 32)
+    monkeypatch.setattr(settings, "GOVERNOR_MEMORY_LOW", 0.15)
+    monkeypatch.setattr(settings, "GOVERNOR_MEMORY_CRITICAL", 0.05)
+    monkeypatch.setattr(settings, "GOVERNOR_IDLE_SECONDS", 600)
+
+
+def runtime(name: str, rss: int = 1 * GB, idle: float = 3600.0, busy: bool = False) -> RuntimeUsage:
+    return RuntimeUsage(session_id=name, rss_bytes=rss, idle_seconds=idle, busy=busy)
+
+
+def sample(available: int, *runtimes: RuntimeUsage, load: float = 0.5, turns: bool = False) -> HostSample:
+    return HostSample(
+        total_bytes=16 * GB,
+        available_bytes=available,
+        load_1m=load,
+        logical_cores=4,
+        runtimes=runtimes,
+        turns_running=turns,
+    )
+
+
+def test_admission_follows_free_memory_at_the_observed_footprint(host) -> None:
+    # 4 GB free less a 1.6 GB reserve holds two more 1 GB runtimes beside the two live ones.
+    decision = decide(sample(4 * GB, runtime("a"), runtime("b")))
+    assert decision.pressure == "ok"
+    assert decision.runtime_limit == 4
+    assert decision.evict == ()
+    assert decision.fan_out_limit is None
+
+
+def test_admission_never_exceeds_the_configured_cap_or_guesses_without_a_reading(host, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "SESSION_MAX_ACTIVE", 3)
+    assert decide(sample(15 * GB)).runtime_limit == 3
+    unknown = HostSample(total_bytes=None, available_bytes=None, load_1m=None, logical_cores=4)
+    assert decide(unknown).runtime_limit == 3
+    assert decide(unknown).pressure == "unknown"
+
+
+def test_past_the_limit_the_longest_idle_runtimes_stop_and_busy_ones_never(host, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "SESSION_MAX_ACTIVE", 2)
+    decision = decide(
+        sample(
+            8 * GB,
+            runtime("recent", idle=700),
+            runtime("oldest", idle=5000),
+            runtime("working", idle=9000, busy=True),
+        )
+    )
+    assert decision.runtime_limit == 2
+    assert decision.evict == ("oldest",)
+    assert decision.reasons["oldest"] == "over_limit"
+
+
+def test_memory_pressure_stops_the_largest_idle_runtimes_first(host) -> None:
+    # 2 GB free of 16 is under the 15% mark by 0.4 GB; the 3 GB runtime covers it.
+    decision = decide(
+        sample(
+            2 * GB,
+            runtime("small", rss=512 * MB),
+            runtime("large", rss=3 * GB),
+            runtime("fresh", rss=4 * GB, idle=30),
+        )
+    )
+    assert decision.pressure == "low"
+    assert "large" in decision.evict
+    assert "fresh" not in decision.evict
+    assert decision.fan_out_limit == 1
+    assert decision.release_models is False
+
+
+def test_models_are_unloaded_only_when_critical_and_no_turn_is_running(host) -> None:
+    assert decide(sample(512 * MB)).release_models is True
+    assert decide(sample(512 * MB, turns=True)).release_models is False
+
+
+def test_a_saturated_cpu_narrows_fan_out(host) -> None:
+    assert decide(sample(8 * GB, load=4.0)).fan_out_limit == governor_module.SATURATED_FAN_OUT
+
+
+def test_the_governor_caps_fan_out_and_admission_once_it_has_stepped(host, limits, monkeypatch) -> None:
+    released: list[str] = []
+    monkeypatch.setattr(governor, "_decision", None)
+    monkeypatch.setattr(governor, "sample", lambda: sample(2 * GB, runtime("idle", rss=3 * GB)))
+    monkeypatch.setattr("src.core.tools.runtime.release_runtime", released.append)
+    assert governor.runtime_limit == 32
+
+    governor.step()
+    assert released == ["idle"]
+    assert governor.runtime_limit == 1
+    assert limits.branch_concurrency("s", 4) == 1
+
+    monkeypatch.setattr(settings, "GOVERNOR_ENABLED", False)
+    assert governor.runtime_limit == 32
+    assert limits.branch_concurrency("s", 4) == 4
+
+
+class FakeRuntime:
+    def __init__(self, last_used: float, in_flight: int = 0):
+        self.last_used = last_used
+        self.in_flight = in_flight
+
+
+def test_admitting_a_runtime_stops_the_longest_idle_one_but_not_a_running_turns(host, monkeypatch) -> None:
+    live = {
+        "oldest": FakeRuntime(last_used=100.0),
+        "in-a-turn": FakeRuntime(last_used=50.0),
+        "mid-cell": FakeRuntime(last_used=10.0, in_flight=1),
+        "recent": FakeRuntime(last_used=900.0),
+    }
+    released: list[str] = []
+    monkeypatch.setattr(governor, "_decision", decide(sample(8 * GB)))
+    monkeypatch.setattr(settings, "SESSION_MAX_ACTIVE", 4)
+    monkeypatch.setattr("src.core.tools.runtime.live_runtimes", lambda: live)
+    monkeypatch.setattr("src.core.tools.runtime.release_runtime", released.append)
+    monkeypatch.setattr("src.core.agent.replay.turn_streams.running_sessions", lambda: {"in-a-turn"})
+
+    governor.make_room("newcomer")
+    assert released == ["oldest"]
+
+    released.clear()
+    governor.make_room("recent")
+    assert released == [], "a session that already has its runtime needs no room"
+
+
+def test_session_capacity_ignores_memory_and_spares_a_running_turn(host, monkeypatch) -> None:
+    from src.core.session import SessionManager
+
+    manager = SessionManager()
+    monkeypatch.setattr(settings, "SESSION_MAX_ACTIVE", 2)
+    monkeypatch.setattr(governor, "_decision", decide(sample(512 * MB)))
+    disposed: list[str] = []
+    first = manager.create()
+    monkeypatch.setattr("src.core.session.Session.dispose", lambda session: disposed.append(session.id))
+    monkeypatch.setattr("src.core.agent.replay.turn_streams.running_sessions", lambda: {first.id})
+    first.last_seen = 0.0
+    second = manager.create()
+    assert disposed == [], "a memory reading evicted a session that holds no runtime"
+
+    manager.create()
+    assert disposed == [second.id]
+    assert first.id in manager._sessions
+
+
+def test_a_real_sample_reads_this_host(host) -> None:
+    measured = governor.sample()
+    assert measured.logical_cores >= 1
+    assert measured.runtimes == () or all(usage.idle_seconds >= 0 for usage in measured.runtimes)
@@ -305,3 +305,511 @@ def test_resolve_workspace_dir_nests_a_subagent_under_its_parent() -> None:
     assert child.parent.parent == parent
     assert child.name == "sub1"
     assert child.is_dir()  # created on demand, like the parent's own workspace
+
+
+# --------------------------------------------------------------------------- #
+# Out-of-core tables
+# --------------------------------------------------------------------------- #
+def _sampled_upload(session, tmp_path: Path, rows: int = 4000):
+    import pandas as pd
+
+    from src.core.ingest.loader import DatasetLoader
+
+    path = tmp_path / "big.csv"
+    pd.DataFrame({"amount": range(rows)}).to_csv(path, index=False)
+    result = DatasetLoader.load(path, max_rows=200)
+    session.add_dataset(
+        "big.csv", result.df, profile=result.profile.to_dict(), full_data=result.full_path, make_active=True
+    )
+    return result
+
+
+def test_the_full_population_is_queryable_while_df_is_a_sample(session, tmp_path: Path) -> None:
+    pytest.importorskip("duckdb")
+    _sampled_upload(session, tmp_path)
+
+    result = session.executor.execute(
+        "print(len(df), db.sql('SELECT count(*), sum(amount) FROM big').fetchone(), "
+        "full_tables['big'].aggregate('max(amount)').fetchone()[0])",
+        session.df,
+        tables=session.tables,
+    )
+    assert result.ok, result.output
+    assert result.output == "200 (4000, 7998000) 3999"
+
+
+def test_the_worker_is_told_to_push_totals_to_sql(session, tmp_path: Path, monkeypatch) -> None:
+    from src.core import prompts
+
+    _sampled_upload(session, tmp_path)
+    monkeypatch.setattr("src.core.tools.runtime.capabilities", lambda session_id=None: frozenset({"duckdb"}))
+    block = prompts._full_tables_block(session.id)
+    assert "`big`: 4,000 rows in full" in block
+    assert "SQL" in block
+
+    monkeypatch.setattr("src.core.tools.runtime.capabilities", lambda session_id=None: frozenset({"pandas"}))
+    assert prompts._full_tables_block(session.id) == ""
+
+
+def test_removing_a_dataset_removes_its_full_copy(session, tmp_path: Path) -> None:
+    from src.core.ingest.outofcore import full_path
+
+    _sampled_upload(session, tmp_path)
+    copy = full_path(session.workspace, "big")
+    assert copy.exists()
+
+    session.remove_dataset("big.csv")
+    assert not copy.exists()
+
+
+def test_the_daemon_opens_full_tables_from_its_own_workspace() -> None:
+    source = render_daemon(workspace="/tmp/session-x")
+    assert "FULL_DIR = os.path.join(WORKSPACE, 'full')" in source
+    assert "open_full_tables(exec_globals)" in source
+
+
+# --------------------------------------------------------------------------- #
+# Lazy workbook sheets
+# --------------------------------------------------------------------------- #
+def _workbook_upload(session, tmp_path: Path):
+    import pandas as pd
+
+    from src.core.ingest.loader import DatasetLoader
+
+    path = tmp_path / "Finance.xlsx"
+    with pd.ExcelWriter(path) as writer:
+        pd.DataFrame({"month": range(12), "revenue": range(100, 112)}).to_excel(writer, sheet_name="P&L", index=False)
+        pd.DataFrame({"region": ["north", "south"], "target": [5, 7]}).to_excel(
+            writer, sheet_name="Targets", index=False
+        )
+    result = DatasetLoader.load(path)
+    session.add_dataset(
+        "Finance.xlsx", result.df, profile=result.profile.to_dict(), source_format="xlsx", workbook=path
+    )
+    return result
+
+
+def test_other_sheets_load_on_first_access(session, tmp_path: Path) -> None:
+    pytest.importorskip("openpyxl")
+    _workbook_upload(session, tmp_path)
+    assert list(session.lazy_tables) == ["finance_targets"]
+
+    result = session.executor.execute(
+        "print('finance_targets' in tables, sorted(tables), int(tables['finance_targets']['target'].sum()))",
+        session.df,
+        tables=session.tables,
+    )
+    assert result.ok, result.output
+    assert result.output == "True ['finance'] 12"
+
+
+def test_the_prompt_names_unloaded_sheets(session, tmp_path: Path) -> None:
+    pytest.importorskip("openpyxl")
+    from src.core import prompts
+
+    _workbook_upload(session, tmp_path)
+    block = prompts._sheets_block(session.id)
+    assert "`tables['finance_targets']`: sheet 'Targets', ~2 rows" in block
+
+
+def test_removing_a_workbook_forgets_its_sheets(session, tmp_path: Path) -> None:
+    pytest.importorskip("openpyxl")
+    from src.core.ingest.workbook import sheets_dir
+
+    _workbook_upload(session, tmp_path)
+    session.remove_dataset("Finance.xlsx")
+    assert session.lazy_tables == {}
+    assert not any(sheets_dir(session.workspace).glob("*.xlsx"))
+
+
+def test_the_daemon_reads_the_sheet_index() -> None:
+    source = render_daemon(workspace="/tmp/session-x")
+    assert "SHEETS_DIR = os.path.join(WORKSPACE, 'sheets')" in source
+    assert "tables = LazyTables(tables, pd)" in source
+
+
+# --------------------------------------------------------------------------- #
+# Host runtimes forked from the zygote
+# --------------------------------------------------------------------------- #
+_FORKED_PROBE = """
+import json, os, sys
+with open("probe.json", "w") as handle:
+    json.dump({
+        "argv": sys.argv,
+        "cwd": os.getcwd(),
+        "marker": os.environ.get("WIZARD_PROBE"),
+        "leader": os.getsid(0) == os.getpid(),
+        "preloaded": "json" in sys.modules,
+    }, handle)
+print("probe ran")
+"""
+
+
+@pytest.fixture
+def light_zygote(monkeypatch):
+    """A zygote that preloads nothing heavy, so the tests fork in milliseconds."""
+    import sys
+
+    if not sys.platform.startswith("linux"):
+        pytest.skip("the zygote is Linux-only")
+    from src.core.tools import zygote as zygote_module
+
+    monkeypatch.setattr(zygote_module, "PRELOAD_MODULES", ("json",))
+    monkeypatch.setattr("src.config.settings.HOST_RUNTIME_ZYGOTE", True)
+    monkeypatch.setattr("src.config.settings.HOST_RUNTIME_SPARES", 1)
+    server = zygote_module.Zygote()
+    yield server
+    server.shutdown()
+
+
+def _wait_for(path: Path, timeout: float = 10.0) -> dict:
+    import json
+    import time
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if path.is_file() and path.stat().st_size:
+            return json.loads(path.read_text())
+        time.sleep(0.02)
+    raise AssertionError(f"{path} never appeared")
+
+
+def test_a_forked_runtime_runs_in_its_own_workspace_and_session(light_zygote, tmp_path: Path) -> None:
+    script = tmp_path / "probe.py"
+    script.write_text(_FORKED_PROBE)
+    process = light_zygote.spawn([str(script), "4242"], tmp_path, {"WIZARD_PROBE": "yes"}, tmp_path / "run.log")
+
+    assert process is not None
+    probe = _wait_for(tmp_path / "probe.json")
+    assert probe == {
+        "argv": [str(script), "4242"],
+        "cwd": str(tmp_path),
+        "marker": "yes",
+        "leader": True,
+        "preloaded": True,
+    }
+    process.wait(timeout=10)
+    assert process.poll() is not None
+    assert process.stdout.read().decode().strip() == "probe ran"
+    process.stdout.close()
+
+
+def test_the_zygote_keeps_serving_once_its_spare_is_bound(light_zygote, tmp_path: Path) -> None:
+    """The first request binds the parked spare; the next is served by its replacement."""
+    for name in ("a", "b", "c"):
+        workspace = tmp_path / name
+        workspace.mkdir()
+        (workspace / "probe.py").write_text(_FORKED_PROBE)
+        process = light_zygote.spawn([str(workspace / "probe.py")], workspace, {}, workspace / "run.log")
+        assert process is not None
+        assert _wait_for(workspace / "probe.json")["cwd"] == str(workspace)
+        process.wait(timeout=10)
+        process.stdout.close()
+
+
+def test_a_forked_runtime_can_be_stopped(light_zygote, tmp_path: Path) -> None:
+    script = tmp_path / "sleeper.py"
+    script.write_text("import time\ntime.sleep(60)\n")
+    process = light_zygote.spawn([str(script)], tmp_path, {}, tmp_path / "run.log")
+
+    assert process is not None and process.poll() is None
+    process.terminate()
+    process.wait(timeout=10)
+    assert process.poll() is not None
+    process.stdout.close()
+
+
+def test_a_late_reply_is_not_taken_for_the_next_one(light_zygote, tmp_path: Path) -> None:
+    """A reply to an abandoned request is dropped, and the runtime it forked is stopped."""
+    import json
+    import time
+
+    abandoned = tmp_path / "abandoned"
+    abandoned.mkdir()
+    (abandoned / "late.py").write_text("import time, pathlib\ntime.sleep(0.5)\npathlib.Path('survived').touch()\n")
+    assert light_zygote._ensure_started()
+    request = {"argv": [str(abandoned / "late.py")], "cwd": str(abandoned), "env": {}, "log": str(abandoned / "log")}
+    light_zygote._socket.send(json.dumps({**request, "id": -1}).encode())
+
+    current = tmp_path / "current"
+    current.mkdir()
+    (current / "probe.py").write_text(_FORKED_PROBE)
+    process = light_zygote.spawn([str(current / "probe.py")], current, {}, current / "run.log")
+
+    assert process is not None
+    assert _wait_for(current / "probe.json")["cwd"] == str(current)
+    time.sleep(1.0)
+    assert not (abandoned / "survived").exists()
+    process.wait(timeout=10)
+    process.stdout.close()
+
+
+def test_the_zygote_is_not_used_when_disabled(monkeypatch, tmp_path: Path) -> None:
+    from src.core.tools.zygote import Zygote
+
+    monkeypatch.setattr("src.config.settings.HOST_RUNTIME_ZYGOTE", False)
+    server = Zygote()
+    assert server.spawn([str(tmp_path / "x.py")], tmp_path, {}, tmp_path / "run.log") is None
+    assert not server.is_running
+
+
+def test_a_wrapped_spawn_plan_is_never_forked(monkeypatch, tmp_path: Path) -> None:
+    """`sandbox-exec` or a job object has to wrap a real spawn; a fork would skip it."""
+    import sys
+
+    from src.core.security.sandbox import SpawnPlan
+    from src.core.tools import host_runtime
+
+    calls: list[list[str]] = []
+    monkeypatch.setattr(host_runtime.zygote, "spawn", lambda argv, *_args: calls.append(argv))
+    session = host_runtime.HostSession("s-wrapped", tmp_path)
+
+    wrapped = SpawnPlan(argv=["/usr/bin/sandbox-exec", "-f", "p.sb", sys.executable, "-u", "d.py", "1"])
+    adopted = SpawnPlan(argv=[sys.executable, "-u", "d.py", "1"], adopt=lambda _process: None)
+    assert session._fork_from_zygote(wrapped) is None
+    assert session._fork_from_zygote(adopted) is None
+    assert calls == []
+
+    session._fork_from_zygote(SpawnPlan(argv=[sys.executable, "-u", "d.py", "1"]))
+    assert calls == [["d.py", "1"]]
+
+
+# --------------------------------------------------------------------------- #
+# Tables mapped copy-on-write by the daemon
+# --------------------------------------------------------------------------- #
+def _daemon_functions() -> dict:
+    namespace = {"__name__": "wizard_daemon_under_test"}
+    exec(compile(render_daemon(workspace="/tmp/session-x"), "daemon", "exec"), namespace)  # noqa: S102
+    return namespace
+
+
+def test_the_daemon_maps_numeric_columns_without_copying(tmp_path: Path) -> None:
+    import numpy as np
+    import pandas as pd
+
+    from src.core.ingest.loader import safe_write_feather
+
+    frame = pd.DataFrame(
+        {
+            "n": np.arange(1000),
+            "x": np.linspace(0, 1, 1000),
+            "label": ["a", "b"] * 500,
+            "maybe": pd.array([1, None] * 500, dtype="Int64"),
+            "level": pd.Categorical(["lo", "hi"] * 500, ordered=True),
+        }
+    )
+    path = tmp_path / "t.feather"
+    safe_write_feather(frame, path)
+
+    loaded = _daemon_functions()["read_feather_shared"](str(path), pd)
+
+    pd.testing.assert_frame_equal(loaded, frame)
+    assert not loaded["n"].to_numpy().flags.owndata
+    assert loaded["n"].to_numpy().flags.writeable
+
+
+def test_writing_a_mapped_column_never_reaches_the_file(tmp_path: Path) -> None:
+    import numpy as np
+    import pandas as pd
+
+    from src.core.ingest.loader import safe_write_feather
+
+    path = tmp_path / "t.feather"
+    safe_write_feather(pd.DataFrame({"n": np.arange(10)}), path)
+    loaded = _daemon_functions()["read_feather_shared"](str(path), pd)
+
+    loaded.loc[0, "n"] = 99
+    loaded["n"] += 1
+
+    assert loaded.loc[0, "n"] == 100
+    assert pd.read_feather(path).loc[0, "n"] == 0
+
+
+def test_an_unmappable_file_is_read_as_before(tmp_path: Path) -> None:
+    import pandas as pd
+
+    path = tmp_path / "t.feather"
+    pd.DataFrame({"n": [1, 2, 3]}).to_feather(path, compression="zstd")
+
+    loaded = _daemon_functions()["read_feather_shared"](str(path), pd)
+    assert loaded["n"].tolist() == [1, 2, 3]
+
+
+def test_a_closed_listener_ends_the_control_loop_instead_of_spinning() -> None:
+    import socket
+    import threading
+
+    server = socket.socket()
+    server.close()
+    serve_control = _daemon_functions()["serve_control"]
+    thread = threading.Thread(target=serve_control, args=(server, None, {}, {}, None, None, None), daemon=True)
+    thread.start()
+    thread.join(timeout=5)
+
+    assert not thread.is_alive(), "accept() on a closed socket was retried forever"
+
+
+# --------------------------------------------------------------------------- #
+# A live daemon: control actions and isolated cells beside a running cell
+# --------------------------------------------------------------------------- #
+@pytest.fixture(scope="module")
+def live_daemon(tmp_path_factory):
+    import os
+    import socket
+    import subprocess
+    import sys
+    import threading
+    import time
+
+    import pandas as pd
+
+    from src.core.tools.daemon import DaemonClient, find_free_port
+
+    if not hasattr(os, "fork"):
+        pytest.skip("isolated cells need fork")
+    workspace = tmp_path_factory.mktemp("daemon")
+    pd.DataFrame({"a": range(10)}).to_feather(workspace / "dataset.feather")
+    port = find_free_port()
+    script = workspace / "daemon.py"
+    script.write_text(
+        render_daemon(port=port, pid_file=str(workspace / "pid"), workspace=str(workspace), bind_host="127.0.0.1")
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-u", str(script), str(port)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+    class Client(DaemonClient):
+        def __init__(self):
+            super().__init__()
+            self._lock = threading.Lock()
+
+        @property
+        def is_running(self) -> bool:
+            return process.poll() is None
+
+        def endpoint(self) -> tuple[str, int]:
+            return "127.0.0.1", port
+
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+    yield Client(), process
+    process.kill()
+    process.wait()
+
+
+def _in_background(call):
+    import threading
+
+    box: dict = {}
+    thread = threading.Thread(target=lambda: box.setdefault("result", call()))
+    thread.start()
+    return thread, box
+
+
+def test_control_actions_answer_while_a_cell_runs(live_daemon) -> None:
+    import time
+
+    client, _process = live_daemon
+    thread, box = _in_background(lambda: client.run_code("import time\ntime.sleep(1.5)\nslow = 1"))
+    time.sleep(0.3)
+
+    started = time.monotonic()
+    assert client.ping() is True
+    assert "df" in client.inspect_variables()
+    assert time.monotonic() - started < 1.0
+    thread.join()
+    assert box["result"] == ("Executed successfully.", None)
+
+
+def test_an_isolated_cell_runs_beside_the_main_one_and_merges_only_new_names(live_daemon) -> None:
+    import time
+
+    client, _process = live_daemon
+    client.run_code("base = 1")
+    thread, box = _in_background(
+        lambda: client.run_code("import time\ntime.sleep(1.5)\nbase = 100\ncheck = df['a'].sum() + base", isolated=True)
+    )
+    time.sleep(0.3)
+
+    started = time.monotonic()
+    assert client.run_code("print('main done')")[0] == "main done"
+    assert time.monotonic() - started < 1.0
+    thread.join()
+    assert box["result"][0] == "Executed successfully."
+    # `check` is new and comes back; the rebinding of `base` stayed in the fork.
+    assert client.run_code("print(base, check)")[0] == "1 145"
+
+
+def test_an_isolated_cell_sent_during_a_cell_is_forked_after_it(live_daemon) -> None:
+    """Never forked beside a running cell, whose locks the child would inherit mid-use."""
+    import time
+
+    client, _process = live_daemon
+    thread, box = _in_background(lambda: client.run_code("import time\ntime.sleep(1.0)\nlater = 7"))
+    time.sleep(0.3)
+
+    output, _ = client.run_code("print(later * 6)", isolated=True)
+    thread.join()
+    assert box["result"] == ("Executed successfully.", None)
+    assert output == "42"
+
+
+def test_an_isolated_cell_reports_errors_like_any_other(live_daemon) -> None:
+    client, _process = live_daemon
+    output, _ = client.run_code("1 / 0", isolated=True)
+    assert output.startswith("Error executing code:")
+    assert "ZeroDivisionError" in output
+
+
+def test_an_interrupt_between_cells_leaves_the_runtime_up(live_daemon) -> None:
+    import os
+    import signal
+    import time
+
+    client, process = live_daemon
+    os.kill(process.pid, signal.SIGINT)
+    time.sleep(0.2)
+    assert client.ping() is True
+    assert process.poll() is None
+
+
+def test_a_cell_reports_what_it_used(live_daemon) -> None:
+    client, _process = live_daemon
+    output, _plot, resources = client.run_code_measured("block = bytearray(32 * 1024 * 1024)\nprint(len(block))")
+    assert output == str(32 * 1024 * 1024)
+    assert resources["wall_seconds"] >= 0
+    assert resources["cpu_seconds"] >= 0
+    assert resources["output_bytes"] == len(output) + 1  # the trailing newline print wrote
+    assert resources["peak_rss_bytes"] >= 32 * 1024 * 1024
+    assert resources["out_of_memory"] is False
+
+
+def test_the_memory_ceiling_moves_without_a_restart(live_daemon) -> None:
+    client, _process = live_daemon
+    ceiling = 64 * 1024**3
+    if client.set_memory_limit(ceiling) != ceiling:
+        pytest.skip("RLIMIT_AS cannot be set here")
+    _output, _plot, resources = client.run_code_measured("x = 1")
+    assert resources["mem_limit_bytes"] == ceiling
+
+
+def test_cells_are_profiled_only_while_armed(live_daemon) -> None:
+    client, _process = live_daemon
+    assert client.profile(enabled=False)["enabled"] is False
+    client.run_code("def busy():\n    return sum(i * i for i in range(200_000))\nbusy()")
+    assert client.profile()["last"] is None
+
+    assert client.profile(enabled=True)["enabled"] is True
+    client.run_code("busy()")
+    last = client.profile(enabled=False)["last"]
+    assert last["status"] == "success"
+    assert last["code"] == "busy()"
+    assert "busy" in [row["function"] for row in last["functions"]]
+    # Disarmed again: the next cell leaves the last profile as it was.
+    client.run_code("x = 2")
+    assert client.profile()["last"]["code"] == "busy()"
@@ -8,6 +8,7 @@ tests pin that they stay separate.
 
 from __future__ import annotations
 
+import numpy as np
 import pytest
 
 from src.config import settings
@@ -91,6 +92,61 @@ def test_an_unrelated_question_is_its_own_candidate() -> None:
     assert all(entry["occurrences"] == 1 for entry in db_mgr.get_skill_candidates())
 
 
+REWORDED = "break down the revenue by region for the last quarter"
+
+
+def test_an_exact_repeat_is_found_whatever_the_index_still_holds(monkeypatch) -> None:
+    """Case, spacing and a closing question mark do not make a new analysis."""
+    monkeypatch.setattr(settings, "SKILL_CANDIDATE_INDEX_SIZE", 1)
+    run(times=1)
+    promotion.record(KIND_RECURRING, "plot the distribution of tips by weekday", COLUMNS, "", "")
+    promotion.record(KIND_RECURRING, "  Break down revenue by region for the LAST quarter? ", COLUMNS, "", "")
+
+    counts = {entry["instruction"]: entry["occurrences"] for entry in db_mgr.get_skill_candidates()}
+    assert counts[QUESTION] == 2
+
+
+def test_a_candidate_recorded_before_the_hash_column_is_still_found_exactly(monkeypatch) -> None:
+    db_mgr.add_skill_candidate(KIND_RECURRING, QUESTION, COLUMNS, "", "", None)
+    monkeypatch.setattr(promotion, "_backfilled", False)
+
+    found = promotion._match(KIND_RECURRING, "Break down revenue by region for the last quarter?", np.zeros(4))
+
+    assert found is not None
+    assert found["instruction"] == QUESTION
+
+
+def test_a_reworded_repeat_is_matched_without_rereading_the_table(monkeypatch) -> None:
+    for number in range(20):
+        promotion.record(KIND_RECURRING, f"count orders shipped from warehouse {number}", COLUMNS, "", "")
+    run(times=1)
+
+    read: list[int] = []
+    fetch = db_mgr.get_skill_candidates
+
+    def counting(*args, **kwargs):
+        rows = fetch(*args, **kwargs)
+        read.append(len(rows))
+        return rows
+
+    monkeypatch.setattr(db_mgr, "get_skill_candidates", counting)
+    promotion.record(KIND_RECURRING, REWORDED, COLUMNS, "", "")
+
+    monkeypatch.setattr(db_mgr, "get_skill_candidates", fetch)
+    assert db_mgr.get_skill_candidates()[0]["occurrences"] == 2
+    assert sum(read) <= 1
+
+
+def test_a_candidate_deleted_underneath_the_index_is_not_bumped() -> None:
+    run(times=2)
+    db_mgr.clear_skill_candidates()
+    run(times=1)
+
+    entries = db_mgr.get_skill_candidates()
+    assert len(entries) == 1
+    assert entries[0]["occurrences"] == 1
+
+
 def test_the_stored_plan_and_code_are_refreshed_not_frozen() -> None:
     """What the user would promote is how they do this *now*; the first attempt
     at a recurring analysis is usually the worst one."""
@@ -170,6 +226,19 @@ def test_a_promoted_candidate_stops_being_offered() -> None:
     assert db_mgr.get_skill_candidates(include_settled=True)[0]["promoted_to"] == "revenue-by-region"
 
 
+def test_a_settled_candidate_ages_out_but_an_exact_repeat_still_finds_it(monkeypatch) -> None:
+    offers = run(times=settings.SKILL_PROMOTION_THRESHOLD)
+    promotion.dismiss(offers[-1].id)
+    monkeypatch.setattr(settings, "SKILL_CANDIDATE_SETTLED_DAYS", 0)
+
+    # Out of the in-memory set, so a rewording starts its own count...
+    promotion.record(KIND_RECURRING, REWORDED, COLUMNS, "", "")
+    assert len(db_mgr.get_skill_candidates(include_settled=True)) == 2
+    # ...while the question itself is still the dismissed one, and stays quiet.
+    assert run(times=1) == [None]
+    assert promotion.get(offers[-1].id).occurrences == settings.SKILL_PROMOTION_THRESHOLD + 1
+
+
 def test_dismissing_something_absent_reports_it_rather_than_succeeding() -> None:
     """This asserted `is True` and was pinning a defect: `settle_skill_candidate`
     returned unconditionally, so an UPDATE matching no row read as success and
@@ -350,6 +350,109 @@ def test_search_is_off_when_skills_are_disabled(tmp_path: Path, monkeypatch) ->
     assert registry.search("how are fees applied") == []
 
 
+# --------------------------------------------------------------------------- #
+# Reloading and stored vectors
+# --------------------------------------------------------------------------- #
+class _CountingEncoder:
+    """A semantic encoder that counts what it is asked to encode."""
+
+    is_semantic = True
+
+    def __init__(self, label: str = "provider:test"):
+        self.backend = label
+        self.batches: list[int] = []
+
+    def encode_many(self, texts: list[str]) -> list:
+        import numpy as np
+
+        self.batches.append(len(texts))
+        return [np.full(4, float(len(text)), dtype=np.float32) for text in texts]
+
+    def rank(self, query: str, candidates: list) -> list[tuple[float, int]]:
+        return [(1.0, index) for index in range(len(candidates))]
+
+
+@pytest.fixture
+def encoder(tmp_path: Path, monkeypatch) -> _CountingEncoder:
+    from src.core.skills import loader as loader_module, registry as registry_module, vectors as vectors_module
+
+    fake = _CountingEncoder()
+    monkeypatch.setattr(loader_module, "embedding_service", fake)
+    monkeypatch.setattr(registry_module, "embedding_service", fake)
+    monkeypatch.setattr(vectors_module, "skill_vectors", vectors_module.ChunkVectorStore(tmp_path / "vectors.npz"))
+    return fake
+
+
+def _library(root: Path, count: int) -> None:
+    for index in range(count):
+        write_skill(root, f"skill-{index}", VALID.replace("fee-rules", f"skill-{index}"))
+
+
+def test_a_reload_parses_only_the_skill_that_changed(tmp_path: Path, monkeypatch, encoder) -> None:
+    from src.core.skills import registry as registry_module
+
+    user = tmp_path / "u"
+    _library(user, 5)
+    registry = _registry(monkeypatch, tmp_path / "b", user, tmp_path / "p")
+    assert len(registry) == 5
+
+    parsed: list[str] = []
+    real_load = registry_module.load_skill
+    monkeypatch.setattr(
+        registry_module, "load_skill", lambda path, *a, **k: parsed.append(path.name) or real_load(path, *a, **k)
+    )
+    (user / "skill-3" / "SKILL.md").write_text(VALID.replace("fee-rules", "skill-3") + "\nA new rule.\n")
+    registry.reload()
+
+    assert len(registry) == 5
+    assert parsed == ["skill-3"]
+    assert "A new rule." in registry.get("skill-3").body
+
+
+def test_new_chunks_are_embedded_in_one_batch_and_only_once(tmp_path: Path, monkeypatch, encoder) -> None:
+    user = tmp_path / "u"
+    _library(user, 4)
+    registry = _registry(monkeypatch, tmp_path / "b", user, tmp_path / "p")
+    assert len(registry) == 4
+    assert len(encoder.batches) == 1
+
+    write_skill(user, "extra", VALID.replace("fee-rules", "extra").replace("A fee", "A different fee"))
+    registry.reload()
+    assert len(registry) == 5
+    # Only the new skill's passage; its siblings' vectors were kept.
+    assert encoder.batches[1:] == [1]
+    assert all(chunk.embedding is not None for skill in registry.list() for chunk in skill.chunks)
+
+
+def test_stored_vectors_survive_a_restart(tmp_path: Path, monkeypatch, encoder) -> None:
+    from src.core.skills import vectors as vectors_module
+
+    user = tmp_path / "u"
+    _library(user, 3)
+    assert len(_registry(monkeypatch, tmp_path / "b", user, tmp_path / "p")) == 3
+    assert (tmp_path / "vectors.npz").is_file()
+
+    # A new process: nothing in memory, the same file on disk.
+    monkeypatch.setattr(vectors_module, "skill_vectors", vectors_module.ChunkVectorStore(tmp_path / "vectors.npz"))
+    encoder.batches.clear()
+    registry = _registry(monkeypatch, tmp_path / "b", user, tmp_path / "p")
+    assert len(registry) == 3
+    assert encoder.batches == []
+    assert registry.get("skill-0").chunks[0].embedding is not None
+
+
+def test_a_different_encoder_does_not_reuse_another_encoders_vectors(tmp_path: Path, monkeypatch, encoder) -> None:
+    user = tmp_path / "u"
+    _library(user, 2)
+    registry = _registry(monkeypatch, tmp_path / "b", user, tmp_path / "p")
+    assert len(registry) == 2
+    encoder.batches.clear()
+
+    encoder.backend = "provider:other"
+    registry.search("when are fees waived")
+    assert sum(encoder.batches) >= 2
+
+
 # --------------------------------------------------------------------------- #
 # Writing
 # --------------------------------------------------------------------------- #
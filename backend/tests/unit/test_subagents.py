@@ -336,3 +336,84 @@ async def test_subagent_disabled_globally_removes_it_from_the_menu(
 
     assert result.status == "completed"
     assert collector.of_type(EventType.SUBAGENT_START) == []
+
+
+# --------------------------------------------------------------------------- #
+# Workspace snapshots
+# --------------------------------------------------------------------------- #
+def _snapshot(session: Session, branch: str = "sub1"):
+    from src.core.tools import runtime as runtime_backend
+
+    child_id = session.spawn_subagent_id(branch)
+    session._snapshot_tables_for(child_id)
+    return runtime_backend.workspace_for(child_id)
+
+
+def test_a_snapshot_shares_the_parents_files_instead_of_copying_them(loaded_session: Session) -> None:
+    import os
+    import sys
+
+    if sys.platform == "win32":
+        pytest.skip("snapshots are copies on Windows")
+    child_dir = _snapshot(loaded_session)
+    parent_table = next((loaded_session.workspace / "tables").glob("*.feather"))
+    child_table = child_dir / "tables" / parent_table.name
+
+    assert os.path.samefile(parent_table, child_table) or child_table.read_bytes() == parent_table.read_bytes()
+    assert (child_dir / "dataset.feather").read_bytes() == parent_table.read_bytes()
+    assert not os.access(child_table, os.W_OK) or os.geteuid() == 0
+
+
+def test_a_snapshot_never_changes_the_mode_of_the_parents_files(loaded_session: Session) -> None:
+    import stat
+
+    parent_table = next((loaded_session.workspace / "tables").glob("*.feather"))
+    before = stat.S_IMODE(parent_table.stat().st_mode)
+
+    _snapshot(loaded_session)
+
+    assert stat.S_IMODE(parent_table.stat().st_mode) == before
+    assert parent_table.stat().st_mode & stat.S_IWUSR
+
+
+def test_only_a_frozen_file_is_shared_by_hardlink(tmp_path) -> None:
+    import os
+    import sys
+
+    from src.utils.filelinks import freeze, share_file
+
+    if sys.platform == "win32":
+        pytest.skip("snapshots are copies on Windows")
+    writable, frozen = tmp_path / "writable.bin", tmp_path / "frozen.bin"
+    writable.write_bytes(b"a")
+    frozen.write_bytes(b"b")
+    freeze(frozen)
+
+    assert share_file(writable, tmp_path / "w-copy") in ("reflink", "copy")
+    assert not os.path.samefile(writable, tmp_path / "w-copy")
+    share_file(frozen, tmp_path / "f-copy")
+    assert (tmp_path / "f-copy").read_bytes() == b"b"
+
+
+def test_replacing_a_parent_table_leaves_the_snapshot_as_it_was(loaded_session: Session, simple_df) -> None:
+    import pandas as pd
+
+    child_dir = _snapshot(loaded_session)
+    before = pd.read_feather(child_dir / "dataset.feather")
+
+    loaded_session.add_dataset("dataset.csv", simple_df.head(2))
+
+    assert len(pd.read_feather(loaded_session.workspace / "dataset.feather")) == 2
+    pd.testing.assert_frame_equal(pd.read_feather(child_dir / "dataset.feather"), before)
+    assert len(pd.read_csv(child_dir / "dataset.csv")) == len(before)
+
+
+def test_the_active_table_is_written_once(loaded_session: Session) -> None:
+    """`dataset.feather` is another name for the active table, not a second write."""
+    import os
+    import sys
+
+    if sys.platform == "win32":
+        pytest.skip("no hardlinks in this path on Windows")
+    table = next((loaded_session.workspace / "tables").glob("*.feather"))
+    assert os.path.samefile(table, loaded_session.workspace / "dataset.feather")
@@ -43,6 +43,8 @@ export type EventType =
   // — these two exist only to bound one branch's frames into a UI panel.
   | "subagent_start"
   | "subagent_end"
+  // Transport only: several queued events sent as one frame, in `frames`.
+  | "batch"
 
 export type Phase =
   | "idle"
@@ -227,6 +227,8 @@ export function useChatStream({ onArtifact, onSessionId }: UseChatStreamOptions
   const socketRef = useRef<WebSocket | null>(null)
   const connectRef = useRef<(() => void) | null>(null)
   const activeIdRef = useRef<string | null>(null)
+  // The running turn and the last event seen from it, for resuming after a drop.
+  const turnRef = useRef<{ id: string; seq: number } | null>(null)
   const reconnectRef = useRef<ReturnType<typeof setTimeout> | null>(null)
   const heartbeatRef = useRef<ReturnType<typeof setInterval> | null>(null)
   const attemptsRef = useRef(0)
@@ -635,6 +637,10 @@ export function useChatStream({ onArtifact, onSessionId }: UseChatStreamOptions
       }
       attemptsRef.current = 0
       setConnection("open")
+      // The turn kept running on the server while the socket was down.
+      if (activeIdRef.current && turnRef.current) {
+        socket.send(JSON.stringify({ type: "resume", turn: turnRef.current.id, after: turnRef.current.seq }))
+      }
       heartbeatRef.current = setInterval(() => {
         if (socket.readyState === WebSocket.OPEN) {
           socket.send(JSON.stringify({ type: "ping" }))
@@ -645,7 +651,16 @@ export function useChatStream({ onArtifact, onSessionId }: UseChatStreamOptions
     socket.onmessage = (raw) => {
       if (!isCurrent()) return
       try {
-        handleEvent(JSON.parse(raw.data) as ServerEvent)
+        const frame = JSON.parse(raw.data) as ServerEvent
+        // Several queued events can arrive in one frame; each is handled in order.
+        const events = frame.type === "batch" ? (frame.frames as ServerEvent[]) : [frame]
+        for (const event of events) {
+          if (typeof event.turn === "string" && typeof event.seq === "number") {
+            turnRef.current = { id: event.turn, seq: event.seq }
+          }
+          handleEvent(event)
+          if (event.type === "final" || event.type === "error") turnRef.current = null
+        }
       } catch {
         // A malformed frame must not tear down the stream.
       }
@@ -662,8 +677,11 @@ export function useChatStream({ onArtifact, onSessionId }: UseChatStreamOptions
       socketRef.current = null
       setConnection("closed")
 
-      // A close mid-run would otherwise leave the UI spinning forever.
-      if (activeIdRef.current) {
+      if (activeIdRef.current && turnRef.current && shouldReconnectRef.current) {
+        // Resumed from the last event seen once the next socket opens.
+        patchActive((message) => ({ ...message, statusLabel: "Reconnecting…" }))
+      } else if (activeIdRef.current) {
+        // A close mid-run would otherwise leave the UI spinning forever.
         patchActive((message) => ({
           ...message,
           streaming: false,
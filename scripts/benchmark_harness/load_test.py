@@ -0,0 +1,431 @@
+"""Concurrency load test: N simulated users against the real app, with the model stubbed.
+
+Nothing else here puts more than one user on the backend at a time, so what
+breaks first under load -- `SESSION_MAX_ACTIVE` eviction, the per-IP `ws_gate`,
+the SQLite writer lock, the runtime pool churning through spawns -- is only
+found in production. This starts the FastAPI app under uvicorn in-process, with
+the LLM replaced by a stub that answers by role after `--llm-latency-ms` (so a
+turn still spends time "in the model" without needing one), and drives
+`--users` simultaneous users through the same calls the frontend makes:
+
+    POST /api/session             a fresh session per user
+    POST /api/datasets            a generated CSV of `--rows` rows
+    /ws/chat                      `--turns` questions, `--think` seconds apart
+
+and reports p50/p95/p99 of upload time, time-to-first-event and time-to-final,
+completed turns per second, and the resident memory of the API process and of
+the runtime processes it spawned (sampled from /proc, peak and at the end).
+
+The per-IP limits would otherwise reject every simulated user past the fourth,
+since they all arrive from 127.0.0.1, so `WS_MAX_CONCURRENT_PER_IP` and the
+rate limiter are raised to fit `--users` -- unless set in the environment, which
+is how to measure them instead. Every other setting (`SESSION_MAX_ACTIVE`,
+`EXECUTION_BACKEND`, pool sizes) is read from the environment as usual.
+
+Usage, from the repo root:
+
+    python scripts/benchmark_harness/load_test.py --users 20 --turns 3
+    SESSION_MAX_ACTIVE=8 python scripts/benchmark_harness/load_test.py --users 16 --think 2
+
+Exits 1 when any turn failed or was rejected; the report says which and why.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import io
+import json
+import logging
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+
+REPO_DIR = Path(__file__).resolve().parents[2]
+BACKEND_DIR = REPO_DIR / "backend"
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=10, help="simultaneous simulated users")
+    parser.add_argument("--turns", type=int, default=3, help="questions each user asks")
+    parser.add_argument("--rows", type=int, default=20_000, help="rows in each uploaded dataset")
+    parser.add_argument("--think", type=float, default=1.0, help="mean think time between turns, in seconds")
+    parser.add_argument("--ramp", type=float, default=2.0, help="seconds over which users arrive")
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0, help="stubbed model time per call")
+    parser.add_argument("--mode", default="fast", choices=["fast", "auto", "deep"], help="agent mode of each turn")
+    parser.add_argument("--turn-timeout", type=float, default=120.0, help="seconds before a turn counts as failed")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", type=Path, default=Path(__file__).resolve().parent / "results" / "load_test.json")
+    parser.add_argument("--verbose", action="store_true", help="keep the backend's info logging")
+    return parser.parse_args()
+
+
+ARGS = _parse_args() if __name__ == "__main__" else None
+
+# --- environment must be pinned before any `src` import: Settings is built at
+#     import time, exactly like backend/tests/conftest.py does it. ---
+_BENCH_ROOT = Path(tempfile.mkdtemp(prefix="wizard-load-"))
+os.environ.setdefault("WORKSPACE_DIR", str(_BENCH_ROOT / "workspace"))
+os.environ.setdefault("DATA_DIR", str(_BENCH_ROOT / "data"))
+os.environ.setdefault("LOG_DIR", str(_BENCH_ROOT / "logs"))
+os.environ.setdefault("WIZARD_CONFIG_DIR", str(_BENCH_ROOT / "config"))
+os.environ.setdefault("API_PROVIDER", "ollama")
+os.environ.setdefault("REDIS_URL", "")
+os.environ.setdefault("API_KEY", "")
+os.environ.setdefault("EMBEDDINGS_FORCE_FALLBACK", "true")
+os.environ.setdefault("OLLAMA_BASE_URL", "http://127.0.0.1:1")
+os.environ.setdefault("LMSTUDIO_BASE_URL", "http://127.0.0.1:1")
+_users = ARGS.users if ARGS else 10
+os.environ.setdefault("WS_MAX_CONCURRENT_PER_IP", str(_users + 4))
+os.environ.setdefault("RATE_LIMIT_MAX_REQUESTS", str(max(60, _users * 20)))
+
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(BACKEND_DIR / "tests"))
+
+import httpx  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import structlog  # noqa: E402
+import uvicorn  # noqa: E402
+import websockets  # noqa: E402
+from stubs import ScriptedLLM  # noqa: E402
+
+from src.api.api import app  # noqa: E402
+from src.api.deps import SESSION_HEADER  # noqa: E402
+from src.config import settings  # noqa: E402
+from src.core.agent import flow, orchestrator as orchestrator_module  # noqa: E402
+from src.core.tools import runtime as runtime_backend  # noqa: E402
+
+
+QUESTIONS = [
+    "what is the average revenue per region",
+    "how many orders are there per region",
+    "which region has the most units sold",
+    "show the total revenue by region",
+]
+#: What the stub answers, by the role a call is made for. One manager reply
+#: serves as both plan and final answer; neither is graded here.
+REPLIES = {
+    "worker": "```python\nprint(df.groupby('region')['revenue'].agg(['mean', 'count']).round(2))\n```",
+    "manager": "- Group the orders by region\n- Report revenue per region",
+}
+
+
+class LoadLLM(ScriptedLLM):
+    """Answers any number of concurrent turns by role, each call after a fixed latency."""
+
+    def __init__(self, latency: float):
+        super().__init__([])
+        self.latency = latency
+        self.calls = 0
+
+    def _reply(self, kwargs: dict) -> str:
+        self.calls += 1
+        return REPLIES.get(str(kwargs.get("role", "")), REPLIES["manager"])
+
+    async def acomplete(self, prompt: str, **kwargs: object) -> str:
+        await asyncio.sleep(self.latency)
+        return self._reply(kwargs)
+
+    def complete(self, prompt: str, **kwargs: object) -> str:
+        time.sleep(self.latency)
+        return self._reply(kwargs)
+
+    async def astream(self, prompt: str, **kwargs: object):
+        text = self._reply(kwargs)
+        # Time to first token is most of a call; the rest trickles out.
+        await asyncio.sleep(self.latency * 0.8)
+        pieces = range(0, len(text), 12)
+        for index in pieces:
+            await asyncio.sleep(self.latency * 0.2 / len(pieces))
+            yield text[index : index + 12]
+
+
+def percentiles(samples: list[float]) -> dict[str, float | int | None]:
+    """p50/p95/p99 and max, nearest-rank, in milliseconds."""
+    if not samples:
+        return {"count": 0, "p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    ordered = sorted(samples)
+
+    def rank(share: float) -> float:
+        return round(ordered[min(len(ordered) - 1, max(0, int(np.ceil(share * len(ordered))) - 1))] * 1000, 1)
+
+    return {
+        "count": len(ordered),
+        "p50_ms": rank(0.50),
+        "p95_ms": rank(0.95),
+        "p99_ms": rank(0.99),
+        "max_ms": round(ordered[-1] * 1000, 1),
+    }
+
+
+def _rss_kb(pid: int) -> int | None:
+    try:
+        with open(f"/proc/{pid}/status", encoding="utf-8") as handle:
+            for line in handle:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return None
+
+
+def _descendants(root: int) -> list[int]:
+    """Every live process below ``root``, from the parent ids in /proc."""
+    children: dict[int, list[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", encoding="utf-8") as handle:
+                # The command name is parenthesised and may contain spaces.
+                parent = int(handle.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(parent, []).append(int(entry))
+    found, pending = [], [root]
+    while pending:
+        for child in children.get(pending.pop(), []):
+            found.append(child)
+            pending.append(child)
+    return found
+
+
+class MemorySampler:
+    """Samples the RSS of this process and of its descendants until stopped.
+
+    Linux only: elsewhere there is no /proc to read, and the report says so
+    rather than guessing.
+    """
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.available = os.path.isdir("/proc/self")
+        self.peak = {"api_kb": 0, "runtimes_kb": 0, "runtimes": 0}
+        self.last = dict(self.peak)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="load-rss", daemon=True)
+
+    def start(self) -> None:
+        if self.available:
+            self._thread.start()
+
+    def stop(self) -> dict:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=5)
+            self.sample()
+        if not self.available:
+            return {"available": False}
+        return {"available": True, "peak": self.peak, "final": self.last}
+
+    def sample(self) -> None:
+        pid = os.getpid()
+        runtimes = [size for size in map(_rss_kb, _descendants(pid)) if size]
+        self.last = {"api_kb": _rss_kb(pid) or 0, "runtimes_kb": sum(runtimes), "runtimes": len(runtimes)}
+        for key, value in self.last.items():
+            self.peak[key] = max(self.peak[key], value)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+
+def generate_csv(rows: int, seed: int) -> bytes:
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame(
+        {
+            "order_id": np.arange(rows),
+            "region": rng.choice(["EU", "US", "APAC", "LATAM"], rows),
+            "revenue": rng.gamma(2.0, 50.0, rows).round(2),
+            "units": rng.integers(1, 20, rows),
+            "ordered_at": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365 * 24, rows), unit="h"),
+        }
+    )
+    buffer = io.StringIO()
+    frame.to_csv(buffer, index=False)
+    return buffer.getvalue().encode("utf-8")
+
+
+class Tally:
+    """What every user observed, shared by all of them (one event loop, no locking)."""
+
+    def __init__(self):
+        self.upload: list[float] = []
+        self.first_event: list[float] = []
+        self.final: list[float] = []
+        self.completed = 0
+        self.errors: Counter[str] = Counter()
+
+
+def _frames(raw: str | bytes) -> list[dict]:
+    frame = json.loads(raw)
+    return frame.get("frames", []) if frame.get("type") == "batch" else [frame]
+
+
+async def run_turn(ws, question: str, mode: str, timeout: float, tally: Tally) -> None:
+    started = time.perf_counter()
+    await ws.send(json.dumps({"type": "message", "content": question, "mode": mode}))
+    first = None
+    deadline = started + timeout
+    while True:
+        raw = await asyncio.wait_for(ws.recv(), timeout=max(0.1, deadline - time.perf_counter()))
+        for frame in _frames(raw):
+            kind = frame.get("type")
+            if kind in ("pong", "session"):
+                continue
+            if first is None:
+                first = time.perf_counter() - started
+                tally.first_event.append(first)
+            if kind == "final":
+                tally.final.append(time.perf_counter() - started)
+                tally.completed += 1
+                return
+            if kind == "error":
+                # Without a turn id it was refused before starting: busy, no
+                # dataset, a dead session. With one, the run failed and no
+                # final frame follows, so waiting would only add a timeout.
+                reason = "failed" if frame.get("turn") else "refused"
+                tally.errors[f"{reason}: {str(frame.get('content'))[:60]}"] += 1
+                return
+
+
+async def run_user(index: int, base_url: str, csv: bytes, args: argparse.Namespace, tally: Tally) -> None:
+    rng = random.Random(args.seed + index)
+    await asyncio.sleep(args.ramp * index / max(1, args.users))
+    headers = {"X-API-Key": settings.API_KEY} if settings.API_KEY else {}
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, timeout=args.turn_timeout) as client:
+        response = await client.post("/api/session")
+        if response.status_code != 200:
+            tally.errors[f"session: HTTP {response.status_code}"] += 1
+            return
+        session_id = response.headers[SESSION_HEADER]
+        started = time.perf_counter()
+        response = await client.post(
+            "/api/datasets",
+            files={"file": (f"load_{index}.csv", csv, "text/csv")},
+            headers={SESSION_HEADER: session_id},
+        )
+        if response.status_code != 200:
+            tally.errors[f"upload: HTTP {response.status_code}"] += 1
+            return
+        tally.upload.append(time.perf_counter() - started)
+
+    query = f"session={session_id}" + (f"&api_key={settings.API_KEY}" if settings.API_KEY else "")
+    try:
+        async with websockets.connect(f"{base_url.replace('http', 'ws', 1)}/ws/chat?{query}") as ws:
+            for turn in range(args.turns):
+                if turn:
+                    await asyncio.sleep(rng.expovariate(1 / args.think) if args.think > 0 else 0)
+                try:
+                    await run_turn(ws, rng.choice(QUESTIONS), args.mode, args.turn_timeout, tally)
+                except TimeoutError:
+                    tally.errors["turn timed out"] += 1
+                    await ws.send(json.dumps({"type": "cancel"}))
+    except websockets.ConnectionClosed as exc:
+        reason = "rejected by ws_gate" if exc.rcvd and exc.rcvd.code == 1013 else f"closed ({exc.rcvd})"
+        tally.errors[f"websocket {reason}"] += 1
+    except (OSError, websockets.InvalidHandshake) as exc:
+        tally.errors[f"websocket: {type(exc).__name__}"] += 1
+
+
+def _serve() -> tuple[uvicorn.Server, threading.Thread, str]:
+    """The app under uvicorn on a free port, in a thread of its own."""
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind(("127.0.0.1", 0))
+    port = listener.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning", ws="websockets", lifespan="on"))
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [listener]}, name="load-uvicorn", daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 60
+    while not server.started:
+        if time.monotonic() > deadline or not thread.is_alive():
+            raise RuntimeError("The app did not start within 60 s.")
+        time.sleep(0.05)
+    return server, thread, f"http://127.0.0.1:{port}"
+
+
+async def drive(base_url: str, args: argparse.Namespace, tally: Tally) -> float:
+    csv = generate_csv(args.rows, args.seed)
+    started = time.perf_counter()
+    await asyncio.gather(*(run_user(index, base_url, csv, args, tally) for index in range(args.users)))
+    return time.perf_counter() - started
+
+
+def main() -> int:
+    args = ARGS
+    if not args.verbose:
+        structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    stub = LoadLLM(args.llm_latency_ms / 1000)
+    orchestrator_module.llm_provider = stub
+    flow.llm_provider = stub
+
+    sampler = MemorySampler()
+    server, thread, base_url = _serve()
+    sampler.start()
+    tally = Tally()
+    try:
+        wall = asyncio.run(drive(base_url, args, tally))
+    finally:
+        memory = sampler.stop()
+        server.should_exit = True
+        thread.join(timeout=30)
+
+    expected = args.users * args.turns
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "users": args.users,
+            "turns_per_user": args.turns,
+            "rows": args.rows,
+            "mode": args.mode,
+            "think_s": args.think,
+            "llm_latency_ms": args.llm_latency_ms,
+            "execution_backend": runtime_backend.active_backend(),
+            "session_max_active": settings.SESSION_MAX_ACTIVE,
+            "ws_max_concurrent_per_ip": settings.WS_MAX_CONCURRENT_PER_IP,
+            "cpu_count": os.cpu_count(),
+        },
+        "wall_s": round(wall, 2),
+        "turns": {"expected": expected, "completed": tally.completed},
+        "throughput_turns_per_s": round(tally.completed / wall, 3) if wall else None,
+        "llm_calls": stub.calls,
+        "upload": percentiles(tally.upload),
+        "time_to_first_event": percentiles(tally.first_event),
+        "time_to_final": percentiles(tally.final),
+        "memory": memory,
+        "errors": dict(tally.errors),
+    }
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"{args.users} users x {args.turns} turns: {tally.completed}/{expected} completed in {wall:.1f} s")
+    for name in ("upload", "time_to_first_event", "time_to_final"):
+        stats = report[name]
+        print(f"  {name:<20} p50 {stats['p50_ms']} ms  p95 {stats['p95_ms']} ms  p99 {stats['p99_ms']} ms")
+    print(f"  throughput           {report['throughput_turns_per_s']} turns/s")
+    if memory.get("available"):
+        peak = memory["peak"]
+        print(
+            f"  peak RSS             api {peak['api_kb'] // 1024} MB,"
+            f" runtimes {peak['runtimes_kb'] // 1024} MB over {peak['runtimes']} processes"
+        )
+    for reason, count in tally.errors.most_common():
+        print(f"  error x{count}: {reason}")
+    print(f"Written to {args.output}")
+    return 1 if tally.errors or tally.completed < expected else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,343 @@
+"""Offline performance suite: per-stage timings with stubbed models, and a regression gate.
+
+`backend_microbench.py` times runtime spawn and a trivial exec; `run_benchmark.py`
+needs live models; `tests/regression/test_turn_cost.py` counts round-trips but
+not time or memory. This times the stages a turn is made of, on generated data
+of a chosen size, with the model replaced by the suite's own scripted stub
+(`backend/tests/stubs.py`), so the numbers move only when the code does:
+
+    ingest              DatasetLoader.load of a generated CSV
+    catalog             CatalogEngine.analyze
+    prompt              create_prompt for the worker
+    retrieval.*         memory retrieval at 1k/10k/100k stored memories
+                        (vector: the prompt path; keyword: the LIKE fallback)
+    daemon_roundtrip    one warm CodeExecutor.execute
+    materialize         Session.add_dataset, which writes the workspace copy
+    grounding           check_grounding against a large ObservedNumbers
+    turn                a whole `fast` AnalysisOrchestrator.run, and
+    turn.<phase>        the time it spent in each phase, from its status events
+
+Each stage is run `--repeat` times after one warm-up; the report keeps the
+median, p95 and minimum in milliseconds, and the peak Python allocation of one
+extra run under tracemalloc.
+
+Usage, from the repo root:
+
+    python scripts/benchmark_harness/perf_suite.py --rows 200000
+    python scripts/benchmark_harness/perf_suite.py --write-baseline scripts/benchmark_harness/results/perf_baseline.json
+    python scripts/benchmark_harness/perf_suite.py --compare scripts/benchmark_harness/results/perf_baseline.json
+
+`--compare` exits 1 when any stage's median (or `--metric`) is more than
+`--threshold` (default 25%) slower than the baseline's and by more than
+`--min-delta-ms`, which keeps jitter on the fast stages from failing a run. A
+baseline is only meaningful on the machine, backend and `--rows` it was
+recorded with; both are in its `meta`. A turn that ends in an error frame, or
+without its final answer, stops the suite rather than being timed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from collections.abc import Callable
+from pathlib import Path
+
+
+REPO_DIR = Path(__file__).resolve().parents[2]
+BACKEND_DIR = REPO_DIR / "backend"
+
+# --- environment must be pinned before any `src` import: Settings is built at
+#     import time, exactly like backend/tests/conftest.py does it. The
+#     directory is removed when `main` returns, or at exit if imported. ---
+_BENCH_DIR = tempfile.TemporaryDirectory(prefix="wizard-perf-", ignore_cleanup_errors=True)
+_BENCH_ROOT = Path(_BENCH_DIR.name)
+os.environ.setdefault("WORKSPACE_DIR", str(_BENCH_ROOT / "workspace"))
+os.environ.setdefault("DATA_DIR", str(_BENCH_ROOT / "data"))
+os.environ.setdefault("LOG_DIR", str(_BENCH_ROOT / "logs"))
+os.environ.setdefault("WIZARD_CONFIG_DIR", str(_BENCH_ROOT / "config"))
+os.environ.setdefault("API_PROVIDER", "ollama")
+os.environ.setdefault("REDIS_URL", "")
+os.environ.setdefault("EXECUTION_BACKEND", "host")
+os.environ.setdefault("SANDBOX_ENABLED", "false")
+# Offline by construction: the hashing encoder, and model endpoints that refuse
+# instantly rather than time out.
+os.environ.setdefault("EMBEDDINGS_FORCE_FALLBACK", "true")
+os.environ.setdefault("OLLAMA_BASE_URL", "http://127.0.0.1:1")
+os.environ.setdefault("LMSTUDIO_BASE_URL", "http://127.0.0.1:1")
+
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(BACKEND_DIR / "tests"))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import structlog  # noqa: E402
+from stubs import RecordingLLM  # noqa: E402
+
+from src.core.agent import flow, orchestrator as orchestrator_module  # noqa: E402
+from src.core.agent.events import EventCollector, EventType  # noqa: E402
+from src.core.agent.grounding import ObservedNumbers, check_grounding  # noqa: E402
+from src.core.agent.orchestrator import orchestrator  # noqa: E402
+from src.core.database import db_mgr  # noqa: E402
+from src.core.embeddings import embedding_service  # noqa: E402
+from src.core.execution import CodeExecutor  # noqa: E402
+from src.core.ingest.loader import DatasetLoader  # noqa: E402
+from src.core.prompts import create_prompt  # noqa: E402
+from src.core.rag.retriever import context_retriever  # noqa: E402
+from src.core.semantic_cache import semantic_cache  # noqa: E402
+from src.core.session import session_manager  # noqa: E402
+from src.core.tools import runtime as runtime_backend  # noqa: E402
+from src.core.tools.catalog import CatalogEngine  # noqa: E402
+
+
+INSTRUCTION = "what is the average revenue per region"
+TURN_SCRIPT = [
+    "1. Group revenue by region\n2. Print the means",
+    "```python\nprint(df.groupby('region')['revenue'].mean().round(2))\n```",
+    "Average revenue is highest in EU.",
+]
+
+
+def generate_frame(rows: int, seed: int = 7) -> pd.DataFrame:
+    """A mixed-type table of ``rows`` rows: ids, categories, numbers, dates, free text."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "order_id": np.arange(rows),
+            "customer_id": rng.integers(0, max(1, rows // 10), rows),
+            "region": rng.choice(["EU", "US", "APAC", "LATAM"], rows),
+            "revenue": rng.gamma(2.0, 50.0, rows).round(2),
+            "units": rng.integers(1, 20, rows),
+            "discount": np.where(rng.random(rows) < 0.1, np.nan, rng.random(rows).round(3)),
+            "ordered_at": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365 * 24, rows), unit="h"),
+            "email": [f"user{index % 5000}@example.com" for index in range(rows)],
+        }
+    )
+
+
+def summarize(samples: list[float]) -> dict[str, float | int]:
+    ordered = sorted(samples)
+    return {
+        "median_ms": round(statistics.median(ordered) * 1000, 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))] * 1000, 3),
+        "min_ms": round(ordered[0] * 1000, 3),
+        "runs": len(ordered),
+    }
+
+
+def measure(run: Callable[[], object], repeat: int, memory: bool = True) -> dict[str, float | int]:
+    run()  # warm-up: imports, caches and first-touch allocation are not the steady state
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - started)
+    stats = summarize(samples)
+    if memory:
+        tracemalloc.start()
+        try:
+            run()
+            stats["peak_alloc_kb"] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+        finally:
+            tracemalloc.stop()
+    return stats
+
+
+def seed_memories(session_id: str, count: int) -> None:
+    """Bulk-inserts ``count`` memories for ``session_id``; one transaction, pooled vectors."""
+    topics = ["revenue", "churn", "units", "discount", "region", "customers", "orders", "seasonality"]
+    verbs = ["average", "total", "trend of", "distribution of", "outliers in", "median"]
+    texts = [f"{verb} {topic} by month" for verb in verbs for topic in topics]
+    vectors = [db_mgr._serialize_vector(embedding_service.encode(text)) for text in texts]
+    now = time.time()
+    rows = [
+        (
+            now - index,
+            session_id,
+            texts[index % len(texts)],
+            "",
+            "",
+            f"result {index}",
+            "{}",
+            vectors[index % len(texts)],
+        )
+        for index in range(count)
+    ]
+    with db_mgr._write() as conn:
+        conn.executemany(
+            "INSERT INTO working_memory (timestamp, session_id, instruction, plan, code, result, meta, embedding)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+
+
+def install_stub() -> RecordingLLM:
+    stub = RecordingLLM(list(TURN_SCRIPT))
+    orchestrator_module.llm_provider = stub
+    flow.llm_provider = stub
+    return stub
+
+
+async def one_turn(session) -> tuple[float, dict[str, float]]:
+    """One stubbed `fast` turn: its wall time, and seconds spent per status phase."""
+    install_stub()
+    # A repeated question would be answered from the cache after the first run.
+    semantic_cache.clear()
+    collector = EventCollector()
+    started = time.perf_counter()
+    await orchestrator.run(session=session, instruction=INSTRUCTION, mode="fast", emitter=collector)
+    elapsed = time.perf_counter() - started
+    # An error frame returns early, and would otherwise be timed as a fast turn.
+    errors = collector.of_type(EventType.ERROR)
+    if errors or not collector.of_type(EventType.FINAL):
+        reason = errors[0].data.get("content") if errors else "no final answer"
+        raise RuntimeError(f"The benchmark turn did not complete: {reason}")
+
+    phases: dict[str, float] = {}
+    marks = [(event.at, str(event.data.get("phase") or "")) for event in collector.of_type(EventType.STATUS)]
+    end = collector.events[-1].at if collector.events else time.time()
+    for (at, phase), (next_at, _) in zip(marks, [*marks[1:], (end, "")], strict=True):
+        if phase:
+            phases[phase] = phases.get(phase, 0.0) + max(0.0, next_at - at)
+    return elapsed, phases
+
+
+def run_suite(rows: int, repeat: int, memories: list[int], turns: int) -> dict:
+    report: dict = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "rows": rows,
+            "repeat": repeat,
+            "memories": memories,
+            "execution_backend": runtime_backend.active_backend(),
+            "embedding_backend": embedding_service.backend,
+            "python": sys.version.split()[0],
+            "cpu_count": os.cpu_count(),
+        },
+        "stages": {},
+    }
+    stages: dict[str, dict] = report["stages"]
+
+    frame = generate_frame(rows)
+    csv_path = _BENCH_ROOT / "bench.csv"
+    frame.to_csv(csv_path, index=False)
+
+    stages["ingest"] = measure(lambda: DatasetLoader.load(csv_path, max_rows=rows), repeat)
+    df = DatasetLoader.load(csv_path, max_rows=rows).df
+    stages["catalog"] = measure(lambda: CatalogEngine.analyze(df), repeat)
+    catalog = CatalogEngine.analyze(df)
+    stages["prompt"] = measure(lambda: create_prompt(INSTRUCTION, df, plan=TURN_SCRIPT[0], catalog=catalog), repeat)
+
+    for count in memories:
+        session_id = f"perf-memories-{count}-{uuid.uuid4().hex[:6]}"
+        seed_memories(session_id, count)
+        label = f"{count // 1000}k" if count >= 1000 else str(count)
+        stages[f"retrieval.vector_{label}"] = measure(
+            lambda session_id=session_id: context_retriever.retrieve_memories(INSTRUCTION, session_id), repeat
+        )
+        stages[f"retrieval.keyword_{label}"] = measure(
+            lambda session_id=session_id: db_mgr.search_memories("average revenue", session_id=session_id), repeat
+        )
+
+    grounding_numbers = ObservedNumbers()
+    grounding_numbers.add(" ".join(f"{value:.2f}" for value in frame["revenue"].head(30_000)))
+    answer = f"Average revenue is {frame['revenue'].iloc[0]:.2f} in EU and {frame['revenue'].iloc[1]:.2f} in US."
+    stages["grounding"] = measure(lambda: check_grounding(answer, grounding_numbers, INSTRUCTION), repeat)
+
+    session = session_manager.create()
+    try:
+        stages["materialize"] = measure(lambda: session.add_dataset("bench.csv", df, catalog=catalog), repeat)
+        executor = CodeExecutor(session.id)
+        stages["daemon_roundtrip"] = measure(lambda: executor.execute("x = 1"), repeat, memory=False)
+
+        elapsed: list[float] = []
+        per_phase: dict[str, list[float]] = {}
+        asyncio.run(one_turn(session))  # warm-up
+        for _ in range(max(1, turns)):
+            seconds, phases = asyncio.run(one_turn(session))
+            elapsed.append(seconds)
+            for phase, spent in phases.items():
+                per_phase.setdefault(phase, []).append(spent)
+        stages["turn"] = summarize(elapsed)
+        for phase, samples in sorted(per_phase.items()):
+            stages[f"turn.{phase}"] = summarize(samples)
+    finally:
+        session_manager.drop(session.id)
+
+    return report
+
+
+def compare(
+    current: dict, baseline: dict, threshold: float, min_delta_ms: float, metric: str = "median_ms"
+) -> list[str]:
+    """Stages whose ``metric`` regressed past both the relative and the absolute bar."""
+    regressions = []
+    for name, stats in current["stages"].items():
+        base = baseline.get("stages", {}).get(name)
+        if not base:
+            continue
+        now, before = stats[metric], base[metric]
+        if now - before <= min_delta_ms or (before > 0 and now <= before * (1 + threshold)):
+            continue
+        # A stage that rounded to zero in the baseline has no relative change to report.
+        change = f"+{(now / before - 1) * 100:.0f}%" if before > 0 else "from zero"
+        regressions.append(f"{name}: {before:.3f} ms -> {now:.3f} ms ({change})")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=100_000, help="rows in the generated dataset")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per stage, after one warm-up")
+    parser.add_argument("--memories", type=int, nargs="*", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--turns", type=int, default=3, help="stubbed orchestrator turns to time")
+    parser.add_argument("--output", type=Path, default=Path(__file__).resolve().parent / "results" / "perf_suite.json")
+    parser.add_argument("--write-baseline", type=Path, help="also write the report here, as the new baseline")
+    parser.add_argument("--compare", type=Path, help="baseline report to gate against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0, help="slowdowns smaller than this never fail")
+    parser.add_argument(
+        "--metric",
+        choices=["median", "min", "p95"],
+        default="median",
+        help="statistic compared; `min` is the steadiest on a noisy machine",
+    )
+    parser.add_argument("--verbose", action="store_true", help="keep the backend's info logging")
+    args = parser.parse_args()
+    if not args.verbose:
+        structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    with _BENCH_DIR:
+        report = run_suite(args.rows, args.repeat, args.memories, args.turns)
+    width = max(len(name) for name in report["stages"])
+    for name, stats in report["stages"].items():
+        print(f"{name:<{width}}  {stats['median_ms']:>10.3f} ms  p95 {stats['p95_ms']:>10.3f} ms")
+
+    for path in filter(None, (args.output, args.write_baseline)):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(report, indent=2))
+        print(f"Written to {path}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        if baseline.get("meta", {}).get("rows") != args.rows:
+            print(f"warning: baseline was recorded at {baseline.get('meta', {}).get('rows')} rows, not {args.rows}")
+        regressions = compare(report, baseline, args.threshold, args.min_delta_ms, f"{args.metric}_ms")
+        if regressions:
+            print("\nRegressions past the threshold:")
+            print("\n".join(f"  {line}" for line in regressions))
+            return 1
+        print(f"\nNo stage regressed past {args.threshold:.0%} against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())